@@ -11,7 +11,8 @@ from component_services.disease_profile_services import (
     create_adjacency_list,
     create_reverse_adjacency_list,
     find_ancestors,
-    extract_data_by_ids
+    extract_data_by_ids,
+    get_disease_ontology_engine
 )
 import uvicorn
 import logging
@@ -44,14 +45,23 @@ from services import (
     # parse_safety_events,
 )
 from api_models import TargetRequest, GraphRequest, DiseaseRequest, SearchQueryModel, DiseasesRequest, SearchRequest, \
-    TargetOnlyRequest,ExcelExportRequest
+    TargetOnlyRequest,ExcelExportRequest,LocusZoomVariantsRequest
 from utils import format_for_cytoscape, get_efo_id, find_disease_id_by_name, send_graphql_request, \
-    save_response_to_file, load_response_from_file, calculate_expiry_date, add_years, save_big_response_to_file,get_associated_targets,get_mouse_phenotypes,fetch_all_publications,get_exact_synonyms,get_conver_later_strapi,get_target_indication_pairs_strapi,enrich_disease_pathway_results,add_pipeline_indication_records,fetch_nct_titles
+    save_response_to_file, load_response_from_file, calculate_expiry_date, add_years, save_big_response_to_file,get_associated_targets,get_mouse_phenotypes,fetch_all_publications,get_exact_synonyms,get_conver_later_strapi,get_target_indication_pairs_strapi,enrich_disease_pathway_results,add_pipeline_indication_records,fetch_nct_titles, \
+    async_get_efo_id, async_send_graphql_request, async_get_exact_synonyms, async_fetch_nct_titles
+from http_client import async_get, async_post, run_blocking, close_async_clients
+from component_services.disease_index import get_disease_index
+from cache_store import section_store_path
+from cache_serialization import redis_get_payload, redis_get_payloads, redis_set_payload, redis_set_payloads
+from cache_freshness import current_refresh_scope, ttl_for
+from dossier_queue import enqueue_dossier_job, INTERACTIVE_LANE
+from request_coalescing import cancel_revalidations, coalesce_requests
 from dependencies import get_neo4j_driver
-from target_analyzer import TargetAnalyzer
+from target_analyzer import TargetAnalyzer, get_target_analyzer
 from db.database import get_db, engine, Base, SessionLocal
 from sqlalchemy.orm import Session
 from db.models import Target, Disease, TargetDisease, DiseasesDossierStatus
+from db.repository import upsert_lookup_record, LookupRecords
 from component_services.market_intelligence_service import extract_nct_ids, fetch_data_for_diseases, \
     get_key_influencers_by_disease,filter_indication_records_by_synonyms,get_pmids_for_nct_ids,add_outcome_status,get_indication_pipeline_strapi,get_disease_pmid_nct_mapping,get_pmids_for_nct_ids_target_pipeline,add_outcome_status_target_pipeline,get_target_pipeline_strapi,remove_duplicates,remove_duplicates_from_indication_pipeline,get_outcome_status_openai
 from component_services.evidence_services import build_query, get_geo_data_for_diseases,fetch_mouse_models,fetch_and_filter_figures_by_disease_and_pmids,fetch_mouse_model_data_alliancegenome,get_top_10_literature_helper,add_platform_name,add_study_type, get_mesh_term_for_disease
@@ -68,11 +78,13 @@ from component_services.excel_export import process_data_and_return_file_rna,pro
 from fastapi.responses import FileResponse
 from cache_results import cache_all_data
 from component_services.genomics_services import fetch_pgs_data
-from component_services.entity_search_services import lexical_phenotype_search, get_db_connection, get_gene_search_db_connection, lexical_gene_search
+from component_services.entity_search_services import lexical_phenotype_search, lexical_gene_search
 import duckdb
 from duckdb import DuckDBPyConnection
 from component_services.gwas_services import get_gwas_studies
-from component_services.locus_zoom_services import load_data
+from component_services.locus_zoom_services import load_data, query_variants, variants_to_columns, variants_to_arrow, \
+    ARROW_STREAM_MEDIA_TYPE
+from fastapi.responses import Response
 from fastapi.staticfiles import StaticFiles
 from starlette.responses import FileResponse
 from fastapi.responses import FileResponse
@@ -113,6 +125,18 @@ app.mount("/gwas-data", StaticFiles(directory=GWAS_DATA_DIR), name="gwas-data")
 async def startup():
     # This will create the tables for all models defined with Base
     Base.metadata.create_all(bind=engine)
+    # Build the local disease name -> EFO/MONDO index before serving requests
+    await run_blocking(get_disease_index)
+    # Load the disease ontology graph used by /disease-profile/ontology/ and TargetAnalyzer
+    await run_blocking(get_disease_ontology_engine)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Stop the background refreshes of stale cache sections; their sections stay as they are
+    await cancel_revalidations()
+    # Release the pooled keep-alive connections to the upstream APIs
+    await close_async_clients()
 
 
 # def get_redis() -> Redis:
@@ -145,13 +169,22 @@ def generate_cache_key(endpoint: str, target: str, diseases: List[str] = None) -
     if diseases is None:
         diseases_str = ""
     else:
-        diseases_str = "_".join(diseases)
+        # sorted, so the same selection in any order shares one entry
+        diseases_str = "_".join(sorted(disease.strip().lower().replace(" ", "_") for disease in diseases))
+
+    return f"{endpoint}:{target.strip().lower()}:{diseases_str}"
+
 
-    return f"{endpoint}:{target}:{diseases_str}"
+def entity_cache_key(endpoint: str, entity: str) -> str:
+    """ Redis key of one entity's (e.g. one disease's) part of an endpoint response """
+    return f"{endpoint}:entity:{entity.strip().lower().replace(' ', '_')}"
 
 
 async def get_cached_response(redis: Redis, key: str):
-    cached_response = redis.json().get(key)
+    if current_refresh_scope() is not None:
+        # a refresh recomputes what Redis holds
+        return None
+    cached_response = redis_get_payload(redis, key)
     if cached_response:
         # logger.log("")
         # return json.loads(cached_response)
@@ -160,8 +193,31 @@ async def get_cached_response(redis: Redis, key: str):
 
 
 async def set_cached_response(redis: Redis, key: str, response: dict):
-    #redis.set(key, json.dumps(response), ex=expiry)
-    redis.json().set(key, "$", response)
+    redis_set_payload(redis, key, response, ex=ttl_for(key))
+
+
+async def get_cached_entities(redis: Redis, endpoint: str, entities: List[str]) -> Dict[str, Any]:
+    """
+    Read the cached per-entity responses of a multi-disease endpoint with a single MGET.
+
+    Args:
+        redis (Redis): Redis client.
+        endpoint (str): Endpoint path.
+        entities (List[str]): Entities as they key the endpoint's response, e.g. disease names.
+
+    Returns:
+        Dict[str, Any]: The cached entities, keyed as requested; misses are left out.
+    """
+    if current_refresh_scope() is not None:
+        return {}
+    payloads = redis_get_payloads(redis, [entity_cache_key(endpoint, entity) for entity in entities])
+    return {entity: payload for entity, payload in zip(entities, payloads) if payload is not None}
+
+
+async def set_cached_entities(redis: Redis, endpoint: str, responses: Dict[str, Any]):
+    """ Cache a multi-disease response as one entry per entity, so any selection can reuse it """
+    redis_set_payloads(redis, {entity_cache_key(endpoint, entity): response for entity, response in responses.items()},
+                       ex=ttl_for(endpoint))
 
 
 def validate_target_and_diseases(request: TargetRequest, require_diseases: bool = False):
@@ -193,8 +249,18 @@ async def download_file(file_path: str):
 
 #################################### Build Dossier ##############################################
 
+def queue_dossier_job(redis: Redis, disease: str) -> None:
+    # the record is already 'submitted': if Redis is unavailable the builder's reconciliation picks it up
+    try:
+        if enqueue_dossier_job(redis, disease, lane=INTERACTIVE_LANE):
+            logging.info(f"queued dossier job for disease {disease}")
+    except Exception as e:
+        logging.error(f"Could not queue dossier job for disease {disease}: {e}")
+
+
 @app.post("/dossier/disease-dossier-status/", tags = ["Dossier Status"])
-async def get_dossier_status(request: DiseasesRequest, db: Session = Depends(get_db)):
+async def get_dossier_status(request: DiseasesRequest, redis: Redis = Depends(get_redis),
+                             db: Session = Depends(get_db)):
     try:
         diseases = request.diseases
         cached_diseases = []
@@ -209,6 +275,9 @@ async def get_dossier_status(request: DiseasesRequest, db: Session = Depends(get
                     cached_diseases.append(disease) 
                 elif cache_status in ['processing','submitted','error']:
                     building_dossier.append(disease) 
+                    if cache_status != 'processing':
+                        # resubmitting a failed or not yet queued disease queues it again
+                        queue_dossier_job(redis, disease)
                               
             else:
                 new_record = DiseasesDossierStatus(id=f"{disease}",
@@ -218,6 +287,7 @@ async def get_dossier_status(request: DiseasesRequest, db: Session = Depends(get
                 db.refresh(new_record) 
                 logging.info(f"added record for disease {disease}")
                 building_dossier.append(disease)
+                queue_dossier_job(redis, disease)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))    
@@ -257,6 +327,7 @@ async def get_dossier_dashboard(db: Session = Depends(get_db)):
 
 
 @app.post("/target-profile/details/", tags=["Target Profile"])
+@coalesce_requests("/target-profile/details/")
 async def get_target_details(request: TargetOnlyRequest, redis: Redis = Depends(get_redis),
                              db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
@@ -268,7 +339,7 @@ async def get_target_details(request: TargetOnlyRequest, redis: Redis = Depends(
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -287,12 +358,13 @@ async def get_target_details(request: TargetOnlyRequest, redis: Redis = Depends(
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(get_target_analyzer, target)
 
     try:
-        introduction = analyzer.get_target_introduction()
-        description = analyzer.get_target_description()
-        taxonomy = analyzer.get_target_introduction()
+        introduction = await run_blocking(analyzer.get_target_introduction)
+        description = await run_blocking(analyzer.get_target_description)
+        # taxonomy is parsed from the same UniProt record as the introduction
+        taxonomy = introduction
 
         parsed_introduction = parse_target_introduction(introduction)
         parsed_description = parse_target_description(description)
@@ -319,15 +391,11 @@ async def get_target_details(request: TargetOnlyRequest, redis: Redis = Depends(
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
 
         return response
     except Exception as e:
@@ -335,6 +403,7 @@ async def get_target_details(request: TargetOnlyRequest, redis: Redis = Depends(
 
 
 @app.post("/target-profile/ontology/", tags=["Target Profile"])
+@coalesce_requests("/target-profile/ontology/")
 async def get_ontology(request: TargetOnlyRequest, redis: Redis = Depends(get_redis), db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
     key: str = f"/target-profile/ontology/:{target}"
@@ -345,7 +414,7 @@ async def get_ontology(request: TargetOnlyRequest, redis: Redis = Depends(get_re
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -364,9 +433,9 @@ async def get_ontology(request: TargetOnlyRequest, redis: Redis = Depends(get_re
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(get_target_analyzer, target)
     try:
-        ontology = analyzer.get_target_ontology()
+        ontology = await run_blocking(analyzer.get_target_ontology)
         parsed_ontology = parse_gene_ontology(ontology)
         response = {
             "ontology": parsed_ontology
@@ -382,15 +451,11 @@ async def get_ontology(request: TargetOnlyRequest, redis: Redis = Depends(get_re
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
 
         return response
     except Exception as e:
@@ -398,6 +463,7 @@ async def get_ontology(request: TargetOnlyRequest, redis: Redis = Depends(get_re
 
 
 @app.post("/target-profile/protein-expressions/", tags=["Target Profile"])
+@coalesce_requests("/target-profile/protein-expressions/")
 async def get_protein_expressions(request: TargetOnlyRequest, redis: Redis = Depends(get_redis),
                                   db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
@@ -409,7 +475,7 @@ async def get_protein_expressions(request: TargetOnlyRequest, redis: Redis = Dep
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -428,9 +494,9 @@ async def get_protein_expressions(request: TargetOnlyRequest, redis: Redis = Dep
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(get_target_analyzer, target)
     try:
-        expressions = analyzer.get_differential_rna_and_protein_expression()
+        expressions = await run_blocking(analyzer.get_differential_rna_and_protein_expression)
         parsed_protein_expressions = parse_protein_expression(expressions['data']['target']['expressions'])
         response = {
             "protein_expressions": parsed_protein_expressions
@@ -446,15 +512,11 @@ async def get_protein_expressions(request: TargetOnlyRequest, redis: Redis = Dep
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
 
         return response
     except Exception as e:
@@ -462,6 +524,7 @@ async def get_protein_expressions(request: TargetOnlyRequest, redis: Redis = Dep
 
 
 @app.post("/target-profile/subcellular/", tags=["Target Profile"])
+@coalesce_requests("/target-profile/subcellular/")
 async def get_subcellular(request: TargetOnlyRequest, redis: Redis = Depends(get_redis), db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
     key: str = f"/target-profile/subcellular/:{target}"
@@ -472,7 +535,7 @@ async def get_subcellular(request: TargetOnlyRequest, redis: Redis = Depends(get
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -491,16 +554,16 @@ async def get_subcellular(request: TargetOnlyRequest, redis: Redis = Depends(get
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(TargetAnalyzer.from_cache, target)
     try:
-        uniprot_id: str=analyzer.get_uniprotkb_id(target)
+        uniprot_id: str= await run_blocking(analyzer.get_uniprotkb_id, target)
         if not uniprot_id:
             response = {
             "subcellular": [],
             "subcellular_locations":[]
             }
         else:
-            topology = analyzer.get_target_topology_features()
+            topology = await run_blocking(analyzer.get_target_topology_features)
             if not topology:
                 parsed_subcellular=[]
             else:
@@ -520,21 +583,18 @@ async def get_subcellular(request: TargetOnlyRequest, redis: Redis = Depends(get
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/target-profile/anatomical-system/", tags=["Target Profile"])
+@coalesce_requests("/target-profile/anatomical-system/")
 async def get_anatomy(request: TargetOnlyRequest, redis: Redis = Depends(get_redis), db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
     key: str = f"/target-profile/anatomical-system/:{target}"
@@ -545,7 +605,7 @@ async def get_anatomy(request: TargetOnlyRequest, redis: Redis = Depends(get_red
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -564,9 +624,9 @@ async def get_anatomy(request: TargetOnlyRequest, redis: Redis = Depends(get_red
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(TargetAnalyzer.from_cache, target)
     try:
-        ensemble_id: str = analyzer.get_ensembl_id(target)
+        ensemble_id: str = await run_blocking(analyzer.get_ensembl_id, target)
         print("ensemble_id: ", ensemble_id)
 
         ot_api_url: str = "https://api.platform.opentargets.org/api/v4/graphql"
@@ -574,7 +634,7 @@ async def get_anatomy(request: TargetOnlyRequest, redis: Redis = Depends(get_red
         variables: dict = {"ensemblId": ensemble_id}
 
         # Make a POST request to the GraphQL API
-        response = requests.post(
+        response = await async_post(
             ot_api_url,
             json={"query": TargetExpressionQuery, "variables": variables}
         )
@@ -590,21 +650,18 @@ async def get_anatomy(request: TargetOnlyRequest, redis: Redis = Depends(get_red
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/target-profile/protein-structure/", tags=["Target Profile"])
+@coalesce_requests("/target-profile/protein-structure/")
 async def get_protein_structure(request: TargetOnlyRequest, redis: Redis = Depends(get_redis),
                                 db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
@@ -616,7 +673,7 @@ async def get_protein_structure(request: TargetOnlyRequest, redis: Redis = Depen
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -635,16 +692,16 @@ async def get_protein_structure(request: TargetOnlyRequest, redis: Redis = Depen
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(TargetAnalyzer.from_cache, target)
     try:
-        uniprot_id: str = analyzer.get_uniprotkb_id(target)
+        uniprot_id: str = await run_blocking(analyzer.get_uniprotkb_id, target)
         print("uniprot_id: ", uniprot_id)
 
         ebi_protein_api_url: str = "https://www.ebi.ac.uk/proteins/api/proteins/"
         request_url: str = f"{ebi_protein_api_url}{uniprot_id}"
 
         # Make a POST request to the GraphQL API
-        response = requests.get(request_url)
+        response = await async_get(request_url)
         response = response.json()
 
         await set_cached_response(redis, key, response)
@@ -657,15 +714,11 @@ async def get_protein_structure(request: TargetOnlyRequest, redis: Redis = Depen
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -686,6 +739,7 @@ async def get_target_pipeline_semaphore(request: TargetRequest, redis: Redis = D
 
 
 @app.post("/market-intelligence/target-pipeline/", tags=["Market Intelligence"])
+@coalesce_requests("/market-intelligence/target-pipeline/")
 async def get_target_pipeline(request: TargetRequest, redis: Redis = Depends(get_redis), db: Session = Depends(get_db)):
     target, diseases = validate_target_and_diseases(request, require_diseases=True)
     key = generate_cache_key("/market-intelligence/target-pipeline/", request.target, request.diseases)
@@ -698,11 +752,12 @@ async def get_target_pipeline(request: TargetRequest, redis: Redis = Depends(get
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    # file_path: str = os.path.join(cache_dir, f"{target}.json")
+    # file_path: str = section_store_path(cache_dir, target)
     cached_diseases: Set[str] = set()
     cached_data: List = []
+    target_disease_records = LookupRecords(db, TargetDisease, [f"{target}-{disease}" for disease in diseases])
     for disease in diseases:
-        target_disease_record = db.query(TargetDisease).filter_by(id=f"{target}-{disease}").first()
+        target_disease_record = target_disease_records.get(f"{target}-{disease}")
         # 1. Check if the cached JSON file exists
         if target_disease_record is not None:
             cached_file_path: str = target_disease_record.file_path
@@ -729,65 +784,65 @@ async def get_target_pipeline(request: TargetRequest, redis: Redis = Depends(get
         print("Returning redis cached response")
         return redis_cached_response
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(TargetAnalyzer.from_cache, target)
 
     try:
         if is_rate_limited():
             remaining_time = int(rate_limited_until - time.time())
             raise HTTPException(status_code=429, detail=f"Rate limit in effect. Try again after {remaining_time} seconds.")
 
-        knowndrugs = analyzer.get_known_drugs()
-        target_pipeline = parse_knowndrugs(knowndrugs, [disease.replace('_', ' ') for disease in
+        knowndrugs = await run_blocking(analyzer.get_known_drugs)
+        target_pipeline = await run_blocking(parse_knowndrugs, knowndrugs, [disease.replace('_', ' ') for disease in
                                                         filtered_diseases])  # only pass the disease for which data is
         print("parse_knowndrugs\n")
-        strapi_results=get_target_pipeline_strapi([disease.replace('_', ' ') for disease in
+        strapi_results=await run_blocking(get_target_pipeline_strapi, [disease.replace('_', ' ') for disease in
                                                         filtered_diseases],target)
         target_pipeline.extend(strapi_results)
         print("Added strapi results\n")
-        for entry in target_pipeline:
-            entry["NctIdTitleMapping"]=fetch_nct_titles([url.split("/")[-1] for url in entry.get("Source URLs",[])])
-        disease_pmid_nct_mapping=get_disease_pmid_nct_mapping([disease.replace('_', ' ') for disease in
+        nct_titles = await asyncio.gather(*(async_fetch_nct_titles([url.split("/")[-1] for url in entry.get("Source URLs",[])])
+                                            for entry in target_pipeline))
+        for entry, nct_title_mapping in zip(target_pipeline, nct_titles):
+            entry["NctIdTitleMapping"]=nct_title_mapping
+        disease_pmid_nct_mapping=await run_blocking(get_disease_pmid_nct_mapping, [disease.replace('_', ' ') for disease in
                                                         filtered_diseases])
         print("get_disease_pmid_nct_mapping\n")
         print(disease_pmid_nct_mapping)
         target_pipeline=get_pmids_for_nct_ids_target_pipeline(target_pipeline,disease_pmid_nct_mapping)
         print("get_pmids_for_nct_ids_target_pipeline\n")
-        target_pipeline=add_outcome_status_target_pipeline(target_pipeline)
+        target_pipeline=await run_blocking(add_outcome_status_target_pipeline, target_pipeline)
         print("add_outcome_status_target_pipeline\n")
         # not cached in json file
         print("target_pipeline:", target_pipeline)
 
-        for record in target_pipeline:
-            disease: str = record["Disease"].strip().lower().replace(" ", "_")
-            target_disease_record = db.query(TargetDisease).filter_by(id=f"{target}-{disease}").first()
-            file_path: str = os.path.join(cache_dir, f"{target}-{disease}.json")
-
-            # now add the response of each of the disease into lookup table.
-            if target_disease_record is not None:
-                cached_file_path: str = target_disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
-
-            # Check if 'target_pipeline' exists for the given endpoint
-            if f"{endpoint}" in cached_responses and "target_pipeline" in cached_responses[f"{endpoint}"]:
-                # If it exists, append the record to the existing list
-                cached_responses[f"{endpoint}"]["target_pipeline"].append(record)
-            else:
-                # If 'target_pipeline' doesn't exist, initialize it with the record in a new list
-                cached_responses[f"{endpoint}"] = {"target_pipeline": [record]}
-
-            if target_disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = TargetDisease(id=f"{target}-{disease}",
-                                           file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {target}-{disease} added to the target_disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
+        try:
+            for record in target_pipeline:
+                disease: str = record["Disease"].strip().lower().replace(" ", "_")
+                target_disease_record = target_disease_records.get(f"{target}-{disease}")
+                file_path: str = section_store_path(cache_dir, f"{target}-{disease}")
+
+                # now add the response of each of the disease into lookup table.
+                if target_disease_record is not None:
+                    cached_file_path: str = target_disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
+
+                # Check if 'target_pipeline' exists for the given endpoint
+                if f"{endpoint}" in cached_responses and "target_pipeline" in cached_responses[f"{endpoint}"]:
+                    # If it exists, append the record to the existing list
+                    cached_responses[f"{endpoint}"]["target_pipeline"].append(record)
+                else:
+                    # If 'target_pipeline' doesn't exist, initialize it with the record in a new list
+                    cached_responses[f"{endpoint}"] = {"target_pipeline": [record]}
+
+                if target_disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    target_disease_records.stage(f"{target}-{disease}", file_path)
+                    print(f"Record with ID {target}-{disease} added to the target_disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+        finally:
+            target_disease_records.flush()
 
         target_pipeline.extend(cached_data)
         target_pipeline=remove_duplicates(target_pipeline)
@@ -816,6 +871,7 @@ async def get_indication_pipeline_semaphore(request: DiseasesRequest,
     return response    
 
 @app.post("/market-intelligence/indication-pipeline/", tags=["Market Intelligence"])
+@coalesce_requests("/market-intelligence/indication-pipeline/")
 async def get_indication_pipeline(request: DiseasesRequest,
                                   db: Session = Depends(get_db)):
     diseases = request.diseases
@@ -828,8 +884,9 @@ async def get_indication_pipeline(request: DiseasesRequest,
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
     cached_diseases: Set[str] = set()
     cached_data: List = []
+    disease_records = LookupRecords(db, Disease, [f"{disease}" for disease in diseases])
     for disease in diseases:
-        disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
+        disease_record = disease_records.get(f"{disease}")
         # 1. Check if the cached JSON file exists
         if disease_record is not None:
             cached_file_path: str = disease_record.file_path
@@ -849,7 +906,7 @@ async def get_indication_pipeline(request: DiseasesRequest,
     diseases_and_efo = {}
     for disease_name in filtered_diseases:
         disease_name = disease_name.replace("_", " ")
-        efo_id = get_efo_id(disease_name)
+        efo_id = await async_get_efo_id(disease_name)
         if efo_id:
             diseases_and_efo[disease_name] = efo_id
         else:
@@ -873,51 +930,50 @@ async def get_indication_pipeline(request: DiseasesRequest,
             remaining_time = int(rate_limited_until - time.time())
             raise HTTPException(status_code=429, detail=f"Rate limit in effect. Try again after {remaining_time} seconds.")
     
-        disease_exact_synonyms:Dict[str,List[str]]={}
-        for d in diseases_and_efo.keys():
-            disease_exact_synonyms[d]=get_exact_synonyms(d)
+        synonyms_per_disease = await asyncio.gather(*(async_get_exact_synonyms(d) for d in diseases_and_efo.keys()))
+        disease_exact_synonyms:Dict[str,List[str]]=dict(zip(diseases_and_efo.keys(), synonyms_per_disease))
         print("disease_exact_synonyms\n")
         print(f"{disease_exact_synonyms}")
-        indication_pipeline:Dict[str, List[Dict]] = fetch_and_parse_diseases_known_drugs(diseases_and_efo,disease_exact_synonyms)
+        indication_pipeline:Dict[str, List[Dict]] = await run_blocking(fetch_and_parse_diseases_known_drugs, diseases_and_efo,disease_exact_synonyms)
         print("fetch_and_parse_diseases_known_drugs\n")
         # adding strapi data
         for disease_name,values in indication_pipeline.items():
-            values.extend(get_indication_pipeline_strapi(disease_name))
+            values.extend(await run_blocking(get_indication_pipeline_strapi, disease_name))
         for disease_name,entries in indication_pipeline.items():
-            for entry in entries:
-                entry["NctIdTitleMapping"]=fetch_nct_titles([url.split("/")[-1] for url in entry.get("Source URLs",[])])
+            nct_titles = await asyncio.gather(*(async_fetch_nct_titles([url.split("/")[-1] for url in entry.get("Source URLs",[])])
+                                                for entry in entries))
+            for entry, nct_title_mapping in zip(entries, nct_titles):
+                entry["NctIdTitleMapping"]=nct_title_mapping
 
                 
-        indication_pipeline=get_pmids_for_nct_ids(indication_pipeline)
+        indication_pipeline=await run_blocking(get_pmids_for_nct_ids, indication_pipeline)
         print("get_pmids_for_nct_ids\n")
-        indication_pipeline=add_outcome_status(indication_pipeline)
+        indication_pipeline=await run_blocking(add_outcome_status, indication_pipeline)
         print("add_outcome_status\n")
         response = {"indication_pipeline": indication_pipeline}
-        for disease, value in response["indication_pipeline"].items():
-            disease = disease.strip().lower().replace(" ", "_")
-            disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
-            file_path: str = os.path.join(cache_dir, f"{disease}.json")
-
-            # now add the response of each of the disease into lookup table.
-            if disease_record is not None:
-                cached_file_path: str = disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
-
-            cached_responses[f"{endpoint}"] = {"indication_pipeline": {disease.replace("_", " "): value}}
-
-            if disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = Disease(id=f"{disease}",
-                                     file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {disease} added to the target_disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
+        try:
+            for disease, value in response["indication_pipeline"].items():
+                disease = disease.strip().lower().replace(" ", "_")
+                disease_record = disease_records.get(f"{disease}")
+                file_path: str = section_store_path(cache_dir, disease)
+
+                # now add the response of each of the disease into lookup table.
+                if disease_record is not None:
+                    cached_file_path: str = disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
+
+                cached_responses[f"{endpoint}"] = {"indication_pipeline": {disease.replace("_", " "): value}}
+
+                if disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    disease_records.stage(f"{disease}", file_path)
+                    print(f"Record with ID {disease} added to the target_disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+        finally:
+            disease_records.flush()
 
         
         response["indication_pipeline"].update(cached_response_api.get("indication_pipeline", {}))
@@ -934,14 +990,11 @@ async def get_indication_pipeline(request: DiseasesRequest,
 
 
 @app.post("/market-intelligence/kol/", tags=["Market Intelligence"])
+@coalesce_requests("/market-intelligence/kol/")
 async def get_kol(request: DiseasesRequest, redis: Redis = Depends(get_redis),
                   db: Session = Depends(get_db)):
     diseases: List[str] = request.diseases
     diseases = [s.strip().lower().replace(" ", "_") for s in diseases]
-    diseases_str = "-".join(diseases)
-
-    # Generate a cache key for the request using target and disease list
-    key: str = f"/market-intelligence/kol/:{diseases_str}"
     endpoint: str = "/market-intelligence/kol/"
 
     # Directory to store the cached JSON file
@@ -950,8 +1003,9 @@ async def get_kol(request: DiseasesRequest, redis: Redis = Depends(get_redis),
 
     cached_diseases: Set[str] = set()
     cached_data: Dict = {}
+    disease_records = LookupRecords(db, Disease, [f"{disease}" for disease in diseases])
     for disease in diseases:
-        disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
+        disease_record = disease_records.get(f"{disease}")
         # 1. Check if the cached JSON file exists
         if disease_record is not None:
             cached_file_path: str = disease_record.file_path
@@ -969,20 +1023,22 @@ async def get_kol(request: DiseasesRequest, redis: Redis = Depends(get_redis),
 
     if len(filtered_diseases) == 0:  # all disease already present in the json file
         print("All diseases already present in cached json files,returning cached response")
-        await set_cached_response(redis, key, cached_data)
+        await set_cached_entities(redis, endpoint, cached_data)
         return cached_data
 
     print("filtered diseases: ", filtered_diseases)
-    # Check if cached response exists in Redis
-    cached_response_redis: dict = await get_cached_response(redis, key)
-    if cached_response_redis:
+    # Check Redis for the remaining diseases, one entry per disease
+    cached_response_redis: Dict[str, Any] = await get_cached_entities(redis, endpoint, [disease.replace("_", " ") for disease in filtered_diseases])
+    cached_data.update(cached_response_redis)
+    filtered_diseases = [disease for disease in filtered_diseases if disease.replace("_", " ") not in cached_response_redis]
+    if len(filtered_diseases) == 0:
         print("Returning chached response")
-        return cached_response_redis
+        return cached_data
 
     diseases_and_efo = {}
     for disease_name in filtered_diseases:
         disease_name = disease_name.replace("_", " ")
-        efo_id = get_efo_id(disease_name)
+        efo_id = await async_get_efo_id(disease_name)
         if efo_id:
             diseases_and_efo[disease_name] = efo_id
         else:
@@ -992,40 +1048,39 @@ async def get_kol(request: DiseasesRequest, redis: Redis = Depends(get_redis),
         # indication_pipeline = fetch_and_parse_diseases_known_drugs(diseases_and_efo)
         # response = {"indication_pipeline": indication_pipeline}
         request_data = DiseasesRequest(diseases=[s.strip().lower().replace("_", " ") for s in filtered_diseases])
-        response = client.post("/market-intelligence/indication-pipeline/", json=request_data.dict())
-        response = response.json()
+        # call the indication pipeline in-process: it is served from the section cache when
+        # the dossier builder (or an earlier request) already computed it
+        response = await get_indication_pipeline(request_data, db)
         disease_nct_ids: Dict[str, List[Tuple[str, str]]] = extract_nct_ids(response)
         print(disease_nct_ids)
-        final_response = fetch_data_for_diseases(disease_nct_ids)
-
-        for disease, data in final_response.items():
-            disease: str = disease.strip().lower().replace(" ", "_")
-            disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
-            file_path: str = os.path.join(cache_dir, f"{disease}.json")
-
-            # now add the response of each of the disease into lookup table.
-            if disease_record is not None:
-                cached_file_path: str = disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
-
-            cached_responses[f"{endpoint}"] = {disease.replace("_", " "): data}
+        final_response = await run_blocking(fetch_data_for_diseases, disease_nct_ids)
 
-            if disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = Disease(id=f"{disease}",
-                                     file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {disease} added to the disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
+        try:
+            for disease, data in final_response.items():
+                disease: str = disease.strip().lower().replace(" ", "_")
+                disease_record = disease_records.get(f"{disease}")
+                file_path: str = section_store_path(cache_dir, disease)
+
+                # now add the response of each of the disease into lookup table.
+                if disease_record is not None:
+                    cached_file_path: str = disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
+
+                cached_responses[f"{endpoint}"] = {disease.replace("_", " "): data}
+
+                if disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    disease_records.stage(f"{disease}", file_path)
+                    print(f"Record with ID {disease} added to the disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+        finally:
+            disease_records.flush()
 
         final_response.update(cached_data)
-        await set_cached_response(redis, key, final_response)
+        await set_cached_entities(redis, endpoint, final_response)
         return final_response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1056,6 +1111,7 @@ async def get_key_influencers(request: DiseasesRequest):
 #################################### evidence page ##############################################
 
 @app.post("/evidence/target-literature/", tags=["Evidence"])
+@coalesce_requests("/evidence/target-literature/")
 async def get_evidence_target_literature(request: TargetRequest,
                                   db: Session = Depends(get_db)):
     diseases: List[str] = request.diseases
@@ -1071,8 +1127,9 @@ async def get_evidence_target_literature(request: TargetRequest,
 
     cached_diseases: Set[str] = set()
     cached_data: Dict[str,Any] = {}
+    target_disease_records = LookupRecords(db, TargetDisease, [f"{target}-{disease}" for disease in diseases])
     for disease in diseases:
-        target_disease_record = db.query(TargetDisease).filter_by(id=f"{target}-{disease}").first()
+        target_disease_record = target_disease_records.get(f"{target}-{disease}")
         # 1. Check if the cached JSON file exists
         if target_disease_record is not None:
             cached_file_path: str = target_disease_record.file_path
@@ -1101,37 +1158,36 @@ async def get_evidence_target_literature(request: TargetRequest,
             remaining_time = int(rate_limited_until - time.time())
             raise HTTPException(status_code=429, detail=f"Rate limit in effect. Try again after {remaining_time} seconds.")
     
-        for disease in filtered_diseases:
+        try:
+            for disease in filtered_diseases:
             
-            target_disease_record = db.query(TargetDisease).filter_by(id=f"{target}-{disease}").first()
-            file_path: str = os.path.join(cache_dir, f"{target}-{disease}.json")
-
-            # now add the response of each of the disease into lookup table.
-            if target_disease_record is not None:
-                cached_file_path: str = target_disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
+                target_disease_record = target_disease_records.get(f"{target}-{disease}")
+                file_path: str = section_store_path(cache_dir, f"{target}-{disease}")
+
+                # now add the response of each of the disease into lookup table.
+                if target_disease_record is not None:
+                    cached_file_path: str = target_disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
             
-            pmids: List[str]=[]
-            mesh_term = get_mesh_term_for_disease(disease.replace("_"," "))
-            pmids=search_pubmed_target(target,disease.replace("_"," "),target_terms_file,mesh_term)
-            print("pmids: ",len(pmids))
-            all_literature_details: List[Dict[str,Any]] = fetch_literature_details_in_batches(disease.replace("_"," "),pmids)
-            print("all_literature_details: ",len(all_literature_details))
-            cached_data[disease.replace("_"," ")] = {"literature": all_literature_details}
-            cached_responses[f"{endpoint}"]={"literature": all_literature_details}
-
-            if target_disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = TargetDisease(id=f"{target}-{disease}", file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {target}-{disease} added to the target-disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
+                pmids: List[str]=[]
+                mesh_term = await run_blocking(get_mesh_term_for_disease, disease.replace("_"," "))
+                pmids=await run_blocking(search_pubmed_target, target,disease.replace("_"," "),target_terms_file,mesh_term)
+                print("pmids: ",len(pmids))
+                all_literature_details: List[Dict[str,Any]] = await run_blocking(fetch_literature_details_in_batches, disease.replace("_"," "),pmids)
+                print("all_literature_details: ",len(all_literature_details))
+                cached_data[disease.replace("_"," ")] = {"literature": all_literature_details}
+                cached_responses[f"{endpoint}"]={"literature": all_literature_details}
+
+                if target_disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    target_disease_records.stage(f"{target}-{disease}", file_path)
+                    print(f"Record with ID {target}-{disease} added to the target-disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+        finally:
+            target_disease_records.flush()
 
         return cached_data
     except Exception as e:
@@ -1156,14 +1212,11 @@ async def get_evidence_literature_semaphore(request: DiseasesRequest, redis: Red
     return response
 
 @app.post("/evidence/literature/", tags=["Evidence"])
+@coalesce_requests("/evidence/literature/")
 async def get_evidence_literature(request: DiseasesRequest, redis: Redis = Depends(get_redis),
                                   db: Session = Depends(get_db)):
     diseases: List[str] = request.diseases
     diseases = [s.strip().lower().replace(" ", "_") for s in diseases]
-    diseases_str = "-".join(diseases)
-
-    # Generate a cache key for the request using target and disease list
-    key: str = f"/evidence/literature/:{diseases_str}"
     endpoint: str = "/evidence/literature/"
 
     # Directory to store the cached JSON file
@@ -1172,8 +1225,9 @@ async def get_evidence_literature(request: DiseasesRequest, redis: Redis = Depen
 
     cached_diseases: Set[str] = set()
     cached_data: Dict[str,Any] = {}
+    disease_records = LookupRecords(db, Disease, [f"{disease}" for disease in diseases])
     for disease in diseases:
-        disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
+        disease_record = disease_records.get(f"{disease}")
         # 1. Check if the cached JSON file exists
         if disease_record is not None:
             cached_file_path: str = disease_record.file_path
@@ -1191,54 +1245,55 @@ async def get_evidence_literature(request: DiseasesRequest, redis: Redis = Depen
 
     if len(filtered_diseases) == 0:  # all disease already present in the json file
         print("All diseases already present in cached json files,returning cached response")
-        await set_cached_response(redis, key, cached_data)
+        await set_cached_entities(redis, endpoint, cached_data)
         return cached_data
 
     print("filtered diseases: ", filtered_diseases)
-    # Check if cached response exists in Redis
-    cached_response_redis: dict = await get_cached_response(redis, key)
-    if cached_response_redis:
+    # Check Redis for the remaining diseases, one entry per disease
+    cached_response_redis: Dict[str, Any] = await get_cached_entities(redis, endpoint, [disease.replace("_", " ") for disease in filtered_diseases])
+    cached_data.update(cached_response_redis)
+    filtered_diseases = [disease for disease in filtered_diseases if disease.replace("_", " ") not in cached_response_redis]
+    if len(filtered_diseases) == 0:
         print("Returning chached response")
-        return cached_response_redis
+        return cached_data
 
     try:
         if is_rate_limited():
             remaining_time = int(rate_limited_until - time.time())
             raise HTTPException(status_code=429, detail=f"Rate limit in effect. Try again after {remaining_time} seconds.")
     
-        for disease in filtered_diseases:
-            print("cached data doesn't exists...Generating the data")
-            disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
-            file_path: str = os.path.join(cache_dir, f"{disease}.json")
-
-            # now add the response of each of the disease into lookup table.
-            if disease_record is not None:
-                cached_file_path: str = disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
+        try:
+            for disease in filtered_diseases:
+                print("cached data doesn't exists...Generating the data")
+                disease_record = disease_records.get(f"{disease}")
+                file_path: str = section_store_path(cache_dir, disease)
+
+                # now add the response of each of the disease into lookup table.
+                if disease_record is not None:
+                    cached_file_path: str = disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
             
-            pmids: List[str]=[]
-            mesh_term=get_mesh_term_for_disease(disease.replace("_"," "))
-            pmids=search_pubmed(mesh_term)
-            print("pmids: ",len(pmids))
-            all_literature_details: List[Dict[str,Any]] = fetch_literature_details_in_batches(disease.replace("_"," "),pmids)
-            print("all_literature_details: ",len(all_literature_details))
-            cached_data[disease.replace("_"," ")] = {"literature": all_literature_details}
-            cached_responses[f"{endpoint}"]={"literature": all_literature_details}
-
-            if disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = Disease(id=disease, file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {disease} added to the disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
-
-        await set_cached_response(redis, key, cached_data)
+                pmids: List[str]=[]
+                mesh_term=await run_blocking(get_mesh_term_for_disease, disease.replace("_"," "))
+                pmids=await run_blocking(search_pubmed, mesh_term)
+                print("pmids: ",len(pmids))
+                all_literature_details: List[Dict[str,Any]] = await run_blocking(fetch_literature_details_in_batches, disease.replace("_"," "),pmids)
+                print("all_literature_details: ",len(all_literature_details))
+                cached_data[disease.replace("_"," ")] = {"literature": all_literature_details}
+                cached_responses[f"{endpoint}"]={"literature": all_literature_details}
+
+                if disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    disease_records.stage(disease, file_path)
+                    print(f"Record with ID {disease} added to the disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+        finally:
+            disease_records.flush()
+
+        await set_cached_entities(redis, endpoint, cached_data)
         return cached_data
 
     except Exception as e:
@@ -1249,6 +1304,7 @@ async def get_evidence_literature(request: DiseasesRequest, redis: Redis = Depen
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/evidence/target-mouse-studies/", tags=["Evidence"])
+@coalesce_requests("/evidence/target-mouse-studies/")
 async def get_target_mouse_studies(request: TargetOnlyRequest, redis: Redis = Depends(get_redis),
                             db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
@@ -1260,7 +1316,7 @@ async def get_target_mouse_studies(request: TargetOnlyRequest, redis: Redis = De
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -1279,10 +1335,10 @@ async def get_target_mouse_studies(request: TargetOnlyRequest, redis: Redis = De
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(get_target_analyzer, target)
 
     try:
-        mouse_phenotypes = analyzer.get_mouse_phenotypes()
+        mouse_phenotypes = await run_blocking(analyzer.get_mouse_phenotypes)
         mouse_studies = parse_mouse_phenotypes(mouse_phenotypes)
         response = {"mouse_studies": mouse_studies}
 
@@ -1296,29 +1352,22 @@ async def get_target_mouse_studies(request: TargetOnlyRequest, redis: Redis = De
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
 
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/evidence/mouse-studies/", tags=["Evidence"])
+@coalesce_requests("/evidence/mouse-studies/")
 async def get_mouse_studies(request: DiseasesRequest, redis: Redis = Depends(get_redis),
                             db: Session = Depends(get_db)):
     diseases: List[str] = request.diseases
     diseases = [s.strip().lower().replace(" ", "_") for s in diseases]
-    diseases_str = "-".join(diseases)
-
-    # Generate a cache key for the request using target and disease list
-    key: str = f"/evidence/mouse-studies/:{diseases_str}"
     endpoint: str = "/evidence/mouse-studies/"
 
     # Directory to store the cached JSON file
@@ -1327,8 +1376,9 @@ async def get_mouse_studies(request: DiseasesRequest, redis: Redis = Depends(get
 
     cached_diseases: Set[str] = set()
     cached_data: Dict[str,Any] = {}
+    disease_records = LookupRecords(db, Disease, [f"{disease}" for disease in diseases])
     for disease in diseases:
-        disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
+        disease_record = disease_records.get(f"{disease}")
         # 1. Check if the cached JSON file exists
         if disease_record is not None:
             cached_file_path: str = disease_record.file_path
@@ -1346,44 +1396,45 @@ async def get_mouse_studies(request: DiseasesRequest, redis: Redis = Depends(get
 
     if len(filtered_diseases) == 0:  # all disease already present in the json file
         print("All diseases already present in cached json files,returning cached response")
-        await set_cached_response(redis, key, cached_data)
+        await set_cached_entities(redis, endpoint, cached_data)
         return cached_data
 
     print("filtered diseases: ", filtered_diseases)
-    # Check if cached response exists in Redis
-    cached_response_redis: dict = await get_cached_response(redis, key)
-    if cached_response_redis:
+    # Check Redis for the remaining diseases, one entry per disease
+    cached_response_redis: Dict[str, Any] = await get_cached_entities(redis, endpoint, [disease.replace("_", " ") for disease in filtered_diseases])
+    cached_data.update(cached_response_redis)
+    filtered_diseases = [disease for disease in filtered_diseases if disease.replace("_", " ") not in cached_response_redis]
+    if len(filtered_diseases) == 0:
         print("Returning chached response")
-        return cached_response_redis
+        return cached_data
 
 
     try:
-        for disease in filtered_diseases:
-            disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
-            file_path: str = os.path.join(cache_dir, f"{disease}.json")
-
-            # now add the response of each of the disease into lookup table.
-            if disease_record is not None:
-                cached_file_path: str = disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
-            data=fetch_mouse_model_data_alliancegenome(disease_name=disease.replace("_"," "))
-            cached_data[disease.replace("_"," ")]  = {"mouse_studies": data}
-            cached_responses[f"{endpoint}"]={"mouse_studies": data}
-
-            if disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = Disease(id=disease, file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {disease} added to the disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
+        try:
+            for disease in filtered_diseases:
+                disease_record = disease_records.get(f"{disease}")
+                file_path: str = section_store_path(cache_dir, disease)
+
+                # now add the response of each of the disease into lookup table.
+                if disease_record is not None:
+                    cached_file_path: str = disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
+                data=await run_blocking(fetch_mouse_model_data_alliancegenome, disease_name=disease.replace("_"," "))
+                cached_data[disease.replace("_"," ")]  = {"mouse_studies": data}
+                cached_responses[f"{endpoint}"]={"mouse_studies": data}
+
+                if disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    disease_records.stage(disease, file_path)
+                    print(f"Record with ID {disease} added to the disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+        finally:
+            disease_records.flush()
         
-        await set_cached_response(redis, key, cached_data)
+        await set_cached_entities(redis, endpoint, cached_data)
         return cached_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1403,6 +1454,7 @@ async def get_network_biology_semaphore(request: DiseasesRequest,
 
     
 @app.post("/evidence/network-biology/", tags=["Evidence"])
+@coalesce_requests("/evidence/network-biology/")
 async def get_network_biology(request: DiseasesRequest,
                             db: Session = Depends(get_db)):
     diseases: List[str] = request.diseases
@@ -1417,8 +1469,9 @@ async def get_network_biology(request: DiseasesRequest,
     
     cached_diseases: Set[str] = set()
     cached_data: Dict[str,Any] = {}
+    disease_records = LookupRecords(db, Disease, [f"{disease}" for disease in diseases])
     for disease in diseases:
-        disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
+        disease_record = disease_records.get(f"{disease}")
         # 1. Check if the cached JSON file exists
         if disease_record is not None:
             cached_file_path: str = disease_record.file_path
@@ -1442,37 +1495,37 @@ async def get_network_biology(request: DiseasesRequest,
     print("filtered diseases: ", filtered_diseases)
 
     try:
-        for disease in filtered_diseases:
-            disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
-            file_path: str = os.path.join(cache_dir, f"{disease}.json")
-
-            data=fetch_and_filter_figures_by_disease_and_pmids(disease.replace("_"," "))
-            cached_data[disease.replace("_"," ")] = {"results": data}
-
-            if disease_record is not None:
-                cached_file_path: str = disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
-
-            cached_responses[f"{endpoint}"] = {"results": data}
-
-            if disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = Disease(id=disease, file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {disease} added to the disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
+        try:
+            for disease in filtered_diseases:
+                disease_record = disease_records.get(f"{disease}")
+                file_path: str = section_store_path(cache_dir, disease)
+
+                data=await run_blocking(fetch_and_filter_figures_by_disease_and_pmids, disease.replace("_"," "))
+                cached_data[disease.replace("_"," ")] = {"results": data}
+
+                if disease_record is not None:
+                    cached_file_path: str = disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
+
+                cached_responses[f"{endpoint}"] = {"results": data}
+
+                if disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    disease_records.stage(disease, file_path)
+                    print(f"Record with ID {disease} added to the disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+        finally:
+            disease_records.flush()
         cached_data=enrich_disease_pathway_results(cached_data)    
         return cached_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/evidence/search-patent/", tags=["Evidence"])
+@coalesce_requests("/evidence/search-patent/")
 async def search_patents(request: TargetRequest, redis: Redis = Depends(get_redis),
                          db: Session = Depends(get_db)):
     """
@@ -1489,9 +1542,11 @@ async def search_patents(request: TargetRequest, redis: Redis = Depends(get_redi
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
     cached_diseases: Set[str] = set()
     cached_data: List = []
+    target_disease_records = LookupRecords(db, TargetDisease,
+                                           [f"{target}-{disease.replace(' ', '_')}" for disease in diseases])
     for disease in diseases:
         disease = disease.replace(" ", "_")
-        target_disease_record = db.query(TargetDisease).filter_by(id=f"{target}-{disease}").first()
+        target_disease_record = target_disease_records.get(f"{target}-{disease}")
         # 1. Check if the cached JSON file exists
         if target_disease_record is not None:
             cached_file_path: str = target_disease_record.file_path
@@ -1527,85 +1582,83 @@ async def search_patents(request: TargetRequest, redis: Redis = Depends(get_redi
     target_terms_file: str = "../target_data/target_terms.json"
     disease_synonyms_file: str = "../disease_data/diseases_synonyms.json"
 
-    for disease in filtered_diseases:
-        # Construct the query for the target and the disease
-        query: str = build_query(target, disease, target_terms_file, disease_synonyms_file)
-        print(query)
-
-        # Define the parameters for the API request
-        params = {
-            "engine": "google_patents",
-            "q": query,
-            "api_key": SERP_API_KEY,
-            "language": "ENGLISH",
-            "num": 100
-        }
-        disease_key: str = disease.replace(" ", "_")
+    try:
+        for disease in filtered_diseases:
+            # Construct the query for the target and the disease
+            query: str = build_query(target, disease, target_terms_file, disease_synonyms_file)
+            print(query)
+
+            # Define the parameters for the API request
+            params = {
+                "engine": "google_patents",
+                "q": query,
+                "api_key": SERP_API_KEY,
+                "language": "ENGLISH",
+                "num": 100
+            }
+            disease_key: str = disease.replace(" ", "_")
 
-        try:
-            # Make the API request
-            response = requests.get(SERP_API_URL, params=params)
-            response.raise_for_status()  # Will raise an error for bad responses
-            data = response.json()
+            try:
+                # Make the API request
+                response = await async_get(SERP_API_URL, params=params)
+                response.raise_for_status()  # Will raise an error for bad responses
+                data = response.json()
 
-            # Keys you want to extract
-            keys_to_extract: List[str] = ["patent_id", "pdf", "title", "assignee", "filing_date", "grant_date"]
+                # Keys you want to extract
+                keys_to_extract: List[str] = ["patent_id", "pdf", "title", "assignee", "filing_date", "grant_date"]
 
-            # Process each entry in data["organic_results"]
-            filtered_results: List[Dict[str, Any]] = []
+                # Process each entry in data["organic_results"]
+                filtered_results: List[Dict[str, Any]] = []
 
-            for entry in data.get("organic_results", []):
-                # Extract specific key values from each dictionary, defaulting to empty string if key is missing
-                filtered_data: Dict[str, Any] = {key: entry.get(key, "") for key in keys_to_extract}
+                for entry in data.get("organic_results", []):
+                    # Extract specific key values from each dictionary, defaulting to empty string if key is missing
+                    filtered_data: Dict[str, Any] = {key: entry.get(key, "") for key in keys_to_extract}
 
-                # Extract the country_status separately, handling the dictionary type
-                country_status: Dict[str, Any] = entry.get("country_status", {})
+                    # Extract the country_status separately, handling the dictionary type
+                    country_status: Dict[str, Any] = entry.get("country_status", {})
 
-                # Add country_status to the filtered_data dictionary
-                filtered_data["country_status"] = country_status
+                    # Add country_status to the filtered_data dictionary
+                    filtered_data["country_status"] = country_status
 
-                # Calculate the expiry_date using filing_date if available, else set it to empty string
-                filtered_data["expiry_date"] = add_years(filtered_data["filing_date"], 20) if filtered_data[
-                    "filing_date"] else ""
+                    # Calculate the expiry_date using filing_date if available, else set it to empty string
+                    filtered_data["expiry_date"] = add_years(filtered_data["filing_date"], 20) if filtered_data[
+                        "filing_date"] else ""
 
-                # Append the processed data to the filtered_results list
-                filtered_results.append(filtered_data)
+                    # Append the processed data to the filtered_results list
+                    filtered_results.append(filtered_data)
 
-            # Append the JSON response for the current disease
-            combined_results.append({"target": target, "disease": disease, "results": filtered_results})
+                # Append the JSON response for the current disease
+                combined_results.append({"target": target, "disease": disease, "results": filtered_results})
 
-            target_disease_record = db.query(TargetDisease).filter_by(id=f"{target}-{disease_key}").first()
-            file_path: str = os.path.join(cache_dir, f"{target}-{disease_key}.json")
+                target_disease_record = target_disease_records.get(f"{target}-{disease_key}")
+                file_path: str = section_store_path(cache_dir, f"{target}-{disease_key}")
 
-            # now add the response of each of the disease into lookup table.
-            if target_disease_record is not None:
-                cached_file_path: str = target_disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
-
-            cached_responses[f"{endpoint}"] = {"results": {
-                "target": target,
-                "disease": disease,
-                "results": filtered_results
-            }}
-
-            if target_disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = TargetDisease(id=f"{target}-{disease_key}",
-                                           file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {target}-{disease} added to the target_disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
+                # now add the response of each of the disease into lookup table.
+                if target_disease_record is not None:
+                    cached_file_path: str = target_disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
 
+                cached_responses[f"{endpoint}"] = {"results": {
+                    "target": target,
+                    "disease": disease,
+                    "results": filtered_results
+                }}
 
-        except requests.RequestException as exc:
-            # Raise an HTTP exception if the request fails
-            raise HTTPException(status_code=exc.response.status_code, detail=f"Error: {exc.response.text}")
+                if target_disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    target_disease_records.stage(f"{target}-{disease_key}", file_path)
+                    print(f"Record with ID {target}-{disease} added to the target_disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+
+
+            except httpx.HTTPStatusError as exc:
+                # Raise an HTTP exception if the request fails
+                raise HTTPException(status_code=exc.response.status_code, detail=f"Error: {exc.response.text}")
+    finally:
+        target_disease_records.flush()
 
     combined_results.extend(cached_data)
     final_response = {"results": combined_results}
@@ -1614,6 +1667,7 @@ async def search_patents(request: TargetRequest, redis: Redis = Depends(get_redi
 
 
 @app.post("/evidence/functional-genomics/", tags=["Evidence"])
+@coalesce_requests("/evidence/functional-genomics/")
 async def get_functional_genomics(request: TargetOnlyRequest, redis: Redis = Depends(get_redis),
                                   db: Session = Depends(get_db)):
     """
@@ -1629,7 +1683,7 @@ async def get_functional_genomics(request: TargetOnlyRequest, redis: Redis = Dep
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -1662,15 +1716,11 @@ async def get_functional_genomics(request: TargetOnlyRequest, redis: Redis = Dep
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
 
         return response
     except Exception as e:
@@ -1693,6 +1743,7 @@ async def get_rna_sequence_semaphore(
     return response
 
 @app.post("/evidence/rna-sequence/", tags=["Evidence"])
+@coalesce_requests("/evidence/rna-sequence/")
 async def get_rna_sequence(
         request: DiseasesRequest,  # Pydantic model that contains the target and diseases list
         redis: Redis = Depends(get_redis),  # Redis dependency for caching
@@ -1703,10 +1754,6 @@ async def get_rna_sequence(
     """
     diseases: List[str] = request.diseases
     diseases = [s.strip().lower().replace(" ", "_") for s in diseases]
-    diseases_str = "-".join(diseases)
-
-    # Generate a cache key for the request using target and disease list
-    key: str = f"/evidence/rna-sequence/:{diseases_str}"
     endpoint: str = "/evidence/rna-sequence/"
 
     # Directory to store the cached JSON file
@@ -1715,8 +1762,9 @@ async def get_rna_sequence(
 
     cached_diseases: Set[str] = set()
     cached_data: dict = {}
+    disease_records = LookupRecords(db, Disease, [f"{disease}" for disease in diseases])
     for disease in diseases:
-        disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
+        disease_record = disease_records.get(f"{disease}")
         # 1. Check if the cached JSON file exists
         if disease_record is not None:
             cached_file_path: str = disease_record.file_path
@@ -1736,52 +1784,52 @@ async def get_rna_sequence(
 
     if len(filtered_diseases) == 0:  # all disease already present in the json file
         print("All diseases already present in cached json files,returning cached response")
-        await set_cached_response(redis, key, cached_data)
+        await set_cached_entities(redis, endpoint, cached_data)
         return cached_data
 
     print("filtered diseases: ", filtered_diseases)
-    # Check if cached response exists in Redis
-    cached_response_redis: dict = await get_cached_response(redis, key)
-    if cached_response_redis:
+    # Check Redis for the remaining diseases, one entry per disease
+    cached_response_redis: Dict[str, Any] = await get_cached_entities(redis, endpoint, filtered_diseases)
+    cached_data.update(cached_response_redis)
+    filtered_diseases = [disease for disease in filtered_diseases if disease not in cached_response_redis]
+    if len(filtered_diseases) == 0:
         print("Returning chached response")
-        return cached_response_redis
+        return cached_data
 
     try:
         if is_rate_limited():
             remaining_time = int(rate_limited_until - time.time())
             raise HTTPException(status_code=429, detail=f"Rate limit in effect. Try again after {remaining_time} seconds.")
     
-        response: dict = get_geo_data_for_diseases(filtered_diseases)
+        response: dict = await run_blocking(get_geo_data_for_diseases, filtered_diseases)
         response=add_platform_name(response)
         response=add_study_type(response)
 
-        for disease, value in response.items():
-            disease_key: str = disease.strip().lower().replace(" ", "_")
-            disease_record = db.query(Disease).filter_by(id=f"{disease_key}").first()
-            file_path: str = os.path.join(cache_dir, f"{disease_key}.json")
-
-            # now add the response of each of the disease into lookup table.
-            if disease_record is not None:
-                cached_file_path: str = disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
-
-            cached_responses[f"{endpoint}"] = {disease: value}
-
-            if disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = Disease(id=f"{disease_key}",
-                                     file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {disease} added to the disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
+        try:
+            for disease, value in response.items():
+                disease_key: str = disease.strip().lower().replace(" ", "_")
+                disease_record = disease_records.get(f"{disease_key}")
+                file_path: str = section_store_path(cache_dir, disease_key)
+
+                # now add the response of each of the disease into lookup table.
+                if disease_record is not None:
+                    cached_file_path: str = disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
+
+                cached_responses[f"{endpoint}"] = {disease: value}
+
+                if disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    disease_records.stage(f"{disease_key}", file_path)
+                    print(f"Record with ID {disease} added to the disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+        finally:
+            disease_records.flush()
         response.update(cached_data)
-        await set_cached_response(redis, key, response)
+        await set_cached_entities(redis, endpoint, response)
 
         # Return the JSON response from the API
         return response
@@ -1819,6 +1867,7 @@ async def get_top_10_literature(request: DiseasesRequest):
     
 #################################### Genomics Data ##############################################
 @app.post("/genomics/pgscatalog", tags=["Genomics"])
+@coalesce_requests("/genomics/pgscatalog")
 async def pgs_catalog_data(request: DiseasesRequest, redis: Redis = Depends(get_redis),
                             db: Session = Depends(get_db)):
     
@@ -1827,10 +1876,6 @@ async def pgs_catalog_data(request: DiseasesRequest, redis: Redis = Depends(get_
     """
     diseases: List[str] = request.diseases
     diseases = [s.strip().lower().replace(" ", "_") for s in diseases]
-    diseases_str = "-".join(diseases)
-
-    # Generate a cache key for the request using target and disease list
-    key: str = f"/genomics/pgscatalog:{diseases_str}"
     endpoint: str = "/genomics/pgscatalog/"
 
     # Directory to store the cached JSON file
@@ -1840,8 +1885,9 @@ async def pgs_catalog_data(request: DiseasesRequest, redis: Redis = Depends(get_
     cached_diseases: Set[str] = set()
     cached_data: List = []
     response = {}
+    disease_records = LookupRecords(db, Disease, [f"{disease}" for disease in diseases])
     for disease in diseases:
-        disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
+        disease_record = disease_records.get(f"{disease}")
         # 1. Check if the cached JSON file exists
         if disease_record is not None:
             cached_file_path: str = disease_record.file_path
@@ -1859,56 +1905,56 @@ async def pgs_catalog_data(request: DiseasesRequest, redis: Redis = Depends(get_
 
     if len(filtered_diseases) == 0:  # all disease already present in the json file
         print("All diseases already present in cached json files,returning cached response")
-        await set_cached_response(redis, key, response)
+        await set_cached_entities(redis, endpoint, response)
         return response
 
     print("filtered diseases: ", filtered_diseases)
-    # Check if cached response exists in Redis
-    cached_response_redis: dict = await get_cached_response(redis, key)
-    if cached_response_redis:
+    # Check Redis for the remaining diseases, one entry per disease
+    cached_response_redis: Dict[str, Any] = await get_cached_entities(redis, endpoint, [disease.replace('_', ' ') for disease in filtered_diseases])
+    response.update(cached_response_redis)
+    filtered_diseases = [disease for disease in filtered_diseases if disease.replace('_', ' ') not in cached_response_redis]
+    if len(filtered_diseases) == 0:
         print("Returning chached response")
-        return cached_response_redis
+        return response
 
     try:
         
         diseases_and_efo: Dict[str, str] = {}  # Dictionary to store disease names and their corresponding EFO IDs
 
-        for disease in filtered_diseases:
-            disease_name: str = disease.strip().lower().replace(" ", "_")
-            disease_record = db.query(Disease).filter_by(id=f"{disease_name}").first()
-            file_path: str = os.path.join(cache_dir, f"{disease_name}.json")
-
-            # now add the response of each of the disease into lookup table.
-            if disease_record is not None:
-                cached_file_path: str = disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
+        try:
+            for disease in filtered_diseases:
+                disease_name: str = disease.strip().lower().replace(" ", "_")
+                disease_record = disease_records.get(f"{disease_name}")
+                file_path: str = section_store_path(cache_dir, disease_name)
+
+                # now add the response of each of the disease into lookup table.
+                if disease_record is not None:
+                    cached_file_path: str = disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
             
-            # Fetch PGS CAtalog data using EFO IDs
-            efo_id: str = get_efo_id(disease_name.replace('_', ' ').lower())
-            if efo_id:
-                diseases_and_efo[disease_name] = efo_id.replace(':', '_')
-                genomics_data = fetch_pgs_data(efo_id)
-            else:
-                genomics_data = [f"EFO ID not found for {disease_name.replace('_', ' ')}"]
-
-            cached_responses[f"{endpoint}"] = genomics_data
-            if disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = Disease(id=f"{disease}",
-                                     file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {disease} added to the disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
-            print('disease: ', disease)
-            print("output: ", cached_responses[f"{endpoint}"])
-            response[disease.replace('_', ' ')]=cached_responses[f"{endpoint}"]
-        await set_cached_response(redis, key, response)
+                # Fetch PGS CAtalog data using EFO IDs
+                efo_id: str = await async_get_efo_id(disease_name.replace('_', ' ').lower())
+                if efo_id:
+                    diseases_and_efo[disease_name] = efo_id.replace(':', '_')
+                    genomics_data = await run_blocking(fetch_pgs_data, efo_id)
+                else:
+                    genomics_data = [f"EFO ID not found for {disease_name.replace('_', ' ')}"]
+
+                cached_responses[f"{endpoint}"] = genomics_data
+                if disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    disease_records.stage(f"{disease}", file_path)
+                    print(f"Record with ID {disease} added to the disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+                print('disease: ', disease)
+                print("output: ", cached_responses[f"{endpoint}"])
+                response[disease.replace('_', ' ')]=cached_responses[f"{endpoint}"]
+        finally:
+            disease_records.flush()
+        await set_cached_entities(redis, endpoint, response)
 
         # Return the JSON response from the API
         return response
@@ -1918,6 +1964,7 @@ async def pgs_catalog_data(request: DiseasesRequest, redis: Redis = Depends(get_
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/genomics/gwas-studies", tags=["Genomics"])
+@coalesce_requests("/genomics/gwas-studies")
 async def gwas_studies_data(request: DiseasesRequest, redis: Redis = Depends(get_redis),
                             db: Session = Depends(get_db)):
     
@@ -1926,10 +1973,6 @@ async def gwas_studies_data(request: DiseasesRequest, redis: Redis = Depends(get
     """
     diseases: List[str] = request.diseases
     diseases = [s.strip().lower().replace(" ", "_") for s in diseases]
-    diseases_str = "-".join(diseases)
-
-    # Generate a cache key for the request using target and disease list
-    key: str = f"/genomics/gwas-studies:{diseases_str}"
     endpoint: str = "/genomics/gwas-studies/"
 
     # Directory to store the cached JSON file
@@ -1939,8 +1982,9 @@ async def gwas_studies_data(request: DiseasesRequest, redis: Redis = Depends(get
     cached_diseases: Set[str] = set()
     cached_data: List = []
     response = {}
+    disease_records = LookupRecords(db, Disease, [f"{disease}" for disease in diseases])
     for disease in diseases:
-        disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
+        disease_record = disease_records.get(f"{disease}")
         # 1. Check if the cached JSON file exists
         if disease_record is not None:
             cached_file_path: str = disease_record.file_path
@@ -1958,56 +2002,56 @@ async def gwas_studies_data(request: DiseasesRequest, redis: Redis = Depends(get
 
     if len(filtered_diseases) == 0:  # all disease already present in the json file
         print("All diseases already present in cached json files,returning cached response")
-        await set_cached_response(redis, key, response)
+        await set_cached_entities(redis, endpoint, response)
         return response
 
     print("filtered diseases: ", filtered_diseases)
-    # Check if cached response exists in Redis
-    cached_response_redis: dict = await get_cached_response(redis, key)
-    if cached_response_redis:
+    # Check Redis for the remaining diseases, one entry per disease
+    cached_response_redis: Dict[str, Any] = await get_cached_entities(redis, endpoint, filtered_diseases)
+    response.update(cached_response_redis)
+    filtered_diseases = [disease for disease in filtered_diseases if disease not in cached_response_redis]
+    if len(filtered_diseases) == 0:
         print("Returning chached response")
-        return cached_response_redis
+        return response
 
     try:
         
         diseases_and_efo: Dict[str, str] = {}  # Dictionary to store disease names and their corresponding EFO IDs
 
-        for disease in filtered_diseases:
-            disease_name: str = disease.strip().lower().replace(" ", "_")
-            disease_record = db.query(Disease).filter_by(id=f"{disease_name}").first()
-            file_path: str = os.path.join(cache_dir, f"{disease_name}.json")
-
-            # now add the response of each of the disease into lookup table.
-            if disease_record is not None:
-                cached_file_path: str = disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
+        try:
+            for disease in filtered_diseases:
+                disease_name: str = disease.strip().lower().replace(" ", "_")
+                disease_record = disease_records.get(f"{disease_name}")
+                file_path: str = section_store_path(cache_dir, disease_name)
+
+                # now add the response of each of the disease into lookup table.
+                if disease_record is not None:
+                    cached_file_path: str = disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
             
-            # Fetch PGS CAtalog data using EFO IDs
-            efo_id: str = get_efo_id(disease_name.replace('_', ' ').lower())
-            if efo_id:
-                diseases_and_efo[disease_name] = efo_id.replace(':', '_')
-                genomics_data = get_gwas_studies(efo_id)
-            else:
-                genomics_data = [f"EFO ID not found for {disease_name.replace('_', ' ')}"]
-
-            cached_responses[f"{endpoint}"] = genomics_data
-            if disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = Disease(id=f"{disease}",
-                                     file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {disease} added to the disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
-            print('disease: ', disease)
-            print("output: ", cached_responses[f"{endpoint}"])
-            response[disease]=cached_responses[f"{endpoint}"]
-        await set_cached_response(redis, key, response)
+                # Fetch PGS CAtalog data using EFO IDs
+                efo_id: str = await async_get_efo_id(disease_name.replace('_', ' ').lower())
+                if efo_id:
+                    diseases_and_efo[disease_name] = efo_id.replace(':', '_')
+                    genomics_data = await run_blocking(get_gwas_studies, efo_id)
+                else:
+                    genomics_data = [f"EFO ID not found for {disease_name.replace('_', ' ')}"]
+
+                cached_responses[f"{endpoint}"] = genomics_data
+                if disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    disease_records.stage(f"{disease}", file_path)
+                    print(f"Record with ID {disease} added to the disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+                print('disease: ', disease)
+                print("output: ", cached_responses[f"{endpoint}"])
+                response[disease]=cached_responses[f"{endpoint}"]
+        finally:
+            disease_records.flush()
+        await set_cached_entities(redis, endpoint, response)
 
         # Return the JSON response from the API
         return response
@@ -2024,12 +2068,12 @@ async def plot_locus_zoom(request: DiseasesRequest, redis: Redis = Depends(get_r
         response = {}
         for disease in diseases:
             print('disease: ', disease)
-            efo_id: str = get_efo_id(disease)
+            efo_id: str = await async_get_efo_id(disease)
             gwas_disease_file_path = os.path.join(GWAS_DATA_DIR, f'{efo_id}.tsv')
             print("gwas_disease_file_path: ", gwas_disease_file_path)
             if not os.path.exists(gwas_disease_file_path):
                 print("path doesn't exists")
-                gwas_disease_file_path = load_data(efo_id)
+                gwas_disease_file_path = await run_blocking(load_data, efo_id)
             print("gwas_disease_file_path: ", gwas_disease_file_path)
             if gwas_disease_file_path and os.path.isfile(gwas_disease_file_path):
                 response[disease] = gwas_disease_file_path
@@ -2041,9 +2085,37 @@ async def plot_locus_zoom(request: DiseasesRequest, redis: Redis = Depends(get_r
 
     except Exception as e:
         return None
+
+@app.post("/genomics/locus-zoom/variants", tags=["Genomics"])
+async def get_locus_zoom_variants(request: LocusZoomVariantsRequest):
+    """
+    Variants of a disease's GWAS associations for Manhattan/locus plots: filtered to the
+    requested window and p-value, with non-significant variants downsampled to one per
+    pixel bucket, returned column oriented (JSON) or as an Arrow IPC stream.
+    """
+    disease: str = request.disease.lower()
+    efo_id: str = await async_get_efo_id(disease)
+    if not efo_id:
+        raise HTTPException(status_code=404, detail=f"EFO ID not found for {disease}")
+    try:
+        variants = await run_blocking(query_variants, efo_id, request.chromosome, request.start, request.end,
+                                      request.max_pvalue, request.significance, request.width, request.height)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if variants is None:
+        raise HTTPException(status_code=404, detail=f"No GWAS associations found for {disease}")
+
+    if request.format == "arrow":
+        try:
+            content: bytes = await run_blocking(variants_to_arrow, variants)
+        except RuntimeError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        return Response(content=content, media_type=ARROW_STREAM_MEDIA_TYPE)
+    return {"efo_id": efo_id, "count": len(variants), "columns": await run_blocking(variants_to_columns, variants)}
 #################################### target assessment page ##############################################
 
 @app.post("/target-assessment/targetability/", tags=["Target Assessment"])
+@coalesce_requests("/target-assessment/targetability/")
 async def get_targetability(request: TargetOnlyRequest, redis: Redis = Depends(get_redis),
                             db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
@@ -2055,7 +2127,7 @@ async def get_targetability(request: TargetOnlyRequest, redis: Redis = Depends(g
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -2074,10 +2146,10 @@ async def get_targetability(request: TargetOnlyRequest, redis: Redis = Depends(g
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(TargetAnalyzer.from_cache, target)
 
     try:
-        targetability_data = analyzer.get_targetablitiy()
+        targetability_data = await run_blocking(analyzer.get_targetablitiy)
         print("targetability_data: ", targetability_data)
         parsed_targetability = parse_targetability(targetability_data, target)
         response = {"targetability": parsed_targetability}
@@ -2092,21 +2164,18 @@ async def get_targetability(request: TargetOnlyRequest, redis: Redis = Depends(g
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
 
         return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/target-assessment/geneEssentialityMap/", tags=["Target Assessment"])
+@coalesce_requests("/target-assessment/geneEssentialityMap/")
 async def get_gene_essentiality_map(request: TargetOnlyRequest, redis: Redis = Depends(get_redis),
                                     db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
@@ -2118,7 +2187,7 @@ async def get_gene_essentiality_map(request: TargetOnlyRequest, redis: Redis = D
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -2137,11 +2206,11 @@ async def get_gene_essentiality_map(request: TargetOnlyRequest, redis: Redis = D
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(get_target_analyzer, target)
 
     try:
         print("Getting gene essentiality data")
-        geneEssentialityMapData = analyzer.get_target_gene_map()
+        geneEssentialityMapData = await run_blocking(analyzer.get_target_gene_map)
         print("geneEssentialityMap ", geneEssentialityMapData)
         parsed_targetability = parse_gene_map(geneEssentialityMapData)
         response = {"geneEssentialityMap": parsed_targetability}
@@ -2156,15 +2225,11 @@ async def get_gene_essentiality_map(request: TargetOnlyRequest, redis: Redis = D
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
 
         return response
     except Exception as e:
@@ -2173,6 +2238,7 @@ async def get_gene_essentiality_map(request: TargetOnlyRequest, redis: Redis = D
 
 
 @app.post("/target-assessment/tractability/", tags=["Target Assessment"])
+@coalesce_requests("/target-assessment/tractability/")
 async def get_tractability(request: TargetOnlyRequest, redis: Redis = Depends(get_redis),
                            db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
@@ -2184,7 +2250,7 @@ async def get_tractability(request: TargetOnlyRequest, redis: Redis = Depends(ge
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -2203,10 +2269,10 @@ async def get_tractability(request: TargetOnlyRequest, redis: Redis = Depends(ge
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(get_target_analyzer, target)
 
     try:
-        tractability_data = analyzer.get_tractability()
+        tractability_data = await run_blocking(analyzer.get_tractability)
         parsed_tractability = parse_tractability(tractability_data)
         response = {"tractability": parsed_tractability}
 
@@ -2220,15 +2286,11 @@ async def get_tractability(request: TargetOnlyRequest, redis: Redis = Depends(ge
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
 
         return response
     except Exception as e:
@@ -2236,6 +2298,7 @@ async def get_tractability(request: TargetOnlyRequest, redis: Redis = Depends(ge
 
 
 @app.post("/target-assessment/paralogs/", tags=["Target Assessment"])
+@coalesce_requests("/target-assessment/paralogs/")
 async def get_paralogs(request: TargetOnlyRequest, redis: Redis = Depends(get_redis), db: Session = Depends(get_db)):
     target: str = request.target.strip().lower()
     key: str = f"/target-assessment/paralogs/:{target}"
@@ -2246,7 +2309,7 @@ async def get_paralogs(request: TargetOnlyRequest, redis: Redis = Depends(get_re
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{target}.json")
+    file_path: str = section_store_path(cache_dir, target)
 
     target_record = db.query(Target).filter_by(id=target).first()
     # 1. Check if the cached JSON file exists
@@ -2265,10 +2328,10 @@ async def get_paralogs(request: TargetOnlyRequest, redis: Redis = Depends(get_re
         print("Returning redis cached response")
         return cached_response_redis
 
-    analyzer = TargetAnalyzer(target)
+    analyzer = await run_blocking(TargetAnalyzer.from_cache, target)
 
     try:
-        paralogs_data = analyzer.get_paralogs()
+        paralogs_data = await run_blocking(analyzer.get_paralogs)
         parsed_paralogs = parse_paralogs(paralogs_data)
         response = {"paralogs": parsed_paralogs}
         await set_cached_response(redis, key, response)
@@ -2281,15 +2344,11 @@ async def get_paralogs(request: TargetOnlyRequest, redis: Redis = Depends(get_re
         cached_responses[f"{endpoint}"] = response
 
         if target_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Target(id=target, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Target, target, file_path)
             print(f"Record with ID {target} added to the target table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
 
         return response
     except Exception as e:
@@ -2304,7 +2363,7 @@ async def fetch_graph(request: GraphRequest, driver=Depends(get_neo4j_driver)
     Return the data for knowledge graph.
     """
 
-    efo_id_list: List[str] = list(map(get_efo_id, request.target_diseases))
+    efo_id_list: List[str] = list(await asyncio.gather(*map(async_get_efo_id, request.target_diseases)))
     key_list: List[str] = [request.target_gene.strip().lower()] + efo_id_list + [request.metapath]
     key: str = ":".join(sorted(key_list))
     endpoint: str = "/fetch-graph/"
@@ -2312,7 +2371,7 @@ async def fetch_graph(request: GraphRequest, driver=Depends(get_neo4j_driver)
     cache_dir: str = "cached_data_json/target_disease"
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
-    file_path: str = os.path.join(cache_dir, f"{key}.json")
+    file_path: str = section_store_path(cache_dir, key)
 
     target_disease_record = db.query(TargetDisease).filter_by(id=f"{key}").first()
     # 1. Check if the cached JSON file exists
@@ -2370,12 +2429,8 @@ async def fetch_graph(request: GraphRequest, driver=Depends(get_neo4j_driver)
     response: Dict[str, Any] = {"elements": graph_elements}
 
     if target_disease_record is None:
-        save_big_response_to_file(file_path, response)
-        new_record = TargetDisease(id=key, file_path=file_path)  # Create a new instance of the identified model
-        db.add(new_record)  # Add the new record to the session
-        db.commit()  # Commit the transaction to save the record to the database
-        db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-        # fields)
+        await run_blocking(save_big_response_to_file, file_path, response)
+        upsert_lookup_record(db, TargetDisease, key, file_path)
         print(f"Record with ID {key} added to the target-disease table.")
 
     return response
@@ -2440,6 +2495,7 @@ def fetch_chunk(reference_id: int):
 
 
 @app.post("/disease-profile/details/", tags=["Disease Profile"])
+@coalesce_requests("/disease-profile/details/")
 async def get_diseases_profiles(
         request: DiseasesRequest,  # Pydantic model that contains the target and diseases list
         redis: Redis = Depends(get_redis),  # Redis dependency for caching
@@ -2450,10 +2506,6 @@ async def get_diseases_profiles(
     """
     diseases: List[str] = request.diseases
     diseases = [s.strip().lower().replace(" ", "_") for s in diseases]
-    diseases_str = "-".join(diseases)
-
-    # Generate a cache key for the request using target and disease list
-    key: str = f"/disease-profile/details:{diseases_str}"
     endpoint: str = "/disease-profile/details/"
 
     # Directory to store the cached JSON file
@@ -2462,8 +2514,11 @@ async def get_diseases_profiles(
 
     cached_diseases: Set[str] = set()
     cached_data: List = []
+    # requested disease -> record, the keys the Redis entries are read back under
+    cached_entities: Dict[str, Any] = {}
+    disease_records = LookupRecords(db, Disease, [f"{disease}" for disease in diseases])
     for disease in diseases:
-        disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
+        disease_record = disease_records.get(f"{disease}")
         # 1. Check if the cached JSON file exists
         if disease_record is not None:
             cached_file_path: str = disease_record.file_path
@@ -2475,6 +2530,7 @@ async def get_diseases_profiles(
                 cached_diseases.add(disease)
                 print(f"Returning cached response from file: {cached_file_path}")
                 cached_data.append(cached_responses[f"{endpoint}"]["data"]["diseases"])
+                cached_entities[disease] = cached_data[-1]
 
     # filtering diseases whose response is not present in the json file
     filtered_diseases = [disease for disease in diseases if disease not in cached_diseases]
@@ -2482,21 +2538,24 @@ async def get_diseases_profiles(
     if len(filtered_diseases) == 0:  # all disease already present in the json file
         response = {"data": {"diseases": cached_data}}
         print("All diseases already present in cached json files,returning cached response")
-        await set_cached_response(redis, key, response)
+        await set_cached_entities(redis, endpoint, cached_entities)
         return response
 
     print("filtered diseases: ", filtered_diseases)
-    # Check if cached response exists in Redis
-    cached_response_redis: dict = await get_cached_response(redis, key)
-    if cached_response_redis:
+    # Check Redis for the remaining diseases, one record per disease
+    cached_response_redis: Dict[str, Any] = await get_cached_entities(redis, endpoint, filtered_diseases)
+    cached_data.extend(cached_response_redis.values())
+    cached_entities.update(cached_response_redis)
+    filtered_diseases = [disease for disease in filtered_diseases if disease not in cached_response_redis]
+    if len(filtered_diseases) == 0:
         print("Returning chached response")
-        return cached_response_redis
+        return {"data": {"diseases": cached_data}}
 
     diseases_and_efo: Dict[str, str] = {}  # Dictionary to store disease names and their corresponding EFO IDs
 
     # Iterate through each disease, fetch its EFO ID, and store it in the dictionary
     for disease_name in filtered_diseases:
-        efo_id: str = get_efo_id(disease_name.replace("_", " "))
+        efo_id: str = await async_get_efo_id(disease_name.replace("_", " "))
         if efo_id:
             diseases_and_efo[disease_name] = efo_id.replace(':', '_')
         else:
@@ -2504,6 +2563,8 @@ async def get_diseases_profiles(
 
     # Extract the list of EFO IDs from the diseases_and_efo dictionary
     diseases_efo_ids: List[str] = list(diseases_and_efo.values())
+    # Open Targets answers with its own disease names; records are stored under the requested ones
+    requested_diseases: Dict[str, str] = {efo_id: disease for disease, efo_id in diseases_and_efo.items()}
 
     # GraphQL query string for fetching disease details
     query_string: str = DiseaseAnnotationQueryVariables
@@ -2516,44 +2577,43 @@ async def get_diseases_profiles(
         base_url: str = "https://api.platform.opentargets.org/api/v4/graphql"
 
         # Make a POST request to the GraphQL API
-        response = requests.post(base_url, json={"query": query_string, "variables": variables})
+        response = await async_post(base_url, json={"query": query_string, "variables": variables})
         response = response.json()
         print("response: ", response)
         
         for record in response["data"]["diseases"]:
             disease: str = record["name"].strip().lower()
-            strapi_disease_description: str=get_disease_description_strapi(disease)
+            strapi_disease_description: str=await run_blocking(get_disease_description_strapi, disease)
             if strapi_disease_description:
                 record["description"]=strapi_disease_description
 
-        for record in response["data"]["diseases"]:
-            disease: str = record["name"].strip().lower().replace(" ", "_")
-            disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
-            file_path: str = os.path.join(cache_dir, f"{disease}.json")
-
-            # now add the response of each of the disease into lookup table.
-            if disease_record is not None:
-                cached_file_path: str = disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
-
-            cached_responses[f"{endpoint}"] = {"data": {"diseases": record}}
-
-            if disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = Disease(id=f"{disease}",
-                                     file_path=file_path)  # Create a new instance of the identified model
-                db.add(new_record)  # Add the new record to the session
-                db.commit()  # Commit the transaction to save the record to the database
-                db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-                # fields)
-                print(f"Record with ID {disease} added to the disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
+        try:
+            for record in response["data"]["diseases"]:
+                disease: str = requested_diseases.get(record["id"], record["name"].strip().lower().replace(" ", "_"))
+                cached_entities[disease] = record
+                disease_record = disease_records.get(f"{disease}")
+                file_path: str = section_store_path(cache_dir, disease)
+
+                # now add the response of each of the disease into lookup table.
+                if disease_record is not None:
+                    cached_file_path: str = disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
+
+                cached_responses[f"{endpoint}"] = {"data": {"diseases": record}}
+
+                if disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    disease_records.stage(f"{disease}", file_path)
+                    print(f"Record with ID {disease} added to the disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+        finally:
+            disease_records.flush()
 
         response["data"]["diseases"].extend(cached_data)
-        await set_cached_response(redis, key, response)
+        await set_cached_entities(redis, endpoint, cached_entities)
 
         # Return the JSON response from the API
         return response
@@ -2564,6 +2624,7 @@ async def get_diseases_profiles(
 
 
 @app.post("/disease-profile/details-llm/", tags=["Disease Profile"])
+@coalesce_requests("/disease-profile/details-llm/")
 async def get_diseases_profiles_llm(
     request: DiseasesRequest,
     redis: Redis = Depends(get_redis),
@@ -2574,10 +2635,6 @@ async def get_diseases_profiles_llm(
     """
     diseases: List[str] = request.diseases
     diseases = [s.strip().lower().replace(" ", "_") for s in diseases]
-    diseases_str = "-".join(diseases)
-
-    # Generate cache key
-    key: str = f"/disease-profile/details-llm/:{diseases_str}"
     endpoint: str = "/disease-profile/details-llm/"
 
     # Directory to store the cached JSON file
@@ -2588,8 +2645,9 @@ async def get_diseases_profiles_llm(
     cached_diseases: Set[str] = set()
     cached_data: Dict[str, Any] = {}
     
+    disease_records = LookupRecords(db, Disease, [f"{disease}" for disease in diseases])
     for disease in diseases:
-        disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
+        disease_record = disease_records.get(f"{disease}")
         if disease_record is not None:
             cached_file_path: str = disease_record.file_path
             print(f"Loading cached response from file: {cached_file_path}")
@@ -2605,46 +2663,48 @@ async def get_diseases_profiles_llm(
 
     if len(filtered_diseases) == 0:
         print("All diseases already present in cached json files, returning cached response")
-        await set_cached_response(redis, key, cached_data)
+        await set_cached_entities(redis, endpoint, cached_data)
         return cached_data
 
     print("filtered diseases: ", filtered_diseases)
 
-    # Check Redis cache
-    cached_response_redis = await get_cached_response(redis, key)
-    if cached_response_redis:
+    # Check Redis cache for the remaining diseases, one entry per disease
+    cached_response_redis: Dict[str, Any] = await get_cached_entities(redis, endpoint, [disease.replace("_", " ") for disease in filtered_diseases])
+    cached_data.update(cached_response_redis)
+    filtered_diseases = [disease for disease in filtered_diseases if disease.replace("_", " ") not in cached_response_redis]
+    if len(filtered_diseases) == 0:
         print("Returning redis cached response")
-        return cached_response_redis
+        return cached_data
 
     try:
         # Process non-cached diseases
-        for disease in filtered_diseases:
-            disease_record = db.query(Disease).filter_by(id=f"{disease}").first()
-            file_path: str = os.path.join(cache_dir, f"{disease}.json")
-
-            if disease_record is not None:
-                cached_file_path: str = disease_record.file_path
-                cached_responses = load_response_from_file(cached_file_path)
-            else:
-                cached_responses = {}
-
-            # Get LLM interpretation for disease
-            disease_data = disease_interpreter(disease_name=disease.replace("_", " "))
-            cached_data[disease.replace("_", " ")] = disease_data
-            cached_responses[f"{endpoint}"] = disease_data
-
-            # Save to cache file and database
-            if disease_record is None:
-                save_response_to_file(file_path, cached_responses)
-                new_record = Disease(id=disease, file_path=file_path)
-                db.add(new_record)
-                db.commit()
-                db.refresh(new_record)
-                print(f"Record with ID {disease} added to the disease table.")
-            else:
-                save_response_to_file(cached_file_path, cached_responses)
-
-        await set_cached_response(redis, key, cached_data)
+        try:
+            for disease in filtered_diseases:
+                disease_record = disease_records.get(f"{disease}")
+                file_path: str = section_store_path(cache_dir, disease)
+
+                if disease_record is not None:
+                    cached_file_path: str = disease_record.file_path
+                    cached_responses = load_response_from_file(cached_file_path)
+                else:
+                    cached_responses = {}
+
+                # Get LLM interpretation for disease
+                disease_data = await run_blocking(disease_interpreter, disease_name=disease.replace("_", " "))
+                cached_data[disease.replace("_", " ")] = disease_data
+                cached_responses[f"{endpoint}"] = disease_data
+
+                # Save to cache file and database
+                if disease_record is None:
+                    await run_blocking(save_response_to_file, file_path, cached_responses)
+                    disease_records.stage(disease, file_path)
+                    print(f"Record with ID {disease} added to the disease table.")
+                else:
+                    await run_blocking(save_response_to_file, cached_file_path, cached_responses)
+        finally:
+            disease_records.flush()
+
+        await set_cached_entities(redis, endpoint, cached_data)
         return cached_data
 
     except Exception as e:
@@ -2652,6 +2712,7 @@ async def get_diseases_profiles_llm(
 
 
 @app.post("/disease-profile/ontology/", tags=["Disease Profile"])
+@coalesce_requests("/disease-profile/ontology/", "disease_request")
 async def get_disease_ontology(
         disease_request: DiseaseRequest,  # Use the Pydantic model here
         redis: Redis = Depends(get_redis),  # Redis dependency for caching
@@ -2670,7 +2731,7 @@ async def get_disease_ontology(
     os.makedirs(cache_dir, exist_ok=True)  # Ensure the directory exists
 
     # File path for the JSON response
-    file_path: str = os.path.join(cache_dir, f"{disease}.json")
+    file_path: str = section_store_path(cache_dir, disease)
 
     disease_record = db.query(Disease).filter_by(id=disease).first()
     # 1. Check if the cached JSON file exists
@@ -2691,35 +2752,12 @@ async def get_disease_ontology(
         return cached_response_redis
 
     try:
-        # File path for the JSONL file
-        jsonl_file_path: str = "../disease_data/diseases_efo.jsonl"
-
-        # Get EFO ID for the disease and adjust the format
-        efo_id: str = find_disease_id_by_name(jsonl_file_path, disease_request.disease.strip().lower())
+        # Children, anchor and ancestors are resolved from the ontology preloaded at startup
+        ontology = get_disease_ontology_engine()
+        efo_id: Optional[str] = ontology.find_id(disease_request.disease.strip().lower())
         print(f"EFO ID: {efo_id}")
 
-        # Create adjacency lists
-        adj_list: Dict[str, List[str]] = create_adjacency_list(jsonl_file_path)
-        adj_list_reverse: Dict[str, List[str]] = create_reverse_adjacency_list(jsonl_file_path)
-
-        # Find ancestors and descendants
-        ancestors: Set[str] = find_ancestors(efo_id, adj_list)
-        descendants: Set[str] = set(adj_list_reverse.get(efo_id, []))
-
-        combined_set: Set[str] = ancestors | descendants  # Using the union operator
-        combined_set.add(efo_id)
-
-        # Log the ancestors and descendants for debugging purposes
-        print("Ancestors: ", ancestors)
-        print("Descendants: ", descendants)
-
-        # Prepare the response data list
-        response_data: List[Dict] = []
-
-        # Extract data for descendants, anchor, and ancestors
-        response_data.extend(extract_data_by_ids(jsonl_file_path, descendants, combined_set, "child"))
-        response_data.extend(extract_data_by_ids(jsonl_file_path, {efo_id}, combined_set, "anchor"))
-        response_data.extend(extract_data_by_ids(jsonl_file_path, ancestors, combined_set, "ancestor"))
+        response_data: List[Dict] = ontology.ontology_for(disease_request.disease.strip().lower())
 
         response: Dict[str, Any] = {"data": response_data}
 
@@ -2733,15 +2771,11 @@ async def get_disease_ontology(
         cached_responses[f"{endpoint}"] = response
 
         if disease_record is None:
-            save_response_to_file(file_path, cached_responses)
-            new_record = Disease(id=disease, file_path=file_path)  # Create a new instance of the identified model
-            db.add(new_record)  # Add the new record to the session
-            db.commit()  # Commit the transaction to save the record to the database
-            db.refresh(new_record)  # Refresh the instance to reflect any changes from the DB (like auto-generated
-            # fields)
+            await run_blocking(save_response_to_file, file_path, cached_responses)
+            upsert_lookup_record(db, Disease, disease, file_path)
             print(f"Record with ID {disease} added to the disease table.")
         else:
-            save_response_to_file(cached_file_path, cached_responses)
+            await run_blocking(save_response_to_file, cached_file_path, cached_responses)
 
         # Return the data in the response
         return response
@@ -2781,7 +2815,7 @@ async def search_disease(
     }
 
     # Send GraphQL request
-    response: Dict[str, Any] = send_graphql_request(SearchQuery, variables)
+    response: Dict[str, Any] = await async_send_graphql_request(SearchQuery, variables)
 
     await set_cached_response(redis, key, response)
 
@@ -2936,28 +2970,28 @@ async def get_target_indication_pairs(request:DiseasesRequest):
 
 
 @app.get("/phenotypes/lexical", tags=["Phenotypes entity search"])
-async def get_phenotypes_lexical(query: str, offset: int = 0, limit: int = 20, conn = Depends(get_db_connection)):
+async def get_phenotypes_lexical(query: str, offset: int = 0, limit: int = 20):
     """
     Endpoint to query phenotypes lexically based on input string.
     """
     try:
-        results = lexical_phenotype_search(query, conn)
-        count = len(results)
-        data = results.iloc[offset:offset + limit].to_dict(orient="records")
+        count, data = await run_blocking(lexical_phenotype_search, query, offset, limit)
         return {"count": count, "data": data} 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/genes/lexical", tags=["Genes"])
-async def get_genes_lexical(query: str, offset: int = 0, limit: int = 20, conn = Depends(get_gene_search_db_connection)):
+async def get_genes_lexical(query: str, offset: int = 0, limit: int = 20):
     """
     Endpoint to query genes based on input string.
     """
     try:
-        results = lexical_gene_search(query, conn)
-        count = len(results)
-        data = results.iloc[offset:offset + limit].to_dict(orient="records")
+        count, data = await run_blocking(lexical_gene_search, query, offset, limit)
         return {"count": count, "data": data} 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
   
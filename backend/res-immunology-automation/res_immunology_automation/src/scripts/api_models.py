@@ -26,6 +26,17 @@ class DiseaseRequest(BaseModel):
 class DiseasesRequest(BaseModel):
     diseases: List[str]
 
+class LocusZoomVariantsRequest(BaseModel):
+    disease: str
+    chromosome: Optional[str] = Field(None, description="Chromosome of the locus window, all chromosomes when omitted")
+    start: Optional[int] = Field(None, description="First position of the window")
+    end: Optional[int] = Field(None, description="Last position of the window")
+    max_pvalue: Optional[float] = Field(None, description="Drop variants with a larger p-value")
+    significance: float = Field(5e-8, description="Variants at or below this p-value are never downsampled")
+    width: int = Field(1000, ge=1, le=10000, description="Horizontal pixel buckets used for downsampling")
+    height: int = Field(100, ge=1, le=2000, description="Vertical pixel buckets used for downsampling")
+    format: Literal["json", "arrow"] = Field("json", description="Column oriented JSON or an Arrow IPC stream")
+
 class ExcelExportRequest(BaseModel):
     endpoint: str
     target: Optional[str] = None  # Make 'target' optional
@@ -4,24 +4,26 @@ from db.models import DiseasesDossierStatus
 from db.database import Base
 
 from api_models import DiseasesRequest, DiseaseRequest
-from api import get_evidence_literature_semaphore, get_mouse_studies, \
-                get_network_biology_semaphore, get_top_10_literature, \
-                get_diseases_profiles, get_indication_pipeline_semaphore, \
-                get_kol, get_key_influencers, get_rna_sequence_semaphore, \
+from api import get_evidence_literature, get_mouse_studies, \
+                get_network_biology, get_top_10_literature, \
+                get_diseases_profiles, get_indication_pipeline, \
+                get_kol, get_key_influencers, get_rna_sequence, \
                 get_disease_ontology
                 
 import logging
-import time
 import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Set, Tuple
 from graphrag_service import get_redis
 from fastapi import HTTPException
-from sqlalchemy.sql import func
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy import update
 import os, sys
+import socket
 import tzlocal
-from datetime import datetime, timezone
+from dossier_queue import DossierQueue, DossierJob, get_async_redis, BUILD_JOB, REGENERATE_JOB, HEARTBEAT_INTERVAL
+from datetime import datetime
 
 
 
@@ -32,7 +34,44 @@ logging.basicConfig(
 )
 
 task_started = False
-WAIT_TIME = 200
+# Number of dossier jobs built concurrently by this process
+DOSSIER_WORKERS: int = int(os.getenv("DOSSIER_WORKERS", "2"))
+# Safety net for jobs lost before reaching the queue (e.g. Redis restarted): re-enqueue stale rows
+RECONCILE_INTERVAL: int = int(os.getenv("DOSSIER_RECONCILE_INTERVAL", "600"))
+
+
+class DossierNode(NamedTuple):
+    """ One section of a disease dossier in the build graph. """
+    endpoint: Callable[..., Awaitable[Any]]
+    upstream: str                       # concurrency group (external API the section mostly waits on)
+    depends_on: Tuple[str, ...] = ()    # sections that must be built first
+    per_disease: bool = False           # takes a DiseaseRequest per disease instead of a DiseasesRequest
+
+
+# Sections of a dossier and their dependencies. KOL extracts its NCT ids from the indication
+# pipeline, which it reads back from the section cache once that node has run.
+DOSSIER_GRAPH: Dict[str, DossierNode] = {
+    "literature": DossierNode(get_evidence_literature, "ncbi"),
+    "mouse_studies": DossierNode(get_mouse_studies, "alliancegenome"),
+    "network_biology": DossierNode(get_network_biology, "ncbi"),
+    "top_10_literature": DossierNode(get_top_10_literature, "local"),
+    "diseases_profiles": DossierNode(get_diseases_profiles, "opentargets"),
+    "indication_pipeline": DossierNode(get_indication_pipeline, "opentargets"),
+    "kol": DossierNode(get_kol, "clinicaltrials", depends_on=("indication_pipeline",)),
+    "key_influencers": DossierNode(get_key_influencers, "local"),
+    "rna_sequence": DossierNode(get_rna_sequence, "ncbi"),
+    "ontology": DossierNode(get_disease_ontology, "local", per_disease=True),
+}
+
+# Maximum number of sections in flight, overall and per upstream
+MAX_PARALLEL_ENDPOINTS: int = int(os.getenv("DOSSIER_MAX_PARALLEL_ENDPOINTS", "4"))
+UPSTREAM_LIMITS: Dict[str, int] = {
+    "ncbi": 2,
+    "opentargets": 2,
+    "clinicaltrials": 1,
+    "alliancegenome": 1,
+    "local": 4,
+}
 
 POSTGRES_USER: str = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD: str = os.getenv("POSTGRES_PASSWORD")
@@ -60,6 +99,105 @@ async def create_models():
     async with engine.begin() as conn:  # `engine.begin()` ensures the connection is properly initialized
         await conn.run_sync(Base.metadata.create_all)
 
+async def set_dossier_status(disease: str, status: str, **values) -> None:
+    async with SessionLocal() as db:
+        await db.execute(
+            update(DiseasesDossierStatus)
+            .where(DiseasesDossierStatus.id == disease)
+            .values(status=status, **values)
+        )
+        await db.commit()
+
+
+async def build_disease(disease: str) -> str:
+    """ Build the dossier of one disease and record the outcome in disease_dossier_status. """
+    local_time = datetime.now(tzlocal.get_localzone())
+    # change the status of current building disease to processing and processing_time
+    await set_dossier_status(disease, "processing", submission_time=local_time)
+    print("status updated to processing: ", disease)
+
+    build_status = await run_endpoints([disease])
+
+    # update the status and processed_time according to the build status
+    if build_status != 'error':
+        await set_dossier_status(disease, build_status, processed_time=datetime.now(tzlocal.get_localzone()))
+    else:
+        await set_dossier_status(disease, build_status)
+    logging.info(f"updated status: {disease} -> {build_status}")
+    return build_status
+
+
+async def process_job(job: DossierJob) -> str:
+    if job.kind == REGENERATE_JOB:
+        # retries, verification and restore-from-backup are handled by the regeneration itself
+        from cache_management.regenerate import regenerate_single_disease
+        return 'processed' if await regenerate_single_disease(job.disease) else 'failed'
+    return await build_disease(job.disease)
+
+
+async def _keep_lease(queue: DossierQueue, job: DossierJob, consumer: str) -> None:
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        await queue.heartbeat(job, consumer)
+
+
+async def dossier_worker(queue: DossierQueue, consumer: str) -> None:
+    """ Take jobs from the queue until cancelled, one at a time. """
+    while True:
+        try:
+            job = await queue.next_job(consumer)
+            if job is None:
+                continue
+            if not await queue.is_current(job):
+                await queue.drop(job)
+                continue
+
+            logging.info(f"{consumer} processing {job}")
+            heartbeat = asyncio.create_task(_keep_lease(queue, job, consumer))
+            try:
+                status = await process_job(job)
+            except Exception as e:
+                logging.error(f"Error building {job.disease}: {e}")
+                await set_dossier_status(job.disease, 'error')
+                status = 'error'
+            finally:
+                heartbeat.cancel()
+
+            if status == 'error' and job.kind == BUILD_JOB:
+                if await queue.retry(job):
+                    logging.info(f"Retrying {job.disease} (attempt {job.attempt + 2})")
+                else:
+                    logging.error(f"Giving up on {job.disease} after {job.attempt + 1} attempts")
+            else:
+                await queue.ack(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Error in dossier worker {consumer}: {e}")
+            await asyncio.sleep(5)
+
+
+async def reconcile_jobs(queue: DossierQueue) -> None:
+    """
+    Enqueue diseases left 'submitted', or 'processing' without a live job, which happens when
+    they were recorded while Redis was unavailable or the queue was flushed.
+    """
+    while True:
+        try:
+            async with SessionLocal() as db:
+                result = await db.execute(
+                    select(DiseasesDossierStatus.id).where(
+                        DiseasesDossierStatus.status.in_(["submitted", "processing"])
+                    )
+                )
+                for disease in result.scalars().all():
+                    if await queue.enqueue(disease):
+                        logging.info(f"Re-enqueued dossier job for {disease}")
+        except Exception as e:
+            logging.error(f"Error reconciling dossier jobs: {e}")
+        await asyncio.sleep(RECONCILE_INTERVAL)
+
+
 async def build_dossier():
     print("dossier started")
     global task_started
@@ -67,141 +205,109 @@ async def build_dossier():
         return  # Prevent multiple instances from starting
     task_started = True
 
-    # db = get_db()
-    while True:
+    queue = DossierQueue(get_async_redis())
+    await queue.ensure_groups()
+    consumer_prefix = f"{socket.gethostname()}-{os.getpid()}"
+    tasks = [asyncio.create_task(reconcile_jobs(queue))]
+    tasks += [asyncio.create_task(dossier_worker(queue, f"{consumer_prefix}-{i}")) for i in range(DOSSIER_WORKERS)]
+    await asyncio.gather(*tasks)
 
-        async with SessionLocal() as db:
-            print("connection created")
-            # processing_records = await db.execute(select(DiseasesDossierStatus).filter(DiseasesDossierStatus.status == "processing")).all()
-            result = await db.execute(
-                select(DiseasesDossierStatus).where(DiseasesDossierStatus.status == "processing")
-            )
-            processing_records = result.scalars().all()
+# Shared by every dossier built concurrently in this process (see DOSSIER_WORKERS)
+_endpoint_pool = asyncio.Semaphore(MAX_PARALLEL_ENDPOINTS)
+_upstream_semaphores: Dict[str, asyncio.Semaphore] = {}
 
-            processing_records = [record.id for record in processing_records if record]
-            logging.info(f"Processing jobs: {processing_records}")
-            try:
-                if not processing_records:
-                    pending_jobs = []
-                    result = await db.execute(
-                        select(DiseasesDossierStatus).where(
-                            DiseasesDossierStatus.status.in_(["error", "submitted"])
-                        )
-                    )
-                    disease_records = result.scalars().all()
-                    if disease_records:
-                        for disease in disease_records:
-                            pending_jobs.append(disease.id)
-
-                    print("pending jobs: ", pending_jobs)
-                    for disease in pending_jobs:
-                        disease_arr = []
-                        disease_arr.append(disease)
-                        print("processing jobs: ",disease_arr)
-                        local_time = datetime.now(tzlocal.get_localzone())
-
-                        #change the status of current building disease to processing and processing_time
-                        update_stmt = (
-                            update(DiseasesDossierStatus)
-                            .where(DiseasesDossierStatus.id == disease)
-                            .values(status="processing", submission_time=local_time)
-                        )
-                        await db.execute(update_stmt) 
-                        await db.commit()
-                        print("status updated to processing: ", disease_arr)
-                        
-                        # run all endpoints for the disease
-                        build_status = await run_endpoints(disease_arr)
-                        
-                        # update the status and processed_time according to the build status
-                        if build_status != 'error':
-                            local_time = datetime.now(tzlocal.get_localzone())
-
-                            update_stmt = (
-                                update(DiseasesDossierStatus)
-                                .where(DiseasesDossierStatus.id == disease)
-                                .values(status=build_status, processed_time=local_time)
-                            )
-                        else:
-                            update_stmt = (
-                                update(DiseasesDossierStatus)
-                                .where(DiseasesDossierStatus.id == disease)
-                                .values(status=build_status)
-                            )
-
-                        await db.execute(update_stmt)
-                        await db.commit()
-                        logging.info(f"updated status: {disease}")
-
-                await asyncio.sleep(WAIT_TIME)
-            except Exception as e:
-                logging.error(f"Error in build_dossier: {e}")
 
-            finally:
-                await db.close()
-                print("connection closed")
+def _upstream_semaphore(upstream: str) -> asyncio.Semaphore:
+    if upstream not in _upstream_semaphores:
+        _upstream_semaphores[upstream] = asyncio.Semaphore(UPSTREAM_LIMITS.get(upstream, 1))
+    return _upstream_semaphores[upstream]
+
+
+def _dossier_order(graph: Dict[str, DossierNode]) -> List[str]:
+    """ Topological order of the graph, raising on unknown or cyclic dependencies. """
+    order: List[str] = []
+    visiting: Set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Cyclic dossier dependency on {name}")
+        if name not in graph:
+            raise ValueError(f"Unknown dossier section {name}")
+        visiting.add(name)
+        for dependency in graph[name].depends_on:
+            visit(dependency)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in graph:
+        visit(name)
+    return order
+
+
+async def _call_endpoint(node: DossierNode, request_data: Any, redis, db) -> Any:
+    # pass only the dependencies the endpoint declares (redis and/or db)
+    params = inspect.signature(node.endpoint).parameters
+    kwargs = {}
+    if "redis" in params:
+        kwargs["redis"] = redis
+    if "db" in params:
+        kwargs["db"] = db
+    return await node.endpoint(request_data, **kwargs)
 
-async def run_endpoints(unique_diseases):
-    
-    try:
-        db = next(get_db())
-        # async with SessionLocal() as db:
-        redis = get_redis()
-        print("connection created in end points")
-
-        # Define endpoint categories
-        diseases_only_endpoints = [
-            get_evidence_literature_semaphore, 
-            get_mouse_studies, 
-            get_network_biology_semaphore, 
-            get_top_10_literature, 
-            get_diseases_profiles, 
-            get_indication_pipeline_semaphore, 
-            get_kol, 
-            get_key_influencers, 
-            get_rna_sequence_semaphore
-        ]
-
-        disease_only_endpoints = [
-            get_disease_ontology
-        ]
-
-        # Call diseases-only endpoints
-        for endpoint in diseases_only_endpoints:
-            try:
-                request_data = DiseasesRequest(diseases=unique_diseases)
-                logging.info(f"Calling {endpoint.__name__} with all diseases: {unique_diseases}")
-                if endpoint.__name__ in ['get_network_biology_semaphore', 'get_indication_pipeline_semaphore']:
-                    response = await endpoint(request_data, db=db )
-                elif endpoint.__name__ in ["get_top_10_literature", 'get_key_influencers']:
-                    response = await endpoint(request_data)
-                else:
-                    response = await endpoint(request_data, redis=redis, db=db )
-                logging.info("Response received")
-                
-            except Exception as e:
-                if isinstance(e, HTTPException) and e.status_code == 404 and 'EFO ID not found' in e.detail:
-                    continue 
-                logging.error(f"Error calling {endpoint.__name__} for {unique_diseases}: {e}")
-                return 'error'
-            await asyncio.sleep(5)
 
-        # Call disease-only endpoints
-        for disease in unique_diseases:
-            for endpoint in disease_only_endpoints:
+async def run_endpoints(unique_diseases, graph: Dict[str, DossierNode] = DOSSIER_GRAPH):
+    """
+    Build every section of the dossier for the given diseases. Sections start as soon as
+    their dependencies are done, bounded by MAX_PARALLEL_ENDPOINTS and UPSTREAM_LIMITS
+    (process wide, shared with the other dossier workers),
+    so the build takes as long as its slowest dependency chain. Returns 'processed', or
+    'error' as soon as one section fails (remaining sections are cancelled).
+    """
+    redis = get_redis()
+    print("connection created in end points")
+    done: Dict[str, asyncio.Event] = {name: asyncio.Event() for name in graph}
+
+    async def run_node(name: str) -> None:
+        node = graph[name]
+        for dependency in node.depends_on:
+            await done[dependency].wait()
+
+        if node.per_disease:
+            calls = [(DiseaseRequest(disease=disease), disease) for disease in unique_diseases]
+        else:
+            calls = [(DiseasesRequest(diseases=unique_diseases), unique_diseases)]
+
+        for request_data, label in calls:
+            async with _upstream_semaphore(node.upstream), _endpoint_pool:
+                # each section gets its own session: the sync Session is not safe to share
+                db = next(get_db())
                 try:
-                    request_data = DiseaseRequest(disease=disease)
-                    logging.info(f"Calling {endpoint.__name__} for disease: {disease}")
-                    response = await endpoint(request_data, redis=redis, db=db )
+                    logging.info(f"Calling {node.endpoint.__name__} for: {label}")
+                    await _call_endpoint(node, request_data, redis, db)
+                    logging.info(f"Response received from {node.endpoint.__name__}")
                 except Exception as e:
-                    logging.error(f"Error calling {endpoint.__name__} for disease {disease}: {e}")
-                    return 'error'
-        await asyncio.sleep(5)
-        
-        return 'processed'
+                    if not node.per_disease and isinstance(e, HTTPException) and e.status_code == 404 \
+                            and 'EFO ID not found' in e.detail:
+                        logging.info(f"Skipping {node.endpoint.__name__} for {label}: {e.detail}")
+                        continue
+                    raise RuntimeError(f"Error calling {node.endpoint.__name__} for {label}: {e}") from e
+                finally:
+                    db.close()
+        done[name].set()
 
+    tasks = [asyncio.create_task(run_node(name), name=name) for name in _dossier_order(graph)]
+    try:
+        await asyncio.gather(*tasks)
+        return 'processed'
+    except Exception as e:
+        logging.error(str(e))
+        return 'error'
     finally:
-        db.close()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
         print("connection closed in endpoints")
 
 async def main():
@@ -0,0 +1,138 @@
+"""
+Freshness policies and revalidation scopes of the endpoint caches.
+
+Every endpoint has a TTL (CACHE_TTLS, CACHE_DEFAULT_TTL for the rest): a file
+section older than it is stale and a Redis entry expires after it. Stale
+sections are still served; `request_coalescing` collects the stale sections a
+request read (`collect_stale_reads`) and refreshes them in the background.
+
+A refresh runs the endpoint inside a `refresh_scope`: the sections it
+revalidates are hidden from the endpoint's cache checks, so they are
+recomputed, and each new section is swapped in with an atomic rename only if
+the copy on disk is still the version that was found stale. Users keep being
+served the old section until then. A scope without sections (cache
+regeneration) recomputes every section it meets.
+"""
+
+import contextvars
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+DAY: int = 24 * 60 * 60
+
+CACHE_DEFAULT_TTL: int = int(os.getenv("CACHE_DEFAULT_TTL", str(30 * DAY)))
+# endpoint -> seconds its cached responses are served before being refreshed
+CACHE_TTLS: Dict[str, int] = {
+    "/evidence/literature/": 7 * DAY,
+    "/evidence/target-literature/": 7 * DAY,
+    "/market-intelligence/indication-pipeline/": 7 * DAY,
+    "/market-intelligence/target-pipeline/": 7 * DAY,
+    "/market-intelligence/kol/": 14 * DAY,
+    "/evidence/rna-sequence/": 14 * DAY,
+    "/evidence/search-patent/": 30 * DAY,
+    "/genomics/gwas-studies/": 30 * DAY,
+    "/genomics/pgscatalog/": 30 * DAY,
+    "/evidence/mouse-studies/": 30 * DAY,
+    "/evidence/target-mouse-studies/": 30 * DAY,
+    "/disease-profile/details/": 90 * DAY,
+    "/disease-profile/details-llm/": 90 * DAY,
+    "/disease-profile/ontology/": 90 * DAY,
+}
+# e.g. CACHE_TTL_OVERRIDES='{"/evidence/literature/": 86400}'
+CACHE_TTLS.update({endpoint: int(ttl) for endpoint, ttl in json.loads(os.getenv("CACHE_TTL_OVERRIDES", "{}")).items()})
+
+# (store directory, endpoint) of a cached section
+SectionKey = Tuple[str, str]
+
+
+def ttl_for(name: str) -> int:
+    """
+    TTL of an endpoint, or of a Redis key built from one ('/evidence/literature/:entity:asthma').
+
+    Args:
+        name (str): Endpoint path or cache key.
+
+    Returns:
+        int: Seconds the cached response is fresh.
+    """
+    matches = [endpoint for endpoint in CACHE_TTLS if name.startswith(endpoint.rstrip("/"))]
+    return CACHE_TTLS[max(matches, key=len)] if matches else CACHE_DEFAULT_TTL
+
+
+def is_stale(endpoint: str, version: int) -> bool:
+    """ True when a section written at `version` (mtime in ns) is older than the endpoint's TTL """
+    return time.time() - version / 1e9 > ttl_for(endpoint)
+
+
+class RefreshScope:
+    """ The sections one refresh recomputes, and the ones it has written so far. """
+
+    def __init__(self, stale: Optional[Dict[SectionKey, int]] = None):
+        # section -> version found stale; None recomputes every section
+        self.stale = stale
+        self.written: Set[SectionKey] = set()
+
+    def bypasses(self, section: SectionKey) -> bool:
+        """ Whether the cached copy of a section must be recomputed rather than read """
+        if section in self.written:
+            return False
+        return self.stale is None or section in self.stale
+
+    def may_replace(self, section: SectionKey, version: Optional[int]) -> bool:
+        """ Swap in a new section only over the version found stale, not over a newer refresh """
+        if self.stale is None or section in self.written or section not in self.stale:
+            return True
+        return version is None or version == self.stale[section]
+
+
+_refresh_scope: contextvars.ContextVar[Optional[RefreshScope]] = contextvars.ContextVar("refresh_scope", default=None)
+_stale_reads: contextvars.ContextVar[Optional[Dict[SectionKey, int]]] = contextvars.ContextVar("stale_reads",
+                                                                                               default=None)
+
+
+def current_refresh_scope() -> Optional[RefreshScope]:
+    return _refresh_scope.get()
+
+
+@contextmanager
+def refresh_scope(stale: Optional[Dict[SectionKey, int]] = None) -> Iterator[RefreshScope]:
+    """
+    Recompute cached sections for the code run inside, including tasks it starts.
+
+    Args:
+        stale (Optional[Dict[SectionKey, int]]): The sections to refresh and their stale versions;
+            None refreshes every section (cache regeneration).
+    """
+    scope = RefreshScope(stale)
+    token = _refresh_scope.set(scope)
+    # the stale reads of a refresh are not refreshed again
+    reads_token = _stale_reads.set(None)
+    try:
+        yield scope
+    finally:
+        _stale_reads.reset(reads_token)
+        _refresh_scope.reset(token)
+
+
+@contextmanager
+def collect_stale_reads() -> Iterator[Dict[SectionKey, int]]:
+    """ Collect the stale sections read by the code run inside, with their versions """
+    stale: Dict[SectionKey, int] = {}
+    token = _stale_reads.set(stale)
+    try:
+        yield stale
+    finally:
+        _stale_reads.reset(token)
+
+
+def collecting_stale_reads() -> bool:
+    return _stale_reads.get() is not None
+
+
+def note_section_read(section: SectionKey, version: Optional[int]) -> None:
+    stale = _stale_reads.get()
+    if stale is not None and version is not None and is_stale(section[1], version):
+        stale[section] = version
@@ -5,10 +5,11 @@ Cache Management Script
 This script manages cache operations for disease data, including:
 - Backing up individual disease cache files
 - Clearing cache for specific diseases
-- Regenerating cache data for specific diseases
+- Regenerating cache data for specific diseases (cached sections stay served until replaced)
 - Restoring from backup
 - Tracking regeneration history
 - Analyzing differences between backup and regenerated files
+- Converting cached data to the configured serialization format
 
 Usage:
     python cache_main.py [OPERATION] [OPTIONS]
@@ -17,22 +18,26 @@ Operations:
     backup [DISEASE_ID]      Backup specific disease or all processed diseases
     clear [DISEASE_ID]       Clear cache for specific disease or all processed diseases
     regenerate [DISEASE_ID]  Regenerate the cache data for specific disease or all marked for regeneration
+    enqueue-regenerate       Queue all diseases marked for regeneration for the dossier workers (bulk lane)
     restore [DISEASE_ID]     Restore specific disease or all diseases from backup
-    full [DISEASE_ID]        Perform full cycle (backup, clear, regenerate) for specific disease or all processed diseases
+    full [DISEASE_ID]        Perform full cycle (backup, regenerate in place) for specific disease or all processed diseases
     history [DISEASE_ID]     Show operation history for a specific disease or recent operations
     diff [DISEASE_ID]        Analyze differences between backup and regenerated files
     report                   Show monthly statistics on disease operations
+    convert [DISEASE_ID]     Rewrite cached data in the format set by CACHE_SERIALIZER/CACHE_COMPRESSION
     help                     Display this help message
 
 Examples:
     python cache_main.py --backup           # Backup all processed diseases
     python cache_main.py --clear            # Clear out all processed diseases 
     python cache_main.py --regenerate       # Regenerate all processed diseases 
+    python cache_main.py --enqueue-regenerate  # Let the dossier workers regenerate marked diseases
     python cache_main.py --full             # Perform full operation cycle
     python cache_main.py --restore          # Restore all the backedup diseases to the main directory
     python cache_main.py --history          # Show operation history of all processed diseases
     python cache_main.py --diff             # Analyze differences for all processed diseases
     python cache_main.py --report           # Show monthly statistics
+    python cache_main.py --convert          # Convert every cached disease/target/target-disease
 """
 
 import asyncio
@@ -53,6 +58,7 @@ from cache_management.regenerate import regenerate_single_disease, regenerate_ca
 from cache_management.restore import restore_from_backup, restore_single_disease
 from cache_management.history_tracker import record_regeneration, print_last_operation_summary, print_monthly_stats
 from cache_management.diff_analyzer import analyze_disease_diff, print_diff_summary
+from cache_management.convert import convert_single_disease, convert_all_caches
 from cache_management.utils import setup_logging, create_backup_directories, log_error_to_json, BASE_DIR
 from cache_management.backup import get_processed_diseases_ordered_by_time
 class CacheManagementError(Exception):
@@ -94,18 +100,9 @@ async def perform_full_cycle_for_disease(disease_id):
             await record_regeneration(disease_id, operation_type="full", status="failed", notes="Backup step failed")
             return False
         
-        # Step 2: Clear cache
-        logger.info(f"Step 2: Clearing cache for disease {disease_id}...")
-        clear_result = await clear_single_disease(disease_id)
-        if not clear_result:
-            error_msg = f"Clear step failed for disease {disease_id}"
-            logger.error(error_msg)
-            log_error_to_json(disease_id, "clear_failure", error_msg)
-            await record_regeneration(disease_id, operation_type="full", status="failed", notes="Clear step failed")
-            return False
-        
-        # Step 3: Regenerate
-        logger.info(f"Step 3: Regenerating cache for disease {disease_id}...")
+        # Step 2: Regenerate in place; the cached sections are served until their
+        # replacements are swapped in, so the cache is not cleared first
+        logger.info(f"Step 2: Regenerating cache for disease {disease_id}...")
         regenerate_result = await regenerate_single_disease(disease_id)
         if not regenerate_result:
             error_msg = f"Regeneration step failed for disease {disease_id}"
@@ -114,8 +111,8 @@ async def perform_full_cycle_for_disease(disease_id):
             await record_regeneration(disease_id, operation_type="full", status="failed", notes="Regenerate step failed")
             return False
         
-        # Step 4: Analyze differences
-        logger.info(f"Step 4: Analyzing differences for disease {disease_id}...")
+        # Step 3: Analyze differences
+        logger.info(f"Step 3: Analyzing differences for disease {disease_id}...")
         await analyze_disease_diff(disease_id)
         
         # Record successful full cycle operation
@@ -289,6 +286,9 @@ async def main():
             else:
                 await execute_operation("Cache regeneration for marked diseases", regenerate_cache)
                 
+        elif operation == "--enqueue-regenerate":
+            await execute_operation("Queueing of marked diseases for regeneration", regenerate_cache, True)
+
         elif operation == "--restore":
             if disease_id:
                 await execute_operation(
@@ -331,6 +331,16 @@ async def main():
             month = datetime.now().month
             year = datetime.now().year
             await print_monthly_stats(month, year)
+
+        elif operation == "--convert":
+            if disease_id:
+                await execute_operation(
+                    f"Format conversion of disease {disease_id}",
+                    convert_single_disease,
+                    disease_id
+                )
+            else:
+                await execute_operation("Format conversion of all cached data", convert_all_caches)
                 
         else:
             print(f"Error: Invalid operation '{operation}'.")
@@ -8,6 +8,7 @@ This package provides modules for:
 - Restoring individual diseases from backup
 - Tracking history of disease operations
 - Analyzing differences between backup and regenerated files
+- Converting cached sections to the configured serialization format
 - Utility functions for cache management operations
 
 Each operation can be performed on a single disease or multiple diseases,
@@ -31,6 +32,7 @@ from .diff_analyzer import (
     print_diff_summary,
     get_latest_diff_report
 )
+from .convert import convert_single_disease, convert_all_caches
 from .utils import (
     setup_logging, 
     create_backup_directories, 
@@ -70,6 +72,10 @@ __all__ = [
     'print_diff_summary',
     'get_latest_diff_report',
     
+    # Serialization format conversion
+    'convert_single_disease',
+    'convert_all_caches',
+    
     # Utility functions
     'setup_logging',
     'create_backup_directories',
@@ -4,7 +4,7 @@ Module for backing up individual disease cache data, prioritized by processing t
 
 import os
 import asyncio
-import shutil
+import json
 import sys
 from sqlalchemy import select, func
 from datetime import datetime
@@ -14,6 +14,7 @@ from .utils import (
     get_disease_timestamp,
     log_error_to_json,
     find_latest_backup_for_disease,
+    disease_store_path,
     DISEASE_CACHE_DIR, 
     BACKUP_DIR,
     LOGS_DIR,
@@ -22,6 +23,7 @@ from .utils import (
 
 # Import database models
 sys.path.append(BASE_DIR)
+from cache_store import store_exists, read_all_sections
 from build_dossier import SessionLocal
 from db.models import DiseasesDossierStatus
 
@@ -71,10 +73,10 @@ async def backup_single_disease(disease_id):
     # Ensure backup directories exist
     backup_dir = await create_backup_directories()
     
-    # Check if disease file exists
-    source_file = os.path.join(DISEASE_CACHE_DIR, f"{disease_id}.json")
-    if not os.path.exists(source_file):
-        error_msg = f"Disease file {source_file} not found."
+    # Check if disease cache exists
+    source_file = disease_store_path(disease_id)
+    if not store_exists(source_file):
+        error_msg = f"Disease cache {source_file} not found."
         logger.error(error_msg)
         log_error_to_json(disease_id, "backup_error", error_msg, module="backup")
         return False
@@ -98,8 +100,9 @@ async def backup_single_disease(disease_id):
             except Exception as e:
                 logger.warning(f"Could not remove old backup file: {str(e)}")
         
-        # Copy disease JSON file to backup with timestamp
-        shutil.copy2(source_file, destination_file)
+        # Backups stay a single JSON document with every cached section
+        with open(destination_file, "w") as f:
+            json.dump(read_all_sections(source_file), f)
         logger.info(f"Successfully backed up {disease_id} to {destination_file}")
         
         return True
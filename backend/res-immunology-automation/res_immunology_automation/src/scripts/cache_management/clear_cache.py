@@ -12,6 +12,7 @@ from .utils import (
     setup_logging,
     log_error_to_json,
     find_latest_backup_for_disease,
+    disease_store_path,
     DISEASE_CACHE_DIR,
     BASE_DIR
 )
@@ -19,6 +20,8 @@ import tzlocal
 
 # Import database models
 sys.path.append(BASE_DIR)
+from cache_store import store_exists, delete_store
+from http_client import run_blocking
 from build_dossier import SessionLocal
 from db.models import DiseasesDossierStatus
 from graphrag_service import get_redis
@@ -73,18 +76,17 @@ async def clear_disease_file(disease_id):
     # Ensure cache directory exists
     os.makedirs(DISEASE_CACHE_DIR, exist_ok=True)
     
-    file_path = os.path.join(DISEASE_CACHE_DIR, f"{disease_id}.json")
+    file_path = disease_store_path(disease_id)
     
     try:
-        # Remove file if it exists
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            logger.info(f"Removed existing file: {file_path}")
+        # Remove the cache (sharded store or legacy file) if it exists
+        if store_exists(file_path):
+            await run_blocking(delete_store, file_path)
+            logger.info(f"Removed existing cache: {file_path}")
         
-        # Create empty JSON file
-        with open(file_path, 'w') as f:
-            json.dump({}, f)
-        logger.info(f"Created empty file: {file_path}")
+        # Create empty cache store
+        os.makedirs(file_path, exist_ok=True)
+        logger.info(f"Created empty cache store: {file_path}")
         
         return True
         
@@ -0,0 +1,64 @@
+"""
+Module for converting cached endpoint sections to the active serialization format.
+"""
+
+import os
+import glob
+from pathlib import Path
+from .utils import (
+    setup_logging,
+    log_error_to_json,
+    disease_store_path,
+    CACHE_DIR
+)
+from cache_store import store_exists, convert_store
+from cache_serialization import ACTIVE_SERIALIZER, ACTIVE_COMPRESSION
+
+# Entity caches written by the API (see cache_store)
+ENTITY_CACHE_DIRS = ["disease", "target", "target_disease"]
+
+
+async def convert_single_disease(disease_id):
+    """Rewrite the cache sections of a disease in the active format."""
+    logger = setup_logging("convert_disease")
+    file_path = disease_store_path(disease_id)
+
+    if not store_exists(file_path):
+        logger.warning(f"No cache found for disease {disease_id}")
+        return False
+
+    try:
+        section_count = convert_store(file_path)
+        logger.info(f"Converted {section_count} sections of disease {disease_id} "
+                    f"to {ACTIVE_SERIALIZER}+{ACTIVE_COMPRESSION}")
+        return True
+    except Exception as e:
+        error_msg = f"Error converting cache for disease {disease_id}: {str(e)}"
+        logger.error(error_msg)
+        log_error_to_json(disease_id, "convert_error", error_msg, module="convert")
+        return False
+
+
+async def convert_all_caches():
+    """Rewrite every disease, target and target-disease cache in the active format."""
+    logger = setup_logging("convert_all")
+    logger.info(f"Converting cached data to {ACTIVE_SERIALIZER}+{ACTIVE_COMPRESSION}...")
+
+    converted = 0
+    failed = 0
+    for entity_dir in ENTITY_CACHE_DIRS:
+        cache_dir = os.path.join(CACHE_DIR, entity_dir)
+        if not os.path.isdir(cache_dir):
+            continue
+        entity_ids = {Path(path).stem for path in glob.glob(os.path.join(cache_dir, "*.json"))}
+        entity_ids |= {Path(path).name for path in glob.glob(os.path.join(cache_dir, "*")) if os.path.isdir(path)}
+        for entity_id in sorted(entity_ids):
+            try:
+                convert_store(os.path.join(cache_dir, entity_id))
+                converted += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f"Error converting {entity_dir}/{entity_id}: {str(e)}")
+
+    logger.info(f"Conversion completed: {converted} caches converted, {failed} failed")
+    return failed == 0
@@ -9,6 +9,7 @@ from .utils import (
     setup_logging,
     find_latest_backup_for_disease,
     log_error_to_json,
+    disease_store_path,
     BASE_DIR,
     DISEASE_CACHE_DIR,
     BACKUP_DIR
@@ -16,6 +17,7 @@ from .utils import (
 
 # Import database models
 sys.path.append(BASE_DIR)
+from cache_store import store_exists, read_all_sections
 from build_dossier import SessionLocal
 from db.models import DiseaseDiffReport
 
@@ -147,9 +149,9 @@ async def analyze_disease_diff(disease_id):
             return None
             
         # Get current file
-        current_file = os.path.join(DISEASE_CACHE_DIR, f"{disease_id}.json")
+        current_file = disease_store_path(disease_id)
         
-        if not os.path.exists(current_file):
+        if not store_exists(current_file):
             error_msg = f"Current file not found for disease {disease_id}"
             logger.error(error_msg)
             return None
@@ -159,8 +161,7 @@ async def analyze_disease_diff(disease_id):
             with open(backup_file, "r") as f:
                 backup_data = json.load(f)
                 
-            with open(current_file, "r") as f:
-                current_data = json.load(f)
+            current_data = read_all_sections(current_file)
         except json.JSONDecodeError as e:
             error_msg = f"Error parsing JSON for disease {disease_id}: {str(e)}"
             logger.error(error_msg)
@@ -1,6 +1,10 @@
 """
 Module for regenerating cache data for individual diseases with retry logic,
 processing in chronological order of their processed_time.
+
+Sections are rebuilt in a refresh scope (see cache_freshness): the cached copies
+stay in place and are served to users until each new section is swapped in, so
+a disease does not need to be cleared before it is regenerated.
 """
 
 import asyncio
@@ -15,15 +19,19 @@ from .utils import (
     check_environment_variables,
     retry_with_backoff,
     find_latest_backup_for_disease,
-    BASE_DIR,
-    DISEASE_CACHE_DIR
+    disease_store_path,
+    BASE_DIR
 )
 import tzlocal
 
 # Import database models and functions
 sys.path.append(BASE_DIR)
+from cache_store import store_exists, list_sections, restore_store
+from http_client import run_blocking
 from build_dossier import SessionLocal, DiseasesDossierStatus, run_endpoints, get_db
+from cache_freshness import refresh_scope
 from graphrag_service import get_redis
+from dossier_queue import enqueue_dossier_job, BULK_LANE, REGENERATE_JOB
 
 # Import backup function to get ordered diseases
 from .backup import get_processed_diseases_ordered_by_time
@@ -83,28 +91,21 @@ async def verify_json_file_content(disease_id):
     # [No changes needed, keep original implementation]
     logger = setup_logging("verify_json")
     
-    file_path = os.path.join(DISEASE_CACHE_DIR, f"{disease_id}.json")
-    if not os.path.exists(file_path):
+    file_path = disease_store_path(disease_id)
+    if not store_exists(file_path):
         error_msg = f"JSON file for disease {disease_id} does not exist after regeneration."
         logger.error(error_msg)
         log_error_to_json(disease_id, "verification_error", error_msg)
         return False
     
-    if os.path.getsize(file_path) == 0:
-        error_msg = f"JSON file for disease {disease_id} is empty after regeneration."
-        logger.error(error_msg)
-        log_error_to_json(disease_id, "verification_error", error_msg)
-        return False
-    
-    # Check if the file contains valid JSON and is not just '{}'
+    # Check the cache contains valid JSON and is not just '{}'
     try:
-        with open(file_path, 'r') as f:
-            content = json.load(f)
-            if not content:
-                error_msg = f"JSON file for disease {disease_id} contains empty object."
-                logger.error(error_msg)
-                log_error_to_json(disease_id, "verification_error", error_msg)
-                return False
+        content = list_sections(file_path)
+        if not content:
+            error_msg = f"JSON file for disease {disease_id} contains empty object."
+            logger.error(error_msg)
+            log_error_to_json(disease_id, "verification_error", error_msg)
+            return False
     except json.JSONDecodeError:
         error_msg = f"JSON file for disease {disease_id} contains invalid JSON."
         logger.error(error_msg)
@@ -133,7 +134,9 @@ async def run_regeneration_for_disease(disease_id):
         # Track which endpoint is being called
         current_endpoint = "run_endpoints"
         try:
-            status = await run_endpoints(single_disease_list)
+            # recompute every section, swapping each in over the cached one once it is built
+            with refresh_scope():
+                status = await run_endpoints(single_disease_list)
             
             if status and status != "error":
                 logger.info(f"Regeneration completed for disease {disease_id}")
@@ -174,10 +177,8 @@ async def restore_disease_from_backup(disease_id):
             log_error_to_json(disease_id, "restore_error", error_msg)
             return False
         
-        # Copy the backup to the cache directory
-        import shutil
-        destination_file = os.path.join(DISEASE_CACHE_DIR, f"{disease_id}.json")
-        shutil.copy2(backup_file, destination_file)
+        # Replace the cache with the backup document
+        await run_blocking(restore_store, disease_store_path(disease_id), backup_file)
         
         logger.info(f"Successfully restored disease {disease_id} from backup {os.path.basename(backup_file)}")
         return True
@@ -276,8 +277,25 @@ async def get_diseases_for_regeneration_ordered():
         return []
 
 
-async def regenerate_cache():
-    """Process diseases with 'regeneration' status one by one, starting with the oldest first."""
+async def enqueue_regeneration(disease_ids):
+    """Queue regeneration jobs on the bulk lane; dossier workers run them after user-facing builds."""
+    logger = setup_logging("enqueue_regeneration")
+    redis = get_redis()
+    queued = 0
+    for disease_id in disease_ids:
+        if enqueue_dossier_job(redis, disease_id, kind=REGENERATE_JOB, lane=BULK_LANE):
+            queued += 1
+        else:
+            logger.info(f"Disease {disease_id} already has a queued dossier job")
+    logger.info(f"Queued {queued}/{len(disease_ids)} diseases for regeneration")
+    return True
+
+
+async def regenerate_cache(queued=False):
+    """
+    Process diseases with 'regeneration' status one by one, starting with the oldest first.
+    With queued=True they are handed to the dossier workers' bulk lane instead.
+    """
     logger = setup_logging("regenerate_cache")
     logger.info("Starting cache regeneration for marked diseases in chronological order...")
     
@@ -301,6 +319,9 @@ async def regenerate_cache():
             logger.warning("No diseases with 'regeneration' status found to process.")
             return True  # Return true since there's nothing to do
         
+        if queued:
+            return await enqueue_regeneration(disease_ids)
+
         logger.info(f"Processing {len(disease_ids)} diseases sequentially in chronological order...")
         
         # Process each disease one by one
@@ -5,7 +5,6 @@ Module for restoring cache data from backup.
 import os
 import sys
 import asyncio
-import shutil
 import glob
 from pathlib import Path
 from sqlalchemy import update
@@ -14,6 +13,7 @@ from .utils import (
     setup_logging,
     log_error_to_json,
     find_latest_backup_for_disease,
+    disease_store_path,
     BACKUP_DIR,
     DISEASE_CACHE_DIR,
     BASE_DIR
@@ -22,6 +22,8 @@ import tzlocal
 
 # Import database models
 sys.path.append(BASE_DIR)
+from cache_store import restore_store
+from http_client import run_blocking
 from build_dossier import SessionLocal, DiseasesDossierStatus
 
 
@@ -43,9 +45,9 @@ async def restore_single_disease(disease_id):
         # Ensure cache directory exists
         os.makedirs(DISEASE_CACHE_DIR, exist_ok=True)
         
-        # Copy the backup file to the cache directory
-        destination = os.path.join(DISEASE_CACHE_DIR, f"{disease_id}.json")
-        shutil.copy2(backup_file, destination)
+        # Replace the current cache with the backup document; it is split into
+        # per-section files on the next write
+        await run_blocking(restore_store, disease_store_path(disease_id), backup_file)
         
         # Update disease status to "processed"
         try:
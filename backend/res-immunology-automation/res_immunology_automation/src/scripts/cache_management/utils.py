@@ -23,6 +23,11 @@ LOGS_DIR = os.path.join(CACHE_DIR, "logs")
 ERROR_LOGS_DIR = os.path.join(CACHE_DIR, "error_logs")  # New directory for error logs
 
 
+def disease_store_path(disease_id):
+    """Path of a disease's sharded cache store (see cache_store)."""
+    return os.path.join(DISEASE_CACHE_DIR, disease_id)
+
+
 def setup_logging(log_name):
     """Set up logging configuration for modules."""
     logger = logging.getLogger(log_name)
@@ -194,7 +199,8 @@ def get_all_disease_ids():
         return []
     
     json_files = glob.glob(os.path.join(DISEASE_CACHE_DIR, "*.json"))
-    return [Path(file).stem for file in json_files]
+    store_dirs = [path for path in glob.glob(os.path.join(DISEASE_CACHE_DIR, "*")) if os.path.isdir(path)]
+    return sorted({Path(file).stem for file in json_files} | {Path(path).name for path in store_dirs})
 
 
 def check_environment_variables():
@@ -0,0 +1,251 @@
+"""
+Pluggable serialization for cached endpoint payloads (file sections and Redis).
+
+Encoded payloads start with a short header recording how they were written,
+e.g. `DBTC1:orjson+zstd\n`, followed by the (optionally compressed) body.
+Payloads without the header are legacy plain JSON and are still decoded, so
+caches written before a format switch stay readable.
+
+The format is chosen with CACHE_SERIALIZER (json, orjson, msgpack) and
+CACHE_COMPRESSION (none, zstd, zlib). The default, stdlib json without
+compression, writes the legacy header-less JSON and keeps RedisJSON documents
+for the Redis cache; other formats are only used when opted into, and every
+host sharing the cache must then have their codecs (orjson, msgpack,
+zstandard) installed to read what the others write.
+"""
+
+import json
+import os
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from redis import ConnectionPool, Redis
+from redis.exceptions import ResponseError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+HEADER_MAGIC: bytes = b"DBTC1:"
+HEADER_END: bytes = b"\n"
+ZSTD_LEVEL: int = int(os.getenv("CACHE_ZSTD_LEVEL", "3"))
+
+CACHE_SERIALIZER: str = os.getenv("CACHE_SERIALIZER", "json")
+CACHE_COMPRESSION: str = os.getenv("CACHE_COMPRESSION", "none")
+
+
+def _to_builtin(obj: Any) -> Any:
+    """ Fallback for types the binary codecs do not know (mirrors utils.CustomJSONEncoder) """
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not serializable")
+
+
+def _fallback(encoder: Optional[type]) -> Callable[[Any], Any]:
+    """ `default` hook of the binary codecs: the caller's json.JSONEncoder when given """
+    return encoder().default if encoder is not None else _to_builtin
+
+
+def _json_dumps(payload: Any, encoder: Optional[type] = None) -> bytes:
+    return json.dumps(payload, cls=encoder).encode("utf-8")
+
+
+def _json_loads(body: bytes) -> Any:
+    return json.loads(body)
+
+
+def _orjson_dumps(payload: Any, encoder: Optional[type] = None) -> bytes:
+    return orjson.dumps(payload, default=_fallback(encoder), option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def _orjson_loads(body: bytes) -> Any:
+    return orjson.loads(body)
+
+
+def _msgpack_dumps(payload: Any, encoder: Optional[type] = None) -> bytes:
+    return msgpack.packb(payload, default=_fallback(encoder), use_bin_type=True)
+
+
+def _msgpack_loads(body: bytes) -> Any:
+    return msgpack.unpackb(body, raw=False, strict_map_key=False)
+
+
+def _zstd_compress(body: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+
+
+def _zstd_decompress(body: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(body)
+
+
+def _identity(body: bytes) -> bytes:
+    return body
+
+
+SERIALIZERS: Dict[str, Tuple[Callable[..., bytes], Callable[[bytes], Any], bool]] = {
+    # name: (dumps, loads, available)
+    "json": (_json_dumps, _json_loads, True),
+    "orjson": (_orjson_dumps, _orjson_loads, orjson is not None),
+    "msgpack": (_msgpack_dumps, _msgpack_loads, msgpack is not None),
+}
+
+COMPRESSORS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes], bool]] = {
+    # name: (compress, decompress, available)
+    "none": (_identity, _identity, True),
+    "zstd": (_zstd_compress, _zstd_decompress, zstandard is not None),
+    "zlib": (zlib.compress, zlib.decompress, True),
+}
+
+
+def _resolve(table: Dict[str, Tuple], name: str, fallback: str, kind: str) -> str:
+    if name not in table:
+        raise ValueError(f"Unknown cache {kind} '{name}', expected one of {sorted(table)}")
+    if not table[name][2]:
+        print(f"Cache {kind} '{name}' is not installed, falling back to '{fallback}'")
+        return fallback
+    return name
+
+
+ACTIVE_SERIALIZER: str = _resolve(SERIALIZERS, CACHE_SERIALIZER, "json", "serializer")
+ACTIVE_COMPRESSION: str = _resolve(COMPRESSORS, CACHE_COMPRESSION, "none", "compression")
+
+
+def is_legacy_format() -> bool:
+    """ True when the active format is plain JSON, i.e. what the cache used before serializers were pluggable """
+    return ACTIVE_SERIALIZER == "json" and ACTIVE_COMPRESSION == "none"
+
+
+def dumps_payload(payload: Any, encoder: Optional[type] = None) -> bytes:
+    """
+    Encode a payload in the active format.
+
+    Args:
+        payload (Any): JSON compatible payload.
+        encoder (Optional[type]): json.JSONEncoder subclass used by the stdlib json serializer.
+
+    Returns:
+        bytes: Header plus encoded body, or plain JSON when the legacy format is active.
+    """
+    if is_legacy_format():
+        return _json_dumps(payload, encoder)
+    body = COMPRESSORS[ACTIVE_COMPRESSION][0](SERIALIZERS[ACTIVE_SERIALIZER][0](payload, encoder))
+    return HEADER_MAGIC + f"{ACTIVE_SERIALIZER}+{ACTIVE_COMPRESSION}".encode("ascii") + HEADER_END + body
+
+
+def payload_format(data: bytes) -> Optional[Tuple[str, str]]:
+    """ Return the (serializer, compression) recorded in the header, or None for legacy JSON """
+    if not data.startswith(HEADER_MAGIC):
+        return None
+    header = data[len(HEADER_MAGIC):data.index(HEADER_END)].decode("ascii")
+    serializer, compression = header.split("+", 1)
+    return serializer, compression
+
+
+def loads_payload(data: Any) -> Any:
+    """
+    Decode a payload written by `dumps_payload`, in any format, or a legacy plain JSON document.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    data_format = payload_format(data)
+    if data_format is None:
+        return _json_loads(data)
+    serializer, compression = data_format
+    if not SERIALIZERS.get(serializer, (None, None, False))[2] or not COMPRESSORS.get(compression, (None, None, False))[2]:
+        raise RuntimeError(f"Cached payload uses '{serializer}+{compression}' which is not installed")
+    body = data[data.index(HEADER_END) + len(HEADER_END):]
+    return SERIALIZERS[serializer][1](COMPRESSORS[compression][1](body))
+
+
+_binary_clients: Dict[Tuple, Redis] = {}
+
+
+def _binary_redis(redis: Redis) -> Redis:
+    """
+    The app's Redis client decodes responses to str, which would corrupt compressed
+    payloads; reuse its connection settings for a client returning raw bytes.
+    """
+    pool = redis.connection_pool
+    connection_kwargs = dict(pool.connection_kwargs)
+    client_key = tuple(connection_kwargs.get(name) for name in ("host", "port", "db", "username", "password"))
+    client = _binary_clients.get(client_key)
+    if client is None:
+        connection_kwargs["decode_responses"] = False
+        client = Redis(connection_pool=ConnectionPool(connection_class=pool.connection_class, **connection_kwargs))
+        _binary_clients[client_key] = client
+    return client
+
+
+def redis_get_payload(redis: Redis, key: str) -> Any:
+    """ Read a cached response stored either as an encoded payload or as a legacy RedisJSON document """
+    if is_legacy_format():
+        return redis.json().get(key)
+    try:
+        data = _binary_redis(redis).get(key)
+    except ResponseError:
+        # WRONGTYPE: the key is still a RedisJSON document
+        return redis.json().get(key)
+    return loads_payload(data) if data is not None else None
+
+
+def redis_set_payload(redis: Redis, key: str, payload: Any, ex: Optional[int] = None) -> None:
+    """ Cache a response, expiring after `ex` seconds when given """
+    if is_legacy_format():
+        redis.json().set(key, "$", payload)
+        if ex is not None:
+            redis.expire(key, ex)
+        return
+    _binary_redis(redis).set(key, dumps_payload(payload), ex=ex)
+
+
+def redis_get_payloads(redis: Redis, keys: List[str]) -> List[Any]:
+    """ Read many cached responses in one round trip (MGET, or JSON.MGET for RedisJSON documents); None for misses """
+    if not keys:
+        return []
+    if is_legacy_format():
+        try:
+            return list(redis.json().mget(keys, "."))
+        except ResponseError:
+            # some keys were written as encoded payloads by another format
+            return [_get_or_none(redis, key) for key in keys]
+    # MGET answers nil for keys that are still RedisJSON documents; they are rewritten on the next set
+    return [loads_payload(data) if data is not None else None for data in _binary_redis(redis).mget(keys)]
+
+
+def _get_or_none(redis: Redis, key: str) -> Any:
+    try:
+        return redis.json().get(key)
+    except ResponseError:
+        return None
+
+
+def redis_set_payloads(redis: Redis, payloads: Dict[str, Any], ex: Optional[int] = None) -> None:
+    """ Write many cached responses in one round trip, expiring after `ex` seconds when given """
+    if not payloads:
+        return
+    if is_legacy_format():
+        pipeline = redis.json().pipeline(transaction=False)
+        for key, payload in payloads.items():
+            pipeline.set(key, "$", payload)
+            if ex is not None:
+                pipeline.expire(key, ex)
+        pipeline.execute()
+        return
+    if ex is None:
+        _binary_redis(redis).mset({key: dumps_payload(payload) for key, payload in payloads.items()})
+        return
+    pipeline = _binary_redis(redis).pipeline(transaction=False)
+    for key, payload in payloads.items():
+        pipeline.set(key, dumps_payload(payload), ex=ex)
+    pipeline.execute()
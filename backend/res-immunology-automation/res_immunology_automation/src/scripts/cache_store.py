@@ -0,0 +1,365 @@
+"""
+Sharded on-disk cache for endpoint responses.
+
+Each cached entity (disease, target, target-disease pair) owns a directory
+`cached_data_json/<entity_type>/<entity_id>/` holding one file per endpoint
+section, so a cache hit only deserializes the section it needs and a write
+only rewrites that section. Legacy single-file caches
+(`cached_data_json/<entity_type>/<entity_id>.json`) are still readable and are
+migrated into the sharded layout on their first write.
+
+Section files are encoded by `cache_serialization` (format recorded in a
+header, legacy plain JSON still readable); they keep the `.json` extension
+so older tooling and lookup-table paths continue to resolve.
+
+A section's mtime is its version: `cache_freshness` compares it with the
+endpoint's TTL to find stale sections, and a refresh only replaces the version
+it found stale. Migrations and format conversions keep the original mtimes.
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Dict, Iterator, MutableMapping, Optional, Set, Tuple
+from urllib.parse import quote, unquote
+from cache_serialization import dumps_payload, loads_payload
+from cache_freshness import collecting_stale_reads, current_refresh_scope, note_section_read
+
+SECTION_EXTENSION: str = ".json"
+LEGACY_EXTENSION: str = ".json"
+LOCK_EXTENSION: str = ".lock"
+
+_entity_locks: Dict[str, threading.Lock] = {}
+_entity_locks_guard = threading.Lock()
+
+
+def section_store_path(cache_dir: str, entity_id: str) -> str:
+    """ Path of the sharded store of an entity, as recorded in the lookup tables. """
+    return os.path.join(cache_dir, entity_id)
+
+
+def store_dir_for(path: str) -> str:
+    """
+    Normalize a lookup-table path to its store directory. Rows written before the
+    sharded layout point at `<entity_id>.json`, their store lives at `<entity_id>`.
+    """
+    if path.endswith(LEGACY_EXTENSION):
+        return path[:-len(LEGACY_EXTENSION)]
+    return path
+
+
+def legacy_file_for(path: str) -> str:
+    return store_dir_for(path) + LEGACY_EXTENSION
+
+
+def section_file(store_dir: str, endpoint: str) -> str:
+    return os.path.join(store_dir, quote(endpoint, safe="") + SECTION_EXTENSION)
+
+
+def _section_name(file_name: str) -> Optional[str]:
+    if not file_name.endswith(SECTION_EXTENSION) or file_name.startswith("."):
+        return None
+    return unquote(file_name[:-len(SECTION_EXTENSION)])
+
+
+def section_key(path: str, endpoint: str) -> Tuple[str, str]:
+    """ Identity of a section across the lookup-table path spellings of its entity """
+    return os.path.abspath(store_dir_for(path)), endpoint
+
+
+def section_version(path: str, endpoint: str) -> Optional[int]:
+    """ mtime (ns) of a cached section, None when it is not cached """
+    store_dir = store_dir_for(path)
+    file_path = section_file(store_dir, endpoint) if os.path.isdir(store_dir) else legacy_file_for(path)
+    try:
+        return os.stat(file_path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _keep_version(file_path: str, version: os.stat_result) -> None:
+    os.utime(file_path, ns=(version.st_atime_ns, version.st_mtime_ns))
+
+
+def _read_payload(file_path: str) -> Any:
+    with open(file_path, 'rb') as file:
+        return loads_payload(file.read())
+
+
+def _atomic_write(file_path: str, data: bytes) -> None:
+    """
+    Write to a temporary file in the same directory and rename it over the target,
+    so readers see either the previous or the new content, never a partial one.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_payload(file_path: str, payload: Any, encoder: Optional[type] = None) -> None:
+    _atomic_write(file_path, dumps_payload(payload, encoder))
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Serialize writers of `path`, across threads (API workers) and processes
+    (build_dossier), using an in-process lock plus an flock on `<path>.lock`.
+    """
+    path = os.path.abspath(path)
+    with _entity_locks_guard:
+        thread_lock = _entity_locks.setdefault(path, threading.Lock())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with thread_lock:
+        with open(path + LOCK_EXTENSION, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def entity_lock(path: str) -> ContextManager[None]:
+    """ Serialize writers of one entity (see `file_lock`), whichever lookup-table spelling `path` uses. """
+    return file_lock(store_dir_for(path))
+
+
+def read_json_file(file_path: str) -> Dict[str, Any]:
+    """ The JSON object stored in a state file, empty when it is missing or unreadable. """
+    if not os.path.exists(file_path):
+        return {}
+    try:
+        with open(file_path, 'r') as file:
+            data = json.load(file)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError) as e:
+        print(f"Could not read {file_path}: {e}")
+        return {}
+
+
+def write_json_file(file_path: str, payload: Any, indent: Optional[int] = None) -> None:
+    """ Atomically replace a JSON state file, serialized with the other writers of the file. """
+    with file_lock(file_path):
+        _atomic_write(file_path, json.dumps(payload, indent=indent, sort_keys=True).encode("utf-8"))
+
+
+def merge_json_file(file_path: str, entries: Dict[str, Any], merge: Optional[Callable[[Any, Any], Any]] = None,
+                    indent: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Add entries to a JSON object shared by several processes without dropping theirs.
+
+    The file is re-read under the lock, so entries other processes saved since this one
+    loaded it are kept, and the merged object is written back atomically.
+
+    Args:
+        file_path (str): The state file.
+        entries (Dict[str, Any]): The entries this process adds or updates.
+        merge (Optional[Callable[[Any, Any], Any]]): (entry on disk, new entry) -> entry to keep;
+            by default the new entry wins.
+        indent (Optional[int]): JSON indentation of the file.
+
+    Returns:
+        Dict[str, Any]: The merged object, including the other processes' entries.
+    """
+    with file_lock(file_path):
+        merged = read_json_file(file_path)
+        for key, value in entries.items():
+            merged[key] = merge(merged[key], value) if merge is not None and key in merged else value
+        _atomic_write(file_path, json.dumps(merged, indent=indent, sort_keys=True).encode("utf-8"))
+    return merged
+
+
+def store_exists(path: str) -> bool:
+    return os.path.isdir(store_dir_for(path)) or os.path.isfile(legacy_file_for(path))
+
+
+def list_sections(path: str) -> Set[str]:
+    store_dir = store_dir_for(path)
+    if os.path.isdir(store_dir):
+        return {name for name in map(_section_name, os.listdir(store_dir)) if name is not None}
+    legacy_file = legacy_file_for(path)
+    if os.path.isfile(legacy_file):
+        return set(_read_payload(legacy_file).keys())
+    return set()
+
+
+def read_section(path: str, endpoint: str) -> Optional[Any]:
+    """ Deserialize a single endpoint section, or return None when it is not cached. """
+    store_dir = store_dir_for(path)
+    if os.path.isdir(store_dir):
+        file_path = section_file(store_dir, endpoint)
+        return _read_payload(file_path) if os.path.isfile(file_path) else None
+    legacy_file = legacy_file_for(path)
+    if os.path.isfile(legacy_file):
+        return _read_payload(legacy_file).get(endpoint)
+    return None
+
+
+def _migrate_legacy_file(path: str) -> str:
+    """ Split a legacy single-file cache into per-section files and remove it (caller holds entity_lock). """
+    store_dir = store_dir_for(path)
+    legacy_file = legacy_file_for(path)
+    os.makedirs(store_dir, exist_ok=True)
+    if os.path.isfile(legacy_file):
+        version = os.stat(legacy_file)
+        for endpoint, payload in _read_payload(legacy_file).items():
+            file_path = section_file(store_dir, endpoint)
+            if not os.path.exists(file_path):
+                _write_payload(file_path, payload)
+                _keep_version(file_path, version)
+        os.remove(legacy_file)
+    return store_dir
+
+
+def write_section(path: str, endpoint: str, payload: Any, encoder: Optional[type] = None) -> None:
+    """ Atomically write one endpoint section; other sections of the entity are left untouched. """
+    write_sections(path, {endpoint: payload}, encoder)
+
+
+def write_sections(path: str, sections: Dict[str, Any], encoder: Optional[type] = None) -> None:
+    scope = current_refresh_scope()
+    with entity_lock(path):
+        store_dir = _migrate_legacy_file(path)
+        for endpoint, payload in sections.items():
+            if scope is not None:
+                key = section_key(path, endpoint)
+                if not scope.may_replace(key, section_version(store_dir, endpoint)):
+                    print(f"Section {endpoint} of {store_dir} was refreshed elsewhere, keeping that version")
+                    continue
+                scope.written.add(key)
+            _write_payload(section_file(store_dir, endpoint), payload, encoder)
+
+
+def read_all_sections(path: str) -> Dict[str, Any]:
+    """ Assemble every section of an entity into one dict (backups, diffs, exports). """
+    return {endpoint: read_section(path, endpoint) for endpoint in sorted(list_sections(path))}
+
+
+def convert_store(path: str) -> int:
+    """
+    Rewrite every section of an entity in the active serialization format
+    (legacy single files are migrated on the way). Returns the number of sections.
+    """
+    with entity_lock(path):
+        store_dir = _migrate_legacy_file(path)
+        sections = list_sections(store_dir)
+        for endpoint in sections:
+            file_path = section_file(store_dir, endpoint)
+            version = os.stat(file_path)
+            _write_payload(file_path, _read_payload(file_path))
+            _keep_version(file_path, version)
+    return len(sections)
+
+
+def delete_store(path: str) -> None:
+    with entity_lock(path):
+        store_dir = store_dir_for(path)
+        if os.path.isdir(store_dir):
+            shutil.rmtree(store_dir)
+        legacy_file = legacy_file_for(path)
+        if os.path.isfile(legacy_file):
+            os.remove(legacy_file)
+
+
+def restore_store(path: str, backup_file: str) -> None:
+    """
+    Replace an entity's cache with a backup (a single-file cache), so readers see either the
+    old or the restored cache: the backup is copied next to the store and renamed into
+    place, and only then is the sharded store, which readers prefer, moved aside and removed.
+    """
+    store_dir = store_dir_for(path)
+    legacy_file = legacy_file_for(path)
+    parent_dir = os.path.dirname(legacy_file) or "."
+    os.makedirs(parent_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=parent_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copy2(backup_file, tmp_path)
+        with entity_lock(path):
+            os.replace(tmp_path, legacy_file)
+            if os.path.isdir(store_dir):
+                trash_dir = tempfile.mkdtemp(dir=parent_dir, prefix=".restore-")
+                os.rename(store_dir, os.path.join(trash_dir, os.path.basename(store_dir)))
+                shutil.rmtree(trash_dir)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class SectionedCache(MutableMapping):
+    """
+    Dict-like view over an entity's sharded cache. Sections are deserialized on first
+    access and only sections assigned through `cache[endpoint] = ...` are written back
+    by `flush` (see `utils.save_response_to_file`).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sections: Optional[Set[str]] = None
+        self._loaded: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+
+    def _section_names(self) -> Set[str]:
+        if self._sections is None:
+            self._sections = list_sections(self.path)
+        return self._sections
+
+    def __contains__(self, endpoint: object) -> bool:
+        if endpoint in self._dirty:
+            return True
+        # a section being refreshed reads as missing, so the endpoint recomputes it
+        scope = current_refresh_scope()
+        if scope is not None and isinstance(endpoint, str) and scope.bypasses(section_key(self.path, endpoint)):
+            return False
+        return endpoint in self._loaded or endpoint in self._section_names()
+
+    def __getitem__(self, endpoint: str) -> Any:
+        if endpoint not in self._loaded:
+            if endpoint not in self._section_names():
+                raise KeyError(endpoint)
+            self._loaded[endpoint] = read_section(self.path, endpoint)
+            if collecting_stale_reads():
+                note_section_read(section_key(self.path, endpoint), section_version(self.path, endpoint))
+        return self._loaded[endpoint]
+
+    def __setitem__(self, endpoint: str, payload: Any) -> None:
+        self._loaded[endpoint] = payload
+        self._section_names().add(endpoint)
+        self._dirty.add(endpoint)
+
+    def __delitem__(self, endpoint: str) -> None:
+        if endpoint not in self:
+            raise KeyError(endpoint)
+        self._loaded.pop(endpoint, None)
+        self._dirty.discard(endpoint)
+        self._section_names().discard(endpoint)
+        with entity_lock(self.path):
+            store_dir = _migrate_legacy_file(self.path)
+            file_path = section_file(store_dir, endpoint)
+            if os.path.isfile(file_path):
+                os.remove(file_path)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self._section_names()))
+
+    def __len__(self) -> int:
+        return len(self._section_names())
+
+    def flush(self, path: Optional[str] = None, encoder: Optional[type] = None) -> None:
+        """ Persist the sections modified since the cache was opened. """
+        target = path or self.path
+        write_sections(target, {endpoint: self._loaded[endpoint] for endpoint in sorted(self._dirty)}, encoder)
+        self._dirty.clear()
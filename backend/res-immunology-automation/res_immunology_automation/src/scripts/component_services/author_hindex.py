@@ -0,0 +1,139 @@
+from typing import *
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from cache_store import merge_json_file, read_json_file
+from component_services.rate_limit import TokenBucket
+
+SEMANTIC_SCHOLAR_AUTHOR_SEARCH_URL: str = "https://api.semanticscholar.org/graph/v1/author/search"
+SEMANTIC_SCHOLAR_API_KEY = os.getenv("SEMANTIC_SCHOLAR_API_KEY")
+# Semantic Scholar allows about one request per second; the bucket refills at this rate
+SEMANTIC_SCHOLAR_REQUESTS_PER_SECOND: float = float(os.getenv("SEMANTIC_SCHOLAR_REQUESTS_PER_SECOND", "1"))
+SEMANTIC_SCHOLAR_BURST: int = int(os.getenv("SEMANTIC_SCHOLAR_BURST", "1"))
+SEMANTIC_SCHOLAR_CONCURRENCY: int = int(os.getenv("SEMANTIC_SCHOLAR_CONCURRENCY", "2"))
+SEMANTIC_SCHOLAR_TIMEOUT: int = 20
+SEMANTIC_SCHOLAR_MAX_ATTEMPTS: int = 3
+# h-indexes are looked up again once they are older than this
+AUTHOR_HINDEX_TTL: int = int(os.getenv("AUTHOR_HINDEX_TTL", str(30 * 24 * 60 * 60)))
+AUTHOR_HINDEX_FILE: str = os.getenv(
+    "AUTHOR_HINDEX_FILE", os.path.join("cached_data_json", "author_hindex.json")
+)
+
+
+def _author_key(author_name: str) -> str:
+    return " ".join(author_name.strip().lower().split())
+
+
+def _newer_entry(stored: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+    return entry if entry.get("fetched_at", 0) >= stored.get("fetched_at", 0) else stored
+
+
+class AuthorHIndexStore:
+    """
+    Persistent author name -> (h-index, Semantic Scholar author id) store.
+
+    Entries younger than AUTHOR_HINDEX_TTL are served from the store file; the names left
+    in a batch are deduplicated and looked up concurrently, every request taking a token
+    from the process wide Semantic Scholar bucket. Failed lookups are not stored.
+    """
+
+    def __init__(self, store_file: str = AUTHOR_HINDEX_FILE, ttl: int = AUTHOR_HINDEX_TTL,
+                 concurrency: int = SEMANTIC_SCHOLAR_CONCURRENCY):
+        self.store_file = store_file
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self._bucket = TokenBucket(SEMANTIC_SCHOLAR_REQUESTS_PER_SECOND, SEMANTIC_SCHOLAR_BURST)
+        self._authors: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        self._authors = read_json_file(self.store_file)
+
+    def _save(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        """ Add entries to the store file, keeping the newer lookup when another process saved the same author. """
+        try:
+            self._authors = merge_json_file(self.store_file, entries, _newer_entry, indent=2)
+        except OSError as e:
+            print(f"Could not persist author h-indexes: {e}")
+            self._authors.update(entries)
+
+    def _fresh(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._authors.get(key)
+        if entry is None or time.time() - entry.get("fetched_at", 0) > self.ttl:
+            return None
+        return entry
+
+    def _search(self, author_name: str) -> Optional[Dict[str, Any]]:
+        params = {"query": author_name, "fields": "authorId,name,hIndex"}
+        headers = {"x-api-key": SEMANTIC_SCHOLAR_API_KEY} if SEMANTIC_SCHOLAR_API_KEY else {}
+        for attempt in range(SEMANTIC_SCHOLAR_MAX_ATTEMPTS):
+            self._bucket.acquire()
+            try:
+                response = requests.get(SEMANTIC_SCHOLAR_AUTHOR_SEARCH_URL, params=params, headers=headers,
+                                        timeout=SEMANTIC_SCHOLAR_TIMEOUT)
+                if response.status_code == 429 or response.status_code >= 500:
+                    time.sleep(2 ** attempt)
+                    continue
+                response.raise_for_status()
+                data = response.json()
+            except (requests.RequestException, ValueError) as e:
+                print(f"Error fetching h-index for {author_name}: {e}")
+                return None
+
+            author = data["data"][0] if data.get("data") else {}  # Take the first match
+            return {"hindex": author.get("hIndex") or 0, "author_id": author.get("authorId") or 0,
+                    "fetched_at": time.time()}
+        print(f"Semantic Scholar kept rate limiting the h-index lookup of {author_name}")
+        return None
+
+    def lookup(self, author_names: Sequence[Optional[str]]) -> List[Tuple[int, Any]]:
+        """
+        Return the (h-index, author id) of every author in the batch.
+
+        Args:
+            author_names (Sequence[Optional[str]]): Author names; empty names map to (0, 0).
+
+        Returns:
+            List[Tuple[int, Any]]: Aligned with `author_names`; (0, 0) when the author is unknown.
+        """
+        keys = [_author_key(name) if isinstance(name, str) and name.strip() else "" for name in author_names]
+        names: Dict[str, str] = {}
+        for key, name in zip(keys, author_names):
+            if key:
+                names.setdefault(key, name)
+        with self._lock:
+            missing = [key for key in names if self._fresh(key) is None]
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                found = dict(zip(missing, executor.map(lambda key: self._search(names[key]), missing)))
+            found = {key: entry for key, entry in found.items() if entry is not None}
+            if found:
+                with self._lock:
+                    self._save(found)
+
+        with self._lock:
+            results = []
+            for key in keys:
+                entry = self._authors.get(key) if key else None
+                results.append((entry["hindex"], entry["author_id"]) if entry else (0, 0))
+            return results
+
+
+_author_hindex_store: Optional[AuthorHIndexStore] = None
+_author_hindex_store_lock = threading.Lock()
+
+
+def get_author_hindex_store() -> AuthorHIndexStore:
+    """ Return the process wide author h-index store, loading the store file on first use. """
+    global _author_hindex_store
+    if _author_hindex_store is None:
+        with _author_hindex_store_lock:
+            if _author_hindex_store is None:
+                _author_hindex_store = AuthorHIndexStore()
+    return _author_hindex_store
@@ -0,0 +1,148 @@
+from typing import *
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+
+OPEN_CITATIONS_API = os.getenv('OPEN_CITATIONS_API')
+OPEN_CITATIONS_COUNT_URL: str = "https://opencitations.net/index/api/v2/citation-count/{identifier}"
+# Counts change slowly; they are refreshed after this many seconds
+CITATION_COUNT_TTL: int = int(os.getenv("CITATION_COUNT_TTL", str(7 * 24 * 60 * 60)))
+CITATION_COUNT_CACHE_SIZE: int = int(os.getenv("CITATION_COUNT_CACHE_SIZE", "100000"))
+# Maximum number of concurrent requests to OpenCitations
+CITATION_FETCH_CONCURRENCY: int = int(os.getenv("CITATION_FETCH_CONCURRENCY", "8"))
+CITATION_REQUEST_TIMEOUT: int = 20
+CITATION_MAX_ATTEMPTS: int = 3
+CITATION_RETRY_BACKOFF: float = 1.0
+
+
+def citation_identifier(value: str) -> str:
+    """ '12345' -> 'pmid:12345', '10.1000/xyz' -> 'doi:10.1000/xyz'; prefixed ids are kept as they are. """
+    value = str(value).strip()
+    if ":" in value.split("/", 1)[0]:
+        return value
+    if value.startswith("10."):
+        return f"doi:{value}"
+    return f"pmid:{value}"
+
+
+class CitationCountProvider:
+    """
+    Citation counts (OpenCitations index API v2) for batches of PMIDs/DOIs.
+
+    A batch is fetched CITATION_FETCH_CONCURRENCY requests at a time; counts are kept for
+    CITATION_COUNT_TTL seconds and an identifier that is already being fetched is not
+    requested twice. Failed lookups are not cached.
+    """
+
+    def __init__(self, ttl: int = CITATION_COUNT_TTL, max_size: int = CITATION_COUNT_CACHE_SIZE,
+                 concurrency: int = CITATION_FETCH_CONCURRENCY):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._counts: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="citation-counts")
+
+    def _cached(self, identifier: str) -> Optional[int]:
+        entry = self._counts.get(identifier)
+        if entry is None:
+            return None
+        fetched_at, count = entry
+        if time.time() - fetched_at > self.ttl:
+            del self._counts[identifier]
+            return None
+        self._counts.move_to_end(identifier)
+        return count
+
+    def _store(self, identifier: str, count: int) -> None:
+        with self._lock:
+            self._counts[identifier] = (time.time(), count)
+            self._counts.move_to_end(identifier)
+            while len(self._counts) > self.max_size:
+                self._counts.popitem(last=False)
+
+    @staticmethod
+    def _download(identifier: str) -> Optional[int]:
+        headers = {"authorization": OPEN_CITATIONS_API} if OPEN_CITATIONS_API else {}
+        url = OPEN_CITATIONS_COUNT_URL.format(identifier=identifier)
+        for attempt in range(CITATION_MAX_ATTEMPTS):
+            try:
+                response = requests.get(url, headers=headers, timeout=CITATION_REQUEST_TIMEOUT)
+            except requests.RequestException as e:
+                print(f"Error fetching citation count for {identifier}: {e}")
+            else:
+                if response.status_code == 200:
+                    try:
+                        data = response.json()
+                        return int(data[0]['count']) if data else 0
+                    except (ValueError, KeyError, TypeError) as e:
+                        print(f"Unexpected OpenCitations response for {identifier}: {e}")
+                        return None
+                if response.status_code != 429 and response.status_code < 500:
+                    print(f"OpenCitations returned {response.status_code} for {identifier}")
+                    return None
+            time.sleep(CITATION_RETRY_BACKOFF * (2 ** attempt))
+        return None
+
+    def _fetch(self, identifier: str) -> Optional[int]:
+        count = self._download(identifier)
+        if count is not None:
+            self._store(identifier, count)
+        return count
+
+    def _future_for(self, identifier: str) -> Future:
+        with self._lock:
+            count = self._cached(identifier)
+            if count is not None:
+                future: Future = Future()
+                future.set_result(count)
+                return future
+            future = self._in_flight.get(identifier)
+            if future is None:
+                future = self._executor.submit(self._fetch, identifier)
+                self._in_flight[identifier] = future
+                future.add_done_callback(lambda _, identifier=identifier: self._forget(identifier))
+            return future
+
+    def _forget(self, identifier: str) -> None:
+        with self._lock:
+            self._in_flight.pop(identifier, None)
+
+    def prefetch(self, ids: Iterable[str]) -> None:
+        """ Start fetching the counts of a batch without waiting for them. """
+        for value in ids:
+            if value:
+                self._future_for(citation_identifier(value))
+
+    def counts(self, ids: Sequence[str]) -> List[Optional[int]]:
+        """
+        Return the citation count of every PMID/DOI in the batch.
+
+        Args:
+            ids (Sequence[str]): PMIDs or DOIs (bare or prefixed with 'pmid:'/'doi:').
+
+        Returns:
+            List[Optional[int]]: Counts aligned with `ids`; None where the count could not be fetched.
+        """
+        futures = {identifier: self._future_for(identifier)
+                   for identifier in dict.fromkeys(citation_identifier(value) for value in ids if value)}
+        counts = {identifier: future.result() for identifier, future in futures.items()}
+        return [counts[citation_identifier(value)] if value else None for value in ids]
+
+
+_citation_count_provider: Optional[CitationCountProvider] = None
+_citation_count_provider_lock = threading.Lock()
+
+
+def get_citation_count_provider() -> CitationCountProvider:
+    """ Return the process wide citation count provider, creating it on first use. """
+    global _citation_count_provider
+    if _citation_count_provider is None:
+        with _citation_count_provider_lock:
+            if _citation_count_provider is None:
+                _citation_count_provider = CitationCountProvider()
+    return _citation_count_provider
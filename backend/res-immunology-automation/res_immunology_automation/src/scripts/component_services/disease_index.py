@@ -0,0 +1,119 @@
+from typing import *
+import json
+import os
+import threading
+
+from cache_store import merge_json_file
+
+DISEASE_DATA_DIR: str = os.getenv(
+    "DISEASE_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "disease_data")
+)
+DISEASES_EFO_FILE: str = os.path.join(DISEASE_DATA_DIR, "diseases_efo.jsonl")
+DISEASES_SYNONYMS_FILE: str = os.path.join(DISEASE_DATA_DIR, "diseases_synonyms.json")
+# Names resolved remotely (OpenTargets search) are written back here so they are only resolved once
+RESOLVED_DISEASES_FILE: str = os.getenv(
+    "RESOLVED_DISEASES_FILE", os.path.join(DISEASE_DATA_DIR, "diseases_resolved_ids.json")
+)
+
+
+def _normalize(name: str) -> str:
+    return " ".join(name.strip().lower().replace("_", " ").split())
+
+
+def id_priority(disease_id: str) -> int:
+    # Prioritize the IDs: EFO > MONDO > others
+    if "EFO" in disease_id:
+        return 0
+    if "MONDO" in disease_id:
+        return 1
+    return 2
+
+
+class DiseaseNameIndex:
+    """
+    In-memory disease name -> ontology id (EFO/MONDO/...) index built from diseases_efo.jsonl,
+    extended with the curated synonyms and with names previously resolved remotely.
+    """
+
+    def __init__(self, jsonl_file: str = DISEASES_EFO_FILE, synonyms_file: str = DISEASES_SYNONYMS_FILE,
+                 resolved_file: str = RESOLVED_DISEASES_FILE):
+        self.resolved_file = resolved_file
+        self._names: Dict[str, str] = {}
+        self._synonyms: Dict[str, str] = {}
+        self._resolved: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load_names(jsonl_file)
+        self._load_synonyms(synonyms_file)
+        self._load_resolved(resolved_file)
+
+    def _load_names(self, jsonl_file: str) -> None:
+        if not os.path.exists(jsonl_file):
+            print(f"Disease ontology file not found: {jsonl_file}")
+            return
+        with open(jsonl_file, 'r') as file:
+            for line in file:
+                data = json.loads(line)
+                name = _normalize(data['name'])
+                disease_id = data['id']
+                current = self._names.get(name)
+                if current is None or id_priority(disease_id) < id_priority(current):
+                    self._names[name] = disease_id
+
+    def _load_synonyms(self, synonyms_file: str) -> None:
+        if not os.path.exists(synonyms_file):
+            return
+        with open(synonyms_file, 'r') as file:
+            diseases = json.load(file).get("diseases", {})
+        for disease_name, entry in diseases.items():
+            disease_id = self._names.get(_normalize(disease_name))
+            if disease_id is None:
+                continue
+            for synonym in entry.get("synonyms", []):
+                self._synonyms.setdefault(_normalize(synonym), disease_id)
+
+    def _load_resolved(self, resolved_file: str) -> None:
+        if not os.path.exists(resolved_file):
+            return
+        try:
+            with open(resolved_file, 'r') as file:
+                self._resolved = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Ignoring unreadable resolved diseases file {resolved_file}: {e}")
+
+    def lookup(self, disease_name: str) -> Optional[str]:
+        """
+        Return the ontology id for a disease name (exact name, then remotely resolved names,
+        then curated synonyms), or None if the name is unknown locally.
+        """
+        name = _normalize(disease_name)
+        return self._names.get(name) or self._resolved.get(name) or self._synonyms.get(name)
+
+    def remember(self, disease_name: str, disease_id: str) -> None:
+        """
+        Record a remotely resolved name and persist it so later processes resolve it locally.
+        """
+        name = _normalize(disease_name)
+        with self._lock:
+            if self._resolved.get(name) == disease_id:
+                return
+            self._resolved[name] = disease_id
+            try:
+                # keeps the names other processes resolved since this one loaded the file
+                self._resolved = merge_json_file(self.resolved_file, {name: disease_id}, indent=2)
+            except OSError as e:
+                print(f"Could not persist resolved disease id for {disease_name}: {e}")
+
+
+_disease_index: Optional[DiseaseNameIndex] = None
+_disease_index_lock = threading.Lock()
+
+
+def get_disease_index() -> DiseaseNameIndex:
+    """ Return the process wide disease name index, building it on first use. """
+    global _disease_index
+    if _disease_index is None:
+        with _disease_index_lock:
+            if _disease_index is None:
+                _disease_index = DiseaseNameIndex()
+    return _disease_index
@@ -4,6 +4,8 @@ from collections import defaultdict
 import json
 import requests
 import os
+import threading
+from component_services.disease_index import DISEASES_EFO_FILE, id_priority
 
 AdjacencyList = Dict[str, List[str]]
 
@@ -142,6 +144,165 @@ def extract_data_by_ids(jsonl_file: str, ids_to_extract: Set[str],all_nodes:Set[
     return extracted_data
 
 
+class DiseaseOntology:
+    """
+    In-memory disease ontology loaded once from diseases_efo.jsonl.
+
+    Nodes are integer indexed: `parents[i]`/`children[i]` hold the indices of the direct
+    parents/children of node i and `ancestor_closure[i]` all of its ancestors. A name -> index
+    hash map resolves disease names with the same EFO > MONDO > other priority as
+    `utils.find_disease_id_by_name`.
+    """
+
+    def __init__(self, jsonl_file: str = DISEASES_EFO_FILE):
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        # line number of each node in the JSONL file, used to return records in file order
+        self.positions: List[int] = []
+        self.parents: List[Tuple[int, ...]] = []
+        self.children: List[Tuple[int, ...]] = []
+        self.ancestor_closure: List[FrozenSet[int]] = []
+        self._index: Dict[str, int] = {}
+        self._name_to_index: Dict[str, int] = {}
+        self._load(jsonl_file)
+        self._compute_ancestor_closures()
+
+    def _node(self, node_id: str) -> int:
+        index = self._index.get(node_id)
+        if index is None:
+            index = len(self.ids)
+            self._index[node_id] = index
+            self.ids.append(node_id)
+            self.names.append("")
+            self.positions.append(-1)
+        return index
+
+    def _load(self, jsonl_file: str) -> None:
+        raw_parents: Dict[int, List[int]] = {}
+        with open(jsonl_file, 'r') as file:
+            for position, line in enumerate(file):
+                data = json.loads(line)
+                index = self._node(data['id'])
+                self.names[index] = data['name']
+                self.positions[index] = position
+                raw_parents[index] = [self._node(parent_id) for parent_id in data.get('parentIds', [])]
+
+                name = data['name'].strip().lower()
+                current = self._name_to_index.get(name)
+                if current is None or id_priority(data['id']) < id_priority(self.ids[current]):
+                    self._name_to_index[name] = index
+
+        raw_children: List[List[int]] = [[] for _ in self.ids]
+        for index, parent_indices in raw_parents.items():
+            for parent in parent_indices:
+                raw_children[parent].append(index)
+        self.parents = [tuple(raw_parents.get(index, ())) for index in range(len(self.ids))]
+        self.children = [tuple(child_indices) for child_indices in raw_children]
+
+    def _compute_ancestor_closures(self) -> None:
+        closures: List[Optional[FrozenSet[int]]] = [None] * len(self.ids)
+        # nodes whose parents are still being expanded; a parent cycle stops at them
+        in_progress: Set[int] = set()
+        for root in range(len(self.ids)):
+            if closures[root] is not None:
+                continue
+            # iterative post-order DFS so deep hierarchies do not hit the recursion limit
+            stack: List[Tuple[int, bool]] = [(root, False)]
+            while stack:
+                index, expanded = stack.pop()
+                if closures[index] is not None:
+                    continue
+                if expanded:
+                    closure: Set[int] = set(self.parents[index])
+                    for parent in self.parents[index]:
+                        closure |= closures[parent] or frozenset()
+                    closures[index] = frozenset(closure)
+                    in_progress.discard(index)
+                    continue
+                if index in in_progress:
+                    continue
+                in_progress.add(index)
+                stack.append((index, True))
+                for parent in self.parents[index]:
+                    if closures[parent] is None and parent not in in_progress:
+                        stack.append((parent, False))
+        self.ancestor_closure = [closure or frozenset() for closure in closures]
+
+    def find_id(self, disease_name: str) -> Optional[str]:
+        index = self._name_to_index.get(disease_name.strip().lower())
+        return self.ids[index] if index is not None else None
+
+    def ancestors(self, node_id: str) -> Set[str]:
+        index = self._index.get(node_id)
+        if index is None:
+            return set()
+        return {self.ids[ancestor] for ancestor in self.ancestor_closure[index]}
+
+    def direct_children(self, node_id: str) -> Set[str]:
+        index = self._index.get(node_id)
+        if index is None:
+            return set()
+        return {self.ids[child] for child in self.children[index]}
+
+    def descendants(self, node_id: str) -> Set[str]:
+        index = self._index.get(node_id)
+        if index is None:
+            return set()
+        seen: Set[int] = set()
+        stack: List[int] = list(self.children[index])
+        while stack:
+            child = stack.pop()
+            if child not in seen:
+                seen.add(child)
+                stack.extend(self.children[child])
+        return {self.ids[child] for child in seen}
+
+    def extract(self, ids_to_extract: Set[str], all_nodes: Set[str], node_type: str) -> List[Dict]:
+        """
+        In-memory equivalent of `extract_data_by_ids`, records come back in file order.
+        """
+        indices = sorted((self._index[node_id] for node_id in ids_to_extract
+                          if node_id in self._index and self.positions[self._index[node_id]] >= 0),
+                         key=lambda index: self.positions[index])
+        return [
+            {
+                "id": self.ids[index],
+                "parentIds": [self.ids[parent] for parent in self.parents[index] if self.ids[parent] in all_nodes],
+                "name": self.names[index],
+                "nodeType": node_type,
+            }
+            for index in indices
+        ]
+
+    def ontology_for(self, disease_name: str) -> List[Dict]:
+        """
+        Build the `/disease-profile/ontology/` payload (children, anchor, ancestors) for a disease.
+        """
+        efo_id = self.find_id(disease_name)
+        if efo_id is None:
+            return []
+        ancestors = self.ancestors(efo_id)
+        descendants = self.direct_children(efo_id)
+        combined_set = ancestors | descendants | {efo_id}
+        return (self.extract(descendants, combined_set, "child")
+                + self.extract({efo_id}, combined_set, "anchor")
+                + self.extract(ancestors, combined_set, "ancestor"))
+
+
+_disease_ontology: Optional[DiseaseOntology] = None
+_disease_ontology_lock = threading.Lock()
+
+
+def get_disease_ontology_engine() -> DiseaseOntology:
+    """ Return the process wide disease ontology, loading it on first use. """
+    global _disease_ontology
+    if _disease_ontology is None:
+        with _disease_ontology_lock:
+            if _disease_ontology is None:
+                _disease_ontology = DiseaseOntology()
+    return _disease_ontology
+
+
 def get_disease_description_strapi(disease_name: str) -> Optional[str]:
     """
     Fetches the description of a disease from Strapi based on the provided disease name.
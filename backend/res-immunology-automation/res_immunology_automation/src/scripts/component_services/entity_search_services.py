@@ -1,43 +1,45 @@
 
-from typing import Dict, List
+from typing import *
+from collections import OrderedDict
 from duckdb import DuckDBPyConnection
-from pandas import DataFrame
 import os
+import threading
 import duckdb
 from fastapi import HTTPException
 
 db_file_path = "/app/database/entity_search.db"
 gene_db_file_path= "/app/database/geneSearch/duckdb.db"
+# Recent (search term, page) results kept per database, per worker
+LEXICAL_SEARCH_CACHE_SIZE: int = int(os.getenv("LEXICAL_SEARCH_CACHE_SIZE", "2048"))
 # To query the phenotype id and name
 primary_phenotype_query = """
 SELECT
    id,
    name,
    CASE
-       WHEN id ILIKE (? || '%') THEN 'id: ' || id
-       WHEN dbXRefs_text ILIKE ('%' || ? || '%') THEN 'dbXRef: ' || dbXRefs_text
-       WHEN name ILIKE ? THEN 'name: ' || name
-       WHEN name ILIKE (? || '%') THEN 'name: ' || name
-       WHEN name ILIKE ('%' || ' ' || ? || '%') THEN 'name: ' || name
+       WHEN id ILIKE ($1 || '%') THEN 'id: ' || id
+       WHEN dbXRefs_text ILIKE ('%' || $1 || '%') THEN 'dbXRef: ' || dbXRefs_text
+       WHEN name ILIKE $1 THEN 'name: ' || name
+       WHEN name ILIKE ($1 || '%') THEN 'name: ' || name
+       WHEN name ILIKE ('%' || ' ' || $1 || '%') THEN 'name: ' || name
        ELSE NULL
-   END AS matched_column
+   END AS matched_column,
+   CASE
+       WHEN name ILIKE $1 THEN 1
+       WHEN name ILIKE ($1 || '%') THEN 2
+       WHEN name ILIKE ('%' || ' ' || $1 || '%') THEN 3
+       WHEN id ILIKE ($1 || '%') THEN 4
+       WHEN dbXRefs_text ILIKE ('%' || $1 || '%') THEN 5
+       ELSE 6
+   END AS rank
 FROM
    phenotypes
 WHERE
-   id ILIKE (? || '%') OR
-   dbXRefs_text ILIKE ('%' || ? || '%') OR
-   name ILIKE ? OR
-   name ILIKE (? || '%') OR
-   name ILIKE ('%' || ' ' || ? || '%')
-ORDER BY
-   CASE
-       WHEN name ILIKE ? THEN 1
-       WHEN name ILIKE (? || '%') THEN 2
-       WHEN name ILIKE ('%' || ' ' || ? || '%') THEN 3
-       WHEN id ILIKE (? || '%') THEN 4
-       WHEN dbXRefs_text ILIKE ('%' || ? || '%') THEN 5
-       ELSE 6
-   END
+   id ILIKE ($1 || '%') OR
+   dbXRefs_text ILIKE ('%' || $1 || '%') OR
+   name ILIKE $1 OR
+   name ILIKE ($1 || '%') OR
+   name ILIKE ('%' || ' ' || $1 || '%')
 """
 
 # To query synonyms
@@ -46,13 +48,14 @@ SELECT
    id,
    name,
    CASE
-       WHEN synonyms_text ILIKE (? || '%') OR synonyms_text ILIKE ('%' || ' ' || ? || '%') THEN 'synonyms: ' || synonyms_text
+       WHEN synonyms_text ILIKE ($1 || '%') OR synonyms_text ILIKE ('%' || ' ' || $1 || '%') THEN 'synonyms: ' || synonyms_text
        ELSE NULL
-   END AS matched_column
+   END AS matched_column,
+   0 AS rank
 FROM
    phenotypes
 WHERE
-   synonyms_text ILIKE (? || '%') OR synonyms_text ILIKE ('%' || ' ' || ? || '%')
+   synonyms_text ILIKE ($1 || '%') OR synonyms_text ILIKE ('%' || ' ' || $1 || '%')
 """
 
 # Full text search query
@@ -62,13 +65,25 @@ WITH fts_results AS (
         id, 
         name,
         synonyms_text,
-        fts_main_phenotypes.match_bm25(id, ?, conjunctive := 1, fields := 'name') AS name_score,
-        fts_main_phenotypes.match_bm25(id, ?, conjunctive := 1, fields := 'synonyms_text') AS synonym_score
+        fts_main_phenotypes.match_bm25(id, $1, conjunctive := 1, fields := 'name') AS name_score,
+        fts_main_phenotypes.match_bm25(id, $1, conjunctive := 1, fields := 'synonyms_text') AS synonym_score
     FROM phenotypes
 )
-SELECT id, name, matched_column
+SELECT
+    id,
+    name,
+    matched_column,
+    row_number() OVER (
+        ORDER BY
+            CASE
+                WHEN matched_column ILIKE 'name:%' THEN 1
+                WHEN matched_column ILIKE 'synonyms:%' THEN 2
+            END,
+            score DESC,
+            id
+    ) AS rank
 FROM (
-    SELECT 
+    SELECT
         id,
         name,
         'name: ' || name AS matched_column,
@@ -76,7 +91,7 @@ FROM (
     FROM fts_results
     WHERE name_score IS NOT NULL
     UNION
-    SELECT 
+    SELECT
         id,
         name,
         'synonyms: ' || synonyms_text AS matched_column,
@@ -84,75 +99,67 @@ FROM (
     FROM fts_results
     WHERE synonym_score IS NOT NULL
 ) AS all_matches
-ORDER BY 
-    CASE 
-        WHEN matched_column ILIKE 'name:%' THEN 1
-        WHEN matched_column ILIKE 'synonyms:%' THEN 2
-    END,
-    score DESC
 """
 
 # catchall query
-substring_query = """
+substring_phenotype_query = """
 SELECT
    id,
    name,
    CASE
-       WHEN name ILIKE ('%' || ? || '%') THEN 'name: ' || name
-       WHEN synonyms_text ILIKE ('%' || ? || '%') THEN 'synonyms: ' || synonyms_text
+       WHEN name ILIKE ('%' || $1 || '%') THEN 'name: ' || name
+       WHEN synonyms_text ILIKE ('%' || $1 || '%') THEN 'synonyms: ' || synonyms_text
        ELSE NULL
-   END AS matched_column
+   END AS matched_column,
+   CASE
+       WHEN name ILIKE ('%' || $1 || '%') THEN 1
+       WHEN synonyms_text ILIKE ('%' || $1 || '%') THEN 2
+       ELSE 3
+   END AS rank
 FROM
    phenotypes
 WHERE
-   name ILIKE ('%' || ? || '%') OR
-   synonyms_text ILIKE ('%' || ? || '%')
-ORDER BY
-   CASE
-       WHEN name ILIKE ('%' || ? || '%') THEN 1
-       WHEN synonyms_text ILIKE ('%' || ? || '%') THEN 2
-       ELSE 3
-   END
+   name ILIKE ('%' || $1 || '%') OR
+   synonyms_text ILIKE ('%' || $1 || '%')
 """
 primary_prefix_query = """
 SELECT
    id,
    approvedSymbol,
    CASE
-       WHEN id ILIKE (? || '%') THEN 'id:' || id
-       WHEN approvedSymbol ILIKE ? THEN 'approvedSymbol:' || approvedSymbol
-       WHEN approvedSymbol ILIKE (? || '%') THEN 'approvedSymbol:' || approvedSymbol
-       WHEN approvedSymbol ILIKE ('%' || ? || '%') THEN 'approvedSymbol:' || approvedSymbol
+       WHEN id ILIKE ($1 || '%') THEN 'id:' || id
+       WHEN approvedSymbol ILIKE $1 THEN 'approvedSymbol:' || approvedSymbol
+       WHEN approvedSymbol ILIKE ($1 || '%') THEN 'approvedSymbol:' || approvedSymbol
+       WHEN approvedSymbol ILIKE ('%' || $1 || '%') THEN 'approvedSymbol:' || approvedSymbol
        WHEN EXISTS (
-       SELECT 1 FROM UNNEST(dbXrefs) AS unnest WHERE unnest.id ILIKE (? || '%')
-           ) THEN 'dbXref:' || (SELECT unnest.id FROM UNNEST(dbXrefs) AS unnest WHERE unnest.id ILIKE (? || '%') LIMIT 1)
+       SELECT 1 FROM UNNEST(dbXrefs) AS unnest WHERE unnest.id ILIKE ($1 || '%')
+           ) THEN 'dbXref:' || (SELECT unnest.id FROM UNNEST(dbXrefs) AS unnest WHERE unnest.id ILIKE ($1 || '%') LIMIT 1)
        ELSE NULL
-   END AS matched_column
+   END AS matched_column,
+   CASE
+       WHEN approvedSymbol ILIKE $1 THEN 1
+       WHEN id ILIKE ($1 || '%') THEN 2
+       WHEN approvedSymbol ILIKE ($1 || '%') THEN 3
+       WHEN approvedSymbol ILIKE ('%' || $1 || '%') THEN 4
+       WHEN EXISTS (
+       SELECT 1
+       FROM UNNEST(dbXrefs) AS unnest
+       WHERE unnest.id ILIKE ($1 || '%')
+   ) THEN 5
+       ELSE 6
+   END AS rank
 FROM
    genes
 WHERE
-   id ILIKE (? || '%') OR
-   approvedSymbol ILIKE ? OR
-   approvedSymbol ILIKE (? || '%') OR
-   approvedSymbol ILIKE ('%' || ? || '%') OR
+   id ILIKE ($1 || '%') OR
+   approvedSymbol ILIKE $1 OR
+   approvedSymbol ILIKE ($1 || '%') OR
+   approvedSymbol ILIKE ('%' || $1 || '%') OR
    EXISTS (
        SELECT 1
        FROM UNNEST(dbXrefs) AS unnest
-       WHERE unnest.id ILIKE (? || '%')
+       WHERE unnest.id ILIKE ($1 || '%')
    )
-ORDER BY
-   CASE
-       WHEN approvedSymbol ILIKE ? THEN 1
-       WHEN id ILIKE (? || '%') THEN 2
-       WHEN approvedSymbol ILIKE (? || '%') THEN 3
-       WHEN approvedSymbol ILIKE ('%' || ? || '%') THEN 4
-       WHEN EXISTS (
-       SELECT 1
-       FROM UNNEST(dbXrefs) AS unnest
-       WHERE unnest.id ILIKE (? || '%')
-   ) THEN 5
-       ELSE 6
-   END
 """
 
 
@@ -162,31 +169,32 @@ SELECT
    id,
    approvedSymbol,
    CASE
-       WHEN array_length(array_filter(alternativeGenes, x -> x ILIKE (? || '%'))) > 0
-           THEN 'alternativeGenes: ' || (array_filter(alternativeGenes, x -> x ILIKE (? || '%')))[1]
+       WHEN array_length(array_filter(alternativeGenes, x -> x ILIKE ($1 || '%'))) > 0
+           THEN 'alternativeGenes: ' || (array_filter(alternativeGenes, x -> x ILIKE ($1 || '%')))[1]
        WHEN EXISTS (
-           SELECT 1 FROM UNNEST(symbolSynonyms) AS unnest WHERE unnest.label ILIKE (? || '%')
+           SELECT 1 FROM UNNEST(symbolSynonyms) AS unnest WHERE unnest.label ILIKE ($1 || '%')
            ) THEN 'symbolSynonyms: ' ||
-           (SELECT unnest.label FROM UNNEST(symbolSynonyms) AS unnest WHERE unnest.label ILIKE (? || '%') LIMIT 1)
+           (SELECT unnest.label FROM UNNEST(symbolSynonyms) AS unnest WHERE unnest.label ILIKE ($1 || '%') LIMIT 1)
        WHEN EXISTS (
-           SELECT 1 FROM UNNEST(obsoleteSymbols) AS unnest WHERE unnest.label ILIKE (? || '%')
+           SELECT 1 FROM UNNEST(obsoleteSymbols) AS unnest WHERE unnest.label ILIKE ($1 || '%')
            ) THEN 'obsoleteSymbols: ' ||
-           (SELECT unnest.label FROM UNNEST(obsoleteSymbols) AS unnest WHERE unnest.label ILIKE (? || '%') LIMIT 1)
+           (SELECT unnest.label FROM UNNEST(obsoleteSymbols) AS unnest WHERE unnest.label ILIKE ($1 || '%') LIMIT 1)
        ELSE NULL
-   END AS matched_column
+   END AS matched_column,
+   0 AS rank
 FROM
    genes
 WHERE
-   array_length(array_filter(alternativeGenes, x -> x ILIKE (? || '%'))) > 0 OR
+   array_length(array_filter(alternativeGenes, x -> x ILIKE ($1 || '%'))) > 0 OR
    EXISTS (
        SELECT 1
        FROM UNNEST(symbolSynonyms) AS unnest
-       WHERE (unnest.label) ILIKE (? || '%')
+       WHERE (unnest.label) ILIKE ($1 || '%')
    ) OR
    EXISTS (
        SELECT 1
        FROM UNNEST(obsoleteSymbols) AS unnest
-       WHERE unnest.label ILIKE (? || '%')
+       WHERE unnest.label ILIKE ($1 || '%')
    )
 """
 
@@ -197,20 +205,19 @@ SELECT
    id,
    approvedSymbol,
    CASE
-       WHEN approvedName ILIKE ? OR approvedName ILIKE (? || '%') OR approvedName ILIKE ('%' || ' ' || ? || '%') THEN 'approvedName:' || approvedName
+       WHEN approvedName ILIKE $1 OR approvedName ILIKE ($1 || '%') OR approvedName ILIKE ('%' || ' ' || $1 || '%') THEN 'approvedName:' || approvedName
        ELSE NULL
-   END AS matched_column
+   END AS matched_column,
+   CASE
+       WHEN approvedName ILIKE $1 THEN 1
+       WHEN approvedName ILIKE ($1 || '%') THEN 2
+       WHEN approvedName ILIKE ('%' || ' ' || $1 || '%') THEN 3
+       ELSE 4
+   END AS rank
 FROM
    genes
 WHERE
-   approvedName ILIKE ? OR approvedName ILIKE (? || '%') OR approvedName ILIKE ('%' || ' ' || ? || '%')
-ORDER BY
-   CASE
-       WHEN approvedName ILIKE ? THEN 1
-       WHEN approvedName ILIKE (? || '%') THEN 2
-       WHEN approvedName ILIKE ('%' || ' ' || ? || '%') THEN 3
-       ELSE 4
-   END
+   approvedName ILIKE $1 OR approvedName ILIKE ($1 || '%') OR approvedName ILIKE ('%' || ' ' || $1 || '%')
 """
 
 
@@ -222,30 +229,31 @@ SELECT
    CASE
        WHEN EXISTS (
            SELECT 1 FROM UNNEST(nameSynonyms) AS unnest
-           WHERE unnest.label ILIKE ? OR unnest.label ILIKE (? || '%') OR unnest.label ILIKE ('%' || ' ' || ? || '%')
+           WHERE unnest.label ILIKE $1 OR unnest.label ILIKE ($1 || '%') OR unnest.label ILIKE ('%' || ' ' || $1 || '%')
            ) THEN 'nameSynonyms: ' ||
            (SELECT unnest.label FROM UNNEST(nameSynonyms) AS unnest
-            WHERE unnest.label ILIKE ? OR unnest.label ILIKE (? || '%') OR unnest.label ILIKE ('%' || ' ' || ? || '%') LIMIT 1)
+            WHERE unnest.label ILIKE $1 OR unnest.label ILIKE ($1 || '%') OR unnest.label ILIKE ('%' || ' ' || $1 || '%') LIMIT 1)
        WHEN EXISTS (
            SELECT 1 FROM UNNEST(obsoleteNames) AS unnest 
-           WHERE unnest.label ILIKE ? OR unnest.label ILIKE (? || '%') OR unnest.label ILIKE ('%' || ' ' || ? || '%')
+           WHERE unnest.label ILIKE $1 OR unnest.label ILIKE ($1 || '%') OR unnest.label ILIKE ('%' || ' ' || $1 || '%')
            ) THEN 'obsoleteNames: ' ||
                (SELECT unnest.label FROM UNNEST(obsoleteNames) AS unnest 
-               WHERE unnest.label ILIKE ? OR unnest.label ILIKE (? || '%') OR unnest.label ILIKE ('%' || ' ' || ? || '%') LIMIT 1)
+               WHERE unnest.label ILIKE $1 OR unnest.label ILIKE ($1 || '%') OR unnest.label ILIKE ('%' || ' ' || $1 || '%') LIMIT 1)
        ELSE NULL
-   END AS matched_column
+   END AS matched_column,
+   0 AS rank
 FROM
    genes
 WHERE
    EXISTS (
        SELECT 1
        FROM UNNEST(nameSynonyms) AS unnest
-       WHERE unnest.label ILIKE ? OR unnest.label ILIKE (? || '%') OR unnest.label ILIKE ('%' || ' ' || ? || '%')
+       WHERE unnest.label ILIKE $1 OR unnest.label ILIKE ($1 || '%') OR unnest.label ILIKE ('%' || ' ' || $1 || '%')
    ) OR
    EXISTS (
        SELECT 1
        FROM UNNEST(obsoleteNames) AS unnest
-       WHERE unnest.label ILIKE ? OR unnest.label ILIKE (? || '%') OR unnest.label ILIKE ('%' || ' ' || ? || '%')
+       WHERE unnest.label ILIKE $1 OR unnest.label ILIKE ($1 || '%') OR unnest.label ILIKE ('%' || ' ' || $1 || '%')
    )
 """
 
@@ -259,12 +267,25 @@ WITH fts_results AS (
         approvedName,
         nameSynonyms,
         obsoleteNames,
-        fts_main_genes.match_bm25(id, ?, conjunctive := 1, fields := 'approvedName') AS approvedName_score,
-        fts_main_genes.match_bm25(id, ?, conjunctive := 1, fields := 'nameSynonyms') AS nameSynonyms_score,
-        fts_main_genes.match_bm25(id, ?, conjunctive := 1, fields := 'obsoleteNames') AS obsoleteNames_score
+        fts_main_genes.match_bm25(id, $1, conjunctive := 1, fields := 'approvedName') AS approvedName_score,
+        fts_main_genes.match_bm25(id, $1, conjunctive := 1, fields := 'nameSynonyms') AS nameSynonyms_score,
+        fts_main_genes.match_bm25(id, $1, conjunctive := 1, fields := 'obsoleteNames') AS obsoleteNames_score
     FROM genes
 )
-SELECT id, approvedSymbol, matched_column
+SELECT
+    id,
+    approvedSymbol,
+    matched_column,
+    row_number() OVER (
+        ORDER BY
+            CASE
+                WHEN matched_column ILIKE 'approvedName%' THEN 1
+                WHEN matched_column ILIKE 'nameSynonyms%' THEN 2
+                WHEN matched_column ILIKE 'obsoleteNames%' THEN 3
+            END,
+            score DESC,
+            id
+    ) AS rank
 FROM (
     SELECT 
         id,
@@ -290,117 +311,240 @@ FROM (
     FROM fts_results
     WHERE obsoleteNames_score IS NOT NULL
 ) AS all_matches
-ORDER BY 
-    CASE 
-        WHEN matched_column ILIKE 'approvedName%' THEN 1
-        WHEN matched_column ILIKE 'nameSynonyms%' THEN 2
-        WHEN matched_column ILIKE 'obsoleteNames%' THEN 3
-    END, score DESC
 """
 
 # Catchall query
-substring_query = """
+substring_gene_query = """
 SELECT
    id,
    approvedSymbol,
    CASE
-       WHEN approvedName ILIKE ('%' || ? || '%') THEN 'approvedName:' || approvedName
+       WHEN approvedName ILIKE ('%' || $1 || '%') THEN 'approvedName:' || approvedName
        WHEN EXISTS (
            SELECT 1 FROM UNNEST(nameSynonyms) AS unnest
-           WHERE unnest.label ILIKE ('%' || ? || '%')
+           WHERE unnest.label ILIKE ('%' || $1 || '%')
            ) THEN 'nameSynonyms: ' ||
            (SELECT unnest.label FROM UNNEST(nameSynonyms) AS unnest
-            WHERE unnest.label ILIKE ('%' || ? || '%') LIMIT 1)
+            WHERE unnest.label ILIKE ('%' || $1 || '%') LIMIT 1)
        WHEN EXISTS (
            SELECT 1 FROM UNNEST(obsoleteNames) AS unnest 
-           WHERE unnest.label ILIKE ('%' || ? || '%')
+           WHERE unnest.label ILIKE ('%' || $1 || '%')
            ) THEN 'obsoleteNames: ' ||
            (SELECT unnest.label FROM UNNEST(obsoleteNames) AS unnest 
-            WHERE unnest.label ILIKE ('%' || ? || '%') LIMIT 1)
+            WHERE unnest.label ILIKE ('%' || $1 || '%') LIMIT 1)
        ELSE NULL
-   END AS matched_column
+   END AS matched_column,
+   CASE
+       WHEN approvedName ILIKE ('%' || $1 || '%') THEN 1
+       WHEN EXISTS (
+           SELECT 1 FROM UNNEST(nameSynonyms) AS unnest
+           WHERE unnest.label ILIKE ('%' || $1 || '%') 
+           ) THEN 2
+       WHEN EXISTS (
+           SELECT 1 FROM UNNEST(obsoleteNames) AS unnest 
+           WHERE unnest.label ILIKE ('%' || $1 || '%')
+           ) THEN 3
+       ELSE 4
+   END AS rank
 FROM
    genes
 WHERE
-   approvedName ILIKE ('%' || ? || '%') OR
+   approvedName ILIKE ('%' || $1 || '%') OR
    EXISTS (
        SELECT 1
        FROM UNNEST(nameSynonyms) AS unnest
-       WHERE unnest.label ILIKE ('%' || ? || '%')
+       WHERE unnest.label ILIKE ('%' || $1 || '%')
    ) OR
    EXISTS (
        SELECT 1
        FROM UNNEST(obsoleteNames) AS unnest
-       WHERE unnest.label ILIKE ('%' || ? || '%')
+       WHERE unnest.label ILIKE ('%' || $1 || '%')
    )
-ORDER BY
-   CASE
-       WHEN approvedName ILIKE ('%' || ? || '%') THEN 1
-       WHEN EXISTS (
-           SELECT 1 FROM UNNEST(nameSynonyms) AS unnest
-           WHERE unnest.label ILIKE ('%' || ? || '%') 
-           ) THEN 2
-       WHEN EXISTS (
-           SELECT 1 FROM UNNEST(obsoleteNames) AS unnest 
-           WHERE unnest.label ILIKE ('%' || ? || '%')
-           ) THEN 3
-       ELSE 4
-   END 
 """
-def get_db_connection() -> DuckDBPyConnection: 
-    if not db_file_path:
-        raise HTTPException(status_code=500, detail="Database path is not set")
-    conn = duckdb.connect(db_file_path, read_only=True)
-    try:
-        yield conn
-    finally:
-        conn.close()
-
-def get_gene_search_db_connection() -> DuckDBPyConnection: 
-    if not gene_db_file_path:
-        raise HTTPException(status_code=500, detail="Database path is not set")
-    conn = duckdb.connect(gene_db_file_path, read_only=True)
-    try:
-        yield conn
-    finally:
-        conn.close()
-
-
-def lexical_phenotype_search(search_string: str, conn: DuckDBPyConnection) -> DataFrame:
+
+
+def _lexical_search_sql(branches: Sequence[str], label_column: str) -> Tuple[str, str]:
+    """
+    Build the page and count statements over the UNION ALL of the branch queries.
+
+    A row keeps the first branch (and the best rank within it) that matched it, the
+    ordering the DataFrame drop_duplicates(keep='first') used to give. Every statement
+    binds the search term as $1; the page statement takes LIMIT $2 OFFSET $3.
+    """
+    matches = " UNION ALL ".join(
+        f"(SELECT id, {label_column}, matched_column, {tier} AS tier, rank FROM ({branch}))"
+        for tier, branch in enumerate(branches, start=1)
+    )
+    page_sql = f"""
+    WITH matches AS ({matches})
+    SELECT id, {label_column}, matched_column
+    FROM matches
+    QUALIFY row_number() OVER (PARTITION BY id, {label_column} ORDER BY tier, rank) = 1
+    ORDER BY tier, rank, id
+    LIMIT $2 OFFSET $3
+    """
+    count_sql = f"""
+    WITH matches AS ({matches})
+    SELECT count(*) FROM (SELECT DISTINCT id, {label_column} FROM matches)
+    """
+    return page_sql, count_sql
+
+
+def normalize_search_term(search_term: str) -> str:
+    """ ILIKE matching is case insensitive, so 'IL6 ' and 'il6' share one cache entry. """
+    return " ".join(search_term.split()).lower()
+
+
+class LexicalSearchIndex:
+    """
+    Typeahead search over one read-only DuckDB file.
+
+    The database is opened once per worker process and every thread queries through its
+    own cursor on that connection, so a keystroke no longer pays for opening the file.
+    Only the requested page is materialized (LIMIT/OFFSET in SQL) and the total comes
+    from a separate count; both are kept in an LRU keyed by the normalized search term.
+    The connection and cache are dropped when the database file is replaced.
+    """
+
+    def __init__(self, db_path: str, branches: Sequence[str], label_column: str,
+                 cache_size: int = LEXICAL_SEARCH_CACHE_SIZE):
+        self.db_path = db_path
+        self.label_column = label_column
+        self.cache_size = cache_size
+        self._page_sql, self._count_sql = _lexical_search_sql(branches, label_column)
+        self._connection: Optional[DuckDBPyConnection] = None
+        self._mtime: Optional[float] = None
+        self._generation = 0
+        self._local = threading.local()
+        self._pages: "OrderedDict[Tuple[str, int, int], List[Dict[str, Any]]]" = OrderedDict()
+        self._counts: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cursor(self) -> DuckDBPyConnection:
+        if not self.db_path:
+            raise HTTPException(status_code=500, detail="Database path is not set")
+        mtime = os.path.getmtime(self.db_path)
+        with self._lock:
+            if self._connection is None or mtime != self._mtime:
+                if self._connection is not None:
+                    self._connection.close()
+                self._connection = duckdb.connect(self.db_path, read_only=True)
+                self._mtime = mtime
+                self._generation += 1
+                self._pages.clear()
+                self._counts.clear()
+            generation, connection = self._generation, self._connection
+        if getattr(self._local, "generation", None) != generation:
+            self._local.cursor = connection.cursor()
+            self._local.generation = generation
+        return self._local.cursor
+
+    def _remember(self, cache: OrderedDict, key: Any, value: Any) -> None:
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+
+    def _recall(self, cache: OrderedDict, key: Any) -> Any:
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def search(self, search_term: str, offset: int, limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Return (total matches, requested page of matches) for a search term.
+
+        Args:
+            search_term (str): The text typed so far.
+            offset (int): Index of the first match to return.
+            limit (int): Maximum number of matches to return.
+
+        Returns:
+            Tuple[int, List[Dict[str, Any]]]: The total and the page rows (id, label, matched_column).
+        """
+        term = normalize_search_term(search_term)
+        offset, limit = max(offset, 0), max(limit, 0)
+        cursor = self._cursor()
+
+        count = self._recall(self._counts, term)
+        if count is None:
+            count = cursor.execute(self._count_sql, [term]).fetchone()[0]
+            self._remember(self._counts, term, count)
+
+        page = self._recall(self._pages, (term, offset, limit))
+        if page is None:
+            if offset >= count or limit == 0:
+                page = []
+            else:
+                rows = cursor.execute(self._page_sql, [term, limit, offset]).fetchall()
+                page = [dict(zip(("id", self.label_column, "matched_column"), row)) for row in rows]
+            self._remember(self._pages, (term, offset, limit), page)
+        return count, page
+
+
+_phenotype_search_index: Optional[LexicalSearchIndex] = None
+_gene_search_index: Optional[LexicalSearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_phenotype_search_index() -> LexicalSearchIndex:
+    """ Return the process wide phenotype search index. """
+    global _phenotype_search_index
+    if _phenotype_search_index is None:
+        with _search_index_lock:
+            if _phenotype_search_index is None:
+                _phenotype_search_index = LexicalSearchIndex(
+                    db_file_path,
+                    [primary_phenotype_query, fts_phenotype_query, secondary_phenotype_query, substring_phenotype_query],
+                    "name",
+                )
+    return _phenotype_search_index
+
+
+def get_gene_search_index() -> LexicalSearchIndex:
+    """ Return the process wide gene search index. """
+    global _gene_search_index
+    if _gene_search_index is None:
+        with _search_index_lock:
+            if _gene_search_index is None:
+                _gene_search_index = LexicalSearchIndex(
+                    gene_db_file_path,
+                    [primary_prefix_query, secondary_prefix_query, name_prefix_query, fts_gene_query,
+                     synonym_prefix_query, substring_gene_query],
+                    "approvedSymbol",
+                )
+    return _gene_search_index
+
+
+def lexical_phenotype_search(search_string: str, offset: int = 0, limit: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
    """
-   Query the database for phenotypes lexically matching the search term with a result limit.
+   Query the database for phenotypes lexically matching the search term.
   
    Parameters:
-       search_term (str): The search term for filtering phenotypes.
+       search_string (str): The search term for filtering phenotypes.
+       offset (int): Index of the first result to return.
        limit (int): Maximum number of results to return.
-       conn (DuckDBPyConnection): The database connection.
 
 
    Returns:
-       List[Dict]: Query results as a list of dictionaries.
+       Tuple[int, List[Dict]]: The number of matching phenotypes and the requested page of them.
    """
-   query = f"({primary_phenotype_query}) UNION ALL ({fts_phenotype_query}) UNION ALL ({secondary_phenotype_query}) UNION ALL ({substring_query})"
-   results = conn.execute(query, (search_string, ) * query.count('?')).df()
-   results.drop_duplicates(subset = ['id', 'name'], keep = 'first', inplace = True)
-   if results.empty:
-    return DataFrame()
-   return results
-
-def lexical_gene_search(search_term: str, conn: DuckDBPyConnection) -> DataFrame:
+   return get_phenotype_search_index().search(search_string, offset, limit)
+
+def lexical_gene_search(search_term: str, offset: int = 0, limit: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
    """
-   Query the database for genes lexically matching the search term with a result limit.
+   Query the database for genes lexically matching the search term.
   
    Parameters:
        search_term (str): The search term for filtering genes.
-       conn (DuckDBPyConnection): The database connection.
+       offset (int): Index of the first result to return.
+       limit (int): Maximum number of results to return.
 
 
    Returns:
-       List[Dict]: Query results as a list of dictionaries.
+       Tuple[int, List[Dict]]: The number of matching genes and the requested page of them.
    """
-   query = f"({primary_prefix_query}) UNION ALL ({secondary_prefix_query}) UNION ALL ({name_prefix_query})  UNION ALL ({fts_gene_query}) UNION ALL ({synonym_prefix_query}) UNION ALL ({substring_query})"
-   results = conn.execute(query, (search_term, ) * query.count('?')).df()
-   results.drop_duplicates(subset = ['id', 'approvedSymbol'], keep = 'first', inplace = True)
-   if results.empty:
-    return DataFrame()
-   return results
+   return get_gene_search_index().search(search_term, offset, limit)
@@ -2,7 +2,6 @@ import json
 from typing import List, Dict
 from Bio import Entrez
 from typing import List
-import GEOparse
 from typing import Dict, List, Any,Tuple
 import requests
 from typing import Optional
@@ -20,11 +19,16 @@ import requests
 from xml.etree import ElementTree
 import xml.etree.ElementTree as ET
 import time
-from xml.etree.ElementTree import Element
 import pandas as pd
 import io
 from fastapi import HTTPException
 from Bio.Entrez import HTTPError
+from component_services.author_hindex import get_author_hindex_store
+from component_services.citation_counts import get_citation_count_provider
+from component_services.pubmed_parser import iter_pubmed_articles, qualifiers_for_disease, element_title_text
+from component_services.ncbi_client import get_ncbi_client, PMC_IDCONV_URL
+from component_services.journal_rank import JOURNAL_DATA_PATH, get_journal_rank_index, rank_many
+from component_services.geo_harvest import GEO_SERIES_ONLY, gds_series_summaries, harvest_series, series_metadata, taxonomy_common_name
 
 MAX_RESULTS=500
 # NCBI API Base URL
@@ -32,8 +36,6 @@ BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
 NCBI_API_KEY = os.getenv('NCBI_API_KEY')
 RATE_LIMIT_RETRY_PERIOD = 300
 EMAIL = os.getenv('NCBI_EMAIL')
-JOURNAL_DATA_PATH = "/app/res-immunology-automation/res_immunology_automation/src/disease_data/scimagojr-journal-2023-cleaned.csv"
-OPEN_CITATIONS_API = os.getenv('OPEN_CITATIONS_API')
 
 def get_mesh_term_for_disease(disease_name):
     """
@@ -48,19 +50,12 @@ def get_mesh_term_for_disease(disease_name):
     params = {
         "db": "mesh",           
         "term": disease_name,   
-        "retmode": "xml",
-        "api_key": NCBI_API_KEY      
+        "retmode": "xml"
     }
 
     try:
         # Send the request to the API
-        response = requests.get(BASE_URL + "esearch.fcgi", params=params)
-        time.sleep(1)
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
+        response = get_ncbi_client().request("esearch.fcgi", params)
         response.raise_for_status()
 
         # Parse the XML response
@@ -156,24 +151,15 @@ def pubmed_to_pmc(pmid: str, tool: str = "my_tool", email: str = EMAIL) -> Optio
     Returns:
         Optional[str]: The corresponding PMC ID if available, otherwise None.
     """
-    base_url = "https://www.ncbi.nlm.nih.gov/pmc/utils/idconv/v1.0/"
     params = {
         "tool": tool,
         "email": email,
         "ids": pmid,
-        "format": "json",
-        "api_key": NCBI_API_KEY
+        "format": "json"
     }
 
     try:
-        response = requests.get(base_url, params=params)
-        time.sleep(0.5)
-        
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
+        response = get_ncbi_client().request(PMC_IDCONV_URL, params)
         response.raise_for_status()  # Raise an error for bad responses
         data = response.json()  # Parse JSON response
 
@@ -198,49 +184,7 @@ def pubmed_to_pmc(pmid: str, tool: str = "my_tool", email: str = EMAIL) -> Optio
         return None  # Return None in case of request failure
 
 
-def fetch_gse_summary(gse_id):
-    """
-    Fetch the summary of a GSE dataset using its GSE ID.
-    
-    Args:
-        gse_id (str): The GSE ID of the dataset.
-    
-    Returns:
-        str: The summary of the GSE dataset.
-    """
-    if not gse_id:
-        return ""
-        
-    Entrez.email = EMAIL  # Replace with your email for NCBI access
-    try:
-        # Fetch the GSE dataset
-        handle = Entrez.esearch(db="gds", term=gse_id)
-        record = Entrez.read(handle)
-        handle.close()
-        
-        # Extract the dataset ID
-        if record["IdList"]:
-            dataset_id = record["IdList"][0]
-            
-            # Fetch the summary for the dataset
-            summary_handle = Entrez.esummary(db="gds", id=dataset_id)
-            summary = Entrez.read(summary_handle)
-            summary_handle.close()
-            
-            return summary[0]["summary"]  # Return the summary field
-        else:
-            print("GSE ID not found in the GDS database.")
-            return ""
-        
-    except HTTPError as e:
-        if e.code == 429:
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-        
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        return ""
-
-def search_geo(disease_name: str) -> List[Tuple[str, str]]:
+def search_geo(disease_name: str) -> List[Tuple[str, str, str]]:
     """
     Search GEO datasets using NCBI's Entrez API and extract GSE IDs along with their corresponding types.
 
@@ -248,10 +192,8 @@ def search_geo(disease_name: str) -> List[Tuple[str, str]]:
     - disease_name: A string containing the name of the disease.
 
     Returns:
-    - A list of tuples, each containing the GSE ID and its Type.
+    - A list of tuples, each containing the GSE ID, its Type and its summary.
     """
-    Entrez.email = EMAIL  # Provide your email here
-    
     try:
         disease_mesh_term = get_mesh_term_for_disease(disease_name)
 
@@ -263,44 +205,9 @@ def search_geo(disease_name: str) -> List[Tuple[str, str]]:
             f'"Expression profiling by high throughput sequencing" [Filter]'
         )
 
-
-        # Search for GEO datasets
-        handle = Entrez.esearch(db="gds", term=query, retmax=MAX_RESULTS)
-        record = Entrez.read(handle)
-        handle.close()
-
-        # Check if results were returned
-        if 'IdList' in record and record['IdList']:
-            # Fetch results in text format
-            fetch_handle = Entrez.efetch(db="gds", id=record['IdList'])
-            data = fetch_handle.read()
-            fetch_handle.close()
-
-            # Extract GSE IDs and Types from the response
-            gse_type_list: List[Tuple[str, str]] = []
-            lines = data.splitlines()
-            gse_id, dataset_type = None, None
-            gse_id_set=set()
-
-            for line in lines:
-                if "Accession: GSE" in line:  # Extract GSE ID
-                    gse_id = line.split()[2]
-                elif "Type:" in line:  # Extract Type
-                    dataset_type = line.split("Type:")[-1].strip()
-                
-                # If both GSE ID and Type are extracted, save them
-                if gse_id and dataset_type and gse_id not in gse_id_set:
-                    gse_type_list.append((gse_id, dataset_type,fetch_gse_summary(gse_id)))
-                    gse_id, dataset_type = None, None  # Reset for next entry
-                gse_id_set.add(gse_id)
-                time.sleep(0.2)
-
-            # Return the list of GSE IDs and their types
-            return gse_type_list
-        
-    except HTTPError as e:
-        if e.code == 429:
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
+        # Search for GEO datasets; the docsums of the hits carry each series' type and summary
+        gds_ids = get_ncbi_client().esearch_ids("gds", query, MAX_RESULTS)
+        return gds_series_summaries(gds_ids)
 
     except HTTPException as e:
         raise e
@@ -321,133 +228,73 @@ def get_common_name(taxonomy_id: str) -> Optional[str]:
     Returns:
     - str or None: The commonName of the organism, or None if the taxonomy ID is invalid or not found.
     """
-    url = f"https://rest.uniprot.org/taxonomy/{taxonomy_id}"
-    response = requests.get(url)
-
-    if response.status_code == 200:
-        data = response.json()
-        return data.get("commonName", None)  # Return None if 'commonName' doesn't exist
-    else:
-        return None  # Return None if taxonomy ID is invalid or not found
+    return taxonomy_common_name(taxonomy_id)
 
 
-def get_geo_metadata(gse_id: str,experiment_type: str,gse_summary: str) -> Dict[str, Any]:
+def get_geo_metadata(gse_id: str,experiment_type: str,gse_summary: str, series_only: bool = GEO_SERIES_ONLY) -> Dict[str, Any]:
     """
     Fetches GEO metadata for the given GEO Series ID.
 
     Args:
         gse_id (str): The GEO Series ID to retrieve metadata for.
         experiment_type (str): Experiment type.
+        gse_summary (str): Summary of the series.
+        series_only (bool): Skip the sample headers and leave "Samples" empty.
 
     Returns:
         Dict[str, Any]: A dictionary containing the GSE metadata and GSM details.
     """
-    try:
-        # Load GEO dataset by GEO Series ID
-        gse = GEOparse.get_GEO(geo=gse_id)
+    return series_metadata(gse_id, experiment_type, gse_summary, series_only)
 
-        # Access metadata and sample details
-        gse_metadata: Dict[str, List[str]] = gse.metadata
-        platform_names: Dict[str, str] = {}
 
-        # Retrieve platform names
-        for gpl_name, gpl in gse.gpls.items():
-            platform_title = gpl.metadata.get("title", [""])[0]  # Use an empty string as the default value
-            platform_names[gpl_name] = platform_title if platform_title else None  # Set to None if empty
-
-        # Extract all PubMed IDs from the metadata
-        pubmed_ids: list[str] = gse_metadata.get("pubmed_id", [])
-
-        # Generate a list of URLs for the PubMed IDs
-        pubmed_urls: list[str] = [
-            f"https://pubmed.ncbi.nlm.nih.gov/{pubmed_id}/" for pubmed_id in pubmed_ids if pubmed_id
-        ]
-
-        # Prepare the output dictionary
-        result: Dict[str, Any] = {
-            "GseID": gse_id,
-            "Summary":gse_summary,
-            "Title": gse_metadata.get("title", []),
-            "OrganismID": gse_metadata.get("sample_taxid", []),
-            "Platform": platform_names,
-            "Design": gse_metadata.get("overall_design", []),
-            "PubMedIDs": pubmed_ids,
-            "PubMedURLs": pubmed_urls,
-            "ExperimentType":experiment_type,
-            "Samples": []
-        }
-        if result["OrganismID"]:
-            result["Organism"] = [get_common_name(organism_id) for organism_id in result["OrganismID"]]
-        else:
-            result["Organism"] = None
-
-        # Collect GSM details
-        for gsm_name, gsm in gse.gsms.items():
-            # Extracting the first tissue type
-            tissue_types: List[str] = gsm.metadata.get("source_name_ch1", [])
-            first_tissue_type: str = tissue_types[0].split(",")[0].strip() if tissue_types else ""  # Default to an
-            # empty string if empty
-
-            sample_info: Dict[str, Any] = {
-                "SampleID": gsm_name,
-                "TissueType": first_tissue_type,
-                "Characteristics": gsm.metadata.get("characteristics_ch1", [])
-            }
-            result["Samples"].append(sample_info)
-
-        # Clean up the downloaded file
-        os.remove(f"{gse_id}_family.soft.gz")
-
-        return result
-    except Exception as e:
-        print(f"An unexpected error occurred for {gse_id}: {e}")
-        return None  # Return None to indicate failure
-
-
-def get_geo_data_for_diseases(diseases: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+def get_geo_data_for_diseases(diseases: List[str], series_only: bool = GEO_SERIES_ONLY) -> Dict[str, List[Dict[str, Any]]]:
     """
     Fetches GSE metadata for a list of diseases.
 
     Args:
         diseases (List[str]): A list of diseases to search for.
+        series_only (bool): Skip the sample headers of every series and leave "Samples" empty.
 
     Returns:
         Dict[str, List[Dict[str, Any]]]: A dictionary mapping each disease to its corresponding GSE metadata.
     """
+    results: Dict[str, List[Dict[str, Any]]] = {}
     try:
-        results: Dict[str, List[Dict[str, Any]]] = {}
-
+        gse_type_lists: Dict[str, List[Tuple[str, str, str]]] = {}
         for disease in diseases:
+            search_term = disease
             if disease=="prurigo nodularis":
-                disease="prurigo"
+                search_term="prurigo"
             elif disease=="chronic idiopathic urticaria":
-                disease="urticaria"
-            print(f"Searching GSE IDs for disease: {disease}")
-            gse_type_list = search_geo(disease)
+                search_term="urticaria"
+            print(f"Searching GSE IDs for disease: {search_term}")
+            gse_type_list = search_geo(search_term)
 
             if gse_type_list is None:
-                print(f"No results found for disease: {disease}")
-                gse_type_list = [] 
+                print(f"No results found for disease: {search_term}")
+                gse_type_list = []
+            gse_type_lists[disease] = gse_type_list
+
+        # Fetch metadata for the GSE IDs of all diseases at once, each series only once
+        all_entries = [entry for gse_type_list in gse_type_lists.values() for entry in gse_type_list]
+        print(f"Fetching metadata for {len(all_entries)} GSE IDs")
+        metadata_by_gse = harvest_series(all_entries, series_only=series_only)
 
-            # Fetch metadata for each GSE ID
+        for disease, gse_type_list in gse_type_lists.items():
             disease_results = []
-            for gse_id,experiment_type,gse_summary in gse_type_list:
-                print(f"Fetching metadata for GSE ID: {gse_id}")
-                metadata = get_geo_metadata(gse_id,experiment_type,gse_summary)
+            for gse_id, _, _ in gse_type_list:
+                metadata = metadata_by_gse.get(gse_id)
                 if metadata is not None:
                     if metadata["Organism"] is not None and any(s and "honeybee" in s.lower() for s in metadata["Organism"]):
                         continue
                     else:
                         disease_results.append(metadata)
-            if disease=="prurigo":
-                disease="prurigo nodularis"
-            elif disease=="urticaria":
-                disease="chronic idiopathic urticaria"
             results[disease] = disease_results  # Store results for the current disease
     
     except HTTPException as e:
         raise e
     except Exception as e:
+        print(f"An error occurred while fetching GEO data: {e}")
         return results
     
     return results
@@ -512,31 +359,16 @@ def search_pubmed(disease_name: str) -> List[str]:
     start_year = current_year - 5
 
     params = {
-        "db": "pubmed",
-        "term": f"{disease_name}[MAJR] AND (review[PTYP])",  # Added filter for review articles
-        "retmode": "json",
-        "retmax": MAX_RESULTS,  # Maximum number of records to retrieve
         "sort": "pub_date",  # Sort by relevance
         "mindate": f"{start_year}/01/01",  # Start date for filtering
         "maxdate": f"{current_year}/12/31",  # End date for filtering
         "datetype": "pdat",  # Search by publication date
-        "api_key": NCBI_API_KEY
     }
     try:
-        response = requests.get(BASE_URL + "esearch.fcgi", params=params)
-        time.sleep(1)
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
-        response.raise_for_status()
-        data = response.json()
-        # print(json.dumps(data, indent=4))
-        # print("----------------------------------------")
+        # Added filter for review articles
+        return get_ncbi_client().esearch_ids("pubmed", f"{disease_name}[MAJR] AND (review[PTYP])", MAX_RESULTS, **params)
     except HTTPException as e:
         raise e
-    return data.get("esearchresult", {}).get("idlist", [])
 
 def search_pubmed_target(target_name: str, disease_name: str,target_terms_file: str,mesh_major_term:str) -> List[str]:
     """
@@ -552,9 +384,6 @@ def search_pubmed_target(target_name: str, disease_name: str,target_terms_file:
     Returns:
         List[str]: A list of PubMed IDs (PMIDs) from the search.
     """
-    # Base URL for PubMed API
-    base_url: str = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
-
         # Load target synonyms from the JSON file
     with open(target_terms_file, 'r') as f:
         target_data: Dict[str, List[str]] = json.load(f)
@@ -586,36 +415,16 @@ def search_pubmed_target(target_name: str, disease_name: str,target_terms_file:
     start_year = current_year - 10
     # Set up query parameters
     params = {
-        "db": "pubmed",
-        "term": query,
-        "retmode": "json",
-        "retmax": MAX_RESULTS,  # Maximum number of records to retrieve
         "mindate": f"{start_year}/01/01",  # Start date for filtering
         "maxdate": f"{current_year}/12/31",  # End date for filtering
         "sort": "pub_date",  # Sort by publication date
         "datetype": "pdat",  # Search by publication date
-        "api_key": NCBI_API_KEY
     }
     try:
-        # Send the request to PubMed API
-        response = requests.get(base_url + "esearch.fcgi", params=params)
-        time.sleep(1)
-
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
-        response.raise_for_status()  # Raise an error for failed requests
-        data = response.json()
-
-        # Debugging output (optional)
-        # print(json.dumps(data, indent=4))
-        # print("----------------------------------------")
+        # Send the request to PubMed API and return the list of PMIDs
+        return get_ncbi_client().esearch_ids("pubmed", query, MAX_RESULTS, **params)
     except HTTPException as e:
         raise e
-    # Extract and return the list of PMIDs
-    return data.get("esearchresult", {}).get("idlist", [])
 
 def extract_article_title(article: ET.Element) -> str:
     """
@@ -627,92 +436,21 @@ def extract_article_title(article: ET.Element) -> str:
     Returns:
         str: The combined title with proper spaces and preserved <sub> tags.
     """
-    # Initialize an empty list to store each element's text
-    text_elements = []
-
-    # Iterate over all elements in the ArticleTitle tag
-    for element in article.iter():
-        if element.tag == "sub" or element.tag=="sup":
-            # Append  tag with its content as is
-            text_elements.append(f"<{element.tag}>{element.text}</{element.tag}>")
-        elif element.text:
-            # Append plain text content
-            text_elements.append(element.text.strip())
-        if element.tail:
-            # Append tail text (text after a nested tag)
-            text_elements.append(element.tail.strip())
-
-    # Combine the elements in the list with spaces
-    full_title = " ".join(text_elements).strip()
-    return full_title
-
-
-def extract_qualifiers_for_disease(mesh_heading_list: Element, disease_name: str) -> List[str]:
-    """
-    Extracts qualifiers for a specific disease from a MeSHHeadingList.
-
-    Args:
-    - mesh_heading_list (Element): The XML element containing MeSHHeadingList.
-    - disease_name (str): The name of the disease to filter.
-
-    Returns:
-    - List[str]: A list of qualifiers for the given disease.
-    """
-    qualifiers = []
-    # print("finding qualifier")
-        # Ensure mesh_heading_list is not None
-    if mesh_heading_list is None or not mesh_heading_list:
-        return qualifiers  # Return an empty list if mesh_heading_list is None
+    return element_title_text(article)
 
 
-    # Iterate through all MeshHeading elements
-    for mesh_heading in mesh_heading_list.findall(".//MeshHeading"):
-        # Get the DescriptorName
-        descriptor_name = mesh_heading.find("DescriptorName")
-        if descriptor_name is not None and descriptor_name.text and descriptor_name.attrib.get("MajorTopicYN") == "Y":
-            # Check if the descriptor name matches the disease name
-            if descriptor_name.text.strip().lower() == disease_name.strip().lower():
-                # Extract all QualifierName elements
-                qualifier_names = mesh_heading.findall("QualifierName")
-                qualifiers.extend([qualifier.text for qualifier in qualifier_names if qualifier.text])
-
-    # print(f"found qualifers: {qualifiers}")
-    return qualifiers
-
-
-def get_cited_by_count(pmid: str) -> int:
+def get_cited_by_count(pmid: str) -> Optional[int]:
     """
     Gets the cite count of a pubmed Article from OpenCitations API
     """
-    API_CALL = f"https://opencitations.net/index/api/v2/citation-count/pmid:{pmid}"
-    HTTP_HEADERS = {"authorization": OPEN_CITATIONS_API}
-
-    try:
-        response = requests.get(API_CALL, headers=HTTP_HEADERS)
-        if response.status_code == 200:
-            time.sleep(0.1)
-            return response.json()[0]['count']
-        
-    except Exception as e:
-        raise e
+    return get_citation_count_provider().counts([pmid])[0]
 
 
 def get_journal_rank(journal_issn: str) -> Optional[int]:
     """
     Get the rank of a journal from SciMago Journal Ranking data using ISSN.
     """
-    with open(JOURNAL_DATA_PATH) as f:
-        headers = ['Rank', 'Title', 'Issn']
-        rows = csv.DictReader(f, fieldnames=headers, delimiter=',')
-        next(rows)  # Skip header row
-
-        for row in rows:
-            row['Issn'] = row['Issn'].split(",")
-            issn_list = ["00" + issn if len(issn) == 6 else issn for issn in row['Issn']]
-            if journal_issn in issn_list:
-                return int(row['Rank']) if row['Rank'].isdigit() else 50000
-
-    return 50000
+    return get_journal_rank_index().rank(journal_issn)
 
 def min_max_rank(df: pd.DataFrame, column: str, invert: bool = False):
     """
@@ -754,6 +492,12 @@ def generate_articles_rank(articles: List[Dict[str, Any]]) -> List[Dict[str, Any
     # Normalize cited by count
     df['citedby_score'] = min_max_rank(df, 'citedby')
 
+    # Rank articles that do not carry a journal rank yet from their ISSN
+    if 'journal_issn' in df:
+        missing_rank = df['journal_rank'].isna() if 'journal_rank' in df else pd.Series(True, index=df.index)
+        if missing_rank.any():
+            df.loc[missing_rank, 'journal_rank'] = rank_many(df.loc[missing_rank, 'journal_issn'])
+
     # Normalize journal rank (lower rank is better, so invert it)
     df['journal_rank_score'] = min_max_rank(df, 'journal_rank', invert=True)
 
@@ -767,23 +511,7 @@ def generate_articles_rank(articles: List[Dict[str, Any]]) -> List[Dict[str, Any
     return df.to_dict('records')
 
 def get_h_index_semantic_scholar(author_name):
-    base_url = "https://api.semanticscholar.org/graph/v1/author/search"
-    params = {"query": author_name, "fields": "authorId,name,hIndex"}
-    
-    try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()  # Raise an error for bad responses (4xx, 5xx)
-        data = response.json()
-        time.sleep(1)  # Avoid hitting API rate limits
-
-        if data.get("data"):
-            author = data["data"][0]  # Take the first match
-            return author.get("hIndex", 0), author.get("authorId", 0)
-        
-    except requests.RequestException:
-        pass
-
-    return 0, 0 
+    return get_author_hindex_store().lookup([author_name])[0]
 
 def generate_articles_hindex(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]: 
     """
@@ -793,7 +521,10 @@ def generate_articles_hindex(articles: List[Dict[str, Any]]) -> List[Dict[str, A
     df['hindex'] = 0
     df['hindex_score'] = 0.0
     top_df = df.head(25).copy()
-    top_df['hindex'] = top_df['last_author'].apply(lambda x: get_h_index_semantic_scholar(x)[0] if pd.notna(x) else 0)
+    # One lookup per unique author that is not already in the h-index store
+    top_df['hindex'] = [hindex for hindex, _ in get_author_hindex_store().lookup(
+        [author if pd.notna(author) else None for author in top_df['last_author']]
+    )]
     top_df['hindex_score'] = min_max_rank(top_df, 'hindex')
     top_df.sort_values(by=['overall_score','hindex_score'], ascending=False, inplace=True)
     df.iloc[:25] = top_df.values
@@ -815,103 +546,54 @@ def fetch_literature_details_with_abstracts(disease_name: str,pmids: List[str])
             "db": "pubmed",
             "id": ",".join(pmids),
             "retmode": "xml",  # Use XML to retrieve detailed information
-            "api_key": NCBI_API_KEY
         }
-        response = requests.get(BASE_URL + "efetch.fcgi", params=params)
+        response = get_ncbi_client().request("efetch.fcgi", params, method="POST")
         if response.status_code != 200:
             print("An error occurred with NCBI: ", response.status_code)
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
 
         print("status: ", response.status_code)
 
         response.raise_for_status()
-        # print("pubmed response: ", response.text)
-        # Parse XML response
-        from xml.etree import ElementTree as ET
-        root = ET.fromstring(response.text)
+        # Citation counts of the batch are fetched concurrently while the XML is parsed
+        citation_counts = get_citation_count_provider()
+        citation_counts.prefetch(pmids)
         
         articles = []
-        for article in root.findall(".//PubmedArticle"):
-            # Safe extraction of data with default values if tags are missing
-            if article is None:
-                continue  # Skip if no article data is found
-            pmid = article.find(".//PMID")
-            print("pmid: ", pmid.text)
-            article_title = article.find(".//ArticleTitle")
-            vernacular_title=article.find(".//VernacularTitle")
-            abstract = article.find(".//Abstract/AbstractText")
-            pub_year = article.find(".//PubDate/Year")
-            mesh_heading=article.find(".//MeshHeadingList")
-            
-            publication_types = article.findall(".//PublicationType") if article is not None else []
-
-            # Safe extraction and handling of PublicationType elements
-            publication_type_texts = [pub_type.text for pub_type in publication_types if pub_type is not None and pub_type.text]
-
+        # Stream the articles out of the response instead of building the whole tree
+        for article in iter_pubmed_articles(response.content):
+            print("pmid: ", article.pmid)
 
             # Use default values (blank string for text, empty list for publication types) if tags are missing
-            pmid_text = pmid.text if pmid is not None else ""
-            article_title_text = extract_article_title(article_title) if article_title is not None else ""
-            vernacular_title_text = extract_article_title(vernacular_title) if vernacular_title is not None else ""
-            abstract_text = abstract.text if abstract is not None else ""
-            year_text = pub_year.text if pub_year is not None else ""
-            
-            citedby_count = get_cited_by_count(pmid_text)
-            
-            journal_name = article.find(".//Journal").find('.//Title').text if article.find(".//Journal") else None
-            journal_issn = article.find(".//Journal").find('.//ISSN').text if article.find(".//Journal") else None
+            journal_issn = article.journal_issn
             if journal_issn:
                 journal_issn = journal_issn.replace('-','')
-                journal_rank = get_journal_rank(journal_issn)
-
-            authors_list = []
-            last_author = None
-            corresponding_author = None
-            authors_ent = article.findall(".//AuthorList/Author")
-
-            for index, auth in enumerate(authors_ent):
-                fore_name = auth.find('ForeName')
-                last_name = auth.find('LastName')
-
-                if fore_name is not None and fore_name.text and last_name is not None and last_name.text:
-                    auth_name = f"{fore_name.text.strip()} {last_name.text.strip()}"
-                elif last_name is not None and last_name.text:
-                    auth_name = last_name.text.strip()
-                else:
-                    auth_name = None
-
-                if auth_name:
-                    authors_list.append(auth_name)
-                    if index == len(authors_ent) - 1:
-                        last_author = auth_name
-
-                
 
             # Create PubMed link using the PMID
-            pubmed_link = f"https://pubmed.ncbi.nlm.nih.gov/{pmid_text}/" if pmid_text else ""
-            
-            # If no publication types, default to empty list
-            publication_type_texts = publication_type_texts if publication_type_texts else []
+            pubmed_link = f"https://pubmed.ncbi.nlm.nih.gov/{article.pmid}/" if article.pmid else ""
             
             # Append article details with default values
             articles.append({
-                "PMID": pmid_text,
-                "Title": article_title_text if article_title_text!="[Not Available]." else vernacular_title_text,
-                "Abstract": abstract_text,
-                "Year": year_text,
-                "PublicationType": publication_type_texts,
+                "PMID": article.pmid,
+                "Title": article.title if article.title!="[Not Available]." else article.vernacular_title,
+                "Abstract": article.abstract,
+                "Year": article.year,
+                "PublicationType": article.publication_types,
                 "PubMedLink": pubmed_link,
-                "Qualifers":extract_qualifiers_for_disease(mesh_heading,disease_name),
-                "citedby": citedby_count,
-                "last_author": last_author,
-                "authors": authors_list,
-                "journal_name": journal_name if journal_name else "",
+                "Qualifers":qualifiers_for_disease(article.mesh_headings,disease_name),
+                "citedby": None,  # filled in for the whole batch below
+                "last_author": article.last_author,
+                "authors": article.authors,
+                "journal_name": article.journal_title if article.journal_title else "",
                 "journal_issn": journal_issn if journal_issn else "",
-                "journal_rank": journal_rank
+                "journal_rank": None
             })
+
+        # Look up the citation counts and journal ranks of the whole batch at once
+        cited_by = citation_counts.counts([article_details["PMID"] for article_details in articles])
+        journal_ranks = rank_many(article_details["journal_issn"] for article_details in articles)
+        for article_details, citedby_count, journal_rank in zip(articles, cited_by, journal_ranks):
+            article_details["citedby"] = citedby_count
+            article_details["journal_rank"] = journal_rank
     
     except HTTPException as e:
         raise e
@@ -954,7 +636,6 @@ def fetch_literature_details_in_batches(disease_name:str,pmids: List[str], batch
             # print("batch details: ", batch_details)
             # Append the batch details to the overall list
             all_articles.extend(batch_details)
-            time.sleep(1)
             print("all_articles ")
             
         print("Ranking Articles according to Journal Rank, Recency and CitedBy count")
@@ -1082,23 +763,15 @@ def fetch_mesh_major_terms(pmid: str) -> list:
     if not pmid:
         return []
 
-    url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-    
     # Request parameters
     params = {
         'db': 'pubmed', 
         'id': pmid,  
-        'retmode': 'xml',
-        "api_key": NCBI_API_KEY   
+        'retmode': 'xml'
     }
     
     try:
-        response = requests.get(url, params=params)
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
+        response = get_ncbi_client().request("efetch.fcgi", params)
         response.raise_for_status()  
 
         # Parse the XML response
@@ -1144,8 +817,6 @@ def is_disease_in_mesh_terms(pmid: str, disease_name: str) -> bool:
         
         if disease_name.lower()=="atopic dermatitis":
             disease_name="dermatitis, atopic"
-        
-        time.sleep(1)
 
         # Check if the disease name is present in the MeSH Major Terms list (case-insensitive)
         return disease_name.lower() in [term.lower() for term in mesh_terms]
@@ -1186,8 +857,6 @@ def enrich_with_pmid(data: List[Dict]) -> List[Dict]:
     tool_name = "my_tool"
     email = EMAIL
 
-    # URL for the NCBI ID Converter API
-    base_url = "https://www.ncbi.nlm.nih.gov/pmc/utils/idconv/v1.0/"
     max_ids_per_request = 200  # Maximum number of IDs allowed per request
 
     # Enrich data by processing in chunks
@@ -1200,20 +869,13 @@ def enrich_with_pmid(data: List[Dict]) -> List[Dict]:
             "tool": tool_name,
             "email": email,
             "ids": ",".join(pmc_ids),
-            "format": "json",
-            "api_key": NCBI_API_KEY
+            "format": "json"
         }
 
         try:
-            response = requests.get(base_url, params=params)
-            if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-                rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-                raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
+            response = get_ncbi_client().request(PMC_IDCONV_URL, params)
             response.raise_for_status()  # Raise exception for HTTP errors
             api_data = response.json()
-            time.sleep(3)
 
             # Create a mapping of PMC to PM IDs
             pmc_to_pmids = {
@@ -1233,8 +895,6 @@ def enrich_with_pmid(data: List[Dict]) -> List[Dict]:
         except Exception as e:
             print(f"An error occurred while processing PMC IDs {pmc_ids}: {e}")
             raise e
-        # Add a delay to avoid overloading the server
-        time.sleep(1)
 
     return data
 
@@ -1697,21 +1357,13 @@ def fetch_mesh_descriptor(disease_name):
 
 def fetch_mesh_terms(disease_name):
     try:
-        base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
         params = {
             "db": "mesh",       # Search in MeSH database
             "term": disease_name, # Query term (disease name)
-            "retmode": "json" ,   # Return results in JSON format
-            "api_key": NCBI_API_KEY
+            "retmode": "json"     # Return results in JSON format
         }
-        response = requests.get(base_url, params=params)
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
+        response = get_ncbi_client().request("esearch.fcgi", params)
         response.raise_for_status()  # Raise an error for HTTP issues
-        time.sleep(0.5)
         data = response.json()
         #print (data)
 
@@ -1723,21 +1375,13 @@ def fetch_mesh_terms(disease_name):
 
 def fetch_mesh_details(mesh_id):
     try:
-        base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
         params = {
             "db": "mesh",
             "id": mesh_id,
-            "retmode": "json",
-            "api_key": NCBI_API_KEY
+            "retmode": "json"
         }
-        response = requests.get(base_url, params=params)
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
+        response = get_ncbi_client().request("esummary.fcgi", params)
         response.raise_for_status()
-        time.sleep(0.5)
         mesh_details = response.json()
 
     except Exception as e:
@@ -0,0 +1,290 @@
+"""
+GEO series metadata harvesting for the RNA-seq dossier section.
+
+Series are read from GEO's brief SOFT view (acc.cgi view=brief), which carries the
+series, platform and sample headers but none of the sample data tables that
+GEOparse downloaded with the full family file. Each response is cached on disk under
+GEO_SOFT_CACHE_DIR/<GSE>/<last update date>.<view>.soft.gz: a harvest only asks
+GEO for the series' last update date and re-downloads the SOFT text when the series
+has changed since it was cached. Series are harvested GEO_HARVEST_CONCURRENCY at a
+time through the shared NCBI client, and taxonomy names are looked up once per
+process.
+"""
+
+from typing import *
+import gzip
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from component_services.ncbi_client import get_ncbi_client
+
+GEO_ACC_URL: str = "https://www.ncbi.nlm.nih.gov/geo/query/acc.cgi"
+UNIPROT_TAXONOMY_URL: str = "https://rest.uniprot.org/taxonomy/{taxonomy_id}"
+GEO_SOFT_CACHE_DIR: str = os.getenv("GEO_SOFT_CACHE_DIR", os.path.join("cached_data_json", "geo_soft"))
+GEO_HARVEST_CONCURRENCY: int = int(os.getenv("GEO_HARVEST_CONCURRENCY", "4"))
+# Only read the series and platform headers, leaving "Samples" empty
+GEO_SERIES_ONLY: bool = os.getenv("GEO_SERIES_ONLY", "false").lower() in ("1", "true", "yes")
+GDS_ESUMMARY_BATCH_SIZE: int = 200
+TAXONOMY_REQUEST_TIMEOUT: int = 20
+
+SoftRecords = Dict[str, Dict[str, Dict[str, List[str]]]]
+
+
+def parse_soft(text: str) -> SoftRecords:
+    """
+    Parse SOFT text into {entity type: {accession: {attribute: [values]}}}.
+
+    Attribute names drop the entity prefix the way GEOparse did ('!Series_title' ->
+    'title', '!Sample_characteristics_ch1' -> 'characteristics_ch1'), and repeated
+    attributes keep every value in order. Data tables, if present, are skipped.
+    """
+    records: SoftRecords = {}
+    current: Optional[Dict[str, List[str]]] = None
+    in_table = False
+    for line in text.splitlines():
+        if line.startswith("^"):
+            entity, _, accession = line[1:].partition(" = ")
+            current = records.setdefault(entity.strip().upper(), {}).setdefault(accession.strip(), {})
+            in_table = False
+        elif line.startswith("!") and current is not None:
+            name, _, value = line[1:].partition(" = ")
+            if name.endswith("_table_begin"):
+                in_table = True
+            elif name.endswith("_table_end"):
+                in_table = False
+            elif not in_table:
+                attribute = name.split("_", 1)[1] if "_" in name else name
+                current.setdefault(attribute, []).append(value.strip())
+    return records
+
+
+def _update_stamp(last_update_date: str) -> str:
+    """ 'Jan 05 2024' -> '20240105'; anything else is made filesystem safe. """
+    try:
+        return datetime.strptime(last_update_date.strip(), "%b %d %Y").strftime("%Y%m%d")
+    except ValueError:
+        return re.sub(r"[^0-9A-Za-z]+", "-", last_update_date).strip("-") or "unknown"
+
+
+def _fetch_soft(gse_id: str, targ: str) -> Optional[str]:
+    response = get_ncbi_client().request(GEO_ACC_URL, {"acc": gse_id, "targ": targ, "form": "text", "view": "brief"})
+    if response.status_code != 200 or not response.text.lstrip().startswith("^"):
+        print(f"GEO returned no SOFT text for {gse_id} (targ={targ}, status {response.status_code})")
+        return None
+    return response.text
+
+
+class GeoSoftCache:
+    """ Brief SOFT text of GEO series, on disk and keyed by accession and last update date. """
+
+    def __init__(self, cache_dir: str = GEO_SOFT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, gse_id: str, stamp: str, view: str) -> str:
+        return os.path.join(self.cache_dir, gse_id, f"{stamp}.{view}.soft.gz")
+
+    def _read(self, path: str) -> Optional[str]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                return file.read()
+        except (OSError, EOFError) as e:
+            print(f"Could not read cached SOFT file {path}: {e}")
+            return None
+
+    def _write(self, gse_id: str, stamp: str, path: str, text: str) -> None:
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as file:
+                file.write(text)
+            os.replace(tmp_path, path)
+            # copies of older revisions of the series are not needed any more
+            for name in os.listdir(directory):
+                if not name.startswith(f"{stamp}."):
+                    os.remove(os.path.join(directory, name))
+        except OSError as e:
+            print(f"Could not cache SOFT text of {gse_id}: {e}")
+
+    def get(self, gse_id: str, series_only: bool = GEO_SERIES_ONLY) -> Optional[str]:
+        """
+        Return the brief SOFT text of a series, downloading it only when the cached copy
+        predates the series' last update.
+
+        Args:
+            gse_id (str): The GEO series accession.
+            series_only (bool): Read the series and platform headers but not the sample headers.
+
+        Returns:
+            Optional[str]: The SOFT text, or None when GEO has no such series.
+        """
+        series_text = _fetch_soft(gse_id, "self")
+        if series_text is None:
+            return None
+        series = parse_soft(series_text).get("SERIES", {}).get(gse_id, {})
+        stamp = _update_stamp((series.get("last_update_date") or [""])[0])
+
+        # a full ("all") copy also answers series-only reads
+        for view in (("all", "series") if series_only else ("all",)):
+            path = self._path(gse_id, stamp, view)
+            if os.path.exists(path):
+                text = self._read(path)
+                if text is not None:
+                    return text
+
+        if series_only:
+            platforms_text = _fetch_soft(gse_id, "gpl") or ""
+            text, view = f"{series_text}\n{platforms_text}", "series"
+        else:
+            text, view = _fetch_soft(gse_id, "all"), "all"
+            if text is None:
+                return None
+        self._write(gse_id, stamp, self._path(gse_id, stamp, view), text)
+        return text
+
+
+_taxonomy_names: Dict[str, Optional[str]] = {}
+_taxonomy_names_lock = threading.Lock()
+
+
+def taxonomy_common_name(taxonomy_id: str) -> Optional[str]:
+    """ UniProt common name of a taxonomy id, looked up once per process. """
+    taxonomy_id = str(taxonomy_id).strip()
+    with _taxonomy_names_lock:
+        if taxonomy_id in _taxonomy_names:
+            return _taxonomy_names[taxonomy_id]
+    try:
+        response = requests.get(UNIPROT_TAXONOMY_URL.format(taxonomy_id=taxonomy_id), timeout=TAXONOMY_REQUEST_TIMEOUT)
+        if response.status_code == 200:
+            common_name = response.json().get("commonName", None)
+        elif response.status_code in (400, 404):
+            common_name = None
+        else:
+            # transient failure, ask again next time
+            return None
+    except Exception as e:
+        print(f"Error fetching taxonomy {taxonomy_id}: {e}")
+        return None
+    with _taxonomy_names_lock:
+        _taxonomy_names[taxonomy_id] = common_name
+    return common_name
+
+
+def gds_series_summaries(gds_ids: Sequence[str]) -> List[Tuple[str, str, str]]:
+    """
+    Return (GSE id, experiment type, summary) for the GEO DataSets records, in order.
+
+    The esummary docsums of the search results already carry the accession, type and
+    summary of every series, so they are read in batches rather than per series.
+    """
+    entries: List[Tuple[str, str, str]] = []
+    seen: Set[str] = set()
+    for start in range(0, len(gds_ids), GDS_ESUMMARY_BATCH_SIZE):
+        batch = list(gds_ids[start:start + GDS_ESUMMARY_BATCH_SIZE])
+        response = get_ncbi_client().request("esummary.fcgi", {"db": "gds", "id": ",".join(batch), "retmode": "json"},
+                                             method="POST")
+        response.raise_for_status()
+        result = response.json().get("result", {})
+        for uid in result.get("uids", batch):
+            docsum = result.get(str(uid), {})
+            accession = docsum.get("accession", "")
+            if not accession.startswith("GSE") or accession in seen:
+                continue
+            seen.add(accession)
+            entries.append((accession, docsum.get("gdstype", ""), docsum.get("summary", "")))
+    return entries
+
+
+def series_metadata(gse_id: str, experiment_type: str, gse_summary: str, series_only: bool = GEO_SERIES_ONLY,
+                    cache: Optional[GeoSoftCache] = None) -> Optional[Dict[str, Any]]:
+    """
+    Build the dossier record of one GEO series.
+
+    Args:
+        gse_id (str): The GEO Series ID.
+        experiment_type (str): Experiment type.
+        gse_summary (str): Summary of the series.
+        series_only (bool): Leave "Samples" empty instead of reading the sample headers.
+        cache (Optional[GeoSoftCache]): SOFT cache to read through.
+
+    Returns:
+        Optional[Dict[str, Any]]: The GSE metadata and GSM details, or None when it could not be fetched or parsed.
+    """
+    # one bad series must not fail the whole harvest, `harvest_series` maps over all of them
+    try:
+        text = (cache or GeoSoftCache()).get(gse_id, series_only)
+        if text is None:
+            return None
+        return _series_record(gse_id, experiment_type, gse_summary, parse_soft(text), series_only)
+    except Exception as e:
+        print(f"An unexpected error occurred for {gse_id}: {e}")
+        return None
+
+
+def _series_record(gse_id: str, experiment_type: str, gse_summary: str, records: SoftRecords,
+                   series_only: bool) -> Dict[str, Any]:
+    gse_metadata = records.get("SERIES", {}).get(gse_id, {})
+
+    platform_names: Dict[str, Optional[str]] = {}
+    for gpl_name, gpl in records.get("PLATFORM", {}).items():
+        platform_title = gpl.get("title", [""])[0]
+        platform_names[gpl_name] = platform_title if platform_title else None
+
+    pubmed_ids: List[str] = gse_metadata.get("pubmed_id", [])
+    result: Dict[str, Any] = {
+        "GseID": gse_id,
+        "Summary": gse_summary,
+        "Title": gse_metadata.get("title", []),
+        "OrganismID": gse_metadata.get("sample_taxid", []),
+        "Platform": platform_names,
+        "Design": gse_metadata.get("overall_design", []),
+        "PubMedIDs": pubmed_ids,
+        "PubMedURLs": [f"https://pubmed.ncbi.nlm.nih.gov/{pubmed_id}/" for pubmed_id in pubmed_ids if pubmed_id],
+        "ExperimentType": experiment_type,
+        "Samples": []
+    }
+    if result["OrganismID"]:
+        result["Organism"] = [taxonomy_common_name(organism_id) for organism_id in result["OrganismID"]]
+    else:
+        result["Organism"] = None
+
+    if not series_only:
+        for gsm_name, gsm in records.get("SAMPLE", {}).items():
+            tissue_types: List[str] = gsm.get("source_name_ch1", [])
+            result["Samples"].append({
+                "SampleID": gsm_name,
+                "TissueType": tissue_types[0].split(",")[0].strip() if tissue_types else "",
+                "Characteristics": gsm.get("characteristics_ch1", [])
+            })
+    return result
+
+
+def harvest_series(entries: Sequence[Tuple[str, str, str]], series_only: bool = GEO_SERIES_ONLY,
+                   concurrency: int = GEO_HARVEST_CONCURRENCY) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Fetch the metadata of many series concurrently.
+
+    Args:
+        entries (Sequence[Tuple[str, str, str]]): (GSE id, experiment type, summary) of each series.
+        series_only (bool): Leave "Samples" empty instead of reading the sample headers.
+        concurrency (int): Series fetched at the same time.
+
+    Returns:
+        Dict[str, Optional[Dict[str, Any]]]: GSE id -> metadata (None when it could not be fetched).
+    """
+    by_gse_id: Dict[str, Tuple[str, str, str]] = {}
+    for entry in entries:
+        by_gse_id.setdefault(entry[0], entry)
+    unique_entries = list(by_gse_id.values())
+    if not unique_entries:
+        return {}
+    cache = GeoSoftCache()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        metadata = executor.map(lambda entry: series_metadata(*entry, series_only=series_only, cache=cache),
+                                unique_entries)
+        return {entry[0]: result for entry, result in zip(unique_entries, metadata)}
@@ -0,0 +1,121 @@
+from typing import *
+import csv
+import os
+import threading
+
+import pandas as pd
+
+JOURNAL_DATA_PATH: str = os.getenv(
+    "JOURNAL_DATA_PATH",
+    "/app/res-immunology-automation/res_immunology_automation/src/disease_data/scimagojr-journal-2023-cleaned.csv"
+)
+# ISSN -> rank table derived from the CSV, rebuilt whenever the CSV is newer
+JOURNAL_RANK_INDEX_PATH: str = os.getenv(
+    "JOURNAL_RANK_INDEX_PATH", os.path.splitext(JOURNAL_DATA_PATH)[0] + ".issn_rank.parquet"
+)
+# Rank given to journals missing from the SciMago data (and to unranked rows)
+UNRANKED_JOURNAL: int = 50000
+
+
+def normalize_issn(issn: Optional[str]) -> str:
+    """ '0007-9235' / ' 00079235' / '79235' (leading zeros lost in the CSV) -> '00079235' """
+    if not issn:
+        return ""
+    issn = issn.strip().replace("-", "").upper()
+    return "00" + issn if len(issn) == 6 else issn
+
+
+class JournalRankIndex:
+    """
+    ISSN -> SciMago journal rank hash index.
+
+    Built once per process from the compact parquet table next to the SciMago CSV;
+    the table is (re)generated from the CSV when it is missing or older than the CSV.
+    """
+
+    def __init__(self, csv_path: str = JOURNAL_DATA_PATH, index_path: str = JOURNAL_RANK_INDEX_PATH):
+        self.csv_path = csv_path
+        self.index_path = index_path
+        self._ranks: Dict[str, int] = self._load()
+
+    def _index_is_fresh(self) -> bool:
+        if not os.path.exists(self.index_path):
+            return False
+        return not os.path.exists(self.csv_path) or os.path.getmtime(self.index_path) >= os.path.getmtime(self.csv_path)
+
+    def _load(self) -> Dict[str, int]:
+        if self._index_is_fresh():
+            try:
+                table = pd.read_parquet(self.index_path, columns=["issn", "rank"])
+                return dict(zip(table["issn"], table["rank"].astype(int).tolist()))
+            except Exception as e:
+                print(f"Could not read journal rank index {self.index_path}, rebuilding it: {e}")
+        ranks = self._read_csv()
+        self._write_index(ranks)
+        return ranks
+
+    def _read_csv(self) -> Dict[str, int]:
+        ranks: Dict[str, int] = {}
+        if not os.path.exists(self.csv_path):
+            print(f"Journal ranking file not found: {self.csv_path}")
+            return ranks
+        with open(self.csv_path) as f:
+            rows = csv.DictReader(f, fieldnames=['Rank', 'Title', 'Issn'], delimiter=',')
+            next(rows)  # Skip header row
+            for row in rows:
+                rank = int(row['Rank']) if row['Rank'].isdigit() else UNRANKED_JOURNAL
+                for issn in (row['Issn'] or "").split(","):
+                    issn = normalize_issn(issn)
+                    # rows are ordered by rank, keep the first (best) one for a shared ISSN
+                    if issn and issn not in ranks:
+                        ranks[issn] = rank
+        return ranks
+
+    def _write_index(self, ranks: Dict[str, int]) -> None:
+        if not ranks:
+            return
+        try:
+            table = pd.DataFrame({"issn": list(ranks), "rank": pd.Series(list(ranks.values()), dtype="int32")})
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            table.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            # read-only data dir or no parquet engine: the in-memory index still works
+            print(f"Could not write journal rank index {self.index_path}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._ranks)
+
+    def rank(self, issn: Optional[str]) -> int:
+        return self._ranks.get(normalize_issn(issn), UNRANKED_JOURNAL)
+
+    def rank_many(self, issns: Iterable[Optional[str]]) -> List[int]:
+        ranks = self._ranks
+        return [ranks.get(normalize_issn(issn), UNRANKED_JOURNAL) for issn in issns]
+
+
+_journal_rank_index: Optional[JournalRankIndex] = None
+_journal_rank_index_lock = threading.Lock()
+
+
+def get_journal_rank_index() -> JournalRankIndex:
+    """ Return the process wide journal rank index, loading it on first use. """
+    global _journal_rank_index
+    if _journal_rank_index is None:
+        with _journal_rank_index_lock:
+            if _journal_rank_index is None:
+                _journal_rank_index = JournalRankIndex()
+    return _journal_rank_index
+
+
+def rank_many(issns: Iterable[Optional[str]]) -> List[int]:
+    """
+    Look up the SciMago rank of many journals at once.
+
+    Args:
+        issns (Iterable[Optional[str]]): Journal ISSNs, with or without the hyphen.
+
+    Returns:
+        List[int]: The rank for each ISSN, in order; UNRANKED_JOURNAL when it is unknown.
+    """
+    return get_journal_rank_index().rank_many(issns)
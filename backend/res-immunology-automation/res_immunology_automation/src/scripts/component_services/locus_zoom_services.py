@@ -1,9 +1,92 @@
 import pandas as pd
 import numpy as np
-import os, csv
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import duckdb
+
+from cache_store import file_lock
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
 # from populate_gwas_asso_data import filter_asso_by_efo_id, prepare_variants_data, fetch_ld_data
 
 gwas_data_path = '/app/res-immunology-automation/res_immunology_automation/src/gwas_data'
+associations_file_path = os.path.join(gwas_data_path, 'associations.tsv')
+# DuckDB copy of associations.tsv with the rows indexed by mapped trait id (EFO_/MONDO_/...)
+associations_db_path = os.getenv("GWAS_ASSOCIATIONS_DB", os.path.join(gwas_data_path, 'associations.duckdb'))
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def ingest_associations(tsv_path: Optional[str] = None, db_path: Optional[str] = None) -> str:
+    """
+    Convert the GWAS Catalog associations.tsv into a DuckDB database.
+
+    `associations` holds the rows as text, as csv.DictReader read them, and
+    `association_traits` maps every trait id of MAPPED_TRAIT_URI to its rows, sorted
+    and indexed on the trait id, so one trait is read without scanning the catalog.
+    The database is built next to the target and swapped in when complete.
+    """
+    tsv_path = tsv_path or associations_file_path
+    db_path = db_path or associations_db_path
+    print("Ingesting the GWAS Associations data into DuckDB")
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = duckdb.connect(tmp_path)
+    try:
+        conn.execute(f"""
+            CREATE TABLE associations AS
+            SELECT row_number() OVER () AS row_id, *
+            FROM read_csv({_sql_literal(tsv_path)}, delim='\t', header=true, all_varchar=true)
+        """)
+        conn.execute("""
+            CREATE TABLE association_traits AS
+            SELECT DISTINCT regexp_extract(trim(uri), '[^/]+$') AS trait_id, row_id
+            FROM (SELECT row_id, unnest(string_split("MAPPED_TRAIT_URI", ',')) AS uri FROM associations)
+            WHERE trim(uri) <> ''
+            ORDER BY trait_id, row_id
+        """)
+        conn.execute("CREATE INDEX association_traits_trait_id ON association_traits (trait_id)")
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    return db_path
+
+
+def _associations_db_current(tsv_path: str, db_path: str) -> bool:
+    if not os.path.exists(db_path):
+        return False
+    return not os.path.exists(tsv_path) or os.path.getmtime(db_path) >= os.path.getmtime(tsv_path)
+
+
+def ensure_associations_db(tsv_path: Optional[str] = None, db_path: Optional[str] = None) -> str:
+    """
+    Path of the associations database, (re)ingesting associations.tsv when it is missing or stale.
+
+    The ingest takes minutes on the full catalog; it is normally run ahead of time
+    (`python -m component_services.locus_zoom_services`). Otherwise the first request
+    runs it while holding a file lock, so only one API worker ingests and the others
+    wait for its database.
+    """
+    tsv_path = tsv_path or associations_file_path
+    db_path = db_path or associations_db_path
+    if _associations_db_current(tsv_path, db_path):
+        return db_path
+    if not os.path.exists(tsv_path) and not os.path.exists(db_path):
+        raise FileNotFoundError("The GWAS Acssociations data file does not exist.")
+    with file_lock(db_path):
+        # another worker may have ingested while this one waited for the lock
+        if not _associations_db_current(tsv_path, db_path):
+            ingest_associations(tsv_path, db_path)
+    return db_path
+
 
 # # load Asso data Filter Asso data by EFOId and generate a variant df
 def filter_asso_by_efo_id(efo_id: str):
@@ -11,20 +94,23 @@ def filter_asso_by_efo_id(efo_id: str):
     Filter the GWAS Association data for given efo_id
     """
     print("Filtering the Associations data")
-    filtered_df = None
-    associations_file_path = os.path.join(gwas_data_path, 'associations.tsv')
-    if os.path.exists(associations_file_path):
-        with open(associations_file_path, 'r') as file:
-            reader = csv.DictReader(file, delimiter='\t')
-            filtered_rows = [row for row in reader if efo_id in row.get('MAPPED_TRAIT_URI', '')]
-
-        if len(filtered_rows) > 0:
-            filtered_df = pd.DataFrame(filtered_rows)
-            return filtered_df
-        else:
-            raise ValueError(f"Associations data doesn't exists for given {efo_id}")
+    db_path = ensure_associations_db()
+    conn = duckdb.connect(db_path, read_only=True)
+    try:
+        # the trait id lookup uses the index; only the matching rows are read from associations
+        filtered_df = conn.execute("""
+            SELECT a.* EXCLUDE (row_id)
+            FROM association_traits t JOIN associations a ON a.row_id = t.row_id
+            WHERE t.trait_id = ?
+            ORDER BY a.row_id
+        """, [efo_id]).df()
+    finally:
+        conn.close()
+
+    if len(filtered_df) > 0:
+        return filtered_df
     else:
-        raise FileNotFoundError("The GWAS Acssociations data file does not exist.")
+        raise ValueError(f"Associations data doesn't exists for given {efo_id}")
 
 # Filter columns in variants file
 def prepare_variants_data(df):
@@ -69,9 +155,121 @@ def load_data(efo_id: str):
             df = prepare_variants_data(df)
             df.to_csv(variants_associate_path, sep='\t', index=False)
         return variants_associate_path
-    except ValueError as e:
+    except ValueError:
         return None
 
     except FileNotFoundError as e:
         raise e
-    
\ No newline at end of file
+
+
+CHROMOSOMES = [str(i) for i in range(1, 23)] + ["X", "Y"]
+GENOME_WIDE_SIGNIFICANCE: float = 5e-8
+ARROW_STREAM_MEDIA_TYPE: str = "application/vnd.apache.arrow.stream"
+_prepared_variants_cache: "OrderedDict[Tuple[str, float], pd.DataFrame]" = OrderedDict()
+_PREPARED_VARIANTS_CACHE_SIZE: int = 16
+_prepared_variants_lock = threading.Lock()
+
+
+def load_prepared_variants(efo_id: str) -> Optional[pd.DataFrame]:
+    """
+    The prepared variants (`prepare_variants_data` output) of a trait, read from its
+    {efo_id}.tsv and kept in memory for the most recently queried traits.
+    """
+    path = load_data(efo_id)
+    if not path or not os.path.isfile(path):
+        return None
+    key = (path, os.path.getmtime(path))
+    with _prepared_variants_lock:
+        df = _prepared_variants_cache.get(key)
+        if df is not None:
+            _prepared_variants_cache.move_to_end(key)
+            return df
+    df = pd.read_csv(path, sep='\t', dtype={"Chromosome": str, "rsID": str, "PubMed ID": str})
+    df["Chromosome"] = pd.Categorical(df["Chromosome"], categories=CHROMOSOMES, ordered=True)
+    with _prepared_variants_lock:
+        _prepared_variants_cache[key] = df
+        while len(_prepared_variants_cache) > _PREPARED_VARIANTS_CACHE_SIZE:
+            _prepared_variants_cache.popitem(last=False)
+    return df
+
+
+def _plot_x(df: pd.DataFrame) -> pd.Series:
+    """ x coordinate of each variant: its position, offset by the preceding chromosomes' extent. """
+    extent = df.groupby("Chromosome", observed=True)["Position"].max().fillna(0)
+    offsets = extent.shift(fill_value=0).cumsum()
+    return df["Position"] + df["Chromosome"].map(offsets).astype(float)
+
+
+def query_variants(efo_id: str, chromosome: Optional[str] = None, start: Optional[int] = None,
+                   end: Optional[int] = None, max_pvalue: Optional[float] = None,
+                   significance: float = GENOME_WIDE_SIGNIFICANCE, width: int = 1000,
+                   height: int = 100) -> Optional[pd.DataFrame]:
+    """
+    Variants of a trait inside a window, downsampled for plotting.
+
+    Args:
+        efo_id (str): Trait id (EFO_/MONDO_/...).
+        chromosome (Optional[str]): Restrict to one chromosome (locus plot); all when None (Manhattan plot).
+        start (Optional[int]): First position of the window, on `chromosome`.
+        end (Optional[int]): Last position of the window, on `chromosome`.
+        max_pvalue (Optional[float]): Drop variants with a larger p-value.
+        significance (float): Variants at or below this p-value are always returned.
+        width (int): Number of horizontal pixel buckets.
+        height (int): Number of vertical (-log10 p) pixel buckets.
+
+    Returns:
+        Optional[pd.DataFrame]: Every significant variant plus one non-significant variant per
+        occupied (x, y) pixel bucket, ordered by chromosome and position; None when the trait
+        has no associations.
+    """
+    df = load_prepared_variants(efo_id)
+    if df is None:
+        return None
+    mask = df["Position"].notna() & df["Chromosome"].notna()
+    if chromosome is not None:
+        mask &= df["Chromosome"] == str(chromosome).upper().removeprefix("CHR")
+        if start is not None:
+            mask &= df["Position"] >= start
+        if end is not None:
+            mask &= df["Position"] <= end
+    if max_pvalue is not None:
+        mask &= df["pvalue"] <= max_pvalue
+    window = df[mask]
+    if window.empty:
+        return window
+
+    significant = window["pvalue"] <= significance
+    rest = window[~significant]
+    if len(rest) > width:
+        x = _plot_x(rest)
+        x_span = max(x.max() - x.min(), 1)
+        y = rest["Neglog10(pvalue)"].fillna(0)
+        y_span = max(y.max() - y.min(), 1e-9)
+        buckets = pd.DataFrame({
+            "x": ((x - x.min()) / x_span * (width - 1)).round().astype(int),
+            "y": ((y - y.min()) / y_span * (height - 1)).round().astype(int),
+        }, index=rest.index)
+        rest = rest.loc[buckets.drop_duplicates().index]
+    return pd.concat([window[significant], rest]).sort_values(["Chromosome", "Position"])
+
+
+def variants_to_columns(df: pd.DataFrame) -> Dict[str, List[Any]]:
+    """ Column name -> values (column oriented JSON, NaN as null). """
+    df = df.astype({"Chromosome": str}).astype(object).where(df.notna(), None)
+    return {column: df[column].tolist() for column in df.columns}
+
+
+def variants_to_arrow(df: pd.DataFrame) -> bytes:
+    """ Arrow IPC stream of the variants; requires pyarrow. """
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    table = pa.Table.from_pandas(df.astype({"Chromosome": str}), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+if __name__ == "__main__":
+    # Build the associations database before starting the API, e.g. after downloading a new associations.tsv
+    print(f"GWAS associations database: {ensure_associations_db()}")
@@ -7,6 +7,11 @@ from llmfactory.llm_provider import get_llm
 from xml.etree import ElementTree
 import time
 from fastapi import HTTPException
+from component_services.nct_study_store import get_nct_study_store, study_why_stopped, study_locations
+from component_services.outcome_classifier import get_outcome_classifier
+from component_services.ncbi_client import get_ncbi_client
+from component_services.pubmed_parser import iter_pubmed_articles
+from component_services.pmid_nct_index import DiseasePmidNctIndex, get_pmid_nct_index_store
 
 MAX_RESULTS = 10000
 NCBI_API_KEY = os.getenv('NCBI_API_KEY')
@@ -133,15 +138,10 @@ def fetch_clinical_study_data(nct_id: str) -> List[Dict[str, Optional[str]]]:
     Returns:
         List[Dict[str, Optional[str]]]: List of dictionaries containing extracted location info for each facility.
     """
-    url: str = f"https://clinicaltrials.gov/api/v2/studies/{nct_id}"
-    response = requests.get(url)
-    response.raise_for_status()  # Raises HTTPError for bad responses
-
-    data: Dict = response.json()
+    data: Dict = get_nct_study_store().get_study(nct_id, raise_errors=True)  # Raises HTTPError for bad responses
 
     # Accessing protocolSection and contactsLocationsModule
-    locations_module: List[Dict] = data.get('protocolSection', {}).get('contactsLocationsModule', {}).get('locations',
-                                                                                                          [])
+    locations_module: List[Dict] = study_locations(data)
 
     # Extracting location information
     extracted_info: List[Dict[str, Optional[str]]] = []
@@ -164,6 +164,8 @@ def fetch_data_for_diseases(disease_dict: Dict[str, List[Tuple[str, str]]]) -> D
         Dict[str, Dict[str, List[Dict[str, Optional[str]]]]]: A nested dictionary containing extracted location info for each disease and NCT ID.
     """
     results: Dict[str, Dict[str, List[Dict[str, Optional[str]]]]] = {}
+    # download all studies concurrently up front, the loop below then reads them from the store
+    get_nct_study_store().get_studies(nct_id for nct_ids_type in disease_dict.values() for nct_id, _ in nct_ids_type)
 
     for disease, nct_ids_type in disease_dict.items():
         results[disease] = {}  # Initialize a new dictionary for the disease
@@ -277,23 +279,8 @@ def get_pmids_indication_pipeline(disease_name: str) -> List[str]:
             f'("clinical trial"[Publication Type])) AND ({disease_name}[MeSH Terms])'
         )
         
-        params = {
-            "db": "pubmed",
-            "term": query,
-            "retmode": "json",
-            "retmax": MAX_RESULTS,
-            "api_key": NCBI_API_KEY  # Maximum number of records to retrieve
-        }
-        
-        response = requests.get(NCBI_BASE_URL + "esearch.fcgi", params=params)
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
-        time.sleep(0.4)  # Add a delay of 0.4 seconds between requests
-        response.raise_for_status()
-        data = response.json()
+        # Maximum number of records to retrieve
+        return get_ncbi_client().esearch_ids("pubmed", query, MAX_RESULTS)
 
     except HTTPException as e:
         raise e
@@ -301,7 +288,6 @@ def get_pmids_indication_pipeline(disease_name: str) -> List[str]:
     except requests.RequestException as e:
         print(f"An error occurred while fetching the Pubmed Articles for Randomized Controlled Trials: {e}")
         raise e
-    return data.get("esearchresult", {}).get("idlist", [])
 
 def get_nctids_from_pmid_efetch(pmid_list: List[str]) -> Dict[str, List[str]]:
     """
@@ -314,8 +300,6 @@ def get_nctids_from_pmid_efetch(pmid_list: List[str]) -> Dict[str, List[str]]:
     Returns:
         Dict[str, List[str]]: A dictionary where each key is a PMID and the value is a list of associated NCT IDs.
     """
-    base_url = f"{NCBI_BASE_URL}/efetch.fcgi"
-    
     try:
         # Join the list of PMIDs into a comma-separated string
         pmid_str = ",".join(pmid_list)
@@ -323,44 +307,20 @@ def get_nctids_from_pmid_efetch(pmid_list: List[str]) -> Dict[str, List[str]]:
         params = {
             "db": "pubmed",
             "id": pmid_str,
-            "retmode": "xml",
-            "api_key": NCBI_API_KEY
+            "retmode": "xml"
         }
         
         # Make a POST request to avoid URL length limitations
-        response = requests.post(base_url, data=params)
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
-        time.sleep(0.2)
+        response = get_ncbi_client().request("efetch.fcgi", params, method="POST")
         
         pmid_nct_dict: Dict[str, List[str]] = {}
         
         if response.status_code == 200:
-            root = ET.fromstring(response.content)
-            
-            # Iterate over each PubmedArticle in the response
-            for pubmed_article in root.findall(".//PubmedArticle"):
-                # Extract the PMID for this article
-                pmid = pubmed_article.find(".//PMID").text
-                
-                # Initialize a list to store NCT IDs for this PMID
-                nct_ids: List[str] = []
-                
-                # Find DataBank entries that may contain NCT IDs
-                for databank in pubmed_article.findall(".//DataBank"):
-                    databank_name = databank.find("DataBankName")
-                    if databank_name is not None and databank_name.text == "ClinicalTrials.gov":
-                        accession_numbers = databank.findall(".//AccessionNumber")
-                        for accession_number in accession_numbers:
-                            if accession_number is not None and accession_number.text:
-                                nct_ids.append(accession_number.text)
-                
+            # Stream the PubmedArticles of the response
+            for pubmed_article in iter_pubmed_articles(response.content):
                 # If there are associated NCT IDs, add them to the dictionary
-                if nct_ids:
-                    pmid_nct_dict[pmid] = nct_ids
+                if pubmed_article.nct_ids:
+                    pmid_nct_dict[pubmed_article.pmid] = pubmed_article.nct_ids
     
     except HTTPException as e:
         raise e
@@ -379,16 +339,10 @@ def fetch_pubmed_article_data(pmids: List[str]) -> List[Dict[str, Any]]:
         params = {
                   "db": "pubmed",
                   "id": ",".join(pmids),
-                  "retmode": "xml",  # Use XML to retrieve detailed information
-                  "api_key": NCBI_API_KEY
+                  "retmode": "xml"  # Use XML to retrieve detailed information
               }
         
-        response = requests.get(NCBI_BASE_URL + "efetch.fcgi", params=params)
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
+        response = get_ncbi_client().request("efetch.fcgi", params, method="POST")
         response.raise_for_status()
 
     except HTTPException as e:
@@ -412,19 +366,12 @@ def get_mesh_term_for_disease(disease_name):
     params = {
         "db": "mesh",
         "term": disease_name,
-        "retmode": "xml",
-        "api_key": NCBI_API_KEY
+        "retmode": "xml"
     }
 
     try:
         # Send the request to the API
-        response = requests.get(NCBI_BASE_URL + "esearch.fcgi", params=params)
-        time.sleep(1)
-        if response.status_code == 429:
-            # raise Exception("Too Many Requests: You are being rate-limited. Please try again later.")
-            rate_limited_until = time.time() + RATE_LIMIT_RETRY_PERIOD
-            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
-
+        response = get_ncbi_client().request("esearch.fcgi", params)
         response.raise_for_status()
 
         # Parse the XML response
@@ -458,62 +405,37 @@ def filter_pubmed_articles(pubmed_response: str, disease_mesh_term: str):
     if DiseaseName is not a MeSH Major Topic then corresponding Qualifier should be MeSH Major Topic
     And then extract the NCTIDs of those articles
     """
-    root = ET.fromstring(pubmed_response)
-    articles = root.findall(".//PubmedArticle")
     filtered_articles = []
     qualifier_count = 0
     descriptor_count = 0
-    for article in articles:
+    disease_mesh_term = disease_mesh_term.strip().lower()
+    for article in iter_pubmed_articles(pubmed_response):
         article_info = {}
-        if article is None:
-            continue  # Skip if no article data is found
-        article_info['pmid'] = article.find(".//PMID").text if article.find(".//PMID") is not None else None
+        article_info['pmid'] = article.pmid or None
 
         mesh_details = []
-        mesh_heading_list = article.find(".//MeshHeadingList")
-        # if mesh_heading_list is None or not mesh_heading_list:
-        #     return qualifiers  # Return an empty list if mesh_heading_list is None
-
-        if mesh_heading_list:
-            # Iterate through all MeshHeading elements
-            for mesh_heading in mesh_heading_list.findall(".//MeshHeading"):
-                mesh_info = {}
-
-                # Get the DescriptorName
-                descriptor_name = mesh_heading.find("DescriptorName")
-                if descriptor_name is not None and descriptor_name.text.strip().lower() == disease_mesh_term.strip().lower():
-                    if descriptor_name.attrib.get("MajorTopicYN") == "Y":
-                      mesh_info["DescriptorName"] = descriptor_name.text.strip()
-                      descriptor_count += 1
-                    # Check if the descriptor name matches the disease name
-                    else:
-                        qualifier_names = mesh_heading.findall("QualifierName")
-                        if qualifier_names:
-                            qualifiers = []
-                            for qualifier_name in qualifier_names:
-                                if qualifier_name.attrib.get("MajorTopicYN") == "Y":
-                                    qualifiers.append(qualifier_name.text.strip())
-
-                            if qualifiers:
-                                mesh_info["DescriptorName"] = descriptor_name.text.strip()
-                                mesh_info["Qualifiers"] = qualifiers
-                                qualifier_count += 1
-                    if mesh_info:
-                        mesh_details.append(mesh_info)
+        for mesh_heading in article.mesh_headings:
+            mesh_info = {}
+
+            # Check if the descriptor name matches the disease name
+            if mesh_heading.descriptor.lower() == disease_mesh_term:
+                if mesh_heading.major:
+                    mesh_info["DescriptorName"] = mesh_heading.descriptor
+                    descriptor_count += 1
+                else:
+                    qualifiers = [name for name, major in mesh_heading.qualifiers if major]
+                    if qualifiers:
+                        mesh_info["DescriptorName"] = mesh_heading.descriptor
+                        mesh_info["Qualifiers"] = qualifiers
+                        qualifier_count += 1
+                if mesh_info:
+                    mesh_details.append(mesh_info)
         if len(mesh_details):
             article_info['mesh_details'] = mesh_details
-            nct_ids = []
-            for databank in article.findall(".//DataBank"):
-                databank_name = databank.find("DataBankName")
-                if databank_name is not None and databank_name.text == "ClinicalTrials.gov":
-                    accession_numbers = databank.findall(".//AccessionNumber")
-                    for accession_number in accession_numbers:
-                        if accession_number is not None and accession_number.text:
-                            nct_ids.append(accession_number.text)
 
             # If there are associated NCT IDs, add them to the dictionary
-            if nct_ids:
-                article_info['nctids'] = nct_ids
+            if article.nct_ids:
+                article_info['nctids'] = article.nct_ids
 
             filtered_articles.append(article_info)
     return filtered_articles, descriptor_count, qualifier_count
@@ -528,10 +450,8 @@ def filter_pmids_in_batches(pmids, disease) -> List[Dict[str, Any]]:
     filtered_pmids = []
     total_descriptor_count = 0
     total_qualifier_count = 0
-    for i in range(0, len(pmids), 200):
-        batch = pmids[i:i + 200]
-        pubmed_article_data = fetch_pubmed_article_data(batch)
-        time.sleep(0.1)
+    # the PMIDs are posted to the NCBI history server once and read back 200 articles at a time
+    for pubmed_article_data in get_ncbi_client().efetch_pages("pubmed", pmids, 200, retmode="xml"):
         filtered_articles, descriptor_count, qualifier_count = filter_pubmed_articles(pubmed_article_data, disease)
         filtered_pmids.extend(filtered_articles)
         total_descriptor_count += descriptor_count
@@ -540,10 +460,9 @@ def filter_pmids_in_batches(pmids, disease) -> List[Dict[str, Any]]:
 
 def get_pmids_for_nct_ids(disease_data: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
     """
-    Extracts disease names from each record, retrieves PMIDs using `get_pmids_indication_pipeline` function,
-    and then calls `get_nctids_from_pmid_efetch` to retrieve and filter unique PMIDs associated with NCT IDs.
-    Adds the list of matching PMIDs to each record only if the record has a "Status" of "Completed".
-    If "Status" is missing, or if any other keys are missing, default values are used.
+    Adds to each record the PMIDs of the disease's clinical trial publications that cite one of its NCT IDs,
+    keeping only the articles whose major MeSH topic is the disease. The PMIDs are looked up in the
+    disease's persistent NCT -> PMIDs index (see `get_disease_pmid_nct_index`).
 
     Args:
         disease_data (Dict[str, List[Dict]]): A dictionary with disease names as keys and
@@ -559,48 +478,17 @@ def get_pmids_for_nct_ids(disease_data: Dict[str, List[Dict]]) -> Dict[str, List
         try:
             # Initialize a list to store records with updated PMIDs for each disease
             updated_records = []
-            # Get the list of PMIDs related to the disease using get_pmids_indication_pipeline
-            pmids = get_pmids_indication_pipeline(disease)
-
-            # filter the pubmed articles which has descriptor as mesh term of the disease
-            disease_mesh_term = get_mesh_term_for_disease(disease)
-            filtered_records = filter_pmids_in_batches(pmids, disease_mesh_term)
-
-            # get pmids from filtered_records
-            filtered_pmids = [record["pmid"] for record in filtered_records]
-
-            # print(f"Filtered PMIDs for {disease}: {len(filtered_pmids)}")
-            # pmid_nct_dict = get_nctids_from_pmid_efetch(filtered_pmids)
+            # PMIDs of the disease's trial publications whose major MeSH topic is the disease, by NCT ID
+            pmid_nct_index = get_disease_pmid_nct_index(disease)
+            print(f"NCT IDs for {disease}:  {len(pmid_nct_index.pmid_nct_dict(mesh_major_only=True))}")
 
-            #get nctids from filtered_records
-            pmid_nct_dict = {record["pmid"]:record["nctids"] for record in filtered_records if "nctids" in record}
-            print(f"NCT IDs for {disease}:  {len(pmid_nct_dict)}")
-
-            # For each record, extract the disease name and call get_pmids_indication_pipeline with the disease name
+            # For each record, look up the PMIDs citing its NCT IDs
             for record in records:
-                disease_name = record.get("Disease", "")  # Default to empty string if "Disease" is missing
-
-                # Check if the status is "Completed", if not, add an empty list for Matching PMIDs
-                # if record.get("Status", "") == "Completed":  # Default to empty string if "Status" is missing
-
                 # Extract the NCT IDs from the record's 'Source URLs' (default to empty list if key is missing)
                 nct_ids = [url.split("/")[-1] for url in record.get("Source URLs", [])]
 
-                # Initialize a set to collect unique PMIDs associated with the NCT IDs
-                matching_pmids = set()
-
-                # For each NCT ID, collect the corresponding PMIDs that have it
-                for nct_id in nct_ids:
-                    for pmid, associated_nct_ids in pmid_nct_dict.items():
-                        if nct_id in associated_nct_ids:
-                            # Add the PMID to the set if it matches
-                            matching_pmids.add(pmid)
-
                 # Add the matching PMIDs as a new key in the record
-                record["PMIDs"] = list(matching_pmids)
-                # else:
-                #     # If the status is not "Completed" or missing, add an empty list for PMIDs
-                #     record["PMIDs"] = []
+                record["PMIDs"] = pmid_nct_index.pmids_for(nct_ids, mesh_major_only=True)
 
                 # Add the updated record to the list of updated records for the disease
                 updated_records.append(record)
@@ -621,17 +509,17 @@ from typing import List, Dict, Any
 
 def get_pmids_for_nct_ids_target_pipeline(
     disease_data: List[Dict[str, Any]],
-    disease_pmid_nct_mapping: Dict[str, Dict[str, List[str]]]
+    disease_pmid_nct_mapping: Dict[str, DiseasePmidNctIndex]
 ) -> List[Dict[str, Any]]:
     """
     Processes a list of records, retrieves PMIDs for each disease using a precomputed mapping,
-    and adds matching PMIDs for completed studies to each record.
+    and adds the PMIDs citing the record's trials to each record.
 
     Args:
         disease_data (List[Dict[str, Any]]): A list of records, each containing information about drugs,
                                               diseases, and associated clinical trials.
-        disease_pmid_nct_mapping (Dict[str, Dict[str, List[str]]]): A dictionary mapping diseases to a 
-                                                                     dictionary of PMIDs and their associated NCT IDs.
+        disease_pmid_nct_mapping (Dict[str, DiseasePmidNctIndex]): A dictionary mapping diseases to their
+                                                                   NCT -> PMIDs index.
 
     Returns:
         List[Dict[str, Any]]: The updated list of records with added PMIDs for completed studies.
@@ -640,30 +528,13 @@ def get_pmids_for_nct_ids_target_pipeline(
     for record in disease_data:
         # Extract disease name and ensure it's in the mapping
         disease_name = record.get("Disease", "").lower()
-        pmid_nct_dict = disease_pmid_nct_mapping.get(disease_name, {})
-        
+        pmid_nct_index = disease_pmid_nct_mapping.get(disease_name)
 
-        # Check if the record has a "Completed" status
-        # if record.get("Status", "") == "Completed":
         # Extract NCT IDs from the record's "Source URLs"
         nct_ids = [url.split("/")[-1] for url in record.get("Source URLs", [])]
 
-        # Collect unique PMIDs associated with these NCT IDs
-                        # Initialize a set to collect unique PMIDs associated with the NCT IDs
-        matching_pmids = set()
-
-        # For each NCT ID, collect the corresponding PMIDs that have it
-        for nct_id in nct_ids:
-            for pmid, associated_nct_ids in pmid_nct_dict.items():
-                if nct_id in associated_nct_ids:
-                    # Add the PMID to the set if it matches
-                    matching_pmids.add(pmid)
-
         # Add the matching PMIDs as a new key in the record
-        record["PMIDs"] = list(matching_pmids)
-        # else:
-        #     # For non-completed statuses, add an empty list for PMIDs
-        #     record["PMIDs"] = []
+        record["PMIDs"] = pmid_nct_index.pmids_for(nct_ids) if pmid_nct_index is not None else []
 
     return disease_data
 
@@ -678,12 +549,9 @@ def get_conclusion(pubmed_id: str) -> Optional[str]:
     Returns:
     - Optional[str]: The conclusion or abstract text of the article, or None if not found.
     """
-    # Define the URL for PubMed E-utilities
-    url = f"https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi?db=pubmed&id={pubmed_id}&retmode=xml&api_key={NCBI_API_KEY}"
-    
     try:
         # Send the GET request to fetch the XML data
-        response = requests.get(url)
+        response = get_ncbi_client().request("efetch.fcgi", {"db": "pubmed", "id": pubmed_id, "retmode": "xml"})
         
         # Check if the response status code is OK (200)
         if response.status_code == 200:
@@ -746,11 +614,6 @@ def get_combined_conclusions(pubmed_ids: List[str]) -> str:
     # Join all results with a paragraph break
     return "\n\n".join(combined_content)
 
-import os
-import json
-from typing import List
-from openai import OpenAI
-
 def get_outcome_status_openai(pubmed_ids: List[str], disease_name: str) -> str:
     """
     Return the outcome status for a disease name and pubmed ids.
@@ -762,78 +625,9 @@ def get_outcome_status_openai(pubmed_ids: List[str], disease_name: str) -> str:
     Returns:
     - str: A single string containing the outcome status (Success/Failed/Indeterminate).
     """
-    try:
-        if not pubmed_ids or not disease_name:
-            return "Not Known"
-
-        # Placeholder for fetching conclusions
-        conclusion: str = get_combined_conclusions(pubmed_ids=pubmed_ids)
-        pmids_string: str = ",".join(pubmed_ids)
-
-        if conclusion:
-            # Prepare a prompt for classification
-            prompt = f"""
-            The conclusion of the PubMed articles with Pubmed ID {pmids_string} is as follows:
-            {conclusion}
-
-            The article is associated with the disease: {disease_name}.
-
-            Based on this conclusion, classify it into one of the following categories:
-
-            1. **Success**: The study indicates clear positive outcomes or advancements related to the disease's treatment, management, or understanding.
-            2. **Failed**: The study reports negative results, lack of significant outcomes, or setbacks in addressing the disease.
-            3. **Indeterminate**: The study provides ambiguous or inconclusive results, or the conclusion lacks sufficient evidence to determine success or failure.
-
-            Provide the classification in the following JSON format:
-            {{ "classification": "<Success/Failed/Indeterminate>" }}
-            """
-
-            try:
-                # Create an OpenAI client
-                client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-                # Make a call to OpenAI's GPT model
-                response = client.chat.completions.create(
-                    model="gpt-4", 
-                    messages=[
-                        {"role": "system", "content": "You are an expert in analyzing and classifying scientific research."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=4096,  # Adjust as needed
-                    n=1,
-                    stop=None,
-                    temperature=0.2  # Use a low temperature for consistent outputs
-                )
-
-                # Extract the response content
-                response_content = response.choices[0].message.content
-                # print(f"OpenAI Response: {response_content}")
-
-                # Parse the JSON from the response content
-                classification = json.loads(response_content).get("classification", "Indeterminate")
-                # print(f"Classification: {classification}")
-
-                # Return the classification status
-                if "Success" in classification:
-                    return "Success"
-                elif "Failed" in classification:
-                    return "Failed"
-                elif "Indeterminate" in classification:
-                    return "Indeterminate"
-                else:
-                    return "Not Known"
-
-            except Exception as e:
-                print(f"An error occurred while invoking OpenAI: {e}")
-                return "Not Known"
-        else:
-            print(f"Error: No conclusion found for the provided PubMed IDS: {pmids_string}")
-            return "Not Known"
-    
-    except HTTPException as e:
-        raise e
-    
-    except Exception as e:
-        raise e
+    if not pubmed_ids or not disease_name:
+        return "Not Known"
+    return get_outcome_classifier().classify([(pubmed_ids, disease_name)])[0]
     
 def get_outcome_status(pubmed_ids: List[str],disease_name: str) -> str:
     """
@@ -923,6 +717,22 @@ def get_outcome_status(pubmed_ids: List[str],disease_name: str) -> str:
         raise e
     
 
+STOPPED_TRIAL_STATUSES = ("Terminated", "Withdrawn", "Suspended")
+
+
+def classify_outcomes(pending: List[Tuple[Dict[str, Any], str]]) -> None:
+    """
+    Set OutcomeStatus on pipeline entries with a single batched classification.
+
+    :param pending: (entry, disease name) pairs; each entry's PMIDs are classified for that disease.
+    """
+    if not pending:
+        return
+    verdicts = get_outcome_classifier().classify([(entry.get("PMIDs", []), disease) for entry, disease in pending])
+    for (entry, _), verdict in zip(pending, verdicts):
+        entry["OutcomeStatus"] = verdict
+
+
 def add_outcome_status(records: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
     """
     Adds an OutcomeStatus field to each record in the dataset.
@@ -935,13 +745,16 @@ def add_outcome_status(records: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Li
     """
     try:
         # Iterate over all diseases and their respective records
+        pending: List[Tuple[Dict[str, Any], str]] = []
         for disease, entries in records.items():
             for entry in entries:
-                if entry["Status"] == "Terminated" or entry["Status"] == "Withdrawn" or entry["Status"]=="Suspended":
+                if entry["Status"] in STOPPED_TRIAL_STATUSES:
                     entry["OutcomeStatus"] = "Failed"
                 else:
-                    # Call the get_outcome_status function to populate OutcomeStatus
-                    entry["OutcomeStatus"] = get_outcome_status_openai(entry.get("PMIDs", []), disease)
+                    pending.append((entry, disease))
+
+        # Classify the remaining entries in one batch
+        classify_outcomes(pending)
 
     except HTTPException as e:
         raise e
@@ -963,12 +776,15 @@ def add_outcome_status_target_pipeline(records: List[Dict[str, Any]]) -> List[Di
     """
     try:
         # Iterate over all records
+        pending: List[Tuple[Dict[str, Any], str]] = []
         for entry in records:
-            if entry["Status"] == "Terminated" or entry["Status"] == "Withdrawn" or entry["Status"]=="Suspended":
+            if entry["Status"] in STOPPED_TRIAL_STATUSES:
                 entry["OutcomeStatus"] = "Failed"
             else:
-                # Call the get_outcome_status function to populate OutcomeStatus
-                entry["OutcomeStatus"] = get_outcome_status_openai(entry.get("PMIDs", []), entry.get("Disease", "").lower())
+                pending.append((entry, entry.get("Disease", "").lower()))
+
+        # Classify the remaining entries in one batch
+        classify_outcomes(pending)
     
     except HTTPException as e:
         raise e
@@ -979,24 +795,19 @@ def add_outcome_status_target_pipeline(records: List[Dict[str, Any]]) -> List[Di
     return records
 
 def get_why_stopped(nct_id: str) -> str:
-    api_url = f"https://clinicaltrials.gov/api/int/studies/{nct_id}?history=true"
+    return study_why_stopped(get_nct_study_store().get_study(nct_id))
 
-    try:
-        # Send a GET request to the API
-        response = requests.get(api_url)
-        
-        # Raise an error if the response code is not 200
-        response.raise_for_status()
-        
-        # Parse the JSON response
-        study_data = response.json()
-        
-        # Extract and return the `whyStopped` field
-        return study_data.get("study", {}).get("protocolSection", {}).get("statusModule", {}).get("whyStopped", "")
-    
-    except requests.RequestException as e:
-        print(f"Error fetching data for NCT ID {nct_id}: {e}")
-        return ""
+
+def prefetch_strapi_trials(items: List[Dict[str, Any]]) -> None:
+    """ Download the studies referenced by Strapi pipeline records concurrently, ahead of get_why_stopped. """
+    nct_ids: List[str] = []
+    for item in items:
+        trial_id = item.get("trialRecord", {}).get("trialID")
+        if isinstance(trial_id, str):
+            nct_ids.append(trial_id)
+        elif isinstance(trial_id, list) and trial_id:
+            nct_ids.append(trial_id[0])
+    get_nct_study_store().get_studies(nct_ids)
 
 def get_indication_pipeline_strapi(disease_name: str) -> List[Dict[str, Any]]:
     """
@@ -1037,6 +848,7 @@ def get_indication_pipeline_strapi(disease_name: str) -> List[Dict[str, Any]]:
             data = response.json()
             filtered_data = []
 
+            prefetch_strapi_trials(data.get("data", []))
             # Extract only the relevant fields
             for item in data.get("data", []):
                 phase = item.get("trialRecord", {}).get("phase")
@@ -1127,6 +939,7 @@ def get_target_pipeline_strapi(diseases: List[str], target: str) -> List[Dict[st
                   data = response.json()
 
                   # Extract only the relevant fields
+                  prefetch_strapi_trials(data.get("data", []))
                   for item in data.get("data", []):
                       phase = item.get("trialRecord", {}).get("phase")
                       trial_status = item.get("trialRecord", {}).get("trialStatus")
@@ -1170,30 +983,36 @@ def get_target_pipeline_strapi(diseases: List[str], target: str) -> List[Dict[st
         return []
 
 
-def get_disease_pmid_nct_mapping(diseases: List[str]) -> Dict[str, Dict[int, List[str]]]:
+def get_disease_pmid_nct_index(disease: str) -> DiseasePmidNctIndex:
+    """
+    Return the NCT -> PMIDs index of the disease's clinical trial publications, fetching only the
+    articles its PubMed search returned since the last refresh.
+
+    Args:
+        disease (str): The disease name.
+
+    Returns:
+        DiseasePmidNctIndex: The disease's index, shared by the target and indication pipelines.
     """
-    Generate a dictionary mapping diseases to their PMIDs and associated NCT IDs.
+    return get_pmid_nct_index_store().index_for(disease, get_pmids_indication_pipeline, get_mesh_term_for_disease)
+
+
+def get_disease_pmid_nct_mapping(diseases: List[str]) -> Dict[str, DiseasePmidNctIndex]:
+    """
+    Generate a dictionary mapping diseases to the NCT -> PMIDs index of their publications.
 
     Args:
         diseases (List[str]): A list of diseases to process.
 
     Returns:
-        Dict[str, Dict[int, List[str]]]: A dictionary where the key is the disease name,
-                                         and the value is another dictionary that maps PMIDs to lists of NCT IDs.
+        Dict[str, DiseasePmidNctIndex]: A dictionary where the key is the disease name,
+                                        and the value is the index of its PMIDs by NCT ID.
     """
-    # Initialize the result dictionary
-    disease_pmid_nct_mapping: Dict[str, Dict[int, List[str]]] = {}
+    disease_pmid_nct_mapping: Dict[str, DiseasePmidNctIndex] = {}
 
     try:
         for disease in diseases:
-            # Get the list of PMIDs related to the disease using the pipeline function
-            pmids: List[int] = get_pmids_indication_pipeline(disease)
-
-            # Call the function to retrieve the mapping of PMIDs to NCT IDs
-            pmid_nct_dict: Dict[str, List[str]] = get_nctids_from_pmid_efetch(pmids)
-
-            # Add the disease and its PMIDs-NCT mapping to the result dictionary
-            disease_pmid_nct_mapping[disease] = pmid_nct_dict
+            disease_pmid_nct_mapping[disease] = get_disease_pmid_nct_index(disease)
     
     except HTTPException as e:
         raise e
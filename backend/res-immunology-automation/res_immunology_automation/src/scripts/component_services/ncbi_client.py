@@ -0,0 +1,203 @@
+"""
+Shared client for the NCBI E-utilities (and the PMC id converter).
+
+Every request takes a token from one process wide bucket sized from the
+NCBI usage policy: 10 requests/second with NCBI_API_KEY, 3 without. This
+replaces the fixed sleeps callers used to pace themselves with. Identical
+requests issued concurrently share one HTTP call, 429/5xx responses are
+retried with backoff, and large id sets are paged through the history server
+(esearch/epost with usehistory, then efetch by WebEnv/query_key) instead of
+resending the ids with every batch.
+"""
+
+from typing import *
+import os
+import threading
+import time
+from concurrent.futures import Future
+from xml.etree import ElementTree as ET
+
+import requests
+from fastapi import HTTPException
+
+from component_services.rate_limit import TokenBucket
+
+EUTILS_BASE_URL: str = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+PMC_IDCONV_URL: str = "https://www.ncbi.nlm.nih.gov/pmc/utils/idconv/v1.0/"
+NCBI_API_KEY = os.getenv('NCBI_API_KEY')
+EMAIL = os.getenv('NCBI_EMAIL')
+NCBI_TOOL: str = os.getenv("NCBI_TOOL", "my_tool")
+NCBI_REQUESTS_PER_SECOND: float = float(os.getenv("NCBI_REQUESTS_PER_SECOND", "10" if NCBI_API_KEY else "3"))
+NCBI_REQUEST_TIMEOUT: int = 60
+NCBI_MAX_ATTEMPTS: int = int(os.getenv("NCBI_MAX_ATTEMPTS", "4"))
+NCBI_RETRY_BACKOFF: float = 1.0
+# ids per efetch page when reading from the history server
+NCBI_EFETCH_PAGE_SIZE: int = 200
+NCBI_ESEARCH_PAGE_SIZE: int = 5000
+RATE_LIMIT_RETRY_PERIOD = 300
+
+
+class NcbiClient:
+    """ Rate limited, coalescing E-utilities client (synchronous, requests based). """
+
+    def __init__(self, requests_per_second: float = NCBI_REQUESTS_PER_SECOND):
+        self._bucket = TokenBucket(requests_per_second, max(int(requests_per_second), 1))
+        self._session = requests.Session()
+        self._in_flight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _url(endpoint: str) -> str:
+        return endpoint if endpoint.startswith("http") else EUTILS_BASE_URL + endpoint
+
+    @staticmethod
+    def _params(params: Dict[str, Any]) -> Dict[str, Any]:
+        params = {key: value for key, value in params.items() if value is not None}
+        if NCBI_API_KEY:
+            params.setdefault("api_key", NCBI_API_KEY)
+        if EMAIL:
+            params.setdefault("email", EMAIL)
+        params.setdefault("tool", NCBI_TOOL)
+        return params
+
+    def _send(self, method: str, url: str, params: Dict[str, Any]) -> requests.Response:
+        for attempt in range(NCBI_MAX_ATTEMPTS):
+            self._bucket.acquire()
+            try:
+                if method == "POST":
+                    response = self._session.post(url, data=params, timeout=NCBI_REQUEST_TIMEOUT)
+                else:
+                    response = self._session.get(url, params=params, timeout=NCBI_REQUEST_TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == NCBI_MAX_ATTEMPTS - 1:
+                    raise
+                print(f"NCBI request to {url} failed ({e}), retrying")
+            else:
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+                if attempt == NCBI_MAX_ATTEMPTS - 1:
+                    break
+                retry_after = response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    time.sleep(int(retry_after))
+                    continue
+            time.sleep(NCBI_RETRY_BACKOFF * (2 ** attempt))
+        if response.status_code == 429:
+            raise HTTPException(status_code=429, detail=f"Rate limit exceeded. Try again after {RATE_LIMIT_RETRY_PERIOD} seconds.")
+        return response
+
+    def request(self, endpoint: str, params: Dict[str, Any], method: str = "GET") -> requests.Response:
+        """
+        Send an E-utilities request.
+
+        Args:
+            endpoint (str): E-utility name (e.g. 'esearch.fcgi') or an absolute NCBI URL.
+            params (Dict[str, Any]): Query parameters; api_key/email/tool are added.
+            method (str): 'GET', or 'POST' for long id lists.
+
+        Returns:
+            requests.Response: The response; callers check the status as before.
+
+        Raises:
+            HTTPException: 429 when NCBI keeps rate limiting after NCBI_MAX_ATTEMPTS.
+        """
+        url = self._url(endpoint)
+        params = self._params(params)
+        key = (method, url, tuple(sorted((name, str(value)) for name, value in params.items())))
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+        if not owner:
+            return future.result()
+        try:
+            response = self._send(method, url, params)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def esearch_ids(self, db: str, term: str, retmax: int, **params: Any) -> List[str]:
+        """
+        Return up to `retmax` ids matching `term`, paging through the history server when the
+        result is larger than one esearch page.
+        """
+        page_size = min(retmax, NCBI_ESEARCH_PAGE_SIZE)
+        response = self.request("esearch.fcgi", {"db": db, "term": term, "retmode": "json", "retmax": page_size,
+                                                 "usehistory": "y", **params})
+        response.raise_for_status()
+        result = response.json().get("esearchresult", {})
+        ids: List[str] = list(result.get("idlist", []))
+        total = min(int(result.get("count", 0) or 0), retmax)
+        while len(ids) < total:
+            page = self.request("esearch.fcgi", {"db": db, "term": term, "retmode": "json",
+                                                 "retstart": len(ids), "retmax": min(page_size, total - len(ids)),
+                                                 "WebEnv": result.get("webenv"), "usehistory": "y", **params})
+            page.raise_for_status()
+            page_ids = page.json().get("esearchresult", {}).get("idlist", [])
+            if not page_ids:
+                break
+            ids.extend(page_ids)
+        return ids
+
+    def epost(self, db: str, ids: Sequence[str]) -> Tuple[str, str]:
+        """ Upload ids to the history server, returning (WebEnv, query_key). """
+        response = self.request("epost.fcgi", {"db": db, "id": ",".join(ids)}, method="POST")
+        response.raise_for_status()
+        root = ET.fromstring(response.content)
+        webenv, query_key = root.findtext("WebEnv"), root.findtext("QueryKey")
+        if not webenv or not query_key:
+            raise ValueError(f"epost did not return a history entry: {response.text[:200]}")
+        return webenv, query_key
+
+    def efetch_pages(self, db: str, ids: Sequence[str], page_size: int = NCBI_EFETCH_PAGE_SIZE,
+                     **params: Any) -> Iterator[bytes]:
+        """
+        Yield efetch responses for `ids`, `page_size` records at a time. The ids are posted to
+        the history server once and the pages are read by retstart; a single page is fetched
+        directly.
+        """
+        ids = list(ids)
+        if not ids:
+            return
+        if len(ids) <= page_size:
+            response = self.request("efetch.fcgi", {"db": db, "id": ",".join(ids), **params}, method="POST")
+            response.raise_for_status()
+            yield response.content
+            return
+        webenv, query_key = self.epost(db, ids)
+        for retstart in range(0, len(ids), page_size):
+            response = self.request("efetch.fcgi", {"db": db, "WebEnv": webenv, "query_key": query_key,
+                                                    "retstart": retstart, "retmax": page_size, **params})
+            response.raise_for_status()
+            yield response.content
+
+    def convert_ids(self, ids: Sequence[str]) -> List[Dict[str, Any]]:
+        """ PMC id converter: records for up to 200 PMIDs/PMCIDs. """
+        response = self.request(PMC_IDCONV_URL, {"ids": ",".join(ids), "format": "json"})
+        response.raise_for_status()
+        data = response.json()
+        if data.get("status", "ok") != "ok":
+            print(f"Error in response: {data.get('error', 'Unknown error')}")
+            return []
+        return data.get("records", [])
+
+
+_ncbi_client: Optional[NcbiClient] = None
+_ncbi_client_lock = threading.Lock()
+
+
+def get_ncbi_client() -> NcbiClient:
+    """ Return the process wide NCBI client, so every caller shares one rate limit. """
+    global _ncbi_client
+    if _ncbi_client is None:
+        with _ncbi_client_lock:
+            if _ncbi_client is None:
+                _ncbi_client = NcbiClient()
+    return _ncbi_client
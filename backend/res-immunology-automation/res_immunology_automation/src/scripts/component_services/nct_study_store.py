@@ -0,0 +1,184 @@
+from typing import *
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+
+from http_client import async_get
+
+CLINICAL_TRIALS_STUDY_URL: str = "https://clinicaltrials.gov/api/v2/studies/{nct_id}"
+# How long a downloaded study document is served before it is fetched again
+NCT_STUDY_TTL: int = int(os.getenv("NCT_STUDY_TTL", str(24 * 60 * 60)))
+NCT_STUDY_CACHE_SIZE: int = int(os.getenv("NCT_STUDY_CACHE_SIZE", "20000"))
+# Maximum number of concurrent requests to clinicaltrials.gov
+NCT_FETCH_CONCURRENCY: int = int(os.getenv("NCT_FETCH_CONCURRENCY", "8"))
+NCT_REQUEST_TIMEOUT: int = 20
+
+
+class NctStudyStore:
+    """
+    Process wide store of ClinicalTrials.gov study documents (API v2), keyed by NCT id.
+
+    Every consumer (trial titles, sponsor, whyStopped, KOL locations) reads the same
+    document, which is downloaded at most once per TTL: concurrent requests for an id
+    that is already being fetched wait for that download instead of starting another.
+    Failed downloads are not cached.
+    """
+
+    def __init__(self, ttl: int = NCT_STUDY_TTL, max_size: int = NCT_STUDY_CACHE_SIZE,
+                 concurrency: int = NCT_FETCH_CONCURRENCY):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.concurrency = concurrency
+        self._studies: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="nct-store")
+        self._async_limit: Optional[asyncio.Semaphore] = None
+
+    def _cached(self, nct_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._studies.get(nct_id)
+        if entry is None:
+            return None
+        fetched_at, study = entry
+        if time.time() - fetched_at > self.ttl:
+            del self._studies[nct_id]
+            return None
+        self._studies.move_to_end(nct_id)
+        return study
+
+    def _store(self, nct_id: str, study: Dict[str, Any]) -> None:
+        with self._lock:
+            self._studies[nct_id] = (time.time(), study)
+            self._studies.move_to_end(nct_id)
+            while len(self._studies) > self.max_size:
+                self._studies.popitem(last=False)
+
+    @staticmethod
+    def _download(nct_id: str) -> Dict[str, Any]:
+        response = requests.get(CLINICAL_TRIALS_STUDY_URL.format(nct_id=nct_id), timeout=NCT_REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def _fetch(self, nct_id: str) -> Dict[str, Any]:
+        study = self._download(nct_id)
+        self._store(nct_id, study)
+        return study
+
+    def _future_for(self, nct_id: str) -> Future:
+        """ Future resolving to the study: already done on a cache hit, shared while a download runs. """
+        with self._lock:
+            study = self._cached(nct_id)
+            if study is not None:
+                future: Future = Future()
+                future.set_result(study)
+                return future
+            future = self._in_flight.get(nct_id)
+            if future is None:
+                future = self._executor.submit(self._fetch, nct_id)
+                self._in_flight[nct_id] = future
+                future.add_done_callback(lambda _, nct_id=nct_id: self._forget(nct_id))
+            return future
+
+    def _forget(self, nct_id: str) -> None:
+        with self._lock:
+            self._in_flight.pop(nct_id, None)
+
+    def get_study(self, nct_id: str, raise_errors: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Return the study document of an NCT id.
+
+        Args:
+            nct_id (str): The NCT id.
+            raise_errors (bool): Re-raise the request error instead of returning None.
+
+        Returns:
+            Optional[Dict[str, Any]]: The ClinicalTrials.gov v2 study, None if it could not be fetched.
+        """
+        try:
+            return self._future_for(nct_id).result()
+        except requests.RequestException as e:
+            if raise_errors:
+                raise
+            print(f"Error fetching study {nct_id}: {e}")
+            return None
+
+    def get_studies(self, nct_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """ Fetch many studies, NCT_FETCH_CONCURRENCY at a time; failed ids map to None. """
+        futures = {nct_id: self._future_for(nct_id) for nct_id in dict.fromkeys(nct_ids) if nct_id}
+        studies: Dict[str, Optional[Dict[str, Any]]] = {}
+        for nct_id, future in futures.items():
+            try:
+                studies[nct_id] = future.result()
+            except requests.RequestException as e:
+                print(f"Error fetching study {nct_id}: {e}")
+                studies[nct_id] = None
+        return studies
+
+    async def async_get_studies(self, nct_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """ Event loop version of `get_studies`, using the shared async clinicaltrials.gov client. """
+        if self._async_limit is None:
+            self._async_limit = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(nct_id: str) -> Optional[Dict[str, Any]]:
+            with self._lock:
+                study = self._cached(nct_id)
+                in_flight = self._in_flight.get(nct_id)
+            if study is not None:
+                return study
+            if in_flight is not None:
+                try:
+                    return await asyncio.wrap_future(in_flight)
+                except requests.RequestException:
+                    return None
+            async with self._async_limit:
+                try:
+                    response = await async_get(CLINICAL_TRIALS_STUDY_URL.format(nct_id=nct_id))
+                    response.raise_for_status()
+                    study = response.json()
+                except Exception as e:
+                    print(f"Error fetching study {nct_id}: {e}")
+                    return None
+            self._store(nct_id, study)
+            return study
+
+        unique_ids = [nct_id for nct_id in dict.fromkeys(nct_ids) if nct_id]
+        results = await asyncio.gather(*(fetch(nct_id) for nct_id in unique_ids))
+        return dict(zip(unique_ids, results))
+
+
+def study_title(study: Optional[Dict[str, Any]]) -> str:
+    return ((study or {}).get("protocolSection", {}).get("identificationModule", {}).get("officialTitle")) or ""
+
+
+def study_sponsor(study: Optional[Dict[str, Any]]) -> str:
+    if not study:
+        return "Unknown"
+    organization = study.get("protocolSection", {}).get("identificationModule", {}).get("organization", {})
+    return organization.get("fullName") or "Unknown"
+
+
+def study_why_stopped(study: Optional[Dict[str, Any]]) -> str:
+    return (study or {}).get("protocolSection", {}).get("statusModule", {}).get("whyStopped", "")
+
+
+def study_locations(study: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return (study or {}).get("protocolSection", {}).get("contactsLocationsModule", {}).get("locations", [])
+
+
+_nct_study_store: Optional[NctStudyStore] = None
+_nct_study_store_lock = threading.Lock()
+
+
+def get_nct_study_store() -> NctStudyStore:
+    """ Return the process wide NCT study store, creating it on first use. """
+    global _nct_study_store
+    if _nct_study_store is None:
+        with _nct_study_store_lock:
+            if _nct_study_store is None:
+                _nct_study_store = NctStudyStore()
+    return _nct_study_store
@@ -0,0 +1,217 @@
+from typing import *
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
+import requests
+from openai import OpenAI
+
+from cache_store import merge_json_file, read_json_file
+from component_services.ncbi_client import get_ncbi_client
+from component_services.rate_limit import TokenBucket
+
+# PMIDs per efetch page; all abstracts of a pipeline are posted to the NCBI history server at once
+EFETCH_BATCH_SIZE: int = int(os.getenv("OUTCOME_EFETCH_BATCH_SIZE", "500"))
+# Verdicts are persisted here so a pipeline rebuild only classifies trials it has not seen before
+OUTCOME_VERDICTS_FILE: str = os.getenv(
+    "OUTCOME_VERDICTS_FILE", os.path.join("cached_data_json", "outcome_verdicts.json")
+)
+OUTCOME_LLM_MODEL: str = os.getenv("OUTCOME_LLM_MODEL", "gpt-4")
+# Concurrent chat completion requests and the overall request rate allowed towards the LLM
+OUTCOME_LLM_CONCURRENCY: int = int(os.getenv("OUTCOME_LLM_CONCURRENCY", "4"))
+OUTCOME_LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("OUTCOME_LLM_REQUESTS_PER_MINUTE", "60"))
+
+NOT_KNOWN: str = "Not Known"
+VERDICTS: Tuple[str, ...] = ("Success", "Failed", "Indeterminate")
+
+OutcomeKey = Tuple[Tuple[str, ...], str]
+
+
+def outcome_key(pubmed_ids: Iterable[str], disease_name: str) -> OutcomeKey:
+    """ Entries citing the same publications for the same disease share one verdict. """
+    return tuple(sorted({str(pmid) for pmid in pubmed_ids if pmid})), disease_name.strip().lower()
+
+
+def _verdict_id(key: OutcomeKey) -> str:
+    pubmed_ids, disease_name = key
+    return f"{disease_name}|{','.join(pubmed_ids)}"
+
+
+def extract_conclusion(article: ElementTree.Element) -> str:
+    """
+    Return the CONCLUSION(S)/INTERPRETATION section of an article's abstract, or the
+    whole abstract when it is not structured.
+    """
+    abstract_texts = article.findall(".//AbstractText")
+    for abstract_text in abstract_texts:
+        if abstract_text.attrib.get("Label") in ("CONCLUSIONS", "CONCLUSION", "INTERPRETATION") and abstract_text.text:
+            return abstract_text.text.strip()
+    return " ".join("".join(abstract_text.itertext()) for abstract_text in abstract_texts)
+
+
+def fetch_conclusions(pubmed_ids: Iterable[str]) -> Dict[str, str]:
+    """
+    Fetch the conclusions of many PubMed articles with batched efetch requests.
+
+    Args:
+        pubmed_ids (Iterable[str]): PubMed IDs, duplicates are fetched once.
+
+    Returns:
+        Dict[str, str]: PMID -> conclusion or abstract text, for the articles that have one.
+    """
+    unique_ids = list(dict.fromkeys(str(pmid) for pmid in pubmed_ids if pmid))
+    conclusions: Dict[str, str] = {}
+    try:
+        for page in get_ncbi_client().efetch_pages("pubmed", unique_ids, EFETCH_BATCH_SIZE, retmode="xml"):
+            for article in ElementTree.fromstring(page).findall(".//PubmedArticle"):
+                pmid = article.findtext("./MedlineCitation/PMID")
+                conclusion = extract_conclusion(article)
+                if pmid and conclusion:
+                    conclusions[pmid] = conclusion
+    except (requests.RequestException, ElementTree.ParseError, ValueError) as e:
+        # classify what was fetched, the rest is retried by the next build
+        print(f"An error occurred while fetching abstracts for {len(unique_ids)} PMIDs: {e}")
+    return conclusions
+
+
+def build_outcome_prompt(pubmed_ids: Sequence[str], conclusion: str, disease_name: str) -> str:
+    pmids_string: str = ",".join(pubmed_ids)
+    return f"""
+            The conclusion of the PubMed articles with Pubmed ID {pmids_string} is as follows:
+            {conclusion}
+
+            The article is associated with the disease: {disease_name}.
+
+            Based on this conclusion, classify it into one of the following categories:
+
+            1. **Success**: The study indicates clear positive outcomes or advancements related to the disease's treatment, management, or understanding.
+            2. **Failed**: The study reports negative results, lack of significant outcomes, or setbacks in addressing the disease.
+            3. **Indeterminate**: The study provides ambiguous or inconclusive results, or the conclusion lacks sufficient evidence to determine success or failure.
+
+            Provide the classification in the following JSON format:
+            {{ "classification": "<Success/Failed/Indeterminate>" }}
+            """
+
+
+def parse_verdict(response_content: str) -> str:
+    classification = json.loads(response_content).get("classification", "Indeterminate")
+    for verdict in VERDICTS:
+        if verdict in classification:
+            return verdict
+    return NOT_KNOWN
+
+
+class OutcomeClassifier:
+    """
+    Classifies clinical trial outcomes (Success/Failed/Indeterminate) from the conclusions
+    of the publications linked to the trial.
+
+    A batch of entries is deduplicated by (sorted PMIDs, disease), verdicts already on disk
+    are reused, the abstracts of everything left are fetched together and the remaining
+    classifications run concurrently on one shared OpenAI client, within
+    OUTCOME_LLM_REQUESTS_PER_MINUTE.
+    """
+
+    def __init__(self, verdicts_file: str = OUTCOME_VERDICTS_FILE, concurrency: int = OUTCOME_LLM_CONCURRENCY,
+                 requests_per_minute: int = OUTCOME_LLM_REQUESTS_PER_MINUTE, model: str = OUTCOME_LLM_MODEL):
+        self.verdicts_file = verdicts_file
+        self.concurrency = concurrency
+        self.model = model
+        self._rate_limiter = TokenBucket(requests_per_minute / 60.0) if requests_per_minute > 0 else None
+        self._client: Optional[OpenAI] = None
+        self._verdicts: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load_verdicts()
+
+    def _load_verdicts(self) -> None:
+        self._verdicts = read_json_file(self.verdicts_file)
+
+    def _save_verdicts(self, verdicts: Dict[str, str]) -> None:
+        """ Add verdicts to the file, keeping the ones other processes saved since it was loaded. """
+        try:
+            self._verdicts = merge_json_file(self.verdicts_file, verdicts, indent=2)
+        except OSError as e:
+            print(f"Could not persist outcome verdicts: {e}")
+            self._verdicts.update(verdicts)
+
+    @property
+    def client(self) -> OpenAI:
+        with self._lock:
+            if self._client is None:
+                self._client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+            return self._client
+
+    def _classify(self, key: OutcomeKey, conclusion: str) -> str:
+        pubmed_ids, disease_name = key
+        prompt = build_outcome_prompt(pubmed_ids, conclusion, disease_name)
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": "You are an expert in analyzing and classifying scientific research."},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=4096,
+                n=1,
+                stop=None,
+                temperature=0.2  # Use a low temperature for consistent outputs
+            )
+            return parse_verdict(response.choices[0].message.content)
+        except Exception as e:
+            print(f"An error occurred while invoking OpenAI: {e}")
+            return NOT_KNOWN
+
+    def classify(self, items: Sequence[Tuple[Sequence[str], str]]) -> List[str]:
+        """
+        Classify a batch of (PubMed IDs, disease name) pairs.
+
+        Args:
+            items (Sequence[Tuple[Sequence[str], str]]): The PMIDs linked to each entry and its disease.
+
+        Returns:
+            List[str]: Success/Failed/Indeterminate/Not Known for each item, in order.
+        """
+        keys = [outcome_key(pubmed_ids, disease_name) for pubmed_ids, disease_name in items]
+        with self._lock:
+            pending = [key for key in dict.fromkeys(keys)
+                       if key[0] and key[1] and _verdict_id(key) not in self._verdicts]
+
+        if pending:
+            conclusions = fetch_conclusions(pmid for key in pending for pmid in key[0])
+            to_classify: Dict[OutcomeKey, str] = {}
+            for key in pending:
+                conclusion = "\n\n".join(conclusions[pmid] for pmid in key[0] if pmid in conclusions)
+                if conclusion:
+                    to_classify[key] = conclusion
+                else:
+                    print(f"Error: No conclusion found for the provided PubMed IDS: {','.join(key[0])}")
+
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                verdicts = dict(zip(to_classify, executor.map(lambda item: self._classify(*item), to_classify.items())))
+
+            # a "Not Known" verdict (LLM error) is retried on the next build instead of being remembered
+            classified = {_verdict_id(key): verdict for key, verdict in verdicts.items() if verdict != NOT_KNOWN}
+            if classified:
+                with self._lock:
+                    self._save_verdicts(classified)
+
+        with self._lock:
+            return [self._verdicts.get(_verdict_id(key), NOT_KNOWN) for key in keys]
+
+
+_outcome_classifier: Optional[OutcomeClassifier] = None
+_outcome_classifier_lock = threading.Lock()
+
+
+def get_outcome_classifier() -> OutcomeClassifier:
+    """ Return the process wide outcome classifier, loading the persisted verdicts on first use. """
+    global _outcome_classifier
+    if _outcome_classifier is None:
+        with _outcome_classifier_lock:
+            if _outcome_classifier is None:
+                _outcome_classifier = OutcomeClassifier()
+    return _outcome_classifier
@@ -0,0 +1,202 @@
+"""
+Persistent NCT -> PMIDs index of the clinical trial publications of each disease.
+
+The pipeline builds match trial records to the PubMed articles that cite them. Each
+disease keeps a file under PMID_NCT_INDEX_DIR with, per PMID of its clinical trial
+search, the NCT ids from the article's DataBankList and its major-topic MeSH
+descriptors. On refresh only the PMIDs not seen before (and, every
+PMID_NCT_UNINDEXED_RECHECK, those PubMed had not MeSH-indexed yet) are fetched, and
+matching a record is a set lookup per NCT id. The
+target and indication pipelines read the same index; the indication pipeline only
+keeps articles whose major topic is the disease's MeSH term.
+"""
+
+from typing import *
+import os
+import threading
+import time
+
+from cache_store import read_json_file, write_json_file
+from component_services.ncbi_client import get_ncbi_client
+from component_services.pubmed_parser import PubmedArticleRecord, iter_pubmed_articles
+
+PMID_NCT_INDEX_DIR: str = os.getenv("PMID_NCT_INDEX_DIR", os.path.join("cached_data_json", "pmid_nct_index"))
+# The PubMed search of a disease is repeated once the index is older than this
+PMID_NCT_INDEX_REFRESH_TTL: int = int(os.getenv("PMID_NCT_INDEX_REFRESH_TTL", str(6 * 60 * 60)))
+# Articles PubMed had not MeSH-indexed are fetched again after this; many never are (non-MEDLINE records)
+PMID_NCT_UNINDEXED_RECHECK: int = int(os.getenv("PMID_NCT_UNINDEXED_RECHECK", str(7 * 24 * 60 * 60)))
+PMID_NCT_EFETCH_PAGE_SIZE: int = 200
+
+
+def _disease_key(disease: str) -> str:
+    return disease.strip().lower().replace(" ", "_")
+
+
+def _major_topics(record: PubmedArticleRecord) -> List[str]:
+    """ Descriptors that are a major topic themselves or through one of their qualifiers. """
+    return sorted({heading.descriptor.lower() for heading in record.mesh_headings
+                   if heading.major or any(major for _, major in heading.qualifiers)})
+
+
+class DiseasePmidNctIndex:
+    """ The PMID -> NCT ids entries of one disease and their NCT -> PMIDs inversion. """
+
+    def __init__(self, disease: str, pmids: Optional[List[str]] = None, mesh_term: Optional[str] = None,
+                 refreshed_at: float = 0.0, articles: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.disease = disease
+        # PMIDs of the disease's latest clinical trial search
+        self.pmids: List[str] = pmids or []
+        self.mesh_term = mesh_term
+        self.refreshed_at = refreshed_at
+        self.articles: Dict[str, Dict[str, Any]] = articles or {}
+        self._current: Set[str] = set(self.pmids)
+        self._by_nct: Dict[str, Set[str]] = {}
+        for pmid, article in self.articles.items():
+            self._invert(pmid, article)
+
+    def __repr__(self) -> str:
+        return f"DiseasePmidNctIndex({self.disease!r}, pmids={len(self.pmids)}, nct_ids={len(self._by_nct)})"
+
+    def _invert(self, pmid: str, article: Dict[str, Any]) -> None:
+        for nct_id in article["nct_ids"]:
+            self._by_nct.setdefault(nct_id, set()).add(pmid)
+
+    def add(self, record: PubmedArticleRecord) -> None:
+        previous = self.articles.get(record.pmid)
+        if previous is not None:
+            for nct_id in previous["nct_ids"]:
+                self._by_nct.get(nct_id, set()).discard(record.pmid)
+        article = {"nct_ids": list(dict.fromkeys(record.nct_ids)), "major_topics": _major_topics(record),
+                   # articles PubMed has not indexed yet get their MeSH terms and DataBanks later
+                   "indexed": bool(record.mesh_headings), "checked_at": time.time()}
+        self.articles[record.pmid] = article
+        self._invert(record.pmid, article)
+
+    def set_pmids(self, pmids: List[str]) -> None:
+        self.pmids = list(pmids)
+        self._current = set(self.pmids)
+
+    def missing(self, recheck: int = PMID_NCT_UNINDEXED_RECHECK) -> List[str]:
+        """
+        PMIDs of the current search that were never fetched, or were not MeSH-indexed
+        when last fetched more than `recheck` seconds ago.
+        """
+        now = time.time()
+        return [pmid for pmid in self.pmids
+                if pmid not in self.articles
+                or (not self.articles[pmid].get("indexed", True)
+                    and now - self.articles[pmid].get("checked_at", 0.0) > recheck)]
+
+    def pmids_for(self, nct_ids: Iterable[str], mesh_major_only: bool = False) -> List[str]:
+        """
+        Return the PMIDs of the disease's search that cite any of the NCT ids.
+
+        Args:
+            nct_ids (Iterable[str]): NCT ids of a pipeline record.
+            mesh_major_only (bool): Keep only articles whose major topic is the disease's MeSH term.
+
+        Returns:
+            List[str]: The matching PMIDs.
+        """
+        matching: Set[str] = set()
+        for nct_id in nct_ids:
+            matching |= self._by_nct.get(nct_id, set()) & self._current
+        if mesh_major_only:
+            mesh_term = (self.mesh_term or "").strip().lower()
+            matching = {pmid for pmid in matching if mesh_term in self.articles[pmid]["major_topics"]}
+        return sorted(matching)
+
+    def pmid_nct_dict(self, mesh_major_only: bool = False) -> Dict[str, List[str]]:
+        """ PMID -> NCT ids for the articles of the current search that cite a trial. """
+        mesh_term = (self.mesh_term or "").strip().lower()
+        return {pmid: self.articles[pmid]["nct_ids"] for pmid in self.pmids
+                if pmid in self.articles and self.articles[pmid]["nct_ids"]
+                and (not mesh_major_only or mesh_term in self.articles[pmid]["major_topics"])}
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"disease": self.disease, "pmids": self.pmids, "mesh_term": self.mesh_term,
+                "refreshed_at": self.refreshed_at, "articles": self.articles}
+
+
+class PmidNctIndexStore:
+    """ Loads, refreshes and persists the per-disease indexes; one refresh per disease at a time. """
+
+    def __init__(self, index_dir: str = PMID_NCT_INDEX_DIR, ttl: int = PMID_NCT_INDEX_REFRESH_TTL):
+        self.index_dir = index_dir
+        self.ttl = ttl
+        self._indexes: Dict[str, DiseasePmidNctIndex] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.index_dir, f"{key}.json")
+
+    def _load(self, disease: str, key: str) -> DiseasePmidNctIndex:
+        path = self._path(key)
+        data = read_json_file(path)
+        if data:
+            try:
+                return DiseasePmidNctIndex(disease, data.get("pmids"), data.get("mesh_term"),
+                                           data.get("refreshed_at", 0.0), data.get("articles"))
+            except (KeyError, TypeError) as e:
+                print(f"Could not load the PMID/NCT index from {path}: {e}")
+        return DiseasePmidNctIndex(disease)
+
+    def _save(self, key: str, index: DiseasePmidNctIndex) -> None:
+        try:
+            write_json_file(self._path(key), index.to_json())
+        except OSError as e:
+            print(f"Could not persist the PMID/NCT index of {index.disease}: {e}")
+
+    def _disease_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def index_for(self, disease: str, search_pmids: Callable[[str], List[str]],
+                  search_mesh_term: Callable[[str], Optional[str]]) -> DiseasePmidNctIndex:
+        """
+        Return the disease's index, refreshing it when it is older than the TTL.
+
+        Args:
+            disease (str): The disease name.
+            search_pmids (Callable[[str], List[str]]): Returns the PMIDs of the disease's clinical trial search.
+            search_mesh_term (Callable[[str], Optional[str]]): Returns the disease's MeSH term.
+
+        Returns:
+            DiseasePmidNctIndex: The up to date index.
+        """
+        key = _disease_key(disease)
+        with self._disease_lock(key):
+            index = self._indexes.get(key)
+            if index is None or time.time() - index.refreshed_at > self.ttl:
+                # another process may have refreshed the index since it was loaded
+                index = self._load(disease, key)
+                self._indexes[key] = index
+            if time.time() - index.refreshed_at <= self.ttl:
+                return index
+
+            index.set_pmids(search_pmids(disease))
+            index.mesh_term = search_mesh_term(disease)
+            missing = index.missing()
+            print(f"PMID/NCT index of {disease}: {len(index.pmids)} PMIDs, fetching {len(missing)}")
+            for page in get_ncbi_client().efetch_pages("pubmed", missing, PMID_NCT_EFETCH_PAGE_SIZE, retmode="xml"):
+                for record in iter_pubmed_articles(page):
+                    if record.pmid:
+                        index.add(record)
+            index.refreshed_at = time.time()
+            self._save(key, index)
+            return index
+
+
+_pmid_nct_index_store: Optional[PmidNctIndexStore] = None
+_pmid_nct_index_store_lock = threading.Lock()
+
+
+def get_pmid_nct_index_store() -> PmidNctIndexStore:
+    """ Return the process wide PMID/NCT index store. """
+    global _pmid_nct_index_store
+    if _pmid_nct_index_store is None:
+        with _pmid_nct_index_store_lock:
+            if _pmid_nct_index_store is None:
+                _pmid_nct_index_store = PmidNctIndexStore()
+    return _pmid_nct_index_store
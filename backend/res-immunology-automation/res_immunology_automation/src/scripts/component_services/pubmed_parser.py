@@ -0,0 +1,156 @@
+"""
+Streaming parser for PubMed efetch (retmode=xml) responses.
+
+`iter_pubmed_articles` walks the response with `iterparse` and yields one
+compact `PubmedArticleRecord` per <PubmedArticle>, reading every field the
+literature and pipeline builds use from the article's own subtree and then
+clearing it, so a 200 article response is never held as a full tree.
+"""
+
+from typing import *
+import io
+from xml.etree import ElementTree as ET
+
+
+class MeshHeading(NamedTuple):
+    descriptor: str
+    major: bool
+    # (qualifier name, is major topic)
+    qualifiers: List[Tuple[str, bool]]
+
+
+class PubmedArticleRecord(NamedTuple):
+    pmid: str
+    title: str
+    vernacular_title: str
+    abstract: str
+    year: str
+    publication_types: List[str]
+    mesh_headings: List[MeshHeading]
+    nct_ids: List[str]
+    authors: List[str]
+    # name of the last listed author, None when that author has no name
+    last_author: Optional[str]
+    journal_title: Optional[str]
+    journal_issn: Optional[str]
+
+
+def element_title_text(element: ET.Element) -> str:
+    """ ArticleTitle/VernacularTitle text, keeping nested <sub>/<sup> tags. """
+    text_elements = []
+    for node in element.iter():
+        if node.tag == "sub" or node.tag == "sup":
+            text_elements.append(f"<{node.tag}>{node.text}</{node.tag}>")
+        elif node.text:
+            text_elements.append(node.text.strip())
+        if node.tail:
+            text_elements.append(node.tail.strip())
+    return " ".join(text_elements).strip()
+
+
+def _text(element: Optional[ET.Element]) -> str:
+    return element.text if element is not None and element.text else ""
+
+
+def _author_name(author: ET.Element) -> Optional[str]:
+    fore_name = author.findtext("ForeName")
+    last_name = author.findtext("LastName")
+    if fore_name and last_name:
+        return f"{fore_name.strip()} {last_name.strip()}"
+    if last_name:
+        return last_name.strip()
+    return None
+
+
+def _mesh_headings(citation: ET.Element) -> List[MeshHeading]:
+    headings = []
+    for mesh_heading in citation.iterfind("MeshHeadingList/MeshHeading"):
+        descriptor = mesh_heading.find("DescriptorName")
+        if descriptor is None or not descriptor.text:
+            continue
+        qualifiers = [(qualifier.text.strip(), qualifier.attrib.get("MajorTopicYN") == "Y")
+                      for qualifier in mesh_heading.iterfind("QualifierName") if qualifier.text]
+        headings.append(MeshHeading(descriptor.text.strip(), descriptor.attrib.get("MajorTopicYN") == "Y", qualifiers))
+    return headings
+
+
+def _nct_ids(article: ET.Element) -> List[str]:
+    nct_ids = []
+    for databank in article.iterfind("DataBankList/DataBank"):
+        if databank.findtext("DataBankName") == "ClinicalTrials.gov":
+            nct_ids.extend(accession.text for accession in databank.iterfind("AccessionNumberList/AccessionNumber")
+                           if accession.text)
+    return nct_ids
+
+
+def _record(pubmed_article: ET.Element) -> PubmedArticleRecord:
+    citation = pubmed_article.find("MedlineCitation")
+    if citation is None:
+        citation = ET.Element("MedlineCitation")
+    article = citation.find("Article")
+    if article is None:
+        article = ET.Element("Article")
+    journal = article.find("Journal")
+
+    title = article.find("ArticleTitle")
+    vernacular_title = article.find("VernacularTitle")
+
+    authors: List[str] = []
+    last_author = None
+    for author in article.iterfind("AuthorList/Author"):
+        last_author = _author_name(author)
+        if last_author:
+            authors.append(last_author)
+
+    return PubmedArticleRecord(
+        pmid=_text(citation.find("PMID")),
+        title=element_title_text(title) if title is not None else "",
+        vernacular_title=element_title_text(vernacular_title) if vernacular_title is not None else "",
+        abstract=_text(article.find("Abstract/AbstractText")),
+        year=_text(article.find("Journal/JournalIssue/PubDate/Year")),
+        publication_types=[pub_type.text for pub_type in article.iterfind("PublicationTypeList/PublicationType")
+                           if pub_type.text],
+        mesh_headings=_mesh_headings(citation),
+        nct_ids=_nct_ids(article),
+        authors=authors,
+        last_author=last_author,
+        journal_title=journal.findtext("Title") if journal is not None and len(journal) else None,
+        journal_issn=journal.findtext("ISSN") if journal is not None and len(journal) else None,
+    )
+
+
+def iter_pubmed_articles(source: Union[bytes, str, IO[bytes]]) -> Iterator[PubmedArticleRecord]:
+    """
+    Yield the articles of an efetch PubmedArticleSet one at a time.
+
+    Args:
+        source (Union[bytes, str, IO[bytes]]): The response body, or a file-like object streaming it.
+
+    Returns:
+        Iterator[PubmedArticleRecord]: One record per <PubmedArticle>, in document order.
+    """
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    root = None
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if root is None:
+            root = element
+        if event == "end" and element.tag == "PubmedArticle":
+            yield _record(element)
+            # drop the parsed article (and its now empty slot in the set) before reading the next one
+            element.clear()
+            root.clear()
+
+
+def qualifiers_for_disease(mesh_headings: List[MeshHeading], disease_name: str) -> List[str]:
+    """ Qualifiers of the major-topic MeSH heading matching the disease. """
+    if not disease_name:
+        return []
+    disease_name = disease_name.strip().lower()
+    qualifiers: List[str] = []
+    for heading in mesh_headings:
+        if heading.major and heading.descriptor.lower() == disease_name:
+            qualifiers.extend(name for name, _ in heading.qualifiers)
+    return qualifiers
@@ -0,0 +1,105 @@
+from typing import Dict, Iterable, List, Optional, Type, Union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from .models import Target, Disease, TargetDisease
+
+LookupModel = Union[Type[Target], Type[Disease], Type[TargetDisease]]
+LookupRecord = Union[Target, Disease, TargetDisease]
+
+
+def get_lookup_records(db: Session, model: LookupModel, record_ids: Iterable[str]) -> Dict[str, LookupRecord]:
+    """
+    Fetch the lookup-table rows of several entities with a single `IN` query.
+
+    Args:
+        db (Session): Database session.
+        model (LookupModel): Lookup-table model.
+        record_ids (Iterable[str]): Entity ids, duplicates are ignored.
+
+    Returns:
+        Dict[str, LookupRecord]: Rows keyed by id, ids without a row are absent.
+    """
+    unique_ids: List[str] = list(dict.fromkeys(record_ids))
+    if not unique_ids:
+        return {}
+    records = db.query(model).filter(model.id.in_(unique_ids)).all()
+    return {record.id: record for record in records}
+
+
+def bulk_upsert_lookup_records(db: Session, model: LookupModel, file_paths: Dict[str, str]) -> None:
+    """
+    Insert or update many cache lookup-table rows (Target, Disease or TargetDisease)
+    in one statement and one transaction.
+
+    Uses INSERT ... ON CONFLICT so concurrent writers (API workers and the
+    build_dossier worker) registering the same entity never fail with a
+    duplicate key error.
+
+    Args:
+        db (Session): Database session.
+        model (LookupModel): Lookup-table model.
+        file_paths (Dict[str, str]): Entity id -> path of the entity's cache store.
+    """
+    if not file_paths:
+        return
+    statement = insert(model.__table__).values(
+        [{"id": record_id, "file_path": file_path} for record_id, file_path in file_paths.items()]
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[model.__table__.c.id],
+        set_={"file_path": statement.excluded.file_path},
+    )
+    db.execute(statement)
+    db.commit()
+
+
+def upsert_lookup_record(db: Session, model: LookupModel, record_id: str, file_path: str) -> None:
+    """
+    Insert or update a single cache lookup-table row, see `bulk_upsert_lookup_records`.
+
+    Args:
+        db (Session): Database session.
+        model (LookupModel): Lookup-table model.
+        record_id (str): Entity id (disease, target or "<target>-<disease>").
+        file_path (str): Path of the entity's cache store.
+    """
+    bulk_upsert_lookup_records(db, model, {record_id: file_path})
+
+
+class LookupRecords:
+    """
+    Per-request view of a lookup table. The ids known up front are resolved with one
+    `IN` query, resolved rows (and misses) are memoized for the rest of the request,
+    and rows registered with `stage` are written by `flush` in a single transaction.
+    """
+
+    def __init__(self, db: Session, model: LookupModel, record_ids: Iterable[str] = ()):
+        self.db = db
+        self.model = model
+        self._records: Dict[str, Optional[LookupRecord]] = {}
+        self._pending: Dict[str, str] = {}
+        self.prefetch(record_ids)
+
+    def prefetch(self, record_ids: Iterable[str]) -> None:
+        missing: List[str] = [record_id for record_id in dict.fromkeys(record_ids) if record_id not in self._records]
+        if not missing:
+            return
+        found = get_lookup_records(self.db, self.model, missing)
+        for record_id in missing:
+            self._records[record_id] = found.get(record_id)
+
+    def get(self, record_id: str) -> Optional[LookupRecord]:
+        """ Return the row of an entity (None when it is not cached yet). """
+        if record_id not in self._records:
+            self.prefetch([record_id])
+        return self._records[record_id]
+
+    def stage(self, record_id: str, file_path: str) -> None:
+        """ Register an entity's cache store, written on the next `flush`. """
+        self._records[record_id] = self.model(id=record_id, file_path=file_path)
+        self._pending[record_id] = file_path
+
+    def flush(self) -> None:
+        """ Write the staged rows; call it in a `finally:` so stores written before an error stay reachable. """
+        bulk_upsert_lookup_records(self.db, self.model, self._pending)
+        self._pending.clear()
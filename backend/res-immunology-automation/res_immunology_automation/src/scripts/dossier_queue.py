@@ -0,0 +1,217 @@
+"""
+Redis stream backed job queue for building disease dossiers.
+
+`/dossier/disease-dossier-status/` enqueues new diseases on the interactive
+lane and bulk regeneration (cache_management.regenerate) uses the bulk lane;
+build_dossier workers always drain the interactive lane first.
+
+Each lane is a Redis stream read through one consumer group, so an entry
+delivered to a worker stays in the group's pending list until it is acked.
+That pending entry is the worker's lease: the worker heartbeats by
+re-claiming it, and entries idle for longer than LEASE_TIMEOUT_MS (worker
+crashed or hung) are claimed by another worker. Failed jobs are retried with
+exponential backoff through a delayed-job sorted set. A per-disease key
+holds the id of the live entry, so a disease is queued at most once.
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from redis import Redis
+from redis import asyncio as aioredis
+from redis.exceptions import ResponseError
+
+QUEUE_PREFIX: str = os.getenv("DOSSIER_QUEUE_PREFIX", "dossier")
+INTERACTIVE_LANE: str = "interactive"
+BULK_LANE: str = "bulk"
+# lanes in priority order
+LANE_STREAMS: Dict[str, str] = {
+    INTERACTIVE_LANE: f"{QUEUE_PREFIX}:jobs:{INTERACTIVE_LANE}",
+    BULK_LANE: f"{QUEUE_PREFIX}:jobs:{BULK_LANE}",
+}
+DELAYED_JOBS: str = f"{QUEUE_PREFIX}:jobs:delayed"
+CONSUMER_GROUP: str = "dossier-builders"
+
+BUILD_JOB: str = "build"
+REGENERATE_JOB: str = "regenerate"
+
+LEASE_TIMEOUT_MS: int = int(os.getenv("DOSSIER_LEASE_TIMEOUT_MS", str(10 * 60 * 1000)))
+HEARTBEAT_INTERVAL: float = float(os.getenv("DOSSIER_HEARTBEAT_INTERVAL", "60"))
+BLOCK_MS: int = int(os.getenv("DOSSIER_QUEUE_BLOCK_MS", "5000"))
+MAX_ATTEMPTS: int = int(os.getenv("DOSSIER_MAX_ATTEMPTS", "5"))
+BACKOFF_BASE: float = float(os.getenv("DOSSIER_BACKOFF_BASE", "30"))
+BACKOFF_MAX: float = float(os.getenv("DOSSIER_BACKOFF_MAX", "1800"))
+# a queued disease is not enqueued again while this key lives
+JOB_KEY_TTL: int = int(os.getenv("DOSSIER_JOB_KEY_TTL", str(24 * 60 * 60)))
+DELAYED_MARKER: str = "delayed"
+
+
+class DossierJob(NamedTuple):
+    message_id: str
+    lane: str
+    disease: str
+    kind: str
+    attempt: int
+
+
+def job_key(disease: str) -> str:
+    return f"{QUEUE_PREFIX}:job:{disease}"
+
+
+def _job_fields(disease: str, kind: str, lane: str, attempt: int = 0) -> Dict[str, str]:
+    return {"disease": disease, "kind": kind, "lane": lane, "attempt": str(attempt)}
+
+
+def enqueue_dossier_job(redis: Redis, disease: str, kind: str = BUILD_JOB, lane: str = INTERACTIVE_LANE) -> bool:
+    """
+    Queue a dossier job (synchronous client, used by the API and the cache management CLI).
+
+    Args:
+        redis (Redis): Redis client.
+        disease (str): Disease id as stored in disease_dossier_status.
+        kind (str): BUILD_JOB or REGENERATE_JOB.
+        lane (str): INTERACTIVE_LANE or BULK_LANE.
+
+    Returns:
+        bool: False when the disease is already queued (an interactive request still
+        promotes a job waiting on the bulk lane).
+    """
+    key = job_key(disease)
+    reserved = redis.set(key, DELAYED_MARKER, nx=True, ex=JOB_KEY_TTL)
+    if not reserved:
+        current = redis.get(key)
+        if lane != INTERACTIVE_LANE or current is None or not current.startswith(f"{BULK_LANE}:"):
+            return False
+    try:
+        message_id = redis.xadd(LANE_STREAMS[lane], _job_fields(disease, kind, lane))
+    except Exception:
+        # without the entry the reservation would block the disease until JOB_KEY_TTL
+        if reserved:
+            redis.delete(key)
+        raise
+    # the worker only runs the entry the key points at, which drops a superseded bulk entry
+    redis.set(key, f"{lane}:{message_id}", ex=JOB_KEY_TTL)
+    return True
+
+
+def get_async_redis() -> aioredis.Redis:
+    """ Asyncio client for the workers, configured like graphrag_service.get_redis """
+    return aioredis.Redis(host=os.getenv("REDIS_HOST", None), port=int(os.getenv("REDIS_PORT", "6379")),
+                          password=os.getenv("REDIS_PASSWORD", None), decode_responses=True)
+
+
+class DossierQueue:
+    """ Worker side of the queue (asyncio Redis client). """
+
+    def __init__(self, redis: aioredis.Redis):
+        self.redis = redis
+
+    async def ensure_groups(self) -> None:
+        for stream in LANE_STREAMS.values():
+            try:
+                await self.redis.xgroup_create(stream, CONSUMER_GROUP, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+
+    async def enqueue(self, disease: str, kind: str = BUILD_JOB, lane: str = INTERACTIVE_LANE,
+                      attempt: int = 0, force: bool = False) -> bool:
+        key = job_key(disease)
+        reserved = False
+        if not force:
+            reserved = await self.redis.set(key, DELAYED_MARKER, nx=True, ex=JOB_KEY_TTL)
+            if not reserved:
+                return False
+        try:
+            message_id = await self.redis.xadd(LANE_STREAMS[lane], _job_fields(disease, kind, lane, attempt))
+        except Exception:
+            if reserved:
+                await self.redis.delete(key)
+            raise
+        await self.redis.set(key, f"{lane}:{message_id}", ex=JOB_KEY_TTL)
+        return True
+
+    async def promote_delayed(self) -> None:
+        """ Move retries whose backoff has elapsed back onto their lane. """
+        due: List[str] = await self.redis.zrangebyscore(DELAYED_JOBS, 0, time.time())
+        for member in due:
+            # only the worker that removes the member re-queues it
+            if await self.redis.zrem(DELAYED_JOBS, member):
+                fields = json.loads(member)
+                await self.enqueue(fields["disease"], fields["kind"], fields["lane"], int(fields["attempt"]), force=True)
+
+    @staticmethod
+    def _to_job(lane: str, message_id: str, fields: Dict[str, str]) -> DossierJob:
+        return DossierJob(message_id, lane, fields["disease"], fields.get("kind", BUILD_JOB),
+                          int(fields.get("attempt", 0)))
+
+    async def next_job(self, consumer: str) -> Optional[DossierJob]:
+        """
+        Return the next job for this consumer: expired leases first, then new entries by lane
+        priority. Blocks up to BLOCK_MS on the interactive lane when everything is empty.
+        """
+        await self.promote_delayed()
+        for lane, stream in LANE_STREAMS.items():
+            claimed = await self.redis.xautoclaim(stream, CONSUMER_GROUP, consumer, LEASE_TIMEOUT_MS,
+                                                  start_id="0-0", count=1)
+            if claimed[1]:
+                message_id, fields = claimed[1][0]
+                if fields:
+                    return self._to_job(lane, message_id, fields)
+                # entry was deleted from the stream while pending
+                await self.redis.xack(stream, CONSUMER_GROUP, message_id)
+
+        for lane, stream in LANE_STREAMS.items():
+            entries = await self.redis.xreadgroup(CONSUMER_GROUP, consumer, {stream: ">"}, count=1)
+            if entries:
+                message_id, fields = entries[0][1][0]
+                return self._to_job(lane, message_id, fields)
+
+        entries = await self.redis.xreadgroup(CONSUMER_GROUP, consumer, {LANE_STREAMS[INTERACTIVE_LANE]: ">"},
+                                              count=1, block=BLOCK_MS)
+        if entries:
+            message_id, fields = entries[0][1][0]
+            return self._to_job(INTERACTIVE_LANE, message_id, fields)
+        return None
+
+    async def is_current(self, job: DossierJob) -> bool:
+        """ False when the entry was superseded (e.g. a bulk job promoted to the interactive lane). """
+        current = await self.redis.get(job_key(job.disease))
+        return current is None or current == f"{job.lane}:{job.message_id}"
+
+    async def heartbeat(self, job: DossierJob, consumer: str) -> None:
+        """ Renew the lease: reset the pending entry's idle time and keep the dedup key alive. """
+        await self.redis.xclaim(LANE_STREAMS[job.lane], CONSUMER_GROUP, consumer, 0, [job.message_id], justid=True)
+        await self.redis.expire(job_key(job.disease), JOB_KEY_TTL)
+
+    async def _release(self, job: DossierJob) -> None:
+        stream = LANE_STREAMS[job.lane]
+        await self.redis.xack(stream, CONSUMER_GROUP, job.message_id)
+        await self.redis.xdel(stream, job.message_id)
+
+    async def ack(self, job: DossierJob) -> None:
+        await self._release(job)
+        if await self.is_current(job):
+            await self.redis.delete(job_key(job.disease))
+
+    async def drop(self, job: DossierJob) -> None:
+        """ Discard a superseded entry without touching the disease's live job. """
+        await self._release(job)
+
+    async def retry(self, job: DossierJob) -> bool:
+        """
+        Schedule the job again after an exponential backoff. Returns False (and clears the
+        job) once MAX_ATTEMPTS is reached.
+        """
+        attempt = job.attempt + 1
+        if attempt >= MAX_ATTEMPTS:
+            await self.ack(job)
+            return False
+        await self._release(job)
+        delay = min(BACKOFF_BASE * (2 ** job.attempt), BACKOFF_MAX)
+        member = json.dumps(_job_fields(job.disease, job.kind, job.lane, attempt), sort_keys=True)
+        await self.redis.zadd(DELAYED_JOBS, {member: time.time() + delay})
+        await self.redis.set(job_key(job.disease), DELAYED_MARKER, ex=JOB_KEY_TTL)
+        return True
@@ -13,6 +13,7 @@ import requests
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from target_analyzer import TargetAnalyzer
+from component_services.nct_study_store import get_nct_study_store, study_sponsor
 
 data_source_groups = {
     "Association Score": ["Overall Association score"],
@@ -772,16 +773,7 @@ def process_and_display_knowndrugs(api_response):
         nct_id = url.split('/')[-1] if 'clinicaltrials.gov' in url else None
         if not nct_id:
             return "URL Invalid or Not Applicable"
-        
-        api_url = f"https://clinicaltrials.gov/api/int/studies/{nct_id}?history=true"
-        try:
-            response = requests.get(api_url)
-            response_data = response.json()
-            sponsor_name = response_data['study']['protocolSection']['identificationModule']['organization']['fullName']
-            return sponsor_name
-        except Exception as e:
-            print(f"Failed to fetch sponsor from {api_url}: {str(e)}")
-            return "Unknown"
+        return study_sponsor(get_nct_study_store().get_study(nct_id))
 
     def get_latest_phase_entries(data):
         temp_entries = {}
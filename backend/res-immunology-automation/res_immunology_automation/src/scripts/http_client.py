@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlparse
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+T = TypeVar("T")
+
+# Per-upstream timeouts (seconds). Hosts not listed here fall back to DEFAULT_TIMEOUT.
+DEFAULT_TIMEOUT: httpx.Timeout = httpx.Timeout(30.0, connect=10.0)
+HOST_TIMEOUTS: Dict[str, httpx.Timeout] = {
+    "api.platform.opentargets.org": httpx.Timeout(60.0, connect=10.0),
+    "eutils.ncbi.nlm.nih.gov": httpx.Timeout(60.0, connect=10.0),
+    "www.ncbi.nlm.nih.gov": httpx.Timeout(30.0, connect=10.0),
+    "clinicaltrials.gov": httpx.Timeout(20.0, connect=5.0),
+    "rest.ensembl.org": httpx.Timeout(20.0, connect=5.0),
+    "rest.uniprot.org": httpx.Timeout(20.0, connect=5.0),
+    "www.ebi.ac.uk": httpx.Timeout(30.0, connect=10.0),
+    "api.opencitations.net": httpx.Timeout(20.0, connect=5.0),
+    "api.semanticscholar.org": httpx.Timeout(20.0, connect=5.0),
+}
+
+# Connection pool sizing shared by every per-host client.
+MAX_CONNECTIONS_PER_HOST: int = 20
+MAX_KEEPALIVE_PER_HOST: int = 10
+KEEPALIVE_EXPIRY: float = 30.0
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _host_of(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """
+    Return the shared keep-alive client for the upstream host of the given URL,
+    creating it on first use.
+
+    Args:
+        url (str): Any URL on the upstream host.
+
+    Returns:
+        httpx.AsyncClient: A client bound to the host's connection pool and timeouts.
+    """
+    host: str = _host_of(url)
+    client: Optional[httpx.AsyncClient] = _clients.get(host)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=MAX_KEEPALIVE_PER_HOST,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            follow_redirects=True,
+        )
+        _clients[host] = client
+    return client
+
+
+async def async_get(url: str, **kwargs: Any) -> httpx.Response:
+    """ GET through the shared client of the URL's host """
+    return await get_async_client(url).get(url, **kwargs)
+
+
+async def async_post(url: str, **kwargs: Any) -> httpx.Response:
+    """ POST through the shared client of the URL's host """
+    return await get_async_client(url).post(url, **kwargs)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a synchronous (requests based) helper in the worker thread pool so it
+    does not block the event loop while it waits on the network.
+    """
+    return await run_in_threadpool(func, *args, **kwargs)
+
+
+async def close_async_clients() -> None:
+    """ Close every pooled client, called on application shutdown. """
+    clients = list(_clients.values())
+    _clients.clear()
+    await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
@@ -33,7 +33,8 @@ class TargetDiseaseAnalyzerApp:
             if not target:
                 display(Markdown('Please enter a target gene name.'))
                 return
-            analyzer = TargetAnalyzer(target)
+            analyzer = TargetAnalyzer.from_cache(target)
+            analyzer.prefetch_target_sections(["description", "tractability", "ontology", "mouse_phenotypes"])
             self.display_all_information(analyzer)
 
     def display_all_information(self, analyzer):
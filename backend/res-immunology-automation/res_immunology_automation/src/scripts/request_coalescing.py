@@ -0,0 +1,305 @@
+"""
+Singleflight coalescing of endpoint computations across uvicorn workers.
+
+`@coalesce_requests(endpoint)` wraps an endpoint whose body checks the file and
+Redis caches, computes on a miss and writes both caches. Calls are keyed by the
+endpoint and its normalized request (strings lowercased, disease lists sorted),
+and only the caller holding the Redis lock `singleflight:lock:<key>` runs the
+body. Everyone else subscribes to `singleflight:done:<key>` and, once the
+holder publishes its outcome, serves the result it left in
+`singleflight:result:<key>`. When the holder failed (or died and its lock
+expired), or left no result, the waiters compete for the lock again, so the
+body only ever runs for one caller at a time. The lock is renewed while the
+body runs, so multi-minute builds keep it. If Redis is unreachable the body
+just runs.
+
+The decorator also implements stale-while-revalidate: the stale cache sections a
+call read (see `cache_freshness`) are returned as they are, and a background
+task re-runs the endpoint in a refresh scope to recompute and swap them in. One
+worker refreshes a request at a time (`revalidate:` locks, which user requests
+never wait on), and calls made inside a refresh, such as cache regeneration,
+coalesce on those locks too.
+"""
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import json
+import os
+import uuid
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from cache_freshness import SectionKey, collect_stale_reads, current_refresh_scope, refresh_scope
+from db.database import get_db
+from dossier_queue import get_async_redis
+
+SINGLEFLIGHT_PREFIX: str = os.getenv("SINGLEFLIGHT_PREFIX", "singleflight")
+# seconds; renewed every third of it while the body runs, so it only bounds how long a crashed holder blocks others
+SINGLEFLIGHT_LOCK_TTL: int = int(os.getenv("SINGLEFLIGHT_LOCK_TTL", "60"))
+# a waiter competes for the lock again after waiting this many seconds without an outcome
+SINGLEFLIGHT_WAIT_TIMEOUT: float = float(os.getenv("SINGLEFLIGHT_WAIT_TIMEOUT", str(30 * 60)))
+# seconds the holder's result is kept for the callers that waited on it
+SINGLEFLIGHT_RESULT_TTL: int = int(os.getenv("SINGLEFLIGHT_RESULT_TTL", "60"))
+
+# prefix of the endpoint part of refresh keys
+REVALIDATE_PREFIX: str = "revalidate:"
+
+DONE: str = "done"
+FAILED: str = "failed"
+RETRY: str = "retry"
+
+# compare-and-delete / compare-and-expire, so a holder never touches a lock it no longer owns
+_RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+_RENEW_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('expire', KEYS[1], ARGV[2]) else return 0 end"
+
+T = TypeVar("T")
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis]" = weakref.WeakKeyDictionary()
+# background refreshes of this process, by singleflight key (also keeps the tasks referenced)
+_revalidations: Dict[str, asyncio.Task] = {}
+
+
+def normalize_entity(value: Any) -> Any:
+    """ Request value -> order and case insensitive form: ['B', 'a '] and ['a', 'b'] are the same entity. """
+    if hasattr(value, "model_dump"):
+        value = value.model_dump()
+    elif hasattr(value, "dict") and callable(value.dict):
+        value = value.dict()
+    if isinstance(value, str):
+        return "_".join(value.strip().lower().split())
+    if isinstance(value, dict):
+        return {name: normalize_entity(field) for name, field in sorted(value.items())}
+    if isinstance(value, (list, tuple, set)):
+        return sorted((normalize_entity(item) for item in value), key=lambda item: json.dumps(item, sort_keys=True))
+    return value
+
+
+def singleflight_key(endpoint: str, entity: Any) -> str:
+    return f"{endpoint}:{json.dumps(normalize_entity(entity), sort_keys=True, separators=(',', ':'))}"
+
+
+def _singleflight_keys(key: str) -> Tuple[str, str, str]:
+    """ (lock, done channel, result) keys of a singleflight key """
+    return f"{SINGLEFLIGHT_PREFIX}:lock:{key}", f"{SINGLEFLIGHT_PREFIX}:done:{key}", f"{SINGLEFLIGHT_PREFIX}:result:{key}"
+
+
+def _redis() -> aioredis.Redis:
+    # asyncio Redis connections belong to the loop that opened them (the API loop, the test client's portal, ...)
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = get_async_redis()
+        _clients[loop] = client
+    return client
+
+
+async def _renew(redis: aioredis.Redis, lock_key: str, token: str) -> None:
+    while True:
+        await asyncio.sleep(SINGLEFLIGHT_LOCK_TTL / 3)
+        try:
+            if not await redis.eval(_RENEW_SCRIPT, 1, lock_key, token, SINGLEFLIGHT_LOCK_TTL):
+                return
+        except RedisError as e:
+            print(f"Could not renew singleflight lock {lock_key}: {e}")
+
+
+async def _share_result(redis: aioredis.Redis, result_key: str, result: Any) -> None:
+    """ Keep the holder's result for its waiters; without it they take turns computing instead """
+    if isinstance(result, Response):
+        return
+    try:
+        await redis.set(result_key, json.dumps(jsonable_encoder(result)), ex=SINGLEFLIGHT_RESULT_TTL)
+    except (RedisError, TypeError, ValueError) as e:
+        print(f"Could not share the result of {result_key}: {e}")
+
+
+async def _shared_result(redis: aioredis.Redis, result_key: str) -> Tuple[bool, Any]:
+    """ (True, result) when the holder left its result, (False, None) otherwise """
+    try:
+        data = await redis.get(result_key)
+    except RedisError as e:
+        print(f"Could not read the result of {result_key}: {e}")
+        return False, None
+    return (True, json.loads(data)) if data is not None else (False, None)
+
+
+async def _lead(redis: aioredis.Redis, lock_key: str, channel: str, result_key: str, token: str,
+                compute: Callable[[], Awaitable[T]]) -> T:
+    renewer = asyncio.create_task(_renew(redis, lock_key, token))
+    outcome = FAILED
+    try:
+        result = await compute()
+        # stored before the waiters are notified
+        await _share_result(redis, result_key, result)
+        outcome = DONE
+        return result
+    finally:
+        renewer.cancel()
+        try:
+            # release before notifying, so woken waiters can take the lock straight away
+            await redis.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+            await redis.publish(channel, outcome)
+        except RedisError as e:
+            print(f"Could not release singleflight lock {lock_key}: {e}")
+
+
+async def _wait(redis: aioredis.Redis, lock_key: str, channel: str, deadline: float) -> Optional[str]:
+    """ Wait for the lock holder's outcome; RETRY when the lock is gone without one, None on timeout. """
+    loop = asyncio.get_running_loop()
+    pubsub = redis.pubsub()
+    try:
+        await pubsub.subscribe(channel)
+        while True:
+            # the holder may have finished before the subscription was in place
+            if not await redis.exists(lock_key):
+                return RETRY
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            message = await pubsub.get_message(ignore_subscribe_messages=True,
+                                               timeout=min(remaining, SINGLEFLIGHT_LOCK_TTL))
+            if message is not None:
+                data = message["data"]
+                return data.decode() if isinstance(data, bytes) else data
+    finally:
+        try:
+            await pubsub.unsubscribe(channel)
+            await (pubsub.aclose() if hasattr(pubsub, "aclose") else pubsub.reset())
+        except RedisError:
+            pass
+
+
+async def run_once(endpoint: str, entity: Any, compute: Callable[[], Awaitable[T]]) -> T:
+    """
+    Run `compute` for (endpoint, entity) at most once at a time across all workers.
+
+    Args:
+        endpoint (str): Endpoint path.
+        entity (Any): The request the endpoint computes for (normalized into the key).
+        compute (Callable[[], Awaitable[T]]): The endpoint body.
+
+    Returns:
+        T: The body's result, or the JSON form of the result another caller computed.
+    """
+    key = singleflight_key(endpoint, entity)
+    lock_key, channel, result_key = _singleflight_keys(key)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + SINGLEFLIGHT_WAIT_TIMEOUT
+    while True:
+        token = uuid.uuid4().hex
+        try:
+            redis = _redis()
+            acquired = await redis.set(lock_key, token, nx=True, ex=SINGLEFLIGHT_LOCK_TTL)
+            if not acquired:
+                outcome = await _wait(redis, lock_key, channel, deadline)
+        except (RedisError, OSError) as e:
+            print(f"Singleflight unavailable for {key}, computing directly: {e}")
+            return await compute()
+
+        if acquired:
+            return await _lead(redis, lock_key, channel, result_key, token, compute)
+        if outcome == DONE:
+            shared, result = await _shared_result(redis, result_key)
+            if shared:
+                print(f"Computation of {key} finished elsewhere, serving its result")
+                return result
+        elif outcome is None:
+            print(f"Still waiting for {key} after {SINGLEFLIGHT_WAIT_TIMEOUT}s, competing for the lock again")
+            deadline = loop.time() + SINGLEFLIGHT_WAIT_TIMEOUT
+        # FAILED, RETRY, timed out or no shared result: compete for the lock again
+
+
+async def run_if_idle(endpoint: str, entity: Any, compute: Callable[[], Awaitable[T]]) -> Optional[T]:
+    """ Run `compute` unless another worker is already running it for (endpoint, entity); None when skipped. """
+    key = singleflight_key(endpoint, entity)
+    lock_key, channel, result_key = _singleflight_keys(key)
+    token = uuid.uuid4().hex
+    try:
+        redis = _redis()
+        if not await redis.set(lock_key, token, nx=True, ex=SINGLEFLIGHT_LOCK_TTL):
+            return None
+    except (RedisError, OSError) as e:
+        print(f"Singleflight unavailable for {key}, computing directly: {e}")
+        return await compute()
+    return await _lead(redis, lock_key, channel, result_key, token, compute)
+
+
+async def _call_with_fresh_session(func: Callable[..., Awaitable[T]], arguments: Dict[str, Any]) -> T:
+    """ Re-run an endpoint after its request ended: the request's DB session is closed by then """
+    arguments = dict(arguments)
+    db = None
+    if "db" in arguments:
+        db = next(get_db())
+        arguments["db"] = db
+    try:
+        return await func(**arguments)
+    finally:
+        if db is not None:
+            db.close()
+
+
+async def _revalidate(endpoint: str, entity: Any, stale: Dict[SectionKey, int],
+                      func: Callable[..., Awaitable[T]], arguments: Dict[str, Any]) -> None:
+    print(f"Refreshing {len(stale)} stale section(s) of {endpoint} in the background")
+    try:
+        with refresh_scope(stale):
+            await run_if_idle(f"{REVALIDATE_PREFIX}{endpoint}", entity,
+                              lambda: _call_with_fresh_session(func, arguments))
+    except Exception as e:
+        print(f"Background refresh of {endpoint} failed, the stale sections stay in place: {e}")
+
+
+def _schedule_revalidation(endpoint: str, entity: Any, stale: Dict[SectionKey, int],
+                           func: Callable[..., Awaitable[T]], arguments: Dict[str, Any]) -> None:
+    key = singleflight_key(endpoint, entity)
+    if key in _revalidations:
+        return
+    # started from an empty context, so the caller's stale reads and scopes do not leak into it
+    task = contextvars.Context().run(asyncio.create_task, _revalidate(endpoint, entity, stale, func, arguments))
+    _revalidations[key] = task
+    task.add_done_callback(lambda _: _revalidations.pop(key, None))
+
+
+async def cancel_revalidations() -> None:
+    """ Cancel this process's background refreshes and wait for them to stop (app shutdown) """
+    tasks = list(_revalidations.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def coalesce_requests(endpoint: str, argument: str = "request") -> Callable:
+    """
+    Decorate an async endpoint so concurrent identical requests share one computation,
+    and the stale cache sections it serves are refreshed in the background.
+
+    Args:
+        endpoint (str): Endpoint path, the first half of the key.
+        argument (str): Name of the parameter holding the request model, the second half of the key.
+    """
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            bound = signature.bind_partial(*args, **kwargs)
+            entity = bound.arguments.get(argument)
+            if current_refresh_scope() is not None:
+                return await run_once(f"{REVALIDATE_PREFIX}{endpoint}", entity, lambda: func(*args, **kwargs))
+
+            with collect_stale_reads() as stale:
+                result = await run_once(endpoint, entity, lambda: func(*args, **kwargs))
+            if stale:
+                _schedule_revalidation(endpoint, entity, stale, func, dict(bound.arguments))
+            return result
+
+        return wrapper
+
+    return decorator
@@ -5,6 +5,7 @@ import requests
 from typing import *
 from utils import fetch_all_publications
 from datetime import datetime
+from component_services.nct_study_store import get_nct_study_store, study_sponsor, study_why_stopped
 
 
 
@@ -366,16 +367,7 @@ def parse_knowndrugs(api_response, disease_list):
         nct_id = url.split('/')[-1] if 'clinicaltrials.gov' in url else None
         if not nct_id:
             return "URL Invalid or Not Applicable"
-
-        api_url = f"https://clinicaltrials.gov/api/int/studies/{nct_id}?history=true"
-        try:
-            response = requests.get(api_url)
-            response_data = response.json()
-            sponsor_name = response_data['study']['protocolSection']['identificationModule']['organization']['fullName']
-            return sponsor_name
-        except Exception as e:
-            print(f"Failed to fetch sponsor from {api_url}: {str(e)}")
-            return "Unknown"
+        return study_sponsor(get_nct_study_store().get_study(nct_id))
         
     def check_drug_approval_status(record: Dict[str, Any]) -> str:
         """
@@ -410,24 +402,7 @@ def parse_knowndrugs(api_response, disease_list):
     
     
     def get_why_stopped(nct_id: str) -> str:
-        api_url = f"https://clinicaltrials.gov/api/int/studies/{nct_id}?history=true"
-
-        try:
-            # Send a GET request to the API
-            response = requests.get(api_url)
-            
-            # Raise an error if the response code is not 200
-            response.raise_for_status()
-            
-            # Parse the JSON response
-            study_data = response.json()
-            
-            # Extract and return the `whyStopped` field
-            return study_data.get("study", {}).get("protocolSection", {}).get("statusModule", {}).get("whyStopped", "")
-        
-        except requests.RequestException as e:
-            print(f"Error fetching data for NCT ID {nct_id}: {e}")
-            return ""
+        return study_why_stopped(get_nct_study_store().get_study(nct_id))
         
     
     def get_latest_phase_entries(data):
@@ -474,6 +449,11 @@ def parse_knowndrugs(api_response, disease_list):
         return combined_list
 
     latest_phase_entries = get_latest_phase_entries(known_drugs['rows'])
+    # download every referenced study once, concurrently, before the per-entry lookups
+    get_nct_study_store().get_studies(
+        url['url'].split('/')[-1] for entry in latest_phase_entries for url in entry['urls'] or []
+        if url['name'] == 'ClinicalTrials'
+    )
     known_drugs_list = []
     for entry in latest_phase_entries:
         drug_id = entry['drug']['id']
@@ -740,16 +720,7 @@ def parse_disease_known_drugs(api_response,disease_exact_synonyms:List[str]):
         }.get(status, -1)
 
     def get_sponsor_name(nct_id):
-        api_url = f"https://clinicaltrials.gov/api/int/studies/{nct_id}?history=true"
-        try:
-            response = requests.get(api_url,timeout=5)
-            response.raise_for_status()
-            response_data = response.json()
-            sponsor_name = response_data['study']['protocolSection']['identificationModule']['organization']['fullName']
-            return sponsor_name
-        except Exception as e:
-            print(f"Failed to fetch sponsor from {api_url}: {str(e)}")
-            return "Unknown"
+        return study_sponsor(get_nct_study_store().get_study(nct_id))
 
 
     def fetch_last_update_date(nct_id: str) -> Optional[str]:
@@ -838,24 +809,7 @@ def parse_disease_known_drugs(api_response,disease_exact_synonyms:List[str]):
         return combined_list
 
     def get_why_stopped(nct_id: str) -> str:
-        api_url = f"https://clinicaltrials.gov/api/int/studies/{nct_id}?history=true"
-
-        try:
-            # Send a GET request to the API
-            response = requests.get(api_url)
-            
-            # Raise an error if the response code is not 200
-            response.raise_for_status()
-            
-            # Parse the JSON response
-            study_data = response.json()
-            
-            # Extract and return the `whyStopped` field
-            return study_data.get("study", {}).get("protocolSection", {}).get("statusModule", {}).get("whyStopped", "")
-        
-        except requests.RequestException as e:
-            print(f"Error fetching data for NCT ID {nct_id}: {e}")
-            return ""
+        return study_why_stopped(get_nct_study_store().get_study(nct_id))
 
     
     def check_drug_approval_status(record: Dict[str, Any], disease_id: str) -> str:
@@ -895,6 +849,11 @@ def parse_disease_known_drugs(api_response,disease_exact_synonyms:List[str]):
             exact_synonyms_row.append(row)
     latest_phase_entries = get_latest_phase_entries(exact_synonyms_row)
     efo_id_disease=api_response['data']['disease']['id']
+    # download every referenced study once, concurrently, before the per-entry lookups
+    get_nct_study_store().get_studies(
+        url['url'].split('/')[-1] for entry in latest_phase_entries for url in entry['urls']
+        if url['name'] == 'ClinicalTrials'
+    )
     known_drugs_list = []
     for entry in latest_phase_entries:
         sponsor = "Unknown"
@@ -10,26 +10,172 @@ from gql_variables import DiseaseAssociationQueryVariables, TargetAssociationQue
     TargetabilityVariables, PublicationVariables,GeneEssentialityMapTargetVariable
 from typing import Dict, List
 import requests
+import copy
 import json
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 import pandas as pd
 from utils import get_efo_id
+from component_services.disease_profile_services import get_disease_ontology_engine
 from typing import *
 
+# Seconds for which resolved target identifiers (ensembl/hgnc/uniprot) are reused by the process
+TARGET_IDS_TTL: int = int(os.getenv("TARGET_IDS_TTL", 24 * 60 * 60))
+
+# target name -> (resolved_at, {"ensembl_id": ..., "hgnc_id": ..., "uniprot_id": ...})
+_target_ids_cache: Dict[str, Tuple[float, Dict[str, Optional[str]]]] = {}
+_target_ids_lock = threading.Lock()
+
+# Seconds a target's prefetched analyzer serves the target-profile endpoints (see `get_target_analyzer`)
+TARGET_SECTIONS_TTL: int = int(os.getenv("TARGET_SECTIONS_TTL", 10 * 60))
+
+# target name -> (prefetched_at, analyzer)
+_target_analyzers: Dict[str, Tuple[float, "TargetAnalyzer"]] = {}
+_target_analyzer_locks: Dict[str, threading.Lock] = {}
+_target_analyzers_lock = threading.Lock()
+
+# Target scoped OpenTargets queries that can be merged into a single request by
+# `TargetAnalyzer.prefetch_target_sections`, keyed by section name.
+TARGET_SECTION_QUERIES: Dict[str, str] = {
+    "description": TargetDescriptionQuery,
+    "ontology": GeneOntologyQuery,
+    "mouse_phenotypes": MousePhenotypesQuery,
+    "tractability": TractabilityQuery,
+    "expression": DifferentialRNAQuery,
+    "gene_map": GeneEssentialityMapTargetQuery,
+}
+
+
+def _target_selection_set(query: str) -> str:
+    """
+    Return the `{ ... }` selection set of the `target(ensemblId: ...)` field of a query.
+    """
+    start = query.index("{", query.index("target(ensemblId:"))
+    depth = 0
+    for index in range(start, len(query)):
+        if query[index] == "{":
+            depth += 1
+        elif query[index] == "}":
+            depth -= 1
+            if depth == 0:
+                return query[start:index + 1]
+    raise ValueError("Unbalanced braces in target query")
+
+
+def _get_cached_target_ids(target: str) -> Optional[Dict[str, Optional[str]]]:
+    with _target_ids_lock:
+        entry = _target_ids_cache.get(target.lower())
+    if entry is None:
+        return None
+    resolved_at, ids = entry
+    if time.time() - resolved_at > TARGET_IDS_TTL:
+        return None
+    return ids
+
 
 class TargetAnalyzer:
     """
     Given a target (gene name), the TargetAnalyzer class provides various functions for easy analysis.
     """
 
-    def __init__(self, target: str):
+    def __init__(self, target: str, use_cached_ids: bool = False):
         self.target = target
-        self.ensembl_id = self.get_ensembl_id(self.target)
-        self.hgnc_id = self.get_hgnc_id(self.target)
         self.otp_base_url = "https://api.platform.opentargets.org/api/v4/graphql"
         self.otg_base_url = "https://api.genetics.opentargets.org/graphql"
-        self.uniprot_id = self.get_uniprotkb_id(self.target)
         self.uniprot_base_url = "https://rest.uniprot.org/uniprotkb/search?&query="
+        # responses fetched ahead of time by prefetch_target_sections, keyed by section name
+        self._sections: Dict[str, Dict] = {}
+        if use_cached_ids:
+            ids = self.resolve_identifiers(self.target)
+            self.ensembl_id = ids["ensembl_id"]
+            self.hgnc_id = ids["hgnc_id"]
+            self.uniprot_id = ids["uniprot_id"]
+        else:
+            self.ensembl_id = self.get_ensembl_id(self.target)
+            self.hgnc_id = self.get_hgnc_id(self.target)
+            self.uniprot_id = self.get_uniprotkb_id(self.target)
+
+    @classmethod
+    def from_cache(cls, target: str) -> "TargetAnalyzer":
+        """
+        Build an analyzer whose identifiers are resolved once per process (see `resolve_identifiers`).
+        """
+        return cls(target, use_cached_ids=True)
+
+    def resolve_identifiers(self, target: str) -> Dict[str, Optional[str]]:
+        """
+        Resolve the Ensembl, HGNC and UniProt ids of a target. The Ensembl and HGNC
+        lookups run concurrently, the UniProt lookup reuses the resolved Ensembl id,
+        and the result is memoized for TARGET_IDS_TTL seconds.
+
+        Args:
+            target (str): The target name (e.g., "PDE4C").
+
+        Returns:
+            Dict[str, Optional[str]]: Mapping with keys ensembl_id, hgnc_id and uniprot_id.
+        """
+        ids = _get_cached_target_ids(target)
+        if ids is not None:
+            return ids
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            ensembl_future = executor.submit(self._lookup_ensembl_id, target)
+            hgnc_future = executor.submit(self.get_hgnc_id, target)
+            ensembl_id = ensembl_future.result()
+            hgnc_id = hgnc_future.result()
+
+        ids = {
+            "ensembl_id": ensembl_id,
+            "hgnc_id": hgnc_id,
+            "uniprot_id": self._lookup_uniprotkb_id(ensembl_id),
+        }
+        # only remember complete resolutions so transient upstream failures are retried
+        if ensembl_id:
+            with _target_ids_lock:
+                _target_ids_cache[target.lower()] = (time.time(), ids)
+        return ids
+
+    def prefetch_target_sections(self, sections: List[str]) -> Dict[str, Dict]:
+        """
+        Fetch several target scoped OpenTargets sections in one combined GraphQL request.
+        The responses are kept on the instance and returned by the matching `get_*`
+        methods (when called without an explicit target).
+
+        Args:
+            sections (List[str]): Keys of TARGET_SECTION_QUERIES.
+
+        Returns:
+            Dict[str, Dict]: Section name -> response shaped like the individual query's response.
+        """
+        if not self.ensembl_id:
+            print("Ensembl ID is None, check get_ensembl_id function.")
+            return {}
+
+        fields = "\n".join(
+            f"  {section}: target(ensemblId: $ensemblId) {_target_selection_set(TARGET_SECTION_QUERIES[section])}"
+            for section in sections
+        )
+        query = f"query TargetSections($ensemblId: String!) {{\n{fields}\n}}"
+
+        r = requests.post(self.otp_base_url, json={"query": query, "variables": {"ensemblId": self.ensembl_id}})
+        api_response = json.loads(r.text)
+        if 'errors' in api_response:
+            print("Error in API response:", api_response['errors'])
+            return {}
+
+        data = api_response.get("data") or {}
+        for section in sections:
+            self._sections[section] = {"data": {"target": data.get(section)}}
+        return {section: self._sections[section] for section in sections}
+
+    def _prefetched(self, section: str, target: Optional[str]) -> Optional[Dict]:
+        if target is not None or section not in self._sections:
+            return None
+        # the analyzer may be shared between requests (get_target_analyzer), callers get their own copy
+        return copy.deepcopy(self._sections[section])
 
     def get_huGE_score(self, phenotype: str, target: str = None) -> float:
         """
@@ -71,10 +217,16 @@ class TargetAnalyzer:
         Get Uniprot id for the given target
         """
         if target is not None:
+            cached_ids = _get_cached_target_ids(target)
+            if cached_ids is not None:
+                return cached_ids["uniprot_id"]
             ensembl_id = self.get_ensembl_id(target)
         else:
             ensembl_id = self.ensembl_id
 
+        return self._lookup_uniprotkb_id(ensembl_id)
+
+    def _lookup_uniprotkb_id(self, ensembl_id: Optional[str]) -> Optional[str]:
         if not ensembl_id:
             print("Ensembl ID is None, check get_ensembl_id function.")
             return None
@@ -100,6 +252,12 @@ class TargetAnalyzer:
         """
         Get the EFO IDs of all the descendants of a given disease.
         """
+        # Resolve from the in-memory ontology first, OLS/OpenTargets only for unknown names
+        ontology = get_disease_ontology_engine()
+        ontology_id = ontology.find_id(disease_name)
+        if ontology_id is not None:
+            return sorted(ontology.descendants(ontology_id))
+
         efo_id = self.get_efo_id(disease_name)
         efo_id = efo_id.replace(":", "_")
         variables = """
@@ -114,6 +272,9 @@ class TargetAnalyzer:
         """
         Get gene map for a given target
         """
+        prefetched = self._prefetched("gene_map", target)
+        if prefetched is not None:
+            return prefetched
         if target is not None:
             ensembl_id = self.get_ensembl_id(target)
         else:
@@ -223,9 +384,15 @@ class TargetAnalyzer:
         Returns:
             Optional[str]: The Ensembl ID with the latest version, or None if not found.
         """
+        cached_ids = _get_cached_target_ids(gene_name)
+        if cached_ids is not None:
+            return cached_ids["ensembl_id"]
+        return self._lookup_ensembl_id(gene_name)
+
+    def _lookup_ensembl_id(self, gene_name: str) -> Optional[str]:
         # Base URLs for Ensembl REST APIs
         base_url_xrefs = f"https://rest.ensembl.org/xrefs/symbol/homo_sapiens/{gene_name}?content-type=application/json"
-        base_url_lookup = "https://rest.ensembl.org/lookup/id/"
+        base_url_lookup = "https://rest.ensembl.org/lookup/id"
 
         try:
             # Fetch Ensembl IDs from the xrefs API
@@ -238,29 +405,31 @@ class TargetAnalyzer:
                 print("No Ensembl IDs found for the given target.")
                 return None
 
-            # Fetch details for each Ensembl ID using the lookup API
+            # Fetch details for all gene Ensembl IDs with a single batch lookup request
             latest_version_id = None
             latest_version = -1  # Initialize with a value lower than any possible version
 
-            for record in ensembl_ids:
-                if record.get("type") == "gene" and "id" in record:
-                    ensembl_id = record["id"]
-                    try:
-                        response_lookup = requests.get(
-                            f"{base_url_lookup}{ensembl_id}?content-type=application/json"
-                        )
-                        response_lookup.raise_for_status()
-                        lookup_data = response_lookup.json()
-
-                        # Extract version and compare to find the latest
-                        version = lookup_data.get("version", -1)
-                        if version > latest_version:
-                            latest_version = version
-                            latest_version_id = ensembl_id
-
-                    except Exception as e:
-                        print(f"Error fetching data for ID {ensembl_id}: {e}")
-                        continue
+            gene_ids = [record["id"] for record in ensembl_ids if record.get("type") == "gene" and "id" in record]
+            lookup_results: Dict[str, Any] = {}
+            if gene_ids:
+                try:
+                    response_lookup = requests.post(
+                        base_url_lookup,
+                        headers={"Content-Type": "application/json", "Accept": "application/json"},
+                        json={"ids": gene_ids}
+                    )
+                    response_lookup.raise_for_status()
+                    lookup_results = response_lookup.json()
+                except Exception as e:
+                    print(f"Error fetching data for IDs {gene_ids}: {e}")
+
+            for ensembl_id in gene_ids:
+                lookup_data = lookup_results.get(ensembl_id) or {}
+                # Extract version and compare to find the latest
+                version = lookup_data.get("version", -1)
+                if version > latest_version:
+                    latest_version = version
+                    latest_version_id = ensembl_id
 
             if latest_version_id:
                 print(f"Ensembl ID with the latest version: {latest_version_id}")
@@ -277,6 +446,9 @@ class TargetAnalyzer:
         """
         Get the HGNC_ID of a gene.
         """
+        cached_ids = _get_cached_target_ids(gene_name)
+        if cached_ids is not None:
+            return cached_ids["hgnc_id"]
         url = f"https://rest.ensembl.org/lookup/symbol/homo_sapiens/{gene_name}?content-type=application/json"
         print(f"Getting HGNC id for {gene_name}...")
         response = requests.get(url)
@@ -358,6 +530,9 @@ class TargetAnalyzer:
         """
         Get gene onotology for a given target
         """
+        prefetched = self._prefetched("ontology", target)
+        if prefetched is not None:
+            return prefetched
         if target is not None:
             ensembl_id = self.get_ensembl_id(target)
         else:
@@ -373,6 +548,9 @@ class TargetAnalyzer:
         """
         Get Description and Target Synonyms for a given target
         """
+        prefetched = self._prefetched("description", target)
+        if prefetched is not None:
+            return prefetched
         if target is not None:
             ensembl_id = self.get_ensembl_id(target)
         else:
@@ -395,6 +573,9 @@ class TargetAnalyzer:
         """
         Get Mouse Phenotypes for a given target
         """
+        prefetched = self._prefetched("mouse_phenotypes", target)
+        if prefetched is not None:
+            return prefetched
         if target is not None:
             ensembl_id = self.get_ensembl_id(target)
         else:
@@ -459,6 +640,9 @@ class TargetAnalyzer:
         """
         Get tractability for a given disease
         """
+        prefetched = self._prefetched("tractability", target)
+        if prefetched is not None:
+            return prefetched
         if target is not None:
             ensembl_id = self.get_ensembl_id(target)
         else:
@@ -545,6 +729,9 @@ class TargetAnalyzer:
         return results
 
     def get_differential_rna_and_protein_expression(self, target: str = None):
+        prefetched = self._prefetched("expression", target)
+        if prefetched is not None:
+            return prefetched
         if target is not None:
             ensembl_id = self.get_ensembl_id(target)
         else:
@@ -687,3 +874,47 @@ class TargetAnalyzer:
         if 'errors' in api_response:
             print("Error in API response:", api_response['errors'])
         return api_response
+
+
+def _fresh_target_analyzer(key: str) -> Optional[TargetAnalyzer]:
+    entry = _target_analyzers.get(key)
+    if entry is None or time.time() - entry[0] > TARGET_SECTIONS_TTL:
+        return None
+    return entry[1]
+
+
+def get_target_analyzer(target: str) -> TargetAnalyzer:
+    """
+    Return the process wide analyzer of a target, with every TARGET_SECTION_QUERIES section
+    prefetched in one combined request, so the target-profile endpoints of a dossier share a
+    single OpenTargets round-trip. The analyzer is rebuilt after TARGET_SECTIONS_TTL seconds.
+
+    Args:
+        target (str): The target name (e.g., "PDE4C").
+
+    Returns:
+        TargetAnalyzer: Analyzer whose section getters answer from the prefetched responses.
+    """
+    key = target.lower()
+    with _target_analyzers_lock:
+        analyzer = _fresh_target_analyzer(key)
+        if analyzer is not None:
+            return analyzer
+        build_lock = _target_analyzer_locks.setdefault(key, threading.Lock())
+
+    # one prefetch per target at a time, concurrent endpoints of the same dossier wait for it
+    with build_lock:
+        with _target_analyzers_lock:
+            analyzer = _fresh_target_analyzer(key)
+        if analyzer is not None:
+            return analyzer
+        analyzer = TargetAnalyzer.from_cache(target)
+        # a failed prefetch is not remembered, the getters query their sections individually
+        if analyzer.prefetch_target_sections(list(TARGET_SECTION_QUERIES)):
+            now = time.time()
+            with _target_analyzers_lock:
+                for stale_key in [name for name, (prefetched_at, _) in _target_analyzers.items()
+                                  if now - prefetched_at > TARGET_SECTIONS_TTL]:
+                    del _target_analyzers[stale_key]
+                _target_analyzers[key] = (now, analyzer)
+        return analyzer
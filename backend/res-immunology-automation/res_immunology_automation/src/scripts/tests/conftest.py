@@ -0,0 +1,7 @@
+import os
+import sys
+
+# the scripts are imported as top-level modules, as the API and the cache scripts run them
+script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if script_dir not in sys.path:
+    sys.path.insert(0, script_dir)
@@ -0,0 +1,140 @@
+import asyncio
+import os
+import time
+
+import pytest
+from redis.exceptions import RedisError
+
+import request_coalescing
+from cache_freshness import collect_stale_reads, refresh_scope
+from cache_store import SectionedCache, read_section, section_file, section_key, section_version, write_section
+from request_coalescing import cancel_revalidations, coalesce_requests
+
+STALE = "/stale/"
+FRESH = "/fresh/"
+DAY = 24 * 60 * 60
+
+
+def _age(path, endpoint, days):
+    file_path = section_file(path, endpoint)
+    mtime = time.time() - days * DAY
+    os.utime(file_path, (mtime, mtime))
+    return section_version(path, endpoint)
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "disease" / "asthma")
+    write_section(path, STALE, {"value": "old"})
+    write_section(path, FRESH, {"value": "current"})
+    _age(path, STALE, 365)
+    return path
+
+
+@pytest.fixture
+def no_redis(monkeypatch):
+    def unavailable():
+        raise RedisError("no redis in tests")
+
+    monkeypatch.setattr(request_coalescing, "_redis", unavailable)
+
+
+def test_stale_section_is_served_and_noted(store):
+    with collect_stale_reads() as stale:
+        cache = SectionedCache(store)
+        assert cache[STALE] == {"value": "old"}
+        assert cache[FRESH] == {"value": "current"}
+
+    assert stale == {section_key(store, STALE): section_version(store, STALE)}
+
+
+def test_refresh_only_bypasses_the_stale_section(store):
+    stale = {section_key(store, STALE): section_version(store, STALE)}
+    with refresh_scope(stale):
+        cache = SectionedCache(store)
+        assert STALE not in cache
+        assert FRESH in cache
+
+        cache[STALE] = {"value": "new"}
+        cache.flush()
+        # once refreshed, the section reads normally again in the same scope
+        assert STALE in SectionedCache(store)
+
+    assert read_section(store, STALE) == {"value": "new"}
+
+
+def test_refresh_does_not_overwrite_a_newer_version(store):
+    stale = {section_key(store, STALE): section_version(store, STALE)}
+    with refresh_scope(stale):
+        # another worker refreshed the section meanwhile
+        with refresh_scope():
+            write_section(store, STALE, {"value": "newer"})
+        write_section(store, STALE, {"value": "late"})
+
+    assert read_section(store, STALE) == {"value": "newer"}
+
+
+def test_regeneration_scope_recomputes_every_section(store):
+    with refresh_scope():
+        cache = SectionedCache(store)
+        assert STALE not in cache
+        assert FRESH not in cache
+
+
+def _endpoint(store, computed):
+    @coalesce_requests(STALE)
+    async def endpoint(request: str):
+        cache = SectionedCache(store)
+        result = {}
+        for section in (STALE, FRESH):
+            if section in cache:
+                result[section] = cache[section]
+            else:
+                computed.append(section)
+                result[section] = cache[section] = {"value": f"recomputed for {request}"}
+        cache.flush()
+        return result
+
+    return endpoint
+
+
+def test_stale_response_is_refreshed_in_the_background(store, no_redis):
+    computed = []
+    endpoint = _endpoint(store, computed)
+
+    async def run():
+        result = await endpoint(request="asthma")
+        assert computed == []
+        await asyncio.gather(*request_coalescing._revalidations.values())
+        return result
+
+    result = asyncio.run(run())
+
+    assert result == {STALE: {"value": "old"}, FRESH: {"value": "current"}}
+    assert computed == [STALE]
+    assert read_section(store, STALE) == {"value": "recomputed for asthma"}
+    assert read_section(store, FRESH) == {"value": "current"}
+    assert not request_coalescing._revalidations
+
+
+def test_shutdown_cancels_background_refreshes(store, no_redis):
+    started = []
+
+    @coalesce_requests(STALE)
+    async def endpoint(request: str):
+        cache = SectionedCache(store)
+        if STALE not in cache:
+            started.append(request)
+            await asyncio.sleep(3600)
+        return cache[STALE]
+
+    async def run():
+        await endpoint(request="asthma")
+        await asyncio.sleep(0)
+        assert started == ["asthma"]
+        await cancel_revalidations()
+
+    asyncio.run(run())
+
+    assert not request_coalescing._revalidations
+    assert read_section(store, STALE) == {"value": "old"}
@@ -0,0 +1,31 @@
+import json
+import os
+
+from cache_store import list_sections, read_all_sections, read_section, restore_store, write_section
+
+
+def test_restore_replaces_the_sharded_store_with_the_backup(tmp_path):
+    path = str(tmp_path / "disease" / "asthma")
+    write_section(path, "/a/", {"value": "current"})
+    write_section(path, "/b/", {"value": "current"})
+    backup_file = tmp_path / "asthma_backup.json"
+    backup_file.write_text(json.dumps({"/a/": {"value": "backup"}}))
+
+    restore_store(path, str(backup_file))
+
+    assert read_all_sections(path) == {"/a/": {"value": "backup"}}
+    # only the restored cache and the entity's lock file are left, no temporary copies
+    assert sorted(os.listdir(tmp_path / "disease")) == ["asthma.json", "asthma.lock"]
+
+
+def test_restored_backup_is_split_into_sections_on_the_next_write(tmp_path):
+    path = str(tmp_path / "disease" / "asthma")
+    backup_file = tmp_path / "asthma_backup.json"
+    backup_file.write_text(json.dumps({"/a/": {"value": "backup"}}))
+    restore_store(path, str(backup_file))
+
+    write_section(path, "/b/", {"value": "new"})
+
+    assert os.path.isdir(path)
+    assert list_sections(path) == {"/a/", "/b/"}
+    assert read_section(path, "/a/") == {"value": "backup"}
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from component_services import outcome_classifier
+from component_services.outcome_classifier import NOT_KNOWN, OutcomeClassifier
+
+
+def _article(pmid: str, conclusion: str) -> str:
+    return (f"<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article><Abstract>"
+            f"<AbstractText Label=\"CONCLUSIONS\">{conclusion}</AbstractText>"
+            f"</Abstract></Article></MedlineCitation></PubmedArticle>")
+
+
+class FakeNcbiClient:
+    def __init__(self):
+        self.efetch_calls = []
+
+    def efetch_pages(self, db, ids, page_size, **params):
+        ids = list(ids)
+        self.efetch_calls.append(ids)
+        for start in range(0, len(ids), page_size):
+            page = ids[start:start + page_size]
+            yield ("<PubmedArticleSet>" + "".join(_article(pmid, f"conclusion {pmid}") for pmid in page)
+                   + "</PubmedArticleSet>").encode()
+
+
+@pytest.fixture
+def ncbi(monkeypatch):
+    client = FakeNcbiClient()
+    monkeypatch.setattr(outcome_classifier, "get_ncbi_client", lambda: client)
+    return client
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+
+    def classify(self, key, conclusion):
+        calls.append((key, conclusion))
+        return "Success"
+
+    monkeypatch.setattr(OutcomeClassifier, "_classify", classify)
+    return calls
+
+
+def test_entries_with_same_pmids_and_disease_are_classified_once(tmp_path, ncbi, llm_calls):
+    classifier = OutcomeClassifier(verdicts_file=str(tmp_path / "verdicts.json"))
+
+    verdicts = classifier.classify([
+        (["2", "1"], "Asthma"),
+        (["1", "2", "1"], " asthma "),
+        (["1", "2"], "eczema"),
+        ([], "asthma"),
+    ])
+
+    assert verdicts == ["Success", "Success", "Success", NOT_KNOWN]
+    assert sorted(key for key, _ in llm_calls) == [(("1", "2"), "asthma"), (("1", "2"), "eczema")]
+    assert dict(llm_calls)[(("1", "2"), "asthma")] == "conclusion 1\n\nconclusion 2"
+
+
+def test_abstracts_are_fetched_in_one_batch(tmp_path, ncbi, llm_calls):
+    classifier = OutcomeClassifier(verdicts_file=str(tmp_path / "verdicts.json"))
+
+    classifier.classify([(["1", "2"], "asthma"), (["2", "3"], "asthma"), (["3"], "eczema")])
+
+    assert ncbi.efetch_calls == [["1", "2", "3"]]
+    assert len(llm_calls) == 3
+
+
+def test_verdicts_on_disk_are_reused(tmp_path, ncbi, llm_calls):
+    verdicts_file = tmp_path / "verdicts.json"
+    verdicts_file.write_text(json.dumps({"asthma|1,2": "Failed"}))
+    classifier = OutcomeClassifier(verdicts_file=str(verdicts_file))
+
+    verdicts = classifier.classify([(["2", "1"], "asthma"), (["3"], "asthma")])
+
+    assert verdicts == ["Failed", "Success"]
+    assert ncbi.efetch_calls == [["3"]]
+    assert [key for key, _ in llm_calls] == [(("3",), "asthma")]
+
+
+def test_saving_keeps_verdicts_written_by_other_processes(tmp_path, ncbi, llm_calls):
+    verdicts_file = tmp_path / "verdicts.json"
+    classifier = OutcomeClassifier(verdicts_file=str(verdicts_file))
+    # another build saved a verdict after this classifier loaded the file
+    verdicts_file.write_text(json.dumps({"eczema|9": "Indeterminate"}))
+
+    classifier.classify([(["1"], "asthma")])
+
+    assert json.loads(verdicts_file.read_text()) == {"asthma|1": "Success", "eczema|9": "Indeterminate"}
+
+
+def test_not_known_verdicts_are_not_persisted(tmp_path, ncbi, monkeypatch):
+    monkeypatch.setattr(OutcomeClassifier, "_classify", lambda self, key, conclusion: NOT_KNOWN)
+    verdicts_file = tmp_path / "verdicts.json"
+    classifier = OutcomeClassifier(verdicts_file=str(verdicts_file))
+
+    assert classifier.classify([(["1"], "asthma")]) == [NOT_KNOWN]
+    assert not verdicts_file.exists()
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from component_services import pmid_nct_index
+from component_services.pmid_nct_index import PmidNctIndexStore
+
+
+def _article(pmid: str, indexed: bool) -> str:
+    mesh = ("<MeshHeadingList><MeshHeading><DescriptorName MajorTopicYN=\"Y\">Asthma</DescriptorName>"
+            "</MeshHeading></MeshHeadingList>") if indexed else ""
+    return (f"<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article><DataBankList><DataBank>"
+            f"<DataBankName>ClinicalTrials.gov</DataBankName>"
+            f"<AccessionNumberList><AccessionNumber>NCT0000000{pmid}</AccessionNumber></AccessionNumberList>"
+            f"</DataBank></DataBankList></Article>{mesh}</MedlineCitation></PubmedArticle>")
+
+
+class FakeNcbiClient:
+    def __init__(self, indexed):
+        self.indexed = indexed
+        self.efetch_calls = []
+
+    def efetch_pages(self, db, ids, page_size, **params):
+        ids = list(ids)
+        self.efetch_calls.append(ids)
+        if ids:
+            yield ("<PubmedArticleSet>" + "".join(_article(pmid, pmid in self.indexed) for pmid in ids)
+                   + "</PubmedArticleSet>").encode()
+
+
+@pytest.fixture
+def ncbi(monkeypatch):
+    client = FakeNcbiClient(indexed={"1"})
+    monkeypatch.setattr(pmid_nct_index, "get_ncbi_client", lambda: client)
+    return client
+
+
+def _refresh(store):
+    return store.index_for("Asthma", lambda disease: ["1", "2"], lambda disease: "Asthma")
+
+
+def test_unindexed_pmids_are_not_refetched_until_recheck(tmp_path, ncbi):
+    store = PmidNctIndexStore(index_dir=str(tmp_path), ttl=0)
+
+    index = _refresh(store)
+    assert index.pmids_for(["NCT00000001", "NCT00000002"]) == ["1", "2"]
+    assert index.pmids_for(["NCT00000001", "NCT00000002"], mesh_major_only=True) == ["1"]
+
+    _refresh(store)
+    assert ncbi.efetch_calls == [["1", "2"], []]
+
+    assert index.missing(recheck=0) == ["2"]
+
+
+def test_index_is_persisted_and_reloaded(tmp_path, ncbi):
+    _refresh(PmidNctIndexStore(index_dir=str(tmp_path), ttl=60))
+    data = json.loads((tmp_path / "asthma.json").read_text())
+    assert data["pmids"] == ["1", "2"]
+    assert data["articles"]["2"]["indexed"] is False
+
+    index = _refresh(PmidNctIndexStore(index_dir=str(tmp_path), ttl=60))
+    assert ncbi.efetch_calls == [["1", "2"]]
+    assert index.pmid_nct_dict() == {"1": ["NCT00000001"], "2": ["NCT00000002"]}
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+import request_coalescing
+from request_coalescing import run_once
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+        self.channels = set()
+
+    async def subscribe(self, channel):
+        self.channels.add(channel)
+        self.redis.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def unsubscribe(self, channel):
+        self.redis.subscribers[channel].remove(self.queue)
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedis:
+    """ The subset of the asyncio client singleflight uses (decoded responses) """
+
+    def __init__(self):
+        self.values = {}
+        self.subscribers = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def exists(self, key):
+        return int(key in self.values)
+
+    async def eval(self, script, numkeys, key, token, *args):
+        if self.values.get(key) != token:
+            return 0
+        if "'del'" in script:
+            del self.values[key]
+        return 1
+
+    async def publish(self, channel, message):
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait({"data": message})
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = FakeRedis()
+    monkeypatch.setattr(request_coalescing, "_redis", lambda: client)
+    return client
+
+
+def test_waiters_serve_the_holders_result(redis):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"disease": "asthma", "rows": [1, 2]}
+
+    async def run():
+        return await asyncio.gather(*(run_once("/endpoint/", {"diseases": ["Asthma"]}, compute) for _ in range(5)))
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert results == [{"disease": "asthma", "rows": [1, 2]}] * 5
+    assert not any(key.startswith("singleflight:lock:") for key in redis.values)
+
+
+def test_waiters_take_turns_when_the_result_is_not_shared(redis):
+    running = []
+    overlapped = []
+
+    async def compute():
+        overlapped.append(bool(running))
+        running.append(1)
+        await asyncio.sleep(0.01)
+        running.pop()
+        return object()  # not JSON serializable, so it is not shared
+
+    async def run():
+        await asyncio.gather(*(run_once("/endpoint/", "asthma", compute) for _ in range(3)))
+
+    asyncio.run(run())
+
+    assert overlapped == [False, False, False]
+
+
+def test_failed_holder_is_retried_by_one_waiter(redis):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("upstream failed")
+        return {"ok": True}
+
+    async def run():
+        return await asyncio.gather(*(run_once("/endpoint/", "asthma", compute) for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert len(calls) == 2
+    assert sum(isinstance(result, RuntimeError) for result in results) == 1
+    assert results.count({"ok": True}) == 2
@@ -18,6 +18,42 @@ import html
 import os
 from component_services.evidence_services import get_network_biology_strapi
 from component_services.market_intelligence_service import get_pmids_for_nct_ids,add_outcome_status,get_indication_pipeline_strapi
+from http_client import async_get, async_post
+from component_services.disease_index import get_disease_index
+from component_services.nct_study_store import get_nct_study_store, study_title
+from cache_store import SectionedCache, write_sections
+import asyncio
+import httpx
+
+OPEN_TARGETS_GRAPHQL_URL: str = "https://api.platform.opentargets.org/api/v4/graphql"
+
+# Search query used to resolve a disease name to its OpenTargets (EFO/MONDO) id
+DISEASE_SEARCH_QUERY: str = """
+    query searchDisease($queryString: String!) {
+      search(queryString: $queryString, entityNames: ["disease"], page: {index: 0, size: 100}) {
+        total
+        hits {
+          id
+          name
+          entity
+          description
+        }
+      }
+    }
+    """
+
+DISEASE_SYNONYMS_QUERY: str = """
+        query diseaseAnnotation {
+          disease(efoId: "%s") {
+            id
+            name
+            synonyms {
+              relation
+              terms
+            }
+          }
+        }
+        """
 
 class CustomJSONEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -109,23 +145,11 @@ def request_open_targets_api(disease_name: str) -> Optional[str]:
     Returns:
         Optional[str]: The EFO ID if found, else None.
     """
-    url: str= "https://api.platform.opentargets.org/api/v4/graphql"
+    url: str= OPEN_TARGETS_GRAPHQL_URL
     headers = {"Content-Type": "application/json"}
     
     # GraphQL query
-    query = """
-    query searchDisease($queryString: String!) {
-      search(queryString: $queryString, entityNames: ["disease"], page: {index: 0, size: 100}) {
-        total
-        hits {
-          id
-          name
-          entity
-          description
-        }
-      }
-    }
-    """
+    query = DISEASE_SEARCH_QUERY
     
     # Variables for the query
     variables = {"queryString": disease_name}
@@ -156,7 +180,54 @@ def request_open_targets_api(disease_name: str) -> Optional[str]:
     return data
 
 def get_efo_id(disease_name: str)-> Optional[str]:
-    open_t_data = request_open_targets_api(disease_name)
+    """
+    Resolve a disease name to its EFO/MONDO id from the local disease index, falling back to
+    the OpenTargets search on a miss and writing the answer back into the index.
+    """
+    disease_index = get_disease_index()
+    efo_id = disease_index.lookup(disease_name)
+    if efo_id:
+        return efo_id
+    efo_id = _efo_id_from_search(request_open_targets_api(disease_name), disease_name)
+    if efo_id:
+        disease_index.remember(disease_name, efo_id)
+    return efo_id
+
+
+async def async_request_open_targets_api(disease_name: str) -> Optional[Dict]:
+    """
+    Non-blocking version of `request_open_targets_api` that uses the shared
+    keep-alive client from `http_client`.
+
+    Args:
+        disease_name (str): Name of the disease to search.
+
+    Returns:
+        Optional[Dict]: The raw search response if the request succeeded, else None.
+    """
+    try:
+        response = await async_post(OPEN_TARGETS_GRAPHQL_URL,
+                                    json={"query": DISEASE_SEARCH_QUERY, "variables": {"queryString": disease_name}})
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        print(f"An error occurred: {e}")
+        return None
+
+
+async def async_get_efo_id(disease_name: str) -> Optional[str]:
+    """ Non-blocking version of `get_efo_id` """
+    disease_index = get_disease_index()
+    efo_id = disease_index.lookup(disease_name)
+    if efo_id:
+        return efo_id
+    efo_id = _efo_id_from_search(await async_request_open_targets_api(disease_name), disease_name)
+    if efo_id:
+        disease_index.remember(disease_name, efo_id)
+    return efo_id
+
+
+def _efo_id_from_search(open_t_data: Optional[Dict], disease_name: str) -> Optional[str]:
     if open_t_data:
         exact_matches = [hit for hit in open_t_data["data"]["search"]["hits"] if hit["name"].lower() == disease_name.lower()]
         if exact_matches:
@@ -211,7 +282,7 @@ def find_disease_id_by_name(jsonl_file: str, disease_name: str) -> Optional[str]
 
 
 def send_graphql_request(query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
-    base_url: str = "https://api.platform.opentargets.org/api/v4/graphql"
+    base_url: str = OPEN_TARGETS_GRAPHQL_URL
     try:
         response = requests.post(
             base_url,
@@ -224,23 +295,39 @@ def send_graphql_request(query: str, variables: Dict[str, Any]) -> Dict[str, Any
     return response.json()
 
 
+async def async_send_graphql_request(query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+    """ Non-blocking version of `send_graphql_request` """
+    try:
+        response = await async_post(OPEN_TARGETS_GRAPHQL_URL, json={'query': query, 'variables': variables})
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=500, detail=f"Error while connecting to the API: {str(e)}")
+
+    return response.json()
+
+
 def save_response_to_file(file_path: str, response: Dict):
-    """ Save response to a file in JSON format """
-    with open(file_path, 'w') as file:
-        json.dump(response, file)
+    """
+    Save endpoint responses into the entity's sharded cache. Only the sections modified
+    since `load_response_from_file` (or every key of a plain dict) are written.
+    """
+    if isinstance(response, SectionedCache):
+        response.flush(file_path)
+    else:
+        write_sections(file_path, response)
 
 
 def save_big_response_to_file(file_path: str, response: Dict):
-    """ Save response to a file in JSON format """
-    with open(file_path, 'w') as file:
-        json.dump(response, file, cls=CustomJSONEncoder)
-        file.flush()
+    """ Save response to the sharded cache, serializing frozensets as lists """
+    if isinstance(response, SectionedCache):
+        response.flush(file_path, encoder=CustomJSONEncoder)
+    else:
+        write_sections(file_path, response, encoder=CustomJSONEncoder)
 
 
-def load_response_from_file(file_path: str) -> Dict:
-    """ Load response from a file in JSON format """
-    with open(file_path, 'r') as file:
-        return json.load(file)
+def load_response_from_file(file_path: str) -> SectionedCache:
+    """ Open the entity's cache; sections are only deserialized when accessed """
+    return SectionedCache(file_path)
 
 
 def add_years(date_str: str, years: int) -> str:
@@ -449,21 +536,10 @@ def get_exact_synonyms(disease_name: str) -> List[str]:
         efo_id: str = get_efo_id(disease_name)
 
         # GraphQL query to fetch disease information
-        query: str = """
-        query diseaseAnnotation {
-          disease(efoId: "%s") {
-            id
-            name
-            synonyms {
-              relation
-              terms
-            }
-          }
-        }
-        """ % efo_id
+        query: str = DISEASE_SYNONYMS_QUERY % efo_id
 
         # OpenTargets API URL
-        api_url: str = "https://api.platform.opentargets.org/api/v4/graphql"
+        api_url: str = OPEN_TARGETS_GRAPHQL_URL
 
         # Make the POST request to the API
         response = requests.post(api_url, json={"query": query})
@@ -474,19 +550,34 @@ def get_exact_synonyms(disease_name: str) -> List[str]:
         # Parse the JSON response
         data: Dict = response.json()
 
-        # Extract synonyms with `hasExactSynonym` relation
-        synonyms = []
-        if data["data"] and data["data"]["disease"] and data["data"]["disease"]["synonyms"]:
-            for synonym_entry in data["data"]["disease"]["synonyms"]:
-                if synonym_entry["relation"] == "hasExactSynonym":
-                    synonyms.extend(synonym_entry["terms"])
-
-        return synonyms+[disease_name]
+        return _exact_synonyms_from_response(data) + [disease_name]
 
     except Exception as e:
         # Print the error message and return an empty list
         print(f"An error occurred: {e}")
         return [disease_name]
+
+
+def _exact_synonyms_from_response(data: Dict) -> List[str]:
+    """ Extract synonyms with `hasExactSynonym` relation from a diseaseAnnotation response """
+    synonyms = []
+    if data["data"] and data["data"]["disease"] and data["data"]["disease"]["synonyms"]:
+        for synonym_entry in data["data"]["disease"]["synonyms"]:
+            if synonym_entry["relation"] == "hasExactSynonym":
+                synonyms.extend(synonym_entry["terms"])
+    return synonyms
+
+
+async def async_get_exact_synonyms(disease_name: str) -> List[str]:
+    """ Non-blocking version of `get_exact_synonyms` """
+    try:
+        efo_id: str = await async_get_efo_id(disease_name)
+        response = await async_post(OPEN_TARGETS_GRAPHQL_URL, json={"query": DISEASE_SYNONYMS_QUERY % efo_id})
+        response.raise_for_status()
+        return _exact_synonyms_from_response(response.json()) + [disease_name]
+    except Exception as e:
+        print(f"An error occurred: {e}")
+        return [disease_name]
     
 
 def get_conver_later_strapi() -> str:
@@ -657,31 +748,33 @@ def fetch_nct_titles(nct_ids: List[str]) -> Dict[str, str]:
     Returns:
         Dict[str, str]: A dictionary mapping NCT IDs to their official titles.
     """
-    base_url = "https://clinicaltrials.gov/api/v2/studies"
+    studies = get_nct_study_store().get_studies(nct_ids)
     nct_to_title: Dict[str, str] = {}
 
     for nct_id in nct_ids:
-        try:
-            # Construct the API URL for the specific NCT ID
-            url = f"{base_url}/{nct_id}"
-            # Make a GET request to the API
-            response = requests.get(url)
-            # Raise an exception if the response status code is not 200
-            response.raise_for_status()
-            # Parse the JSON response
-            data = response.json()
-            
-            # Extract the official title if it exists
-            official_title = data.get("protocolSection", {}).get("identificationModule", {}).get("officialTitle")
-            if official_title:
-                nct_to_title[nct_id] = official_title
-            else:
-                print(f"Title not available for {nct_id}")
-                nct_to_title[nct_id] = ""
-        except Exception as e:
-            # Handle errors (e.g., network issues, invalid NCT ID)
-            print(f"Error fetching title for {nct_id}: {str(e)}")
-            nct_to_title[nct_id] = ""
+        # Extract the official title if it exists (failed downloads map to an empty title)
+        nct_to_title[nct_id] = study_title(studies.get(nct_id))
+        if not nct_to_title[nct_id]:
+            print(f"Title not available for {nct_id}")
 
     return nct_to_title
 
+
+async def async_fetch_nct_titles(nct_ids: List[str]) -> Dict[str, str]:
+    """
+    Non-blocking version of `fetch_nct_titles`. Studies missing from the shared NCT
+    study store are fetched concurrently over the clinicaltrials.gov connection pool.
+
+    Args:
+        nct_ids (List[str]): A list of NCT IDs.
+
+    Returns:
+        Dict[str, str]: A dictionary mapping NCT IDs to their official titles.
+    """
+    studies = await get_nct_study_store().async_get_studies(nct_ids)
+    nct_to_title: Dict[str, str] = {}
+    for nct_id in nct_ids:
+        nct_to_title[nct_id] = study_title(studies.get(nct_id))
+        if not nct_to_title[nct_id]:
+            print(f"Title not available for {nct_id}")
+    return nct_to_title